@@ -0,0 +1,53 @@
+"""Adding publication keywords and SDG analyses
+
+Revision ID: 3b7c1e9d2f40
+Revises: 8e1be5e54d96
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c1e9d2f40'
+down_revision: Union[str, None] = '8e1be5e54d96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('publication_keywords',
+    sa.Column('keywords_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('publication_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['publication_id'], ['publications.publication_id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('keywords_id'),
+    sa.UniqueConstraint('publication_id')
+    )
+    op.create_index(op.f('ix_publication_keywords_keywords_id'), 'publication_keywords', ['keywords_id'], unique=False)
+
+    op.create_table('publication_sdg_analyses',
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('sdg', sa.Integer(), nullable=False),
+    sa.Column('relevance', sa.Text(), nullable=False),
+    sa.Column('reasoning', sa.Text(), nullable=False),
+    sa.Column('publication_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['publication_id'], ['publications.publication_id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('analysis_id'),
+    sa.UniqueConstraint('publication_id', 'sdg', name='uq_publication_sdg_analysis')
+    )
+    op.create_index(op.f('ix_publication_sdg_analyses_analysis_id'), 'publication_sdg_analyses', ['analysis_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_publication_sdg_analyses_analysis_id'), table_name='publication_sdg_analyses')
+    op.drop_table('publication_sdg_analyses')
+    op.drop_index(op.f('ix_publication_keywords_keywords_id'), table_name='publication_keywords')
+    op.drop_table('publication_keywords')
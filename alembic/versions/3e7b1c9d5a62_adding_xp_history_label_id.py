@@ -0,0 +1,39 @@
+"""Adding the rewarded user label to the XP bank histories
+
+Revision ID: 3e7b1c9d5a62
+Revises: 9a4f6b2d8e51
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7b1c9d5a62'
+down_revision: Union[str, None] = '9a4f6b2d8e51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sdg_xp_bank_histories', sa.Column('label_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_sdg_xp_bank_histories_label_id', 'sdg_xp_bank_histories', 'sdg_user_labels', ['label_id'], ['label_id'])
+    op.create_index('ix_sdg_xp_bank_histories_label_id', 'sdg_xp_bank_histories', ['label_id'], unique=False)
+    # Link the labeling rewards given so far (one per user and publication) so the reconciliation does not repeat them
+    op.execute(
+        "UPDATE sdg_xp_bank_histories h "
+        "JOIN (SELECT user_id, publication_id, MIN(label_id) AS label_id FROM sdg_user_labels "
+        "      GROUP BY user_id, publication_id) l "
+        "ON h.xp_bank_id = l.user_id "
+        "AND h.reason = CONCAT('Initial XP reward for SDG labeling of the Publication ', l.publication_id) "
+        "SET h.label_id = l.label_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sdg_xp_bank_histories_label_id', table_name='sdg_xp_bank_histories')
+    op.drop_constraint('fk_sdg_xp_bank_histories_label_id', 'sdg_xp_bank_histories', type_='foreignkey')
+    op.drop_column('sdg_xp_bank_histories', 'label_id')
@@ -0,0 +1,26 @@
+"""Adding decision vote tally
+
+Revision ID: 5d2a8c4e7b13
+Revises: 3b7c1e9d2f40
+Create Date: 2026-10-19 17:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8c4e7b13'
+down_revision: Union[str, None] = '3b7c1e9d2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sdg_label_decisions', sa.Column('vote_tally', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sdg_label_decisions', 'vote_tally')
@@ -0,0 +1,42 @@
+"""Adding SDG label counts and SDG label summary indexes
+
+Revision ID: 9a4f6b2d8e51
+Revises: 5d2a8c4e7b13
+Create Date: 2026-10-19 18:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f6b2d8e51'
+down_revision: Union[str, None] = '5d2a8c4e7b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sdg_label_counts',
+    sa.Column('sdg', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('sdg')
+    )
+    # Seed the counters from the current summaries
+    op.execute(
+        "INSERT INTO sdg_label_counts (sdg, total, updated_at) "
+        + " UNION ALL ".join(
+            f"SELECT {i}, COALESCE(SUM(sdg{i}), 0), CURRENT_TIMESTAMP FROM sdg_label_summaries" for i in range(1, 18)
+        )
+    )
+    for i in range(1, 18):
+        op.create_index(f'ix_sdg_label_summaries_sdg{i}_publication_id', 'sdg_label_summaries', [f'sdg{i}', 'publication_id'], unique=False)
+
+
+def downgrade() -> None:
+    for i in range(1, 18):
+        op.drop_index(f'ix_sdg_label_summaries_sdg{i}_publication_id', table_name='sdg_label_summaries')
+    op.drop_table('sdg_label_counts')
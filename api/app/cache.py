@@ -0,0 +1,90 @@
+import functools
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Callable, List, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import Session
+
+from api.app.routes.authentication import verify_token
+from api.app.serialization import wants_ndjson
+from services.cache_service import get_cache_service
+from settings.settings import CacheServiceSettings
+
+cache_service_settings = CacheServiceSettings()
+
+# Parameters that never contribute to the cache key
+EXCLUDED_KEY_PARAMS = {"db", "token"}
+
+
+def _key_value(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def build_cache_key(namespace: str, params: dict) -> str:
+    """
+    Derive a stable cache key from the route namespace and its path/query/body parameters.
+    """
+    key_params = {
+        name: _key_value(value)
+        for name, value in params.items()
+        if name not in EXCLUDED_KEY_PARAMS and not isinstance(value, (Session, Request))
+    }
+    digest = hashlib.sha1(json.dumps(key_params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{cache_service_settings.CACHE_KEY_PREFIX}:{namespace}:{digest}"
+
+
+def cached(response_model: Any, ttl: int = cache_service_settings.DEFAULT_TTL, tags: Optional[List[str]] = None) -> Callable:
+    """
+    Cache the JSON response of an async route.
+
+    Args:
+        response_model: The route's response model, used to serialize ORM objects and schemas to JSON bytes.
+        ttl (int): Time to live of a cached response in seconds.
+        tags (List[str]): Invalidation tags; may contain route parameters, e.g. "publication:{publication_id}".
+
+    The token is still verified on a cache hit, so cached routes stay protected.
+    """
+    adapter = TypeAdapter(response_model)
+    tags = tags or []
+
+    def decorator(func: Callable) -> Callable:
+        namespace = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = next((value for value in kwargs.values() if isinstance(value, Request)), None)
+            if request is not None and wants_ndjson(request):
+                return await func(*args, **kwargs)  # Streamed responses are never cached
+
+            cache_service = get_cache_service()
+            key = build_cache_key(namespace, kwargs)
+
+            cached_body = cache_service.get(key, namespace=namespace)
+            if cached_body is not None:
+                db, token = kwargs.get("db"), kwargs.get("token")
+                if db is not None and token is not None:
+                    verify_token(token, db)
+                return Response(content=cached_body, media_type="application/json")
+
+            result = await func(*args, **kwargs)
+            route_tags = [tag.format(**kwargs) for tag in tags]
+            if isinstance(result, Response):
+                # Pre-serialized JSON bodies (e.g. bulk ORJSONResponse) are cached as they are; streams pass through
+                if result.media_type == "application/json" and result.status_code == 200 and hasattr(result, "body"):
+                    cache_service.set(key, bytes(result.body), ttl=ttl, tags=route_tags)
+                return result
+
+            body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            cache_service.set(key, body, ttl=ttl, tags=route_tags)
+            return Response(content=body, media_type="application/json")
+
+        return wrapper
+
+    return decorator
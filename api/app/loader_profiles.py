@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import Annotation, Publication, SDGLabelDecision, SDGUserLabel
+
+# Loader profiles: eager-loading option sets matched to the response schemas.
+# Apply them with `query.options(*PROFILE)` so serializing N rows costs a constant number of queries
+# instead of one lazy load per row and relationship. Many-to-one relationships are joined,
+# collections are loaded with one SELECT ... IN per relationship.
+
+# PublicationSchemaBase: authors, faculty, institute, division
+PUBLICATION_BASE = (
+    selectinload(Publication.authors),
+    joinedload(Publication.faculty),
+    joinedload(Publication.institute),
+    joinedload(Publication.division),
+)
+
+# PublicationSchemaFull: adds predictions, dimensionality reductions and the label summary
+PUBLICATION_FULL = PUBLICATION_BASE + (
+    selectinload(Publication.sdg_predictions),
+    selectinload(Publication.dimensionality_reductions),
+    joinedload(Publication.sdg_label_summary),
+)
+
+# AnnotationSchemaBase/Full: votes
+ANNOTATION = (
+    selectinload(Annotation.votes),
+)
+
+# SDGLabelDecisionSchemaBase/Full: annotations with their votes
+SDG_LABEL_DECISION = (
+    selectinload(SDGLabelDecision.annotations).selectinload(Annotation.votes),
+)
+
+# SDGUserLabelSchemaBase/Full: annotations, votes and decisions (each with annotations and votes)
+SDG_USER_LABEL = (
+    selectinload(SDGUserLabel.annotations).selectinload(Annotation.votes),
+    selectinload(SDGUserLabel.votes),
+    selectinload(SDGUserLabel.label_decisions).selectinload(SDGLabelDecision.annotations).selectinload(Annotation.votes),
+)
+
+# User labels of a decision, each loaded with the SDGUserLabel profile
+SDG_LABEL_DECISION_USER_LABELS = (
+    selectinload(SDGLabelDecision.user_labels).options(*SDG_USER_LABEL),
+)
+
+# SDGLabelDecisionSchemaExtended: decision profile plus the full user labels
+SDG_LABEL_DECISION_EXTENDED = SDG_LABEL_DECISION + SDG_LABEL_DECISION_USER_LABELS
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[List[str]]:
+    """
+    Record every SQL statement executed on the engine inside the block.
+
+    Used to assert that a route stays within a fixed query budget, e.g.
+    `with count_queries(engine) as queries: ...; assert len(queries) <= 6`.
+    """
+    queries: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
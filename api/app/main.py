@@ -1,9 +1,10 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi_pagination import add_pagination
+from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes import annotations
 from api.app.routes import authentication
@@ -25,7 +26,14 @@ from api.app.routes import user_profiles_gpt
 from api.app.routes import users
 from api.app.routes import votes
 from api.app.routes import sdg_ranks
-
+from api.app.routes import leaderboards
+from api.app.routes.authentication import verify_token
+from api.app.security import Security
+
+from services.cache_service import get_cache_service
+from services.gpt.llm_response_cache import get_llm_response_cache
+from services.gpt.user_annotation_evaluator_service import get_sdg_semantic_encoder
+from services.reward_evaluation_service import get_reward_evaluation_service
 from settings.settings import FastAPISettings
 fastapi_settings = FastAPISettings()
 
@@ -40,6 +48,22 @@ from db.mongodb_connector import test_mongodb_connection, client as mongo_client
 from db.couchdb_connector import test_couchdb_connection, client as couchdb_client
 from db.qdrantdb_connector import test_qdrant_connection, client as qdrant_client
 from db.redisdb_connector import test_redis_connection, client as redis_client
+from db.mariadb_connector import engine as mariadb_engine
+
+# Setup OAuth2 and security (the cache stats routes are protected like every router)
+security = Security()
+oauth2_scheme = security.oauth2_scheme
+
+# Create a session factory
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=mariadb_engine)
+
+# Dependency for getting DB session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -75,10 +99,26 @@ async def lifespan(app: FastAPI):
     else:
         logging.error("Redis connection failed!")
 
+    # Load the annotation encoder and its SDG description vectors once, before the first evaluation
+    try:
+        get_sdg_semantic_encoder()
+        logging.info("SDG semantic encoder loaded.")
+    except Exception as e:
+        logging.error(f"Failed to load the SDG semantic encoder: {e}")
+
+    # Start the background XP evaluation workers
+    get_reward_evaluation_service().start()
+
     yield  # Allow the application to run
 
     logging.info("Cleaning up resources...")
 
+    try:
+        get_reward_evaluation_service().stop(timeout=5)
+        logging.info("Reward evaluation workers stopped.")
+    except Exception as e:
+        logging.warning(f"Error while stopping reward evaluation workers: {e}")
+
     # Cleanup logic
     try:
         mariadb_conn.close()
@@ -144,6 +184,7 @@ app.include_router(authors.router)
 app.include_router(sdgs.router)
 
 app.include_router(sdg_ranks.router)
+app.include_router(leaderboards.router)
 
 
 # CORS (development only)
@@ -155,6 +196,22 @@ app.add_middleware(
 def read_root():
     return {"message": "Hello, FastAPI!"}
 
+@app.get("/cache/stats")
+def read_cache_stats(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """
+    Hit/miss counters of the response cache, in total and per cached route.
+    """
+    verify_token(token, db)  # Ensure user is authenticated
+    return get_cache_service().stats()
+
+@app.get("/cache/llm/stats")
+def read_llm_cache_stats(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """
+    Hit/miss counters of the LLM response cache and the latency and cost its hits saved.
+    """
+    verify_token(token, db)  # Ensure user is authenticated
+    return get_llm_response_cache().stats()
+
 # Custom OpenAPI schema to include JWT in Swagger UI
 def custom_openapi():
     if app.openapi_schema:
@@ -1,10 +1,11 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import ValidationError
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes.authentication import verify_token
+from api.app.serialization import ANNOTATION, bulk_response
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from models import Annotation
@@ -12,7 +13,7 @@ from request_models.annotations_gpt import AnnotationEvaluationRequest, Annotati
 from schemas import VoteSchemaFull
 from schemas.annotation import AnnotationSchemaFull
 from schemas.gpt_assistant_service import AnnotationEvaluationSchema
-from services.gpt.gpt_assistant_service import GPTAssistantService
+from services.gpt.async_gpt_assistant_service import get_async_gpt_assistant_service
 from services.gpt.user_annotation_evaluator_service import UserAnnotationEvaluatorService
 from settings.settings import AnnotationsSettings
 from utils.logger import logger
@@ -117,11 +118,11 @@ async def evaluate_annotation_score(
         user = verify_token(token, db)  # Authenticate user
 
         # Init here since might be heavy
-        gpt_service = GPTAssistantService()
+        gpt_service = get_async_gpt_assistant_service()
         evaluator_service = UserAnnotationEvaluatorService()
 
         # Get LLM scores from GPT
-        llm_scores = gpt_service.evaluate_annotation(
+        llm_scores = await gpt_service.evaluate_annotation(
             passage=request.passage,
             annotation=request.annotation,
             sdg_label=request.sdg_label,
@@ -227,6 +228,7 @@ async def get_annotation(
     description="Retrieve all annotations"
 )
 async def get_all_annotations(
+        request: Request,
         db: Session = Depends(get_db),
         token: str = Depends(oauth2_scheme),
 ) -> List[AnnotationSchemaFull]:
@@ -236,8 +238,8 @@ async def get_all_annotations(
     try:
         user = verify_token(token, db)  # Ensure user is authenticated
 
-        annotations = db.query(Annotation).all()
-        return [AnnotationSchemaFull.model_validate(annotation) for annotation in annotations]
+        # Column-only bulk path (orjson / NDJSON) instead of per-row model validation
+        return bulk_response(request, db, ANNOTATION)
 
     except Exception as e:
         logging.error(f"Error fetching annotations: {str(e)}")
@@ -4,15 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes.authentication import verify_token
+from api.app.cache import cached
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from models.collection import Collection
 from schemas import CollectionSchemaFull
-from settings.settings import CollectionsRouterSettings
+from settings.settings import CollectionsRouterSettings, CacheServiceSettings
 from utils.logger import logger
 
 # Setup Logging
 collections_router_settings = CollectionsRouterSettings()
+cache_service_settings = CacheServiceSettings()
 logging = logger(collections_router_settings.COLLECTIONS_ROUTER_LOG_NAME)
 
 # Setup OAuth2 and security
@@ -46,6 +48,7 @@ router = APIRouter(
     response_model=List[CollectionSchemaFull],
     description="Get all collections"
 )
+@cached(List[CollectionSchemaFull], ttl=cache_service_settings.COLLECTIONS_TTL, tags=[cache_service_settings.COLLECTIONS_TAG])
 async def get_collections(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
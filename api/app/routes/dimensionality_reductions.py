@@ -2,10 +2,11 @@ from collections import defaultdict
 from typing import List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy import and_, func
-from sqlalchemy.orm import Session, sessionmaker, aliased
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, sessionmaker, aliased, selectinload
 
 from api.app.routes.authentication import verify_token
+from api.app.cache import cached
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from enums.enums import LevelType, ScenarioType
@@ -19,12 +20,14 @@ from schemas.dimensionality_reduction import FilteredDimensionalityReductionStat
     UserCoordinatesSchema, GroupedDimensionalityReductionResponseSchema, GroupedDimensionalityReductionStatisticsSchema, \
     GroupedSDGStatisticsSchema
 from services.umap_coordinates_service import UMAPCoordinateService
-from settings.settings import DimensionalityReductionsRouterSettings, MariaDBSettings
+from services.sdg_label_count_service import SDGLabelCountService
+from settings.settings import DimensionalityReductionsRouterSettings, MariaDBSettings, CacheServiceSettings
 from utils.logger import logger
 
 # Setup Logging
 dimensionality_reductions_router_settings = DimensionalityReductionsRouterSettings()
 mariadb_settings = MariaDBSettings()
+cache_service_settings = CacheServiceSettings()
 logging = logger(dimensionality_reductions_router_settings.DIMENSIONALITYREDUCTIONS_ROUTER_LOG_NAME)
 
 # Setup OAuth2 and security
@@ -201,6 +204,7 @@ async def get_dimensionality_reductions_for_publication(
     response_model=List[DimensionalityReductionSchemaFull],
     description="Retrieve a specific part of dimensionality reductions for a given reduction shorthand."
 )
+@cached(List[DimensionalityReductionSchemaFull], ttl=cache_service_settings.DIMENSIONALITY_REDUCTIONS_TTL, tags=[cache_service_settings.DIMENSIONALITY_REDUCTIONS_TAG])
 async def get_dimensionality_reductions_partitioned(
     reduction_shorthand: str,
     part_number: int,
@@ -337,6 +341,7 @@ async def get_dimensionality_reductions_by_sdg_and_level(
     response_model=List[DimensionalityReductionSchemaFull],
     description="Retrieve Dimensionality Reductions for the top-k SDGs with the highest entropy."
 )
+@cached(List[DimensionalityReductionSchemaFull], ttl=cache_service_settings.MAX_ENTROPY_TTL, tags=[cache_service_settings.SDG_PREDICTIONS_TAG])
 async def get_top_k_entropy_dimensionality_reductions(
         top_k: int,
         db: Session = Depends(get_db),
@@ -378,6 +383,7 @@ async def get_top_k_entropy_dimensionality_reductions(
     response_model=List[DimensionalityReductionSchemaFull],
     description="Retrieve Dimensionality Reductions for the top-k publications associated with the least-labeled SDG."
 )
+@cached(List[DimensionalityReductionSchemaFull], ttl=cache_service_settings.LEAST_LABELED_TTL, tags=[cache_service_settings.SDG_LABEL_SUMMARIES_TAG])
 async def get_least_labeled_dimensionality_reductions(
         top_k: int,
         db: Session = Depends(get_db),
@@ -386,22 +392,15 @@ async def get_least_labeled_dimensionality_reductions(
     try:
         user = verify_token(token, db)
 
-        sdg_counts = (
-            db.query(
-                *[func.sum(getattr(SDGLabelSummary, f"sdg{i}")).label(f"sdg{i}") for i in range(1, 18)]
-            )
-            .first()
-        )
-        least_labeled_sdg = min(
-            (i for i in range(1, 18) if getattr(sdg_counts, f"sdg{i}") is not None),
-            key=lambda i: getattr(sdg_counts, f"sdg{i}"),
-        )
+        # Maintained per-SDG totals instead of aggregating the whole SDGLabelSummary table
+        least_labeled_sdg = SDGLabelCountService(db).least_labeled_sdg()
         logging.info(f"Least labeled SDG is SDG{least_labeled_sdg}.")
 
         publications = (
             db.query(Publication)
             .join(SDGLabelSummary, Publication.publication_id == SDGLabelSummary.publication_id)
             .filter(getattr(SDGLabelSummary, f"sdg{least_labeled_sdg}") == 1)
+            .order_by(SDGLabelSummary.publication_id)
             .limit(top_k)
             .all()
         )
@@ -532,7 +531,10 @@ async def get_filtered_dimensionality_reductions(
 
     for sdg in sdg_list:
         sdg_attr = f"sdg{sdg}"
-        query = db.query(Publication).join(SDGPrediction)
+        query = db.query(Publication).join(SDGPrediction).options(
+            selectinload(Publication.sdg_predictions),
+            selectinload(Publication.dimensionality_reductions),
+        )
 
         if model:
             query = query.filter(
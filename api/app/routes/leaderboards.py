@@ -0,0 +1,169 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.app.routes.authentication import verify_token
+from api.app.security import Security
+from db.mariadb_connector import engine as mariadb_engine
+from schemas.leaderboard import LeaderboardEntrySchema, LeaderboardSchema
+from services.leaderboard_service import (
+    LeaderboardUnavailableError,
+    coins_board_name,
+    get_leaderboard_service,
+    xp_board_name,
+)
+from settings.settings import LeaderboardsRouterSettings, LeaderboardServiceSettings
+from utils.logger import logger
+
+# Setup Logging
+leaderboards_router_settings = LeaderboardsRouterSettings()
+leaderboard_service_settings = LeaderboardServiceSettings()
+logging = logger(leaderboards_router_settings.LEADERBOARDS_ROUTER_LOG_NAME)
+
+# Setup OAuth2 and security
+security = Security()
+oauth2_scheme = security.oauth2_scheme
+
+# Create a session factory
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=mariadb_engine)
+
+# Dependency for getting DB session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Create the API router
+router = APIRouter(
+    prefix="/leaderboards",
+    tags=["Leaderboards"],
+    responses={
+        404: {"description": "Not found"},
+        403: {"description": "Forbidden"},
+        401: {"description": "Unauthorized"},
+    },
+)
+
+
+def _get_page(db: Session, board: str, sdg: Optional[int], offset: int, limit: int) -> LeaderboardSchema:
+    total, entries = get_leaderboard_service().top(db, board, offset=offset, limit=limit)
+    return LeaderboardSchema(
+        board=board,
+        sdg=sdg,
+        total=total,
+        offset=offset,
+        limit=limit,
+        entries=[LeaderboardEntrySchema(rank=rank, user_id=user_id, score=score) for rank, user_id, score in entries],
+    )
+
+
+def _get_rank(db: Session, board: str, user_id: int) -> LeaderboardEntrySchema:
+    result = get_leaderboard_service().rank(db, board, user_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} is not on the leaderboard {board}",
+        )
+    rank, score = result
+    return LeaderboardEntrySchema(rank=rank, user_id=user_id, score=score)
+
+
+@router.get("/xp", response_model=LeaderboardSchema,
+            description="Retrieve a page of the XP leaderboard (total or for a single SDG)")
+async def get_xp_leaderboard(
+    sdg: Optional[int] = Query(None, ge=1, le=17),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(leaderboard_service_settings.DEFAULT_PAGE_SIZE, ge=1, le=leaderboard_service_settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    Retrieve users ordered by XP (descending), read from the materialised leaderboard.
+    """
+    try:
+        verify_token(token, db)  # Ensure user is authenticated
+
+        return _get_page(db, xp_board_name(sdg), sdg, offset, limit)
+
+    except LeaderboardUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching the XP leaderboard: {e}",
+        )
+
+
+@router.get("/xp/users/{user_id}", response_model=LeaderboardEntrySchema,
+            description="Retrieve the position of a user on the XP leaderboard (total or for a single SDG)")
+async def get_user_xp_rank(
+    user_id: int,
+    sdg: Optional[int] = Query(None, ge=1, le=17),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        verify_token(token, db)  # Ensure user is authenticated
+
+        return _get_rank(db, xp_board_name(sdg), user_id)
+
+    except HTTPException:
+        raise
+    except LeaderboardUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching the XP rank: {e}",
+        )
+
+
+@router.get("/coins", response_model=LeaderboardSchema,
+            description="Retrieve a page of the coin leaderboard")
+async def get_coins_leaderboard(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(leaderboard_service_settings.DEFAULT_PAGE_SIZE, ge=1, le=leaderboard_service_settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    Retrieve users ordered by total coins (descending), read from the materialised leaderboard.
+    """
+    try:
+        verify_token(token, db)  # Ensure user is authenticated
+
+        return _get_page(db, coins_board_name(), None, offset, limit)
+
+    except LeaderboardUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching the coin leaderboard: {e}",
+        )
+
+
+@router.get("/coins/users/{user_id}", response_model=LeaderboardEntrySchema,
+            description="Retrieve the position of a user on the coin leaderboard")
+async def get_user_coins_rank(
+    user_id: int,
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        verify_token(token, db)  # Ensure user is authenticated
+
+        return _get_rank(db, coins_board_name(), user_id)
+
+    except HTTPException:
+        raise
+    except LeaderboardUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching the coin rank: {e}",
+        )
@@ -1,12 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlalchemy import paginate as sqlalchemy_paginate
-from sqlalchemy import and_, func
+from sqlalchemy import and_
 from sqlalchemy.orm import Session, sessionmaker, aliased
 
 from api.app.routes.authentication import verify_token
+from api.app.cache import cached
+from api.app.loader_profiles import PUBLICATION_BASE, PUBLICATION_FULL
+from api.app.serialization import PUBLICATION_BASE as PUBLICATION_BASE_BULK, bulk_response
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from db.qdrantdb_connector import client as qdrant_client
@@ -15,16 +18,25 @@ from models import SDGPrediction, SDGLabelDecision, SDGUserLabel, SDGLabelSummar
 from models.publications.dimensionality_reduction import DimensionalityReduction
 from models.publications.publication import Publication
 from request_models.publication import PublicationIdsRequest
-from request_models.publication_similarity_query_service import PublicationSimilarityQueryRequest
+from request_models.publication_similarity_query_service import (
+    PublicationSDGDistributionRequest,
+    PublicationSDGSimilarityRequest,
+    PublicationSimilarityQueryRequest,
+)
 from schemas import PublicationSchemaBase, PublicationSchemaFull
-from schemas.services.publication_similarity_query_service import PublicationSimilaritySchema
+from schemas.services.publication_similarity_query_service import (
+    PublicationSDGSimilaritySchema,
+    PublicationSimilaritySchema,
+)
 from services.publication_similarity_query_service import PublicationSimilarityQueryService
-from settings.settings import PublicationsRouterSettings, MariaDBSettings
+from services.sdg_label_count_service import SDGLabelCountService
+from settings.settings import PublicationsRouterSettings, MariaDBSettings, CacheServiceSettings
 from utils.logger import logger
 
 # Setup Logging
 publications_router_settings = PublicationsRouterSettings()
 mariadb_settings = MariaDBSettings()
+cache_service_settings = CacheServiceSettings()
 logging = logger(publications_router_settings.PUBLICATIONS_ROUTER_LOG_NAME)
 
 # Setup OAuth2 and security
@@ -71,6 +83,7 @@ async def get_publications_by_ids(
         publication_ids = request.publication_ids
 
         publications = (db.query(Publication)
+                        .options(*PUBLICATION_BASE)
                         .filter(Publication.publication_id.in_(publication_ids)).all())
 
         return [PublicationSchemaBase.model_validate(publication) for publication in publications]
@@ -99,7 +112,7 @@ async def get_publications(
         user = verify_token(token, db)  # Ensure user is authenticated
 
         # Base query for fetching publications
-        query = db.query(Publication)
+        query = db.query(Publication).options(*PUBLICATION_BASE)
 
         # Use FastAPI Pagination to fetch paginated data
         paginated_query = sqlalchemy_paginate(query)
@@ -133,6 +146,7 @@ async def get_publication(
 
         # Query to fetch the publication by ID
         publication = (db.query(Publication)
+                       .options(*PUBLICATION_FULL)
                        .filter(Publication.publication_id == publication_id).first())
 
         if not publication:
@@ -176,9 +190,57 @@ async def get_similar_publications(
     return similarity_service.get_similar_publications(
         user_query=request.user_query,
         top_k=top_k,
-        publication_ids=request.publication_ids
+        publication_ids=request.publication_ids,
+        filters=request.filters,
     )
 
+@router.post(
+    "/similar-sdg/{top_k}",
+    response_model=PublicationSDGSimilaritySchema,
+    description="Retrieve the publications whose SDG predictions best match an SDG distribution."
+)
+async def get_publications_by_sdg_distribution(
+    top_k: int,
+    request: PublicationSDGDistributionRequest,
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> PublicationSDGSimilaritySchema:
+    """
+    ANN search over the goal vectors of the prediction model, optionally fused with the similarity to the user query.
+    """
+    # Ensure user is authenticated
+    verify_token(token, db)
+
+    similarity_service = PublicationSimilarityQueryService(qdrant_client, db)
+    return similarity_service.get_publications_by_sdg_distribution(top_k=top_k, request=request)
+
+@router.post(
+    "/{publication_id}/similar-sdg/{top_k}",
+    response_model=PublicationSDGSimilaritySchema,
+    description="Retrieve the publications with an SDG profile similar to the one of a publication."
+)
+async def get_publications_with_similar_sdg_profile(
+    publication_id: int,
+    top_k: int,
+    request: PublicationSDGSimilarityRequest,
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> PublicationSDGSimilaritySchema:
+    """
+    ANN search with the stored goal vector of the publication, optionally fused with its content vector.
+    """
+    # Ensure user is authenticated
+    verify_token(token, db)
+
+    similarity_service = PublicationSimilarityQueryService(qdrant_client, db)
+    result = similarity_service.get_similar_sdg_profile(publication_id=publication_id, top_k=top_k, request=request)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Publication {publication_id} has no {request.prediction_model} SDG vector.",
+        )
+    return result
+
 @router.get(
     "/dimensionality-reductions/sdgs/{sdg}/{reduction_shorthand}/{level}/",
     response_model=List[PublicationSchemaBase],
@@ -202,6 +264,7 @@ async def get_publications_for_dimensionality_reductions(
 
         publications = (
             db.query(Publication)
+            .options(*PUBLICATION_BASE)
             .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
             .join(DimensionalityReduction, Publication.publication_id == DimensionalityReduction.publication_id)
             .filter(
@@ -230,6 +293,7 @@ async def get_publications_for_dimensionality_reductions(
     response_model=List[PublicationSchemaBase],
     description="Retrieve Publications for the top-k SDGs with the highest entropy."
 )
+@cached(List[PublicationSchemaBase], ttl=cache_service_settings.MAX_ENTROPY_TTL, tags=[cache_service_settings.SDG_PREDICTIONS_TAG])
 async def get_top_k_entropy_publications(
         top_k: int,
         db: Session = Depends(get_db),
@@ -253,6 +317,7 @@ async def get_top_k_entropy_publications(
 
         publications = (
             db.query(Publication)
+            .options(*PUBLICATION_BASE)
             .filter(Publication.publication_id.in_([sdg.publication_id for sdg in top_entropy_sdgs]))
             .order_by(Publication.publication_id)
             .all()
@@ -270,6 +335,7 @@ async def get_top_k_entropy_publications(
     response_model=List[PublicationSchemaBase],
     description="Retrieve Publications for the top-k publications associated with the least-labeled SDG."
 )
+@cached(List[PublicationSchemaBase], ttl=cache_service_settings.LEAST_LABELED_TTL, tags=[cache_service_settings.SDG_LABEL_SUMMARIES_TAG])
 async def get_least_labeled_publications(
         top_k: int,
         db: Session = Depends(get_db),
@@ -278,20 +344,13 @@ async def get_least_labeled_publications(
     try:
         user = verify_token(token, db)
 
-        sdg_counts = (
-            db.query(
-                *[func.sum(getattr(SDGLabelSummary, f"sdg{i}")).label(f"sdg{i}") for i in range(1, 18)]
-            )
-            .first()
-        )
-        least_labeled_sdg = min(
-            (i for i in range(1, 18) if getattr(sdg_counts, f"sdg{i}") is not None),
-            key=lambda i: getattr(sdg_counts, f"sdg{i}"),
-        )
+        # Maintained per-SDG totals instead of aggregating the whole SDGLabelSummary table
+        least_labeled_sdg = SDGLabelCountService(db).least_labeled_sdg()
         logging.info(f"Least labeled SDG is SDG{least_labeled_sdg}.")
 
         publications = (
             db.query(Publication)
+            .options(*PUBLICATION_BASE)
             .join(SDGLabelSummary, Publication.publication_id == SDGLabelSummary.publication_id)
             .filter(getattr(SDGLabelSummary, f"sdg{least_labeled_sdg}") == 1)
             .order_by(Publication.publication_id)
@@ -323,6 +382,7 @@ async def get_publications_for_dimensionality_reductions_with_scenario(
 
         publications = (
             db.query(Publication)
+            .options(*PUBLICATION_BASE)
             .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
             .join(DimensionalityReduction, Publication.publication_id == DimensionalityReduction.publication_id)
             .join(SDGLabelDecision, Publication.publication_id == SDGLabelDecision.publication_id)  # New join
@@ -352,10 +412,12 @@ async def get_publications_for_dimensionality_reductions_with_scenario(
     response_model=List[PublicationSchemaBase],
     description="Retrieve the corresponding publications for a specific part of dimensionality reductions."
 )
+@cached(List[PublicationSchemaBase], ttl=cache_service_settings.DIMENSIONALITY_REDUCTIONS_TTL, tags=[cache_service_settings.DIMENSIONALITY_REDUCTIONS_TAG])
 async def get_publications_for_dimensionality_reductions_partitioned(
     reduction_shorthand: str,
     part_number: int,
     total_parts: int,
+    request: Request,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ) -> List[PublicationSchemaBase]:
@@ -419,12 +481,8 @@ async def get_publications_for_dimensionality_reductions_partitioned(
                 detail=f"No publications found for the specified part of dimensionality reductions.",
             )
 
-        # Fetch the corresponding publications
-        publications = db.query(Publication).filter(
-            Publication.publication_id.in_(publication_ids)
-        ).order_by(Publication.publication_id).all()
-        return publications
-        # return [PublicationSchemaFull.model_validate(pub) for pub in publications] # slows it down very hard
+        # Serialize the corresponding publications through the column-only bulk path (orjson / NDJSON)
+        return bulk_response(request, db, PUBLICATION_BASE_BULK, Publication.publication_id.in_(publication_ids))
 
     except HTTPException:
         raise  # Re-raise HTTP exceptions
@@ -440,6 +498,7 @@ async def get_publications_for_dimensionality_reductions_partitioned(
     response_model=List[PublicationSchemaBase],
     description="Retrieve publications associated with a specific scenario type."
 )
+@cached(List[PublicationSchemaBase], ttl=cache_service_settings.SCENARIOS_TTL, tags=[cache_service_settings.SDG_LABEL_DECISIONS_TAG])
 async def get_publications_by_scenario(
     scenario_type: ScenarioType,
     top_k: int,
@@ -454,6 +513,7 @@ async def get_publications_by_scenario(
 
         publications = (
             db.query(Publication)
+            .options(*PUBLICATION_BASE)
             .join(SDGLabelDecision, Publication.publication_id == SDGLabelDecision.publication_id)
             .filter(SDGLabelDecision.scenario_type == scenario_type)
             .order_by(Publication.publication_id)
@@ -498,6 +558,7 @@ async def get_user_labeled_publications(
         # Fetch all publications the user has labeled
         publications = (
             db.query(Publication)
+            .options(*PUBLICATION_BASE)
             .join(SDGUserLabel, Publication.publication_id == SDGUserLabel.publication_id)
             .filter(SDGUserLabel.user_id == user_id)
             .all()
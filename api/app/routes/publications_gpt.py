@@ -1,10 +1,14 @@
+import json
+from typing import Callable, Optional, TypeVar
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes.authentication import verify_token
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
-from models import Fact, Summary
+from models import Fact, PublicationKeywords, PublicationSDGAnalysis, Summary
 from models.publications.publication import Publication
 from request_models.publications_gpt import PublicationIdsRequest
 from schemas import FactSchemaFull
@@ -14,7 +18,7 @@ from schemas.gpt_assistant_service import (
     PublicationSDGAnalysisSchema,
     PublicationKeywordsSchema,
 )
-from services.gpt.gpt_assistant_service import GPTAssistantService
+from services.gpt.async_gpt_assistant_service import get_async_gpt_assistant_service
 from settings.settings import PublicationsRouterSettings
 from utils.logger import logger
 
@@ -48,8 +52,32 @@ router = APIRouter(
     },
 )
 
-# Use the GPT Assistant service for publication-centred operations
-assistant = GPTAssistantService()
+# Use the shared async GPT Assistant service for publication-centred operations
+assistant = get_async_gpt_assistant_service()
+
+Row = TypeVar("Row")
+
+
+def store_generated(db: Session, lookup: Callable[[], Optional[Row]], row: Row) -> Row:
+    """
+    Stores a generated row unless a concurrent request (or the precompute job) stored it while the generation was
+    awaited, and returns the stored one. The transaction of the first lookup is ended first, since its REPEATABLE
+    READ snapshot would not show the other row; a row inserted after the re-check fails the unique constraint and
+    is read back instead.
+    """
+    db.rollback()
+    existing = lookup()
+    if existing:
+        return existing
+
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return lookup()
+    return row
+
 
 @router.get("/{publication_id}/explain/goal/{sdg_id}", response_model=PublicationSDGAnalysisSchema)
 async def explain_publication_sdg_relevance(
@@ -63,8 +91,25 @@ async def explain_publication_sdg_relevance(
     if not publication:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
 
-    sdg_goal_analysis = assistant.analyze_sdg(title=publication.title, abstract=publication.description, goal=str(sdg_id))
-    return {**sdg_goal_analysis.model_dump(), "publication_id": publication_id, "title": publication.title ,"abstract": publication.description}
+    # Precomputed by utils/dataset/precompute_publication_content.py or stored by an earlier request
+    existing_analysis = db.query(PublicationSDGAnalysis).filter(
+        PublicationSDGAnalysis.publication_id == publication_id, PublicationSDGAnalysis.sdg == sdg_id
+    ).first()
+    if not existing_analysis:
+        sdg_goal_analysis = await assistant.analyze_sdg(title=publication.title, abstract=publication.description, goal=str(sdg_id))
+
+        # Concurrent requests share one generation; only the first one to resume stores it
+        existing_analysis = store_generated(
+            db,
+            lambda: db.query(PublicationSDGAnalysis).filter(
+                PublicationSDGAnalysis.publication_id == publication_id, PublicationSDGAnalysis.sdg == sdg_id
+            ).first(),
+            PublicationSDGAnalysis(publication_id=publication_id, sdg=sdg_id,
+                                   relevance=sdg_goal_analysis.relevance, reasoning=sdg_goal_analysis.reasoning),
+        )
+
+    return {"relevance": existing_analysis.relevance, "reasoning": existing_analysis.reasoning,
+            "publication_id": publication_id, "title": publication.title ,"abstract": publication.description}
 
 @router.get("/{publication_id}/explain/target/{target_id}", response_model=PublicationSDGAnalysisSchema)
 async def explain_publication_sdg_target(
@@ -78,7 +123,7 @@ async def explain_publication_sdg_target(
     if not publication:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
 
-    sdg_target_analysis = assistant.analyze_sdg(title=publication.title, abstract=publication.description, target=target_id)
+    sdg_target_analysis = await assistant.analyze_sdg(title=publication.title, abstract=publication.description, target=target_id)
     return {**sdg_target_analysis.model_dump(), "publication_id": publication_id,  "title": publication.title, "abstract": publication.description}
 
 
@@ -93,11 +138,23 @@ async def extract_keywords(
     if not publication:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
 
+    existing_keywords = db.query(PublicationKeywords).filter(PublicationKeywords.publication_id == publication_id).first()
+    if existing_keywords:
+        return PublicationKeywordsSchema(publication_id=publication_id, keywords=existing_keywords.keywords)
+
     if not publication.title and not publication.description:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No content available for keyword extraction")
 
-    keywords = assistant.extract_keywords(title=publication.title, abstract=publication.description)
-    return PublicationKeywordsSchema(publication_id=publication_id, keywords=keywords)
+    keywords = await assistant.extract_keywords(title=publication.title, abstract=publication.description)
+
+    # Concurrent requests share one generation; only the first one to resume stores it
+    stored_keywords = store_generated(
+        db,
+        lambda: db.query(PublicationKeywords).filter(PublicationKeywords.publication_id == publication_id).first(),
+        PublicationKeywords(content=json.dumps(keywords), publication_id=publication_id),
+    )
+
+    return PublicationKeywordsSchema(publication_id=publication_id, keywords=stored_keywords.keywords)
 
 
 @router.get("/{publication_id}/facts", response_model=FactSchemaFull)
@@ -118,14 +175,16 @@ async def create_did_you_know_fact(
     if not publication.title and not publication.description:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No content available for fact generation")
 
-    new_fact_content = assistant.create_fact(title=publication.title, abstract=publication.description)
+    new_fact_content = await assistant.create_fact(title=publication.title, abstract=publication.description)
 
-    new_fact = Fact(content=new_fact_content, publication_id=publication_id)
-    db.add(new_fact)
-    db.commit()
-    db.refresh(new_fact)
+    # Concurrent requests share one generation; only the first one to resume stores it
+    stored_fact = store_generated(
+        db,
+        lambda: db.query(Fact).filter(Fact.publication_id == publication_id).first(),
+        Fact(content=new_fact_content, publication_id=publication_id),
+    )
 
-    return FactSchemaFull.model_validate(new_fact)
+    return FactSchemaFull.model_validate(stored_fact)
 
 
 @router.get("/{publication_id}/summary", response_model=PublicationSummarySchema)
@@ -146,14 +205,16 @@ async def create_or_get_publication_summary(
     if not publication.title and not publication.description:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No content available for summary generation")
 
-    new_summary_content = assistant.summarize_publication(title=publication.title, abstract=publication.description)
+    new_summary_content = await assistant.summarize_publication(title=publication.title, abstract=publication.description)
 
-    new_summary = Summary(content=new_summary_content, publication_id=publication_id)
-    db.add(new_summary)
-    db.commit()
-    db.refresh(new_summary)
+    # Concurrent requests share one generation; only the first one to resume stores it
+    stored_summary = store_generated(
+        db,
+        lambda: db.query(Summary).filter(Summary.publication_id == publication_id).first(),
+        Summary(content=new_summary_content, publication_id=publication_id),
+    )
 
-    return PublicationSummarySchema(publication_id=publication_id, summary=new_summary_content)
+    return PublicationSummarySchema(publication_id=publication_id, summary=stored_summary.content)
 
 
 @router.post("/collective-summaries", response_model=PublicationsCollectiveSummarySchema)
@@ -174,7 +235,7 @@ async def create_collective_summary(
         for pub in publications
     ]
 
-    collective_summary_response = assistant.summarize_publications(publications=publication_data)
+    collective_summary_response = await assistant.summarize_publications(publications=publication_data)
 
     collective_summary = PublicationsCollectiveSummarySchema(
         publication_ids=publication_ids,
@@ -10,6 +10,7 @@ from models import SDGCoinWallet, SDGCoinWalletHistory
 from request_models.sdg_coin_wallet import WalletIncrementRequest
 from schemas.sdg_coin_wallet import SDGCoinWalletSchemaFull
 from schemas.sdg_coin_wallet_history import SDGCoinWalletHistorySchemaFull, NoSDGCoinWalletHistorySchemaBase
+from services.leaderboard_service import get_leaderboard_service
 from settings.settings import CoinWalletsRouterSettings
 from utils.logger import logger
 
@@ -171,6 +172,9 @@ async def add_wallet_increment(
         db.commit()
         db.refresh(new_history)
 
+        # Keep the coin leaderboard in step with the committed wallet
+        get_leaderboard_service().add_coins(user_id, wallet_increment_data.increment)
+
         return SDGCoinWalletHistorySchemaFull.model_validate(new_history)
 
     except Exception as e:
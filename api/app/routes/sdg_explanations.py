@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pymongo.synchronous.database import Database
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -8,6 +10,7 @@ from db.mariadb_connector import engine as mariadb_engine
 from db.mongodb_connector import get_explanations_db
 from models.publications.publication import Publication
 from schemas.sdg_explanations import ExplanationSchema
+from services.explanation_service import ExplanationService
 from settings.settings import ExplanationsRouterSettings, MongoDBSDGSettings
 from utils.logger import logger
 
@@ -43,6 +46,40 @@ router = APIRouter(
     },
 )
 
+@router.get(
+    "/publications",
+    response_model=List[ExplanationSchema],
+    description="Get the SHAP explanations of many publications"
+)
+async def get_sdg_explanations(
+    publication_ids: List[int] = Query(..., alias="publication_id", description="e.g. ?publication_id=1&publication_id=2"),
+    db: Session = Depends(get_db),
+    mongo_db: Database = Depends(get_explanations_db),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Fetch the SHAP explanations of many publications with one publications query and one MongoDB $in query.
+    Publications without an explanation are left out.
+    """
+
+    user = verify_token(token, db) # Ensure user is authenticated
+
+    if len(publication_ids) > explanations_router_settings.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {explanations_router_settings.MAX_BATCH_SIZE} publications per request.")
+
+    oai_identifiers = dict(
+        db.query(Publication.publication_id, Publication.oai_identifier)
+        .filter(Publication.publication_id.in_(publication_ids))
+        .all()
+    )
+    # Keep the requested order
+    requested = {oai_identifiers[publication_id]: publication_id for publication_id in publication_ids
+                 if publication_id in oai_identifiers}
+
+    return ExplanationService(mongo_db[mongo_db_settings.DB_COLLECTION_NAME]).get_many(requested)
+
+
 @router.get(
     "/publications/{publication_id}",
     response_model=ExplanationSchema,
@@ -61,23 +98,15 @@ async def get_sdg_explanation(
     user = verify_token(token, db) # Ensure user is authenticated
 
     # Query publications table
-    publication = db.query(Publication).filter(Publication.publication_id == publication_id).first()
-    if not publication:
+    oai_identifier = db.query(Publication.oai_identifier).filter(Publication.publication_id == publication_id).scalar()
+    if not oai_identifier:
         raise HTTPException(status_code=404, detail="Publication not found in the database.")
 
-    # Use the oai_identifier to query the MongoDB explanations collection
-    oai_identifier = publication.oai_identifier
+    # Use the oai_identifier to query the MongoDB explanations collection (unique index on "id", created by
+    # utils/mongodb/load_mongodb_explanations.py)
     explanations_collection = mongo_db[mongo_db_settings.DB_COLLECTION_NAME]
-    explanation = explanations_collection.find_one({"id": oai_identifier})
-    explanation["mongodb_id"] = str(explanation.pop("_id"))
-    explanation["oai_identifier"] = oai_identifier
-    explanation["sql_id"] = publication_id
-
-    # Lifesaver for index creation, can also be done in Mongodb directly
-    #indexes = explanations_collection.index_information()
-    #explanations_collection.create_index("id", unique=True)
-
+    explanation = ExplanationService(explanations_collection).get(oai_identifier, publication_id)
     if not explanation:
         raise HTTPException(status_code=404, detail="Explanation not found for the given publication.")
 
-    return ExplanationSchema.model_validate(explanation)
+    return explanation
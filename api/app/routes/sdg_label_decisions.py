@@ -1,17 +1,19 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, sessionmaker, joinedload
+from sqlalchemy.orm import Session, sessionmaker
 
+from api.app.loader_profiles import SDG_LABEL_DECISION, SDG_LABEL_DECISION_EXTENDED
 from api.app.routes.authentication import verify_token
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
-from enums.enums import ScenarioType, LevelType, DecisionType
-from models import SDGLabelDecision, SDGPrediction, SDGLabelSummary, SDGLabelHistory, Annotation, SDGUserLabel
+from enums.enums import ScenarioType, LevelType
+from models import SDGLabelDecision, SDGPrediction, SDGLabelSummary, Annotation, SDGUserLabel
 from models.publications.dimensionality_reduction import DimensionalityReduction
 from models.publications.publication import Publication
 from schemas import SDGLabelDecisionSchemaFull, SDGLabelDecisionSchemaExtended
+from services.decision_provisioning_service import DecisionProvisioningService
+from services.sdg_label_count_service import SDGLabelCountService
 from settings.settings import SDGSLabelDecisionsRouterSettings
 from utils.logger import logger
 
@@ -50,7 +52,7 @@ router = APIRouter(
     response_model=List[SDGLabelDecisionSchemaFull],
     description="Retrieve SDG Label Decisions for the top-k publications associated with the least-labeled SDG. If no decision exists, create a new one."
 )
-async def get_or_create_least_labeled_sdg_decisions(
+def get_or_create_least_labeled_sdg_decisions(
     top_k: int,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
@@ -63,104 +65,31 @@ async def get_or_create_least_labeled_sdg_decisions(
     try:
         user = verify_token(token, db)
 
-        # Count occurrences of SDG labels in SDGLabelSummary
-        sdg_counts = (
-            db.query(
-                *[func.sum(getattr(SDGLabelSummary, f"sdg{i}")).label(f"sdg{i}") for i in range(1, 18)]
-            )
-            .first()
-        )
-
-        # Find the SDG with the least labels
-        least_labeled_sdg = min(
-            (i for i in range(1, 18) if getattr(sdg_counts, f"sdg{i}") is not None),
-            key=lambda i: getattr(sdg_counts, f"sdg{i}"),
-        )
+        # Find the SDG with the least labels (maintained per-SDG totals)
+        least_labeled_sdg = SDGLabelCountService(db).least_labeled_sdg()
 
         logging.info(f"Least labeled SDG is SDG{least_labeled_sdg}.")
 
         # Fetch the top-k publications related to the least labeled SDG
-        publications = (
-            db.query(Publication)
-            .join(SDGLabelSummary, Publication.publication_id == SDGLabelSummary.publication_id)
+        publication_ids = [
+            publication_id for (publication_id,) in
+            db.query(SDGLabelSummary.publication_id)
             .filter(
                 getattr(SDGLabelSummary, f"sdg{least_labeled_sdg}") == 1  # Filter by least labeled SDG
             )
+            .order_by(SDGLabelSummary.publication_id)
             .limit(top_k)  # Limit to top-k publications
-            .all()
-        )
+        ]
 
-        decisions_list = []
-
-        for publication in publications:
-            sdg_label_summary = publication.sdg_label_summary
-
-            # Check if SDGLabelHistory exists
-            history = db.query(SDGLabelHistory).filter(
-                SDGLabelHistory.history_id == sdg_label_summary.history_id
-            ).first()
-
-            # If no history exists, create a new one
-            if not history:
-                logging.info(f"No SDGLabelHistory found for publication {publication.publication_id}, creating a new history.")
-
-                new_history = SDGLabelHistory(active=True)
-                db.add(new_history)
-                db.flush()  # Flush to get the new history_id
-
-                # Link the SDGLabelSummary to the new history
-                sdg_label_summary.history_id = new_history.history_id
-                db.commit()
-                db.refresh(new_history)
-
-                history = new_history  # Assign the newly created history
-                logging.info(f"Created new SDGLabelHistory (ID: {history.history_id}) for publication {publication.publication_id}.")
-
-            # Filter out decisions that have scenario_type == DECIDED
-            existing_decisions = [
-                decision for decision in history.decisions if decision.scenario_type != ScenarioType.DECIDED
-            ]
-
-            if not existing_decisions:
-                logging.info(f"No valid SDGLabelDecisions found for publication {publication.publication_id}, creating a new decision.")
-
-                # Fetch the best SDG prediction from the 'Aurora' model
-                prediction = (
-                    db.query(SDGPrediction)
-                    .filter(SDGPrediction.publication_id == publication.publication_id, SDGPrediction.prediction_model == "Aurora")
-                    .first()
-                )
-
-                suggested_label: int = 0  # Default if no prediction is found
-
-                if prediction:
-                    highest_sdg_key, highest_sdg_number, highest_sdg_value = prediction.get_highest_sdg()
-                    logging.info(
-                        f"Highest SDG prediction: {highest_sdg_key} ({highest_sdg_number}), Value: {highest_sdg_value}."
-                    )
-                    suggested_label = highest_sdg_number  # Use extracted integer SDG number
-
-                # Create a new SDGLabelDecision
-                new_decision = SDGLabelDecision(
-                    history_id=history.history_id,
-                    publication_id=publication.publication_id,
-                    suggested_label=suggested_label,
-                    decided_label=0,  # Default: not decided
-                    decision_type=DecisionType.CONSENSUS_MAJORITY,
-                    scenario_type=ScenarioType.NOT_ENOUGH_VOTES,
-                    expert_id=None,
-                    comment=None,
-                )
-                db.add(new_decision)
-                db.commit()
-                db.refresh(new_decision)
-
-                logging.info(f"Created new SDGLabelDecision for publication {publication.publication_id}.")
-                decisions_list.append(SDGLabelDecisionSchemaFull.model_validate(new_decision))
-            else:
-                decisions_list.extend([SDGLabelDecisionSchemaFull.model_validate(decision) for decision in existing_decisions])
-
-        return decisions_list
+        # Open decisions (scenario_type != DECIDED) per publication, created in bulk where there is none
+        decisions = DecisionProvisioningService(db).provision(
+            publication_ids, open_only=True, loader_options=SDG_LABEL_DECISION
+        )
+        return [
+            SDGLabelDecisionSchemaFull.model_validate(decision)
+            for publication_id in publication_ids
+            for decision in decisions.get(publication_id, [])
+        ]
 
     except HTTPException:
         raise
@@ -173,7 +102,7 @@ async def get_or_create_least_labeled_sdg_decisions(
     response_model=List[SDGLabelDecisionSchemaFull],
     description="Retrieve SDG Label Decisions for the top-k SDGs with the highest entropy. If no decision exists, create a new one."
 )
-async def get_or_create_top_k_entropy_sdg_decisions(
+def get_or_create_top_k_entropy_sdg_decisions(
     top_k: int,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
@@ -186,95 +115,26 @@ async def get_or_create_top_k_entropy_sdg_decisions(
         user = verify_token(token, db)
 
         # Find the top-k SDGs with the highest entropy
-        top_entropy_sdgs = (
-            db.query(SDGPrediction)
+        publication_ids = [
+            publication_id for (publication_id,) in
+            db.query(SDGPrediction.publication_id)
             .order_by(SDGPrediction.entropy.desc())
             .filter(
                 SDGPrediction.prediction_model == "Aurora",
             )
             .limit(top_k)
-            .all()
-        )
+        ]
 
-        if not top_entropy_sdgs:
+        if not publication_ids:
             raise HTTPException(status_code=404, detail="No SDG predictions found.")
 
-        decisions_list = []
-
-        for max_entropy_sdg in top_entropy_sdgs:
-            publication_id = max_entropy_sdg.publication_id
-            logging.info(f"Processing SDG with highest entropy for publication {publication_id}.")
-
-            # Fetch the corresponding publication
-            publication = db.query(Publication).filter(Publication.publication_id == publication_id).first()
-
-            if not publication:
-                raise HTTPException(status_code=404, detail=f"Publication with ID {publication_id} not found.")
-
-            sdg_label_summary = publication.sdg_label_summary
-
-            # Check if SDGLabelHistory exists
-            history = db.query(SDGLabelHistory).filter(
-                SDGLabelHistory.history_id == sdg_label_summary.history_id
-            ).first()
-
-            # If no history exists, create a new one
-            if not history:
-                logging.info(f"No SDGLabelHistory found for publication {publication.publication_id}, creating a new history.")
-
-                new_history = SDGLabelHistory(active=True)
-                db.add(new_history)
-                db.flush()  # Flush to get the new history_id
-
-                # Link the SDGLabelSummary to the new history
-                sdg_label_summary.history_id = new_history.history_id
-                db.commit()
-                db.refresh(new_history)
-
-                history = new_history  # Assign the newly created history
-                logging.info(f"Created new SDGLabelHistory (ID: {history.history_id}) for publication {publication.publication_id}.")
-
-            # Check for existing decisions
-            if not history.decisions:
-                logging.info(f"No SDGLabelDecisions found for publication {publication.publication_id}, creating a new decision.")
-
-                # Fetch the best SDG prediction from the 'Aurora' model
-                prediction = (
-                    db.query(SDGPrediction)
-                    .filter(SDGPrediction.publication_id == publication.publication_id, SDGPrediction.prediction_model == "Aurora")
-                    .first()
-                )
-
-                suggested_label: int = 0  # Default if no prediction is found
-
-                if prediction:
-                    highest_sdg_key, highest_sdg_number, highest_sdg_value = prediction.get_highest_sdg()
-                    logging.info(
-                        f"Highest SDG prediction: {highest_sdg_key} ({highest_sdg_number}), Value: {highest_sdg_value}."
-                    )
-                    suggested_label = highest_sdg_number  # Use extracted integer SDG number
-
-                # Create a new SDGLabelDecision
-                new_decision = SDGLabelDecision(
-                    history_id=history.history_id,
-                    publication_id=publication.publication_id,
-                    suggested_label=suggested_label,
-                    decided_label=0,  # Default: not decided
-                    decision_type=DecisionType.CONSENSUS_MAJORITY,
-                    scenario_type=ScenarioType.NOT_ENOUGH_VOTES,
-                    expert_id=None,
-                    comment=None,
-                )
-                db.add(new_decision)
-                db.commit()
-                db.refresh(new_decision)
-
-                logging.info(f"Created new SDGLabelDecision for publication {publication.publication_id}.")
-                decisions_list.append(SDGLabelDecisionSchemaFull.model_validate(new_decision))
-            else:
-                decisions_list.extend([SDGLabelDecisionSchemaFull.model_validate(decision) for decision in history.decisions])
-
-        return decisions_list
+        # All decisions per publication, created in bulk where there is none
+        decisions = DecisionProvisioningService(db).provision(publication_ids, loader_options=SDG_LABEL_DECISION)
+        return [
+            SDGLabelDecisionSchemaFull.model_validate(decision)
+            for publication_id in publication_ids
+            for decision in decisions.get(publication_id, [])
+        ]
 
     except HTTPException:
         raise
@@ -303,6 +163,7 @@ async def get_sdg_label_decisions_for_scenario(
 
         decisions = (
             db.query(SDGLabelDecision)
+            .options(*SDG_LABEL_DECISION)
             .join(SDGLabelSummary, SDGLabelDecision.history_id == SDGLabelSummary.history_id)
             .join(Publication, SDGLabelSummary.publication_id == Publication.publication_id)
             .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
@@ -345,6 +206,7 @@ async def get_sdg_label_decisions_for_scenario(
 
         decisions = (
             db.query(SDGLabelDecision)
+            .options(*SDG_LABEL_DECISION)
             .join(SDGLabelSummary, SDGLabelDecision.history_id == SDGLabelSummary.history_id)
             .join(Publication, SDGLabelSummary.publication_id == Publication.publication_id)
             .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
@@ -413,10 +275,7 @@ async def get_newest_sdg_label_decisions_for_reduction(
                 SDGLabelSummary.publication_id.in_(publication_ids),
                 SDGLabelDecision.decided_label == 0
             )
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
@@ -435,7 +294,7 @@ async def get_newest_sdg_label_decisions_for_reduction(
     response_model=List[SDGLabelDecisionSchemaFull],
     description="Retrieve all SDGLabelDecision entries associated with a publication's SDGLabelHistory"
 )
-async def get_sdg_label_decisions(
+def get_sdg_label_decisions(
     publication_id: int,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
@@ -456,71 +315,11 @@ async def get_sdg_label_decisions(
                 detail=f"Publication with ID {publication_id} not found",
             )
 
-        # Get SDGLabelSummary (we know every publication has one)
-        sdg_label_summary = publication.sdg_label_summary
-
-        # Check if SDGLabelHistory exists
-        history = db.query(SDGLabelHistory).filter(
-            SDGLabelHistory.history_id == sdg_label_summary.history_id
-        ).first()
-
-        # If no history exists, create a new one
-        if not history:
-            logging.info(f"No SDGLabelHistory found for publication {publication_id}, creating a new history.")
-
-            new_history = SDGLabelHistory(active=True)
-            db.add(new_history)
-            db.flush()  # Flush to get the new history_id
-
-            # Link the SDGLabelSummary to the new history
-            sdg_label_summary.history_id = new_history.history_id
-            db.commit()
-            db.refresh(new_history)
-
-            history = new_history  # Assign the newly created history
-            logging.info(f"Created new SDGLabelHistory (ID: {history.history_id}) for publication {publication_id}.")
-
         # If TODO: decisions exists, return the first newest one
 
-        # Check for existing decisions
-        if not history.decisions:
-            logging.info(f"No SDGLabelDecisions found for publication {publication_id}, creating a new decision.")
-
-            # Fetch the best SDG prediction from the 'Aurora' model
-            prediction = (
-                db.query(SDGPrediction)
-                .filter(SDGPrediction.publication_id == publication_id, SDGPrediction.prediction_model == "Aurora")
-                .first()
-            )
-
-            suggested_label: int = 0  # Default if no prediction is found
-
-            if prediction:
-                highest_sdg_key, highest_sdg_number, highest_sdg_value = prediction.get_highest_sdg()
-                logging.info(
-                    f"Highest SDG prediction: {highest_sdg_key} ({highest_sdg_number}), Value: {highest_sdg_value}."
-                )
-                suggested_label = highest_sdg_number  # Use extracted integer SDG number
-
-            # Create a new SDGLabelDecision
-            new_decision = SDGLabelDecision(
-                history_id=history.history_id,
-                publication_id=publication_id,
-                suggested_label=suggested_label,
-                decided_label=0,  # Default: not decided
-                decision_type=DecisionType.CONSENSUS_MAJORITY,
-                scenario_type=ScenarioType.NOT_ENOUGH_VOTES,
-                expert_id=None,
-                comment=None,
-            )
-            db.add(new_decision)
-            db.commit()
-            db.refresh(new_decision)
-
-            logging.info(f"Created new SDGLabelDecision for publication {publication_id}.")
-            return [SDGLabelDecisionSchemaFull.model_validate(new_decision)]
-
-        return [SDGLabelDecisionSchemaFull.model_validate(decision) for decision in history.decisions]
+        # Decisions of the publication's SDGLabelHistory, initialized if there are none
+        decisions = DecisionProvisioningService(db).provision([publication_id], loader_options=SDG_LABEL_DECISION)
+        return [SDGLabelDecisionSchemaFull.model_validate(decision) for decision in decisions.get(publication_id, [])]
 
     except Exception as e:
         logging.error(f"Error fetching SDGLabelDecisions for publication ID {publication_id}: {str(e)}")
@@ -601,7 +400,7 @@ async def get_sdg_label_decisions_by_scenario(
         user = verify_token(token, db)  # Ensure user is authenticated
 
         # Query the database for all SDGLabelDecisions with the specified scenario
-        decisions = db.query(SDGLabelDecision).filter(SDGLabelDecision.scenario_type == scenario).all()
+        decisions = db.query(SDGLabelDecision).options(*SDG_LABEL_DECISION).filter(SDGLabelDecision.scenario_type == scenario).all()
 
         if not decisions:
             raise HTTPException(
@@ -624,7 +423,7 @@ async def get_sdg_label_decisions_by_scenario(
     response_model=List[SDGLabelDecisionSchemaFull],
     description="Retrieve or initialize SDGLabelDecision entries for a batch of publications linked to a specific part of dimensionality reductions."
 )
-async def get_sdg_label_decisions_partitioned(
+def get_sdg_label_decisions_partitioned(
     reduction_shorthand: str,
     part_number: int,
     total_parts: int,
@@ -688,72 +487,9 @@ async def get_sdg_label_decisions_partitioned(
                 detail="No publications found for the specified part of dimensionality reductions.",
             )
 
-        # Fetch all SDGLabelDecisions for these publications
-        decisions = db.query(SDGLabelDecision).filter(
-            SDGLabelDecision.publication_id.in_(publication_ids)
-        ).all()
-
-        existing_decision_pub_ids = {decision.publication_id for decision in decisions}
-        missing_pub_ids = set(publication_ids) - existing_decision_pub_ids
-
-        new_decisions = []
-
-        # Create missing SDGLabelDecisions
-        for publication_id in missing_pub_ids:
-            publication = db.query(Publication).filter(Publication.publication_id == publication_id).first()
-            if not publication:
-                continue  # Skip if somehow publication doesn't exist
-
-            # Retrieve the SDGLabelSummary
-            sdg_label_summary = publication.sdg_label_summary
-            if not sdg_label_summary:
-                continue
-
-            # Retrieve or create SDGLabelHistory
-            history = db.query(SDGLabelHistory).filter(
-                SDGLabelHistory.history_id == sdg_label_summary.history_id
-            ).first()
-
-            if not history:
-                history = SDGLabelHistory(active=True)
-                db.add(history)
-                db.flush()  # Get history_id
-                sdg_label_summary.history_id = history.history_id
-                db.commit()
-                db.refresh(history)
-
-            # Fetch the best SDG prediction from 'Aurora' model
-            prediction = db.query(SDGPrediction).filter(
-                SDGPrediction.publication_id == publication_id,
-                SDGPrediction.prediction_model == "Aurora"
-            ).first()
-
-            suggested_label = 0  # Default if no prediction exists
-            if prediction:
-                _, highest_sdg_number, _ = prediction.get_highest_sdg()
-                suggested_label = highest_sdg_number  # Extracted integer SDG number
-
-            # Create a new SDGLabelDecision
-            new_decision = SDGLabelDecision(
-                history_id=history.history_id,
-                publication_id=publication_id,
-                suggested_label=suggested_label,
-                decided_label=0,  # Default: not decided
-                decision_type=DecisionType.CONSENSUS_MAJORITY,
-                scenario_type=ScenarioType.NOT_ENOUGH_VOTES,
-                expert_id=None,
-                comment=None,
-            )
-            db.add(new_decision)
-            new_decisions.append(new_decision)
-
-        if new_decisions:
-            db.commit()
-            for decision in new_decisions:
-                db.refresh(decision)
-
-        # Combine and return all decisions
-        all_decisions = decisions + new_decisions
+        # All decisions of these publications, created in bulk where there is none
+        decisions = DecisionProvisioningService(db).provision(publication_ids, loader_options=SDG_LABEL_DECISION)
+        all_decisions = [decision for publication_id in publication_ids for decision in decisions.get(publication_id, [])]
 
         logging.info(f"Total SDGLabelDecisions returned: {len(all_decisions)}")
         return all_decisions
@@ -794,10 +530,7 @@ async def get_user_interacted_sdg_label_decisions(
         user_created_decisions = (
             db.query(SDGLabelDecision)
             .filter(SDGLabelDecision.expert_id == user_id)  # Assuming the expert_id is the creator
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
@@ -806,10 +539,7 @@ async def get_user_interacted_sdg_label_decisions(
             db.query(SDGLabelDecision)
             .join(SDGLabelDecision.user_labels)
             .filter(SDGUserLabel.user_id == user_id)
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
@@ -818,10 +548,7 @@ async def get_user_interacted_sdg_label_decisions(
             db.query(SDGLabelDecision)
             .join(SDGLabelDecision.annotations)
             .filter(Annotation.user_id == user_id)
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
@@ -831,10 +558,7 @@ async def get_user_interacted_sdg_label_decisions(
             .join(SDGLabelDecision.user_labels)
             .join(SDGUserLabel.annotations)
             .filter(Annotation.user_id == user_id)
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
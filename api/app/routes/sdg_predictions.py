@@ -1,7 +1,7 @@
 from typing import List, Dict, Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import and_, func
+from sqlalchemy import and_
 from sqlalchemy.orm import Session, sessionmaker, aliased
 
 from api.app.routes.authentication import verify_token
@@ -15,6 +15,7 @@ from request_models.sdg_prediction import SDGPredictionsPublicationsIdsRequest,
 from schemas import SDGPredictionSchemaFull
 from services.math_service import MathService
 from services.metrics_service import MetricsService
+from services.sdg_label_count_service import SDGLabelCountService
 from settings.settings import SDGPredictionsRouterSettings, MariaDBSettings
 from utils.logger import logger
 
@@ -348,16 +349,8 @@ async def get_least_labeled_sdg_predictions(
     try:
         user = verify_token(token, db)
 
-        sdg_counts = (
-            db.query(
-                *[func.sum(getattr(SDGLabelSummary, f"sdg{i}")).label(f"sdg{i}") for i in range(1, 18)]
-            )
-            .first()
-        )
-        least_labeled_sdg = min(
-            (i for i in range(1, 18) if getattr(sdg_counts, f"sdg{i}") is not None),
-            key=lambda i: getattr(sdg_counts, f"sdg{i}"),
-        )
+        # Maintained per-SDG totals instead of aggregating the whole SDGLabelSummary table
+        least_labeled_sdg = SDGLabelCountService(db).least_labeled_sdg()
         logging.info(f"Least labeled SDG is SDG{least_labeled_sdg}.")
 
         predictions = (
@@ -1,20 +1,24 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes.authentication import verify_token
+from api.app.cache import cached
 from models import SDGRank, SDGXPBank
 from models.users.user import User
 from request_models.sdg_rank import UserIdsRequest
 from db.mariadb_connector import engine as mariadb_engine
 from schemas.sdg_ranks import UsersSDGRankSchemaBase, SDGRankSchemaBase, SDGRankSchemaFull
 from schemas.users.user import UserSchemaFull
-from settings.settings import SDGRanksSettings
+from services.rank_service import RankService
+from settings.settings import SDGRanksSettings, CacheServiceSettings, RankServiceSettings
 from api.app.security import Security
 from utils.logger import logger
 
 # Setup Logging
 sdg_ranks_router_settings = SDGRanksSettings()
+cache_service_settings = CacheServiceSettings()
+rank_service_settings = RankServiceSettings()
 logging = logger(sdg_ranks_router_settings.SDGRANKS_ROUTER_LOG_NAME)
 
 # Setup OAuth2 and security
@@ -44,6 +48,7 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[SDGRankSchemaFull], description="Retrieve all SDG ranks")
+@cached(List[SDGRankSchemaFull], ttl=cache_service_settings.RANKS_TTL, tags=[cache_service_settings.RANKS_TAG])
 async def get_all_sdg_ranks(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
@@ -147,41 +152,15 @@ async def get_ranks_for_all_users(
         # Ensure user is authenticated
         verify_token(token, db)
 
-        # Query all users
-        users = db.query(User).all()
+        # Resolve the ranks of every user with an XP bank in one pass
+        all_user_ranks = RankService(db).get_user_ranks()
 
-        if not users:
+        if not all_user_ranks:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No users found"
             )
 
-        # Query XP banks for all users
-        user_xp_banks = db.query(SDGXPBank).filter(SDGXPBank.user_id.in_([u.user_id for u in users])).all()
-
-        all_user_ranks = []
-        for user in users:
-            xp_bank = next((bank for bank in user_xp_banks if bank.user_id == user.user_id), None)
-
-            if not xp_bank:
-                continue  # Skip users without XP data
-
-            user_ranks = []
-            for sdg_id in range(1, 18):  # SDG 1-17
-                sdg_xp = getattr(xp_bank, f"sdg{sdg_id}_xp")
-                rank = db.query(SDGRank).filter(SDGRank.sdg_goal_id == sdg_id, SDGRank.xp_required <= sdg_xp).order_by(SDGRank.xp_required.desc()).first()
-
-                if rank:
-                    user_ranks.append(SDGRankSchemaFull.model_validate(rank))
-
-            if user_ranks:
-                user_info = UserSchemaFull.model_validate(user)
-                all_user_ranks.append({
-                    "user_id": user.user_id,
-                    "user": user_info,
-                    "ranks": user_ranks
-                })
-
         return all_user_ranks
 
     except Exception as e:
@@ -206,43 +185,43 @@ async def get_sdg_ranks_for_users(
                 detail="No user IDs provided"
             )
 
-        # Query users and XP banks for the provided user IDs
-        users = db.query(User).filter(User.user_id.in_(request.user_ids)).all()
-        user_xp_banks = db.query(SDGXPBank).filter(SDGXPBank.user_id.in_(request.user_ids)).all()
+        # Resolve the ranks of the requested users in one pass
+        response_data = RankService(db).get_user_ranks(user_ids=request.user_ids)
 
-        if not users or not user_xp_banks:
+        if not response_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No SDG ranks found for the provided user IDs"
             )
 
-        response_data = []
-        for user in users:
-            xp_bank = next((bank for bank in user_xp_banks if bank.user_id == user.user_id), None)
-
-            if not xp_bank:
-                continue  # Skip users without XP data
-
-            user_ranks = []
-            for sdg_id in range(1, 18):  # SDG 1-17
-                sdg_xp = getattr(xp_bank, f"sdg{sdg_id}_xp")
-                rank = db.query(SDGRank).filter(SDGRank.sdg_goal_id == sdg_id, SDGRank.xp_required <= sdg_xp).order_by(SDGRank.xp_required.desc()).first()
+        return response_data
 
-                if rank:
-                    user_ranks.append(SDGRankSchemaFull.model_validate(rank))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching SDG ranks: {e}",
+        )
 
-            if user_ranks:
-                user_info = UserSchemaFull.model_validate(user)
-                response_data.append({
-                    "user_id": user.user_id,
-                    "user": user_info,
-                    "ranks": user_ranks
-                })
+@router.get("/leaderboard/", response_model=List[UsersSDGRankSchemaBase],
+            description="Retrieve the top-k users by total XP (or by the XP of a single SDG) with their SDG ranks")
+async def get_ranks_leaderboard(
+    top_k: int = Query(rank_service_settings.DEFAULT_LEADERBOARD_SIZE, ge=1),
+    sdg: Optional[int] = Query(None, ge=1, le=17),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    Retrieve the leaderboard: users ordered by XP (descending), each with their resolved SDG ranks.
+    Ordering and limiting happen in SQL; the ranks of the returned users are resolved in one vectorised pass.
+    """
+    try:
+        # Ensure user is authenticated
+        verify_token(token, db)
 
-        return response_data
+        return RankService(db).get_leaderboard(top_k=top_k, sdg=sdg)
 
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred while fetching SDG ranks: {e}",
+            detail=f"An error occurred while fetching the leaderboard: {e}",
         )
@@ -1,11 +1,13 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import ValidationError
 from sqlalchemy import func
 from sqlalchemy.orm import Session, sessionmaker, joinedload
 
+from api.app.loader_profiles import SDG_USER_LABEL, SDG_LABEL_DECISION_USER_LABELS, SDG_LABEL_DECISION_EXTENDED
 from api.app.routes.authentication import verify_token
+from api.app.serialization import SDG_USER_LABEL as SDG_USER_LABEL_BULK, bulk_response
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from enums import SDGType
@@ -14,15 +16,16 @@ from models.publications.publication import Publication
 from models.sdg_label_summary import SDGLabelSummary
 from request_models.annotations_gpt import AnnotationEvaluationRequest
 from request_models.sdg_user_label import UserLabelRequest, UserLabelIdsRequest
-from schemas import SDGUserLabelSchemaFull, SDGUserLabelSchemaBase
+from schemas import SDGUserLabelSchemaFull, SDGUserLabelSchemaBase, RewardEvaluationStatusSchema
 from schemas.gpt_assistant_service import GPTResponseCommentSummarySchema, SDGUserLabelsCommentSummarySchema, \
     AnnotationEvaluationSchema
 from schemas.sdg_label_decision import SDGLabelDecisionSchemaExtended
 from schemas.sdg_user_label import SDGUserLabelStatisticsSchema, SDGLabelDistribution, UserVotingDetails
 from schemas.vote import VoteSchemaFull
-from services.gpt.gpt_assistant_service import GPTAssistantService
+from services.gpt.async_gpt_assistant_service import get_async_gpt_assistant_service
 from services.gpt.user_annotation_evaluator_service import UserAnnotationEvaluatorService
 from services.label_service import LabelService
+from services.reward_evaluation_service import get_reward_evaluation_service
 from settings.settings import SDGUserLabelsSettings
 from utils.logger import logger
 
@@ -57,7 +60,7 @@ router = APIRouter(
 )
 
 # Use the GPT Assistant service for user-label-centred operations
-assistant = GPTAssistantService()
+assistant = get_async_gpt_assistant_service()
 
 @router.get(
     "/{label_id}",
@@ -75,7 +78,7 @@ async def get_sdg_user_label(
     try:
         user = verify_token(token, db)  # Ensure user is authenticated
 
-        user_label = db.query(SDGUserLabel).filter(SDGUserLabel.label_id == label_id).first()
+        user_label = db.query(SDGUserLabel).options(*SDG_USER_LABEL).filter(SDGUserLabel.label_id == label_id).first()
 
         if not user_label:
             raise HTTPException(
@@ -98,6 +101,7 @@ async def get_sdg_user_label(
     description="Retrieve all SDG user labels"
 )
 async def get_all_sdg_user_labels(
+    request: Request,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ) -> List[SDGUserLabelSchemaFull]:
@@ -107,8 +111,8 @@ async def get_all_sdg_user_labels(
     try:
         user = verify_token(token, db)  # Ensure user is authenticated
 
-        user_labels = db.query(SDGUserLabel).all()
-        return [SDGUserLabelSchemaFull.model_validate(label) for label in user_labels]
+        # Column-only bulk path (orjson / NDJSON) instead of per-row model validation
+        return bulk_response(request, db, SDG_USER_LABEL_BULK)
 
     except Exception as e:
         logging.error(f"Error fetching SDG user labels: {str(e)}")
@@ -160,11 +164,11 @@ async def evaluate_user_label(
             )
 
         # Initialize services
-        gpt_service = GPTAssistantService()
+        gpt_service = get_async_gpt_assistant_service()
         evaluator_service = UserAnnotationEvaluatorService()
 
         # Get LLM evaluation scores
-        llm_scores = gpt_service.evaluate_annotation(
+        llm_scores = await gpt_service.evaluate_annotation(
             passage=user_label.abstract_section,
             annotation=user_label.comment,
             sdg_label=SDGType(f"sdg{user_label.voted_label}"),
@@ -227,7 +231,7 @@ async def create_comment_summary(
         ]
 
         # Call the assistant to generate the summary and keywords
-        summary_response = assistant.summarize_comments(user_labels=user_labels_data)
+        summary_response = await assistant.summarize_comments(user_labels=user_labels_data)
 
         return SDGUserLabelsCommentSummarySchema(
             user_labels_ids = user_labels_ids,
@@ -280,18 +284,14 @@ async def get_sdg_user_labels_for_publication(
         history = publication.sdg_label_summary.history
 
         # Retrieve all SDGUserLabels and their related entities in a single query
-        labels = db.query(SDGUserLabel).options(
-            joinedload(SDGUserLabel.votes),
-            joinedload(SDGUserLabel.annotations),
-            joinedload(SDGUserLabel.label_decisions),
-        ).join(
-            sdg_label_decision_user_label_association,
-            sdg_label_decision_user_label_association.c.user_label_id == SDGUserLabel.label_id
-        ).join(
+        history_label_ids = db.query(sdg_label_decision_user_label_association.c.user_label_id).join(
             SDGLabelDecision,
             sdg_label_decision_user_label_association.c.decision_id == SDGLabelDecision.decision_id
         ).filter(
             SDGLabelDecision.history_id == history.history_id
+        )
+        labels = db.query(SDGUserLabel).options(*SDG_USER_LABEL).filter(
+            SDGUserLabel.label_id.in_(history_label_ids)
         ).all()
 
         # Convert SQLAlchemy models to Pydantic models
@@ -399,7 +399,7 @@ async def get_sdg_user_labels(
         # Query the database for the SDGLabelDecision with its associated user_labels
         decision = (
             db.query(SDGLabelDecision)
-            .options(joinedload(SDGLabelDecision.user_labels))  # Eager load user_labels
+            .options(*SDG_LABEL_DECISION_USER_LABELS)  # Eager load user_labels with their relationships
             .filter(SDGLabelDecision.decision_id == decision_id)
             .first()
         )
@@ -442,7 +442,7 @@ async def get_sdg_user_label(
         # Query the database for the SDGLabelDecision with its associated user_labels
         decision = (
             db.query(SDGLabelDecision)
-            .options(joinedload(SDGLabelDecision.user_labels))  # Eager load user_labels
+            .options(*SDG_LABEL_DECISION_USER_LABELS)  # Eager load user_labels with their relationships
             .filter(SDGLabelDecision.decision_id == decision_id)
             .first()
         )
@@ -476,21 +476,21 @@ async def get_sdg_user_label(
 @router.post(
     "/",
     response_model=SDGUserLabelSchemaFull,
-    description="Create or link an SDG user label"
+    description="Create or link an SDG user label; its XP is evaluated asynchronously (see /{label_id}/reward-status)"
 )
-async def create_sdg_user_label(
+def create_sdg_user_label(
     request: UserLabelRequest,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ) -> SDGUserLabelSchemaFull:
     """
     Create or link an SDG user label.
+    Runs in the threadpool, as the submission blocks on the decision's row lock while another vote on it commits.
     """
     try:
 
         user = verify_token(token, db)  # Ensure user is authenticated
         label_service = LabelService(db)
-        print(request)
 
         new_user_label = label_service.create_or_link_label(request)
         return SDGUserLabelSchemaFull.model_validate(new_user_label)
@@ -504,6 +504,40 @@ async def create_sdg_user_label(
             detail="An error occurred while creating or linking the SDG user label",
         )
 
+@router.get(
+    "/{label_id}/reward-status",
+    response_model=RewardEvaluationStatusSchema,
+    description="Poll the state of the asynchronous XP evaluation of an SDG user label"
+)
+async def get_sdg_user_label_reward_status(
+    label_id: int,
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+) -> RewardEvaluationStatusSchema:
+    """
+    Retrieve the XP evaluation state of a label: queued, running, done (with the awarded XP) or failed.
+    """
+    try:
+        user = verify_token(token, db)  # Ensure user is authenticated
+
+        reward_status = get_reward_evaluation_service().status(label_id)
+        if not reward_status:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No XP evaluation found for SDGUserLabel with ID {label_id}",
+            )
+
+        return RewardEvaluationStatusSchema.model_validate(reward_status)
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logging.error(f"Error fetching XP evaluation status for SDG user label {label_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while fetching the XP evaluation status",
+        )
+
 @router.get(
     "/label-decisions/{decision_id}/statistics/",
     response_model=SDGUserLabelStatisticsSchema,
@@ -561,10 +595,7 @@ async def get_user_interacted_sdg_label_decisions(
             db.query(SDGLabelDecision)
             .join(SDGLabelDecision.user_labels)
             .filter(SDGUserLabel.user_id == user_id)
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
@@ -573,10 +604,7 @@ async def get_user_interacted_sdg_label_decisions(
             db.query(SDGLabelDecision)
             .join(SDGLabelDecision.annotations)
             .filter(Annotation.user_id == user_id)
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
@@ -586,10 +614,7 @@ async def get_user_interacted_sdg_label_decisions(
             .join(SDGLabelDecision.user_labels)
             .join(SDGUserLabel.annotations)
             .filter(Annotation.user_id == user_id)
-            .options(
-                joinedload(SDGLabelDecision.user_labels).joinedload(SDGUserLabel.annotations),
-                joinedload(SDGLabelDecision.annotations)
-            )
+            .options(*SDG_LABEL_DECISION_EXTENDED)
             .all()
         )
 
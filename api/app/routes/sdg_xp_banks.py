@@ -1,15 +1,17 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes.authentication import verify_token
+from api.app.serialization import SDG_XP_BANK, bulk_response
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from models import SDGXPBank, SDGXPBankHistory
 from request_models.sdg_xp_bank import BankIncrementRequest
 from schemas import SDGXPBankHistorySchemaFull, SDGXPBankSchemaFull
 from schemas.sdg_xp_bank_history import NoSDGXPBankHistorySchemaBase
+from services.leaderboard_service import get_leaderboard_service, sdg_number
 from settings.settings import XPBanksRouterSettings
 from utils.logger import logger
 
@@ -77,6 +79,7 @@ async def get_user_bank(
 @router.get("/users/banks", response_model=List[SDGXPBankSchemaFull],
             description="Retrieve banks for all users")
 async def get_all_banks(
+        request: Request,
         db: Session = Depends(get_db),
         token: str = Depends(oauth2_scheme),
 ):
@@ -86,10 +89,8 @@ async def get_all_banks(
     try:
         user = verify_token(token, db)  # Ensure user is authenticated
 
-        # Query all banks
-        sdg_xp_banks = db.query(SDGXPBank).all()
-
-        return [SDGXPBankSchemaFull.model_validate(sdg_xp_bank) for sdg_xp_bank in sdg_xp_banks]
+        # Serialize all banks through the column-only bulk path (orjson / NDJSON)
+        return bulk_response(request, db, SDG_XP_BANK)
 
     except Exception as e:
         raise HTTPException(
@@ -145,6 +146,9 @@ async def add_bank_increment(
         db.commit()
         db.refresh(new_history)
 
+        # Keep the leaderboards in step with the committed bank
+        get_leaderboard_service().add_xp(user_id, sdg_number(request.sdg), request.increment)
+
         return SDGXPBankHistorySchemaFull.model_validate(new_history)
 
     except Exception as e:
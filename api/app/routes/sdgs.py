@@ -4,15 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, sessionmaker, joinedload
 
 from api.app.routes.authentication import verify_token
+from api.app.cache import cached
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from models.sdgs.goal import SDGGoal
 from schemas.sdgs.goal import SDGGoalSchemaFull
-from settings.settings import SDGsRouterSettings
+from settings.settings import SDGsRouterSettings, CacheServiceSettings
 from utils.logger import logger
 
 # Setup Logging
 sdgs_router_settings = SDGsRouterSettings()
+cache_service_settings = CacheServiceSettings()
 logging = logger(sdgs_router_settings.SDGS_ROUTER_LOG_NAME)
 
 # OAuth2 scheme for token authentication
@@ -45,6 +47,7 @@ router = APIRouter(
     response_model=SDGGoalSchemaFull,
     description="Get a single SDG goal by ID with optional inclusion of targets"
 )
+@cached(SDGGoalSchemaFull, ttl=cache_service_settings.SDGS_TTL, tags=[cache_service_settings.SDGS_TAG])
 async def get_sdg(
     sdg_id: int,
     db: Session = Depends(get_db),
@@ -84,6 +87,7 @@ async def get_sdg(
     response_model=List[SDGGoalSchemaFull],
     description="Get all SDG goals with optional inclusion of targets"
 )
+@cached(List[SDGGoalSchemaFull], ttl=cache_service_settings.SDGS_TTL, tags=[cache_service_settings.SDGS_TAG])
 async def get_sdgs(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
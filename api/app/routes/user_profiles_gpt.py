@@ -8,7 +8,7 @@ from db.mariadb_connector import engine as mariadb_engine
 from request_models.user_profiles_gpt import UserProfileInterestsRequest, UserProfileSkillsRequest
 from schemas.gpt_assistant_service import UserEnrichedInterestsDescriptionSchema, \
     UserEnrichedSkillsDescriptionSchema, SDGPredictionSchema
-from services.gpt.gpt_assistant_service import GPTAssistantService
+from services.gpt.async_gpt_assistant_service import get_async_gpt_assistant_service
 from settings.settings import UserProfilesRouterSettings
 from utils.logger import logger
 
@@ -41,8 +41,8 @@ router = APIRouter(
     },
 )
 
-# Use GPT assistant service
-assistant_service = GPTAssistantService()
+# Use the shared async GPT assistant service
+assistant_service = get_async_gpt_assistant_service()
 
 @router.post(
     "/skills/sdgs",
@@ -61,7 +61,7 @@ async def propose_sdg_based_on_skills(
 
     try:
         # Propose the SDG based on skills
-        proposed_sdg = assistant_service.propose_sdg_from_skills(request.skills)
+        proposed_sdg = await assistant_service.propose_sdg_from_skills(request.skills)
 
         return SDGPredictionSchema(
             input=request.skills,
@@ -92,7 +92,7 @@ async def propose_sdg_based_on_interests(
 
     try:
         # Propose the SDG based on interests
-        proposed_sdg = assistant_service.propose_sdg_from_interests(request.interests)
+        proposed_sdg = await assistant_service.propose_sdg_from_interests(request.interests)
 
         return SDGPredictionSchema(
             input=request.interests,
@@ -122,7 +122,7 @@ async def generate_skills_query(
 
     try:
         # Generate the skills-based description
-        enriched_skills = assistant_service.generate_skills_description(request.skills)
+        enriched_skills = await assistant_service.generate_skills_description(request.skills)
 
         # Map GPT response to the API schema
         return UserEnrichedSkillsDescriptionSchema(
@@ -153,7 +153,7 @@ async def generate_interests_query(
 
     try:
         # Generate the interests-based description
-        enriched_interests = assistant_service.generate_interests_description(request.interests)
+        enriched_interests = await assistant_service.generate_interests_description(request.interests)
 
         # Map GPT response to the API schema
         return UserEnrichedInterestsDescriptionSchema(
@@ -1,10 +1,11 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import ValidationError
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.app.routes.authentication import verify_token
+from api.app.serialization import VOTE, bulk_response
 from api.app.security import Security
 from db.mariadb_connector import engine as mariadb_engine
 from models import Vote, SDGUserLabel, Annotation
@@ -133,6 +134,7 @@ async def create_vote(
     description="Retrieve all votes"
 )
 async def get_all_votes(
+        request: Request,
         db: Session = Depends(get_db),
         token: str = Depends(oauth2_scheme),
 ) -> List[VoteSchemaFull]:
@@ -142,8 +144,8 @@ async def get_all_votes(
     try:
         user = verify_token(token, db)  # Ensure user is authenticated
 
-        votes = db.query(Vote).all()
-        return [VoteSchemaFull.model_validate(vote) for vote in votes]
+        # Column-only bulk path (orjson / NDJSON) instead of per-row model validation
+        return bulk_response(request, db, VOTE)
 
     except Exception as e:
         logging.error(f"Error fetching votes: {str(e)}")
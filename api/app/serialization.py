@@ -0,0 +1,236 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+from models import (Annotation, Author, Division, Faculty, Institute, Publication, SDGLabelDecision, SDGUserLabel,
+                    SDGXPBank, SDGXPBankHistory, Vote, publication_authors_association,
+                    sdg_label_decision_user_label_association)
+from schemas import (AnnotationSchemaFull, AuthorSchemaFull, DivisionSchemaFull, FacultySchemaFull,
+                     InstituteSchemaFull, PublicationSchemaBase, SDGLabelDecisionSchemaFull, SDGUserLabelSchemaFull,
+                     SDGXPBankHistorySchemaFull, SDGXPBankSchemaFull, VoteSchemaFull)
+from settings.settings import BulkSerializationSettings
+
+bulk_serialization_settings = BulkSerializationSettings()
+
+
+def _chunks(values: List[Any], size: int = bulk_serialization_settings.IN_CHUNK_SIZE) -> Iterator[List[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class BulkSpec:
+    """
+    Column-only serialization spec for a model and its response schema.
+
+    Scalar schema fields are mapped to the model columns of the same name and selected as plain row
+    tuples; relationship fields are filled by the given relations with one SELECT ... IN per relation
+    and chunk. The produced dicts have the same shape as the schema's JSON output, without building
+    ORM objects or pydantic models per row.
+    """
+
+    def __init__(self, model, schema: type[BaseModel], relations: Optional[Dict[str, "Relation"]] = None):
+        self.model = model
+        self.relations = relations or {}
+
+        mapper = inspect(model)
+        column_keys = {attribute.key for attribute in mapper.column_attrs}
+        self.fields = {}
+        for name in schema.model_fields:
+            if name in self.relations:
+                continue
+            if name not in column_keys:
+                raise ValueError(f"{schema.__name__}.{name} is neither a column of {model.__name__} nor a declared relation")
+            self.fields[name] = getattr(model, name)
+
+        self.pk_name = mapper.get_property_by_column(mapper.primary_key[0]).key
+        if self.pk_name not in self.fields:
+            raise ValueError(f"{schema.__name__} must include the primary key {self.pk_name}")
+        self.pk = self.fields[self.pk_name]
+        self.names = list(self.fields)
+
+    def to_dicts(self, rows, skip: int = 0) -> List[dict]:
+        names = self.names
+        return [dict(zip(names, row[skip:])) for row in rows]
+
+    def load(self, db: Session, *criteria, limit: Optional[int] = None) -> List[dict]:
+        """
+        Load all rows matching the criteria (ordered by primary key) together with their relations.
+        """
+        stmt = select(*self.fields.values()).where(*criteria).order_by(self.pk)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        items = self.to_dicts(db.execute(stmt))
+        self.load_relations(db, items)
+        return items
+
+    def iter_batches(self, db: Session, *criteria, batch_size: int = bulk_serialization_settings.STREAM_BATCH_SIZE) -> Iterator[List[dict]]:
+        """
+        Yield the rows in primary-key batches (keyset pagination), so memory stays bounded by one batch.
+        """
+        last_pk = None
+        while True:
+            stmt = select(*self.fields.values()).where(*criteria)
+            if last_pk is not None:
+                stmt = stmt.where(self.pk > last_pk)
+            items = self.to_dicts(db.execute(stmt.order_by(self.pk).limit(batch_size)))
+            if not items:
+                return
+            self.load_relations(db, items)
+            yield items
+            last_pk = items[-1][self.pk_name]
+
+    def load_relations(self, db: Session, items: List[dict]) -> None:
+        if not items:
+            return
+        for name, relation in self.relations.items():
+            relation.attach(db, name, items, self)
+
+
+class Relation(ABC):
+    def __init__(self, spec: BulkSpec):
+        self.spec = spec
+
+    @abstractmethod
+    def attach(self, db: Session, name: str, parents: List[dict], parent_spec: BulkSpec) -> None:
+        """Load the related rows of all parents with one query and set them on the parent dicts under `name`."""
+
+
+class Many(Relation):
+    """One-to-many relation through a foreign key column on the child."""
+
+    def __init__(self, spec: BulkSpec, foreign_key):
+        super().__init__(spec)
+        self.foreign_key = foreign_key
+
+    def attach(self, db, name, parents, parent_spec):
+        parent_ids = list({parent[parent_spec.pk_name] for parent in parents})
+        grouped = defaultdict(list)
+        for chunk in _chunks(parent_ids):
+            stmt = (
+                select(self.foreign_key, *self.spec.fields.values())
+                .where(self.foreign_key.in_(chunk))
+                .order_by(self.spec.pk)
+            )
+            for row in db.execute(stmt):
+                grouped[row[0]].append(dict(zip(self.spec.names, row[1:])))
+
+        self.spec.load_relations(db, [child for children in grouped.values() for child in children])
+        for parent in parents:
+            parent[name] = grouped.get(parent[parent_spec.pk_name], [])
+
+
+class ManyThrough(Relation):
+    """Many-to-many relation through an association table."""
+
+    def __init__(self, spec: BulkSpec, parent_column, child_column):
+        super().__init__(spec)
+        self.parent_column = parent_column
+        self.child_column = child_column
+
+    def attach(self, db, name, parents, parent_spec):
+        parent_ids = list({parent[parent_spec.pk_name] for parent in parents})
+        grouped = defaultdict(list)
+        children_by_pk = {}
+        for chunk in _chunks(parent_ids):
+            stmt = (
+                select(self.parent_column, *self.spec.fields.values())
+                .join_from(self.spec.model, self.child_column.table, self.spec.pk == self.child_column)
+                .where(self.parent_column.in_(chunk))
+                .order_by(self.spec.pk)
+            )
+            for row in db.execute(stmt):
+                child = dict(zip(self.spec.names, row[1:]))
+                # Share one dict per child so its own relations are loaded once
+                child = children_by_pk.setdefault(child[self.spec.pk_name], child)
+                grouped[row[0]].append(child)
+
+        self.spec.load_relations(db, list(children_by_pk.values()))
+        for parent in parents:
+            parent[name] = grouped.get(parent[parent_spec.pk_name], [])
+
+
+class One(Relation):
+    """Many-to-one relation through a foreign key field of the parent."""
+
+    def __init__(self, spec: BulkSpec, local_key: str):
+        super().__init__(spec)
+        self.local_key = local_key
+
+    def attach(self, db, name, parents, parent_spec):
+        keys = list({parent[self.local_key] for parent in parents if parent[self.local_key] is not None})
+        by_pk = {}
+        for chunk in _chunks(keys):
+            for child in self.spec.to_dicts(db.execute(select(*self.spec.fields.values()).where(self.spec.pk.in_(chunk)))):
+                by_pk[child[self.spec.pk_name]] = child
+
+        self.spec.load_relations(db, list(by_pk.values()))
+        for parent in parents:
+            parent[name] = by_pk.get(parent[self.local_key])
+
+
+def wants_ndjson(request: Request) -> bool:
+    return bulk_serialization_settings.NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def bulk_response(request: Request, db: Session, spec: BulkSpec, *criteria):
+    """
+    Serialize all rows matching the criteria with orjson.
+
+    Clients sending `Accept: application/x-ndjson` get one JSON object per line, streamed in
+    primary-key batches from a session of their own (the request session is closed once the route returns).
+    """
+    if wants_ndjson(request):
+        bind = db.get_bind()
+
+        def stream() -> Iterator[bytes]:
+            with Session(bind=bind) as stream_db:
+                for items in spec.iter_batches(stream_db, *criteria):
+                    yield b"".join(orjson.dumps(item) + b"\n" for item in items)
+
+        return StreamingResponse(stream(), media_type=bulk_serialization_settings.NDJSON_MEDIA_TYPE)
+
+    return ORJSONResponse(spec.load(db, *criteria))
+
+
+# Specs matched to the response schemas of the large list endpoints
+VOTE = BulkSpec(Vote, VoteSchemaFull)
+
+ANNOTATION = BulkSpec(Annotation, AnnotationSchemaFull, relations={
+    "votes": Many(VOTE, Vote.annotation_id),
+})
+
+SDG_LABEL_DECISION = BulkSpec(SDGLabelDecision, SDGLabelDecisionSchemaFull, relations={
+    "annotations": Many(ANNOTATION, Annotation.decision_id),
+})
+
+SDG_USER_LABEL = BulkSpec(SDGUserLabel, SDGUserLabelSchemaFull, relations={
+    "annotations": Many(ANNOTATION, Annotation.sdg_user_label_id),
+    "votes": Many(VOTE, Vote.sdg_user_label_id),
+    "label_decisions": ManyThrough(
+        SDG_LABEL_DECISION,
+        sdg_label_decision_user_label_association.c.user_label_id,
+        sdg_label_decision_user_label_association.c.decision_id,
+    ),
+})
+
+SDG_XP_BANK = BulkSpec(SDGXPBank, SDGXPBankSchemaFull, relations={
+    "histories": Many(BulkSpec(SDGXPBankHistory, SDGXPBankHistorySchemaFull), SDGXPBankHistory.xp_bank_id),
+})
+
+PUBLICATION_BASE = BulkSpec(Publication, PublicationSchemaBase, relations={
+    "authors": ManyThrough(
+        BulkSpec(Author, AuthorSchemaFull),
+        publication_authors_association.c.publication_id,
+        publication_authors_association.c.author_id,
+    ),
+    "faculty": One(BulkSpec(Faculty, FacultySchemaFull), "faculty_id"),
+    "institute": One(BulkSpec(Institute, InstituteSchemaFull), "institute_id"),
+    "division": One(BulkSpec(Division, DivisionSchemaFull), "division_id"),
+})
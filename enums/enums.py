@@ -52,6 +52,12 @@ class ScenarioType(PyEnum):
 
     DECIDED = "Decided"
 
+class RewardEvaluationStatusType(PyEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class LevelType(PyEnum):
     LEVEL_1 = (1, 0.98, 100)  # max_prob, min_prob, coins
     LEVEL_2 = (0.98, 0.9, 200)
@@ -12,6 +12,7 @@ from .vote import Vote
 from .sdg_label_decision import SDGLabelDecision
 from .sdg_label_history import SDGLabelHistory
 from .sdg_label_summary import SDGLabelSummary
+from .sdg_label_count import SDGLabelCount
 from .sdg_prediction import SDGPrediction
 from .sdg_target_prediction import SDGTargetPrediction
 
@@ -42,6 +43,8 @@ from .inventory_achievement_association import InventoryAchievementAssociation
 
 from .fact import Fact
 from .summary import Summary
+from .publication_keywords import PublicationKeywords
+from .publication_sdg_analysis import PublicationSDGAnalysis
 
 from .sdg_xp_bank import SDGXPBank
 from .sdg_coin_wallet import SDGCoinWallet
@@ -69,6 +72,7 @@ __all__ = [
     "SDGLabelDecision",
     "SDGLabelHistory",
     "SDGLabelSummary",
+    "SDGLabelCount",
     "SDGPrediction",
     "SDGTargetPrediction",
     "sdg_label_decision_user_label_association",
@@ -96,6 +100,8 @@ __all__ = [
 
     "Fact",
     "Summary",
+    "PublicationKeywords",
+    "PublicationSDGAnalysis",
 
     "SDGXPBank",
     "SDGCoinWallet",
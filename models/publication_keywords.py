@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import ForeignKey, DateTime, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from models.base import Base
+from settings.settings import TimeZoneSettings
+
+time_zone_settings = TimeZoneSettings()
+
+
+class PublicationKeywords(Base):
+    """
+    Represents the GPT-extracted keywords of a publication, with one-to-one mapping.
+    """
+    __tablename__ = "publication_keywords"
+
+    keywords_id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    content: Mapped[str] = mapped_column(Text, nullable=False)  # JSON list of strings
+
+    publication_id: Mapped[int] = mapped_column(
+        ForeignKey("publications.publication_id", ondelete="cascade"),
+        unique=True,  # Ensures one-to-one mapping
+        nullable=False
+    )
+    publication: Mapped["Publication"] = relationship(
+        "Publication", back_populates="keywords"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        onupdate=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        nullable=False,
+    )
+
+    @property
+    def keywords(self) -> List[str]:
+        return json.loads(self.content)
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, DateTime, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from models.base import Base
+from settings.settings import TimeZoneSettings
+
+time_zone_settings = TimeZoneSettings()
+
+
+class PublicationSDGAnalysis(Base):
+    """
+    Represents the GPT explanation of the relevance of a publication for one SDG goal.
+    """
+    __tablename__ = "publication_sdg_analyses"
+    __table_args__ = (UniqueConstraint("publication_id", "sdg", name="uq_publication_sdg_analysis"),)
+
+    analysis_id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    sdg: Mapped[int] = mapped_column(nullable=False)  # Goal number 1-17
+    relevance: Mapped[str] = mapped_column(Text, nullable=False)
+    reasoning: Mapped[str] = mapped_column(Text, nullable=False)
+
+    publication_id: Mapped[int] = mapped_column(
+        ForeignKey("publications.publication_id", ondelete="cascade"),
+        nullable=False
+    )
+    publication: Mapped["Publication"] = relationship(
+        "Publication", back_populates="sdg_analyses"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        onupdate=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        nullable=False,
+    )
@@ -66,6 +66,14 @@ class Publication(Base):
     summary: Mapped["Summary"] = relationship("Summary", back_populates="publication", uselist=False
     )
 
+    keywords: Mapped["PublicationKeywords"] = relationship(
+        "PublicationKeywords", back_populates="publication", uselist=False
+    )
+
+    sdg_analyses: Mapped[list["PublicationSDGAnalysis"]] = relationship(
+        "PublicationSDGAnalysis", back_populates="publication", cascade="all, delete-orphan"
+    )
+
     is_dim_reduced: Mapped[bool] = mapped_column(default=False)
 
     faculty_id: Mapped[int | None] = mapped_column(ForeignKey("faculties.faculty_id"), nullable=True)
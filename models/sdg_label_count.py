@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import Base
+from settings.settings import TimeZoneSettings
+
+time_zone_settings = TimeZoneSettings()
+
+
+class SDGLabelCount(Base):
+    """
+    Maintained total of one SDG column over all SDGLabelSummaries (same value as SUM(sdg_label_summaries.sdgN)).
+    Updated in the transaction that changes a summary (see SDGLabelCountService), reconciled by a job.
+    """
+    __tablename__ = "sdg_label_counts"
+
+    sdg: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)  # 1-17
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        onupdate=lambda: datetime.now(time_zone_settings.ZURICH_TZ),
+        nullable=False,
+    )
@@ -51,6 +51,9 @@ class SDGLabelDecision(Base):
 
     comment: Mapped[str] = mapped_column(Text(), nullable=True)
 
+    # Latest vote per user and vote count per label as JSON, maintained incrementally (see VoteTally)
+    vote_tally: Mapped[str | None] = mapped_column(Text(), nullable=True)
+
     # Add publication_id ForeignKey
     publication_id: Mapped[int] = mapped_column(ForeignKey("publications.publication_id"), nullable=False)
 
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, DateTime, Integer, CheckConstraint
+from sqlalchemy import ForeignKey, DateTime, Integer, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models import Base
@@ -56,6 +56,11 @@ class SDGLabelSummary(Base):
         nullable=False,
     )
 
+    # (sdgN, publication_id) indexes: "labelled with SDG N, ordered by publication" is an index range read
+    __table_args__ = tuple(
+        Index(f"ix_sdg_label_summaries_sdg{i}_publication_id", f"sdg{i}", "publication_id") for i in range(1, 18)
+    )
+
     def __repr__(self) -> str:
         active_sdgs = [
             f"SDG{i}" for i in range(1, 18)
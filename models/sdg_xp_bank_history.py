@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from sqlalchemy import Enum
 from sqlalchemy import ForeignKey, Float, DateTime, Boolean, Text
@@ -23,6 +24,8 @@ class SDGXPBankHistory(Base):
     increment: Mapped[float] = mapped_column(Float, nullable=False)  # Incremental change in XP (+/-)
     reason: Mapped[str] = mapped_column(Text(), nullable=True)  # Optional reason for the change
     is_shown: Mapped[bool] = mapped_column(Boolean, nullable=True, default=False)
+    # The user label rewarded by this change (labeling XP only); makes the reward idempotent and reconcilable
+    label_id: Mapped[Optional[int]] = mapped_column(ForeignKey("sdg_user_labels.label_id"), nullable=True, index=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(time_zone_settings.ZURICH_TZ), nullable=False)
 
     # Relationship with SDGXPBank
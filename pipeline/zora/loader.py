@@ -1,5 +1,9 @@
 import argparse
-from qdrant_client.http.models import Distance, PointStruct, VectorParams
+from typing import List, Optional
+
+from qdrant_client.http.models import Distance, PayloadSchemaType, PointStruct, SetPayload, SetPayloadOperation, \
+    VectorParams
+from sqlalchemy import and_, select
 from sqlalchemy.orm import sessionmaker
 
 from db.mariadb_connector import engine as mariadb_engine
@@ -7,31 +11,43 @@ from db.qdrantdb_connector import client as qdrantdb_client
 
 from pipeline.zora.embeddings import PublicationEmbeddingGenerator
 
-
-
-from models.base import Base
-from models.author import Author
-from models.division import Division
-from models.faculty import Faculty
-from models.institute import Institute
-from models.sdg_prediction import SDGPrediction
-from models.sdg_label import SDGLabel
-from models.sdg_label_history import SDGLabelHistory
-from models.sdg_label_decision import SDGLabelDecision
-from models.sdg_user_label import SDGUserLabel
-from models.dim_red import DimRed
-from models.publication import Publication
+from models import Publication, SDGPrediction
 
 # Ensure these settings are properly initialized
-from settings.settings import EmbeddingsSettings, SDGSettings, LoaderSettings
+from settings.settings import EmbeddingsSettings, SDGSettings, LoaderSettings, MariaDBSettings, QdrantDBSettings, \
+    ReducerSettings
 embeddings_settings = EmbeddingsSettings()
 sdg_settings = SDGSettings()
 loader_settings = LoaderSettings()
+qdrantdb_settings = QdrantDBSettings()
 
 # Setup Logging
 from utils.logger import logger
 logging = logger(loader_settings.LOADER_LOG_NAME)
 
+
+def filter_payload(year: Optional[int], faculty_id: Optional[int], collection_id: Optional[int],
+                   predictions: Optional[List[float]]) -> dict:
+    """
+    Payload fields the similarity search filters on (indexed, see QdrantDBSettings.PUBLICATIONS_PAYLOAD_INDEXES).
+    The SDG fields are derived from the predictions of the default prediction model.
+    """
+    payload = {"year": year, "faculty_id": faculty_id, "collection_id": collection_id,
+               "top_sdg": None, "top_sdg_score": None, "sdg_levels": []}
+    if predictions and max(prediction or 0.0 for prediction in predictions) > 0:
+        predictions = [prediction or 0.0 for prediction in predictions]
+        top_score = max(predictions)
+        payload["top_sdg"] = predictions.index(top_score) + 1
+        payload["top_sdg_score"] = top_score
+        payload["sdg_levels"] = [
+            f"sdg{sdg}_level{level}"
+            for sdg, prediction in enumerate(predictions, start=1)
+            for level, (upper, lower) in enumerate(ReducerSettings.FILTER_RANGES, start=1)
+            if lower < prediction <= upper
+        ]
+    return payload
+
+
 class QdrantUploader:
     def __init__(self, qdrantdb_client):
         self.qclient = qdrantdb_client
@@ -75,6 +91,10 @@ class QdrantUploader:
                 vectors = {"content": emb.tolist()}
                 vectors.update(goal_predictions.get(pub.publication_id, {"goal_default": [0.0] * sdg_settings.SDGOAL_NUMBER}))
 
+                default_predictions = goal_predictions.get(pub.publication_id, {}).get(
+                    f"goal_{MariaDBSettings.DEFAULT_PREDICTION_MODEL.lower()}"
+                )
+
                 points.append(
                     PointStruct(
                         id=int(pub.oai_identifier_num),
@@ -85,6 +105,7 @@ class QdrantUploader:
                             "oai_identifier_num": pub.oai_identifier_num,
                             "title": pub.title,
                             "description": pub.description,
+                            **filter_payload(pub.year, pub.faculty_id, pub.collection_id, default_predictions),
                         },
                     )
                 )
@@ -118,10 +139,58 @@ class QdrantUploader:
                 logging.info(f"Collection {collection_name} successfully created.")
             else:
                 logging.info(f"Collection {collection_name} already exists.")
+            self.init_payload_indexes(collection_name)
         except Exception as e:
             logging.error(f"Failed to create collection {collection_name}: {e}")
             raise
 
+    def init_payload_indexes(self, collection_name=loader_settings.PUBLICATIONS_COLLECTION_NAME):
+        """Create the payload indexes of the filterable fields (existing indexes are kept)."""
+        existing = self.qclient.get_collection(collection_name=collection_name).payload_schema or {}
+        for field_name, field_type in qdrantdb_settings.PUBLICATIONS_PAYLOAD_INDEXES.items():
+            if field_name not in existing:
+                self.qclient.create_payload_index(
+                    collection_name=collection_name, field_name=field_name, field_schema=PayloadSchemaType(field_type),
+                )
+                logging.info(f"Created the {field_type} payload index on {field_name}.")
+
+    def backfill_payloads(self, session, collection_name=loader_settings.PUBLICATIONS_COLLECTION_NAME,
+                          batch_size=qdrantdb_settings.PAYLOAD_UPDATE_BATCH_SIZE):
+        """
+        Write the filter payload fields of all embedded publications, one set-payload request per batch
+        (points uploaded before these fields existed, or after year, faculty or collection changed).
+        """
+        sdg_columns = [getattr(SDGPrediction, f"sdg{sdg}") for sdg in range(1, sdg_settings.SDGOAL_NUMBER + 1)]
+        last_id, updated = 0, 0
+        while True:
+            rows = session.execute(
+                select(Publication.publication_id, Publication.oai_identifier_num, Publication.year,
+                       Publication.faculty_id, Publication.collection_id, SDGPrediction.prediction_id, *sdg_columns)
+                .outerjoin(SDGPrediction, and_(
+                    SDGPrediction.publication_id == Publication.publication_id,
+                    SDGPrediction.prediction_model == MariaDBSettings.DEFAULT_PREDICTION_MODEL,
+                ))
+                .where(Publication.embedded == True, Publication.publication_id > last_id)
+                .order_by(Publication.publication_id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            operations = [
+                SetPayloadOperation(set_payload=SetPayload(
+                    payload=filter_payload(year, faculty_id, collection_id,
+                                           list(predictions) if prediction_id is not None else None),
+                    points=[int(oai_identifier_num)],
+                ))
+                for _, oai_identifier_num, year, faculty_id, collection_id, prediction_id, *predictions in rows
+            ]
+            self.qclient.batch_update_points(collection_name=collection_name, update_operations=operations)
+            updated += len(rows)
+            last_id = rows[-1][0]
+            logging.info(f"Backfilled the filter payload of {updated} publications.")
+        return updated
+
     def process_and_upload(self, embedding_generator, session, batch_size):
         """Process unembedded publications and upload them to Qdrant."""
         logging.info("Starting the embedding generation and upload process...")
@@ -157,7 +226,7 @@ class QdrantUploader:
                 logging.error(f"Error during processing and uploading: {e}")
                 break
 
-def main(db, batch_size):
+def main(db, batch_size, backfill_payload=False):
     logging.info("Starting main Qdrant loader...")
 
     try:
@@ -184,6 +253,10 @@ def main(db, batch_size):
         Session = sessionmaker(bind=engine)
         session = Session()
 
+        if backfill_payload:
+            uploader.backfill_payloads(session)
+            return
+
         # Continuously process and upload unprocessed publications
         uploader.process_and_upload(embedding_generator, session, batch_size)
 
@@ -195,9 +268,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the Qdrant loader with SQLite or MariaDB.")
     parser.add_argument("--db", choices=["sqlite", "mariadb"], default="sqlite", help="Specify the database to use: sqlite or mariadb (default: sqlite).")
     parser.add_argument("--batch_size", type=int, default=loader_settings.DEFAULT_BATCH_SIZE, help=f"Specify the batch size for embedding generation and uploading (default: {loader_settings.DEFAULT_BATCH_SIZE}).")
+    parser.add_argument("--backfill_payload", action="store_true", help="Only write the filter payload fields of the embedded publications.")
 
     args = parser.parse_args()
-    main(args.db, args.batch_size)
+    main(args.db, args.batch_size, args.backfill_payload)
 
 def loader_main(db, batch_size):
     main(db, batch_size)
@@ -1,8 +1,50 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+
+
+class PublicationSimilarityFilters(BaseModel):
+    """Structured filters of a similarity search, applied by Qdrant on indexed payload fields."""
+    sdg: Optional[int] = Field(None, ge=1, le=17, description="Top predicted SDG (or the SDG of `level`)")
+    level: Optional[int] = Field(None, ge=1, description="Prediction level of `sdg` (ReducerSettings.FILTER_RANGES)")
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    faculty_ids: Optional[List[int]] = None
+    collection_ids: Optional[List[int]] = None
+
+    @model_validator(mode="after")
+    def level_requires_sdg(self):
+        if self.level is not None and self.sdg is None:
+            raise ValueError("A level filter requires an sdg.")
+        return self
 
 
 class PublicationSimilarityQueryRequest(BaseModel):
     user_query: str
     publication_ids: Optional[List[int]] = None
+    filters: Optional[PublicationSimilarityFilters] = None
+
+
+class PublicationSDGSimilarityRequest(BaseModel):
+    """
+    ANN search over the goal_<prediction_model> vectors of the publications, optionally fused with a content search
+    (the publication's own content vector, or the embedded `user_query` of a distribution search).
+    """
+    prediction_model: Literal["aurora", "dvdblk"] = "aurora"
+    content_weight: float = Field(0.0, ge=0.0, le=1.0,
+                                  description="Weight of the content search (0: SDG vectors only; rrf: fused if > 0)")
+    fusion: Literal["weighted", "rrf"] = "weighted"
+    publication_ids: Optional[List[int]] = None
+    exclude_publication_ids: Optional[List[int]] = None
+    filters: Optional[PublicationSimilarityFilters] = None
+
+
+class PublicationSDGDistributionRequest(PublicationSDGSimilarityRequest):
+    sdg_distribution: List[float] = Field(..., min_length=17, max_length=17, description="One score per SDG (1 to 17)")
+    user_query: Optional[str] = None
+
+    @model_validator(mode="after")
+    def content_weight_requires_query(self):
+        if self.content_weight > 0 and not self.user_query:
+            raise ValueError("A content_weight requires a user_query.")
+        return self
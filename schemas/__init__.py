@@ -52,6 +52,10 @@ from .collection import CollectionSchemaBase, CollectionSchemaFull
 
 from .sdg_ranks import SDGRankSchemaBase, SDGRankSchemaFull, UsersSDGRankSchemaBase
 
+from .leaderboard import LeaderboardEntrySchema, LeaderboardSchema # NON-Entity-derived
+
+from .reward_evaluation import RewardEvaluationStatusSchema # NON-Entity-derived
+
 print("Export all models")
 # Export all models for external use
 __all__ = [
@@ -175,7 +179,12 @@ __all__ = [
 
     "SDGRankSchemaBase",
     "SDGRankSchemaFull",
-    "UsersSDGRankSchemaBase" # Non-entity-derived
+    "UsersSDGRankSchemaBase", # Non-entity-derived
+
+    "LeaderboardEntrySchema", # Non-entity-derived
+    "LeaderboardSchema", # Non-entity-derived
+
+    "RewardEvaluationStatusSchema", # Non-entity-derived
 ]
 
 # Black magic below:
@@ -235,6 +244,9 @@ UserSchemaFull.model_rebuild()
 SDGRankSchemaBase.model_rebuild()
 SDGRankSchemaFull.model_rebuild()
 UsersSDGRankSchemaBase.model_rebuild()
+LeaderboardEntrySchema.model_rebuild()
+LeaderboardSchema.model_rebuild()
+RewardEvaluationStatusSchema.model_rebuild()
 
 
 print("Finished rebuilding schemas")
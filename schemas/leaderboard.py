@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+
+# Not directly derived from models
+class LeaderboardEntrySchema(BaseModel):
+    rank: int  # 1-based position on the board
+    user_id: int
+    score: float
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class LeaderboardSchema(BaseModel):
+    board: str
+    sdg: Optional[int] = None
+    total: int  # Number of users on the board
+    offset: int
+    limit: int
+    entries: List[LeaderboardEntrySchema]
+
+    model_config = {
+        "from_attributes": True
+    }
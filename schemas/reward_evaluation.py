@@ -0,0 +1,20 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+from enums.enums import RewardEvaluationStatusType
+
+
+# Not directly derived from models
+class RewardEvaluationStatusSchema(BaseModel):
+    label_id: int
+    status: RewardEvaluationStatusType
+    xp: Optional[int] = None  # Awarded XP once the evaluation is done
+    attempts: int = 0
+    error: Optional[str] = None
+    retry_at: Optional[datetime] = None  # Next attempt of a failed evaluation
+    updated_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
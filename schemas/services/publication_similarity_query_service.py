@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -30,3 +30,10 @@ class PublicationSimilaritySchema(BaseModel):
 
     class Config:
         from_attributes = True  # Enables ORM-style model validation
+
+class PublicationSDGSimilaritySchema(BaseModel):
+    query_building_time: float
+    search_time: float
+    prediction_model: str
+    fusion: Optional[str]
+    results: List[dict]
@@ -0,0 +1,196 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from pynndescent import NNDescent
+
+from settings.settings import ANNIndexSettings
+from utils.logger import logger
+
+ann_index_settings = ANNIndexSettings()
+
+# Setup Logging
+logging = logger(ann_index_settings.ANN_INDEX_LOG_NAME)
+
+
+def embedding_fingerprint(ids: np.ndarray, embeddings: np.ndarray) -> str:
+    """
+    Version of an embedding set: a hash over its IDs (in row order) and float32 vectors.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class ANNIndex:
+    """
+    Persistent approximate nearest-neighbour index (NN-descent, CPU-only) over an embedding matrix.
+
+    The index and its k-NN graph are stored in <INDEX_DIR>/<fingerprint>-<metric>-k<k>/, where the fingerprint
+    versions the embedding set (IDs and vectors). Consumers that need the neighbour structure of the same
+    embeddings (UMAP fits with other min_dist values, topic models, similarity lookups) load it instead of
+    searching again: `precomputed_knn` is the `precomputed_knn` argument of umap.UMAP.
+    """
+
+    def __init__(self, ids: np.ndarray, index: NNDescent, graph_indices: np.ndarray, graph_distances: np.ndarray,
+                 version: str):
+        self.ids = ids
+        self.index = index
+        self.graph_indices = graph_indices
+        self.graph_distances = graph_distances
+        self.version = version
+        self.row_of = {id_: row for row, id_ in enumerate(ids.tolist())}
+
+    @property
+    def n_neighbors(self) -> int:
+        return self.graph_indices.shape[1]
+
+    @staticmethod
+    def _path(index_dir: str, fingerprint: str, metric: str, n_neighbors: int) -> str:
+        return os.path.join(index_dir, f"{fingerprint}-{metric}-k{n_neighbors}")
+
+    @classmethod
+    def build(cls, ids: Sequence[int], embeddings: np.ndarray, n_neighbors: int, metric: str = None,
+              index_dir: str = None) -> "ANNIndex":
+        """
+        Build the index over the embeddings and store it.
+
+        Args:
+            ids (Sequence[int]): ID of every embedding row (e.g. publication IDs).
+            embeddings (np.ndarray): (n, d) embedding matrix.
+            n_neighbors (int): Neighbours per point in the stored graph (the point itself included).
+            metric (str): Distance metric, as in UMAP.
+            index_dir (str): Directory of the stored indices.
+
+        Returns:
+            ANNIndex: The built index.
+        """
+        metric = metric or ann_index_settings.DEFAULT_METRIC
+        index_dir = index_dir or ann_index_settings.INDEX_DIR
+        ids = np.asarray(ids, dtype=np.int64)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        n_neighbors = min(n_neighbors, len(ids) - 1)
+        fingerprint = embedding_fingerprint(ids, embeddings)
+
+        start = time.perf_counter()
+        index = NNDescent(
+            embeddings,
+            n_neighbors=n_neighbors,
+            metric=metric,
+            random_state=ann_index_settings.RANDOM_STATE,
+            low_memory=True,
+            n_jobs=ann_index_settings.N_JOBS,
+        )
+        graph_indices, graph_distances = index.neighbor_graph
+        logging.info(f"Built the {metric} k={n_neighbors} neighbour graph of {len(ids)} embeddings "
+                     f"in {time.perf_counter() - start:.1f} seconds.")
+
+        path = cls._path(index_dir, fingerprint, metric, n_neighbors)
+        temporary_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(temporary_path, exist_ok=True)
+        np.save(os.path.join(temporary_path, "ids.npy"), ids)
+        np.save(os.path.join(temporary_path, "graph_indices.npy"), graph_indices)
+        np.save(os.path.join(temporary_path, "graph_distances.npy"), graph_distances)
+        joblib.dump(index, os.path.join(temporary_path, "index.joblib"))
+        with open(os.path.join(temporary_path, "meta.json"), "w") as file:
+            json.dump({"fingerprint": fingerprint, "metric": metric, "n_neighbors": n_neighbors, "size": len(ids),
+                       "dimensions": embeddings.shape[1]}, file)
+        if os.path.exists(path):
+            shutil.rmtree(temporary_path)  # Built concurrently by another process
+        else:
+            os.replace(temporary_path, path)
+
+        return cls(ids, index, graph_indices, graph_distances, os.path.basename(path))
+
+    @classmethod
+    def load(cls, path: str, with_index: bool = True) -> "ANNIndex":
+        """
+        Load a stored index. Without the search index only `knn` by ID and `precomputed_knn` without a
+        search index are available.
+        """
+        index = joblib.load(os.path.join(path, "index.joblib")) if with_index else None
+        return cls(
+            np.load(os.path.join(path, "ids.npy")),
+            index,
+            np.load(os.path.join(path, "graph_indices.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "graph_distances.npy"), mmap_mode="r"),
+            os.path.basename(path),
+        )
+
+    @classmethod
+    def find(cls, fingerprint: str, n_neighbors: int, metric: str = None, index_dir: str = None) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: Path of the stored index of the embedding set with the fewest neighbours
+            that still covers n_neighbors, if any.
+        """
+        metric = metric or ann_index_settings.DEFAULT_METRIC
+        index_dir = index_dir or ann_index_settings.INDEX_DIR
+        candidates = []
+        for path in glob.glob(os.path.join(index_dir, f"{fingerprint}-{metric}-k*")):
+            k = os.path.basename(path).rsplit("-k", 1)[1]
+            if k.isdigit() and int(k) >= n_neighbors:
+                candidates.append((int(k), path))
+        return min(candidates)[1] if candidates else None
+
+    @classmethod
+    def load_or_build(cls, ids: Sequence[int], embeddings: np.ndarray, n_neighbors: int, metric: str = None,
+                      index_dir: str = None) -> "ANNIndex":
+        """
+        Load the stored index of the embedding set, or build it if there is none with enough neighbours.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        fingerprint = embedding_fingerprint(ids, embeddings)
+        path = cls.find(fingerprint, min(n_neighbors, len(ids) - 1), metric, index_dir)
+        if path:
+            logging.info(f"Reusing the neighbour graph {path}.")
+            return cls.load(path)
+        return cls.build(ids, embeddings, n_neighbors, metric, index_dir)
+
+    def knn(self, ids: Sequence[int] = None, vectors: np.ndarray = None, k: int = 10,
+            include_self: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest neighbours of indexed points (by ID, read from the stored graph) or of new vectors
+        (searched in the index).
+
+        Args:
+            ids (Sequence[int]): IDs of indexed points.
+            vectors (np.ndarray): (m, d) query vectors (if no IDs are given).
+            k (int): Number of neighbours.
+            include_self (bool): Whether an indexed point is its own first neighbour.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (m, k) neighbour IDs and distances, nearest first.
+        """
+        if ids is not None:
+            rows = [self.row_of[id_] for id_ in ids]
+            first = 0 if include_self else 1
+            if first + k > self.n_neighbors:
+                raise ValueError(f"The stored graph has {self.n_neighbors} neighbours per point, {first + k} requested.")
+            indices = self.graph_indices[rows, first:first + k]
+            distances = self.graph_distances[rows, first:first + k]
+        else:
+            if self.index is None:
+                raise ValueError("The index was loaded without its search index.")
+            indices, distances = self.index.query(np.asarray(vectors, dtype=np.float32), k=k)
+        return self.ids[indices], np.asarray(distances)
+
+    def precomputed_knn(self, n_neighbors: int) -> Tuple[np.ndarray, np.ndarray, Optional[NNDescent]]:
+        """
+        Hand-off to umap.UMAP(precomputed_knn=...): the first n_neighbors columns of the graph, whose rows
+        are the rows of the embedding matrix the index was built on, and the search index for `transform`.
+        """
+        if n_neighbors > self.n_neighbors:
+            raise ValueError(f"The stored graph has {self.n_neighbors} neighbours per point, {n_neighbors} requested.")
+        return (
+            np.ascontiguousarray(self.graph_indices[:, :n_neighbors]),
+            np.ascontiguousarray(self.graph_distances[:, :n_neighbors]),
+            self.index,
+        )
@@ -0,0 +1,272 @@
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from settings.settings import CacheServiceSettings
+from utils.logger import logger
+
+cache_service_settings = CacheServiceSettings()
+
+# Setup Logging
+logging = logger(cache_service_settings.CACHE_SERVICE_LOG_NAME)
+
+
+class LRUCacheBackend:
+    """
+    In-process LRU cache with per-entry TTLs and tag sets.
+    Used as fallback whenever Redis is not reachable (e.g. local development and tests).
+    """
+
+    def __init__(self, max_entries: int = cache_service_settings.LRU_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Set[str]] = {}
+        self._lock = Lock()
+
+    def _discard(self, key: str) -> bool:
+        """
+        Remove an entry and its tag memberships; empty tag sets are dropped. The caller holds the lock.
+        """
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return self._entries.pop(key, None) is not None
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int, tags: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._discard(key)  # Tags of a replaced entry no longer apply
+            self._entries[key] = (time.monotonic() + ttl, value)
+            tags = set(tags)
+            if tags:
+                self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            return sum(self._discard(key) for key in list(self._tags.get(tag, ())))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+
+class RedisCacheBackend:
+    """
+    Redis-backed cache. Every tag is a Redis set holding the keys that were stored under it; the set expires
+    with the longest-lived of its keys (EXPIRE NX/GT, Redis >= 7), so tags of expired entries do not pile up.
+    """
+
+    def __init__(self, client, tag_prefix: str = cache_service_settings.CACHE_TAG_PREFIX):
+        self.client = client
+        self.tag_prefix = tag_prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.tag_prefix}:{tag}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(key)
+        if value is None:
+            return None
+        # The shared client is created with decode_responses=True
+        return value.encode() if isinstance(value, str) else value
+
+    def set(self, key: str, value: bytes, ttl: int, tags: Iterable[str] = ()) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.set(key, value, ex=ttl)
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipeline.sadd(tag_key, key)
+            pipeline.expire(tag_key, ttl, nx=True)  # New tag set
+            pipeline.expire(tag_key, ttl, gt=True)  # Never shorten the TTL of the longest-lived member
+        pipeline.execute()
+
+    def invalidate_tag(self, tag: str) -> int:
+        tag_key = self._tag_key(tag)
+        keys = self.client.smembers(tag_key)
+        pipeline = self.client.pipeline()
+        if keys:
+            pipeline.delete(*keys)
+        pipeline.delete(tag_key)
+        pipeline.execute()
+        return len(keys)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{cache_service_settings.CACHE_KEY_PREFIX}:*"):
+            self.client.delete(key)
+
+
+class CacheService:
+    """
+    Response cache for hot read endpoints.
+
+    Stores serialized response bytes under keys derived from the route and its parameters.
+    Redis is used when available; otherwise (or when Redis fails at runtime) the service
+    falls back to an in-process LRU so the API keeps working without the cache server, and
+    probes Redis again every REDIS_REPROBE_INTERVAL seconds to switch back once it recovers.
+    """
+
+    def __init__(self, redis_client=None, max_entries: int = cache_service_settings.LRU_MAX_ENTRIES):
+        self.fallback = LRUCacheBackend(max_entries=max_entries)
+        self.backend = self.fallback
+        self.redis_client = redis_client
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.errors = 0
+        self._reprobe_at: Optional[float] = None
+        # Tags invalidated while Redis was unreachable, replayed on its entries once it is back
+        self._missed_tags: Set[str] = set()
+
+        if redis_client is not None:
+            try:
+                redis_client.ping()
+                self.backend = RedisCacheBackend(redis_client)
+                logging.info("CacheService initialized with Redis backend.")
+            except Exception as e:
+                logging.warning(f"Redis not reachable, falling back to in-process LRU cache: {e}")
+                self._schedule_reprobe()
+        else:
+            logging.info("CacheService initialized with in-process LRU backend.")
+
+    @property
+    def backend_name(self) -> str:
+        return "redis" if isinstance(self.backend, RedisCacheBackend) else "lru"
+
+    def _schedule_reprobe(self) -> None:
+        self._reprobe_at = time.monotonic() + cache_service_settings.REDIS_REPROBE_INTERVAL
+
+    def _use_fallback(self, e: Exception) -> None:
+        logging.error(f"Redis cache error, switching to in-process LRU cache: {e}")
+        self.errors += 1
+        self.backend = self.fallback
+        self._schedule_reprobe()
+
+    def _maybe_reprobe(self) -> None:
+        """
+        Switch back to Redis once it answers again. Tags invalidated in the meantime are invalidated on Redis
+        first, so no entry that went stale during the outage is served.
+        """
+        if self._reprobe_at is None or time.monotonic() < self._reprobe_at:
+            return
+        self._reprobe_at = None
+        try:
+            self.redis_client.ping()
+            backend = RedisCacheBackend(self.redis_client)
+            for tag in list(self._missed_tags):
+                backend.invalidate_tag(tag)
+        except Exception as e:
+            logging.warning(f"Redis still not reachable: {e}")
+            self._schedule_reprobe()
+            return
+        self._missed_tags.clear()
+        self.fallback.clear()
+        self.backend = backend
+        logging.info("Redis reachable again, switched back to the Redis cache backend.")
+
+    def get(self, key: str, namespace: str = "default") -> Optional[bytes]:
+        self._maybe_reprobe()
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._use_fallback(e)
+            value = self.backend.get(key)
+
+        if value is None:
+            self.misses[namespace] += 1
+        else:
+            self.hits[namespace] += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: int = cache_service_settings.DEFAULT_TTL, tags: Iterable[str] = ()) -> None:
+        tags = list(tags)
+        self._maybe_reprobe()
+        try:
+            self.backend.set(key, value, ttl, tags)
+        except Exception as e:
+            self._use_fallback(e)
+            self.backend.set(key, value, ttl, tags)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Remove every cached entry stored under one of the given tags.
+        """
+        tags = list(tags)
+        self._maybe_reprobe()
+        removed = 0
+        for tag in tags:
+            try:
+                removed += self.backend.invalidate_tag(tag)
+            except Exception as e:
+                self._use_fallback(e)
+                removed += self.backend.invalidate_tag(tag)
+            # Entries may still sit in the fallback if Redis failed mid-run
+            if self.backend is not self.fallback:
+                removed += self.fallback.invalidate_tag(tag)
+            elif self.redis_client is not None:
+                self._missed_tags.add(tag)
+        logging.info(f"Invalidated {removed} cache entries for tags {tags}.")
+        return removed
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.fallback.clear()
+
+    def stats(self) -> Dict:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            "backend": self.backend_name,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "errors": self.errors,
+            "routes": {
+                namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]}
+                for namespace in namespaces
+            },
+        }
+
+
+_cache_service: Optional[CacheService] = None
+
+
+def get_cache_service() -> CacheService:
+    """
+    Return the shared CacheService, connecting to Redis on first use.
+    """
+    global _cache_service
+    if _cache_service is None:
+        try:
+            from db.redisdb_connector import client as redis_client
+        except Exception as e:
+            logging.warning(f"Redis connector unavailable: {e}")
+            redis_client = None
+        _cache_service = CacheService(redis_client)
+    return _cache_service
+
+
+def set_cache_service(cache_service: Optional[CacheService]) -> None:
+    """
+    Replace the shared CacheService (e.g. with an LRU-only instance in tests).
+    """
+    global _cache_service
+    _cache_service = cache_service
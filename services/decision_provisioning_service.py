@@ -0,0 +1,183 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from enums.enums import DecisionType, ScenarioType
+from models import SDGLabelDecision, SDGLabelHistory, SDGLabelSummary, SDGPrediction
+from services.decision_service import VoteTally
+from settings.settings import DecisionProvisioningServiceSettings, SDGSettings
+from utils.logger import logger
+
+decision_provisioning_service_settings = DecisionProvisioningServiceSettings()
+sdg_settings = SDGSettings()
+
+# Setup Logging
+logging = logger(decision_provisioning_service_settings.DECISION_PROVISIONING_SERVICE_LOG_NAME)
+
+SDG_COLUMNS = [getattr(SDGPrediction, f"sdg{i}") for i in range(1, sdg_settings.SDGOAL_NUMBER + 1)]
+
+
+def suggested_labels(prediction_matrix: np.ndarray) -> np.ndarray:
+    """
+    Suggested label (1-17) per row of an (n, 17) prediction matrix: the SDG with the highest prediction.
+    Ties resolve to the lowest SDG, as in SDGPrediction.get_highest_sdg.
+    """
+    if not len(prediction_matrix):
+        return np.zeros(0, dtype=int)
+    return np.argmax(np.nan_to_num(prediction_matrix, nan=-np.inf), axis=1) + 1
+
+
+class DecisionProvisioningService:
+    """
+    Makes sure a set of publications has label histories and decisions, with a constant number of statements.
+
+    Missing SDGLabelHistories and SDGLabelDecisions are found with one query per chunk of publications and
+    inserted with multi-row INSERTs. Label summaries without a history are locked before their history is
+    created, and the histories, then their decisions, are locked (SELECT ... FOR UPDATE) while the decisions
+    are checked and created, so concurrent callers never create a second history or decision. All rows are
+    locked in ascending ID order across chunks, and histories before decisions as in label submission
+    (DecisionService.find_or_create_decision_for_update), so callers do not deadlock.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def provision(self, publication_ids: Sequence[int], open_only: bool = False,
+                  loader_options: Sequence = ()) -> Dict[int, List[SDGLabelDecision]]:
+        """
+        Return the decisions of every publication, creating a decision where there is none.
+
+        Args:
+            publication_ids: Publications to provision. Publications without an SDGLabelSummary are skipped.
+            open_only: Only return (and require) decisions whose scenario is not DECIDED.
+            loader_options: Eager-loading options for the returned decisions (see api.app.loader_profiles).
+
+        Returns:
+            Dict[int, List[SDGLabelDecision]]: Decisions per publication ID, in decision ID order.
+        """
+        chunk_size = decision_provisioning_service_settings.CHUNK_SIZE
+        sorted_publication_ids = sorted(set(publication_ids))
+        histories: Dict[int, int] = {}
+        for start in range(0, len(sorted_publication_ids), chunk_size):
+            histories.update(self._provision_histories(sorted_publication_ids[start:start + chunk_size]))
+
+        history_ids = sorted(histories.values())
+        publication_by_history = {history_id: publication_id for publication_id, history_id in histories.items()}
+        for start in range(0, len(history_ids), chunk_size):
+            self._provision_decisions(history_ids[start:start + chunk_size], publication_by_history, open_only)
+        self.db.commit()
+
+        decisions: Dict[int, List[SDGLabelDecision]] = defaultdict(list)
+        for start in range(0, len(history_ids), chunk_size):
+            query = (
+                self.db.query(SDGLabelDecision)
+                .options(*loader_options)
+                .filter(SDGLabelDecision.history_id.in_(history_ids[start:start + chunk_size]))
+                .order_by(SDGLabelDecision.decision_id)
+            )
+            if open_only:
+                query = query.filter(SDGLabelDecision.scenario_type != ScenarioType.DECIDED)
+            for decision in query:
+                decisions[publication_by_history[decision.history_id]].append(decision)
+        return decisions
+
+    def _provision_histories(self, publication_ids: List[int]) -> Dict[int, int]:
+        """
+        Create the missing histories of a chunk of publications, in ascending ID order (flushed, not committed).
+
+        Returns:
+            Dict[int, int]: History ID per publication ID (publications with an SDGLabelSummary only).
+        """
+        # Label summaries with their history (if it still exists), one query
+        summary_query = (
+            select(SDGLabelSummary.sdg_label_summary_id, SDGLabelSummary.publication_id, SDGLabelHistory.history_id)
+            .outerjoin(SDGLabelHistory, SDGLabelHistory.history_id == SDGLabelSummary.history_id)
+        )
+        rows = self.db.execute(summary_query.where(SDGLabelSummary.publication_id.in_(publication_ids))).all()
+        histories = {publication_id: history_id for _, publication_id, history_id in rows if history_id}
+
+        without_history = [publication_id for _, publication_id, history_id in rows if not history_id]
+        if not without_history:
+            return histories
+
+        # Lock these summaries and re-read them: a concurrent caller may have created their history meanwhile
+        locked_rows = self.db.execute(
+            summary_query
+            .where(SDGLabelSummary.publication_id.in_(without_history))
+            .order_by(SDGLabelSummary.publication_id)
+            .with_for_update()
+        ).all()
+        histories.update({publication_id: history_id for _, publication_id, history_id in locked_rows if history_id})
+        summaries_without_history = [(summary_id, publication_id) for summary_id, publication_id, history_id in locked_rows
+                                     if not history_id]
+        if summaries_without_history:
+            logging.info(f"Creating {len(summaries_without_history)} missing SDGLabelHistories.")
+            new_histories = [SDGLabelHistory(active=True) for _ in summaries_without_history]
+            self.db.add_all(new_histories)
+            self.db.flush()
+            self.db.execute(update(SDGLabelSummary), [
+                {"sdg_label_summary_id": summary_id, "history_id": history.history_id}
+                for (summary_id, _), history in zip(summaries_without_history, new_histories)
+            ])
+            for (_, publication_id), history in zip(summaries_without_history, new_histories):
+                histories[publication_id] = history.history_id
+        return histories
+
+    def _provision_decisions(self, history_ids: List[int], publication_by_history: Dict[int, int],
+                             open_only: bool) -> None:
+        """
+        Create the missing decisions of a chunk of histories, given in ascending ID order (flushed, not committed).
+        """
+        # Lock the histories, then their decisions; the locking read sees decisions committed by concurrent
+        # callers, which a plain read of the transaction's snapshot would miss
+        self.db.execute(
+            select(SDGLabelHistory.history_id)
+            .where(SDGLabelHistory.history_id.in_(history_ids))
+            .order_by(SDGLabelHistory.history_id)
+            .with_for_update()
+        )
+        decision_query = (
+            select(SDGLabelDecision.history_id)
+            .where(SDGLabelDecision.history_id.in_(history_ids))
+            .order_by(SDGLabelDecision.decision_id)
+            .with_for_update()
+        )
+        if open_only:
+            decision_query = decision_query.where(SDGLabelDecision.scenario_type != ScenarioType.DECIDED)
+        with_decision = set(self.db.scalars(decision_query))
+
+        history_by_publication = {
+            publication_by_history[history_id]: history_id for history_id in history_ids if history_id not in with_decision
+        }
+        missing = list(history_by_publication)
+        if not missing:
+            return
+
+        # Suggested labels: argmax over the prediction matrix of all missing publications
+        prediction_rows = self.db.execute(
+            select(SDGPrediction.publication_id, *SDG_COLUMNS)
+            .where(SDGPrediction.publication_id.in_(missing))
+            .where(SDGPrediction.prediction_model == decision_provisioning_service_settings.DEFAULT_MODEL)
+        ).all()
+        suggested = {publication_id: 0 for publication_id in missing}  # Default if no prediction is found
+        if prediction_rows:
+            matrix = np.array([row[1:] for row in prediction_rows], dtype=float)
+            suggested.update(zip((row[0] for row in prediction_rows), suggested_labels(matrix).tolist()))
+
+        logging.info(f"Creating {len(missing)} SDGLabelDecisions.")
+        empty_tally = VoteTally().to_json()
+        self.db.execute(insert(SDGLabelDecision), [
+            {
+                "history_id": history_by_publication[publication_id],
+                "publication_id": publication_id,
+                "suggested_label": suggested[publication_id],
+                "decided_label": 0,  # Default: not decided
+                "decision_type": DecisionType.CONSENSUS_MAJORITY,
+                "scenario_type": ScenarioType.NOT_ENOUGH_VOTES,
+                "vote_tally": empty_tally,
+            }
+            for publication_id in missing
+        ])
@@ -1,16 +1,21 @@
+import json
 import re
 from collections import Counter, defaultdict
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from enums.enums import DecisionType, ScenarioType
-from models import SDGLabelDecision, SDGLabelHistory, SDGLabelSummary, SDGPrediction, SDGUserLabel
+from models import SDGLabelDecision, SDGLabelHistory, SDGLabelSummary, SDGPrediction, SDGUserLabel, \
+    sdg_label_decision_user_label_association
 from models.publications.publication import Publication
 from request_models.sdg_user_label import UserLabelRequest
 from services.reward_service import RewardService
+from services.sdg_label_count_service import SDGLabelCountService
 from settings.settings import TimeZoneSettings, DecisionServiceSettings
 from utils.logger import logger
 
@@ -21,6 +26,108 @@ decision_service_settings = DecisionServiceSettings()
 logging = logger(decision_service_settings.DECISION_SERVICE_LOG_NAME)
 
 
+def classify_vote_scenario(vote_counts: Dict[int, int], total_votes: int,
+                           votes_needed: int = decision_service_settings.VOTES_NEEDED_FOR_SCENARIO) -> ScenarioType:
+    """
+    Classify the scenario of a decision from the vote count per label of the most recent votes.
+    """
+    if total_votes < votes_needed:
+        logging.info("Not enough votes to trigger a scenario.")
+        return ScenarioType.NOT_ENOUGH_VOTES
+
+    sorted_counts = sorted((count for count in vote_counts.values() if count > 0), reverse=True)
+
+    # Thresholds (relative to total_votes) #TODO: de-hardcode
+    absolute_majority_threshold = total_votes * 0.5  # More than 50% for Confirm
+    significant_count_threshold = total_votes * 0.3  # At least 30% for Investigate
+
+    # Scenario 1: Confirm (Absolute majority > 50% for one class)
+    if sorted_counts[0] > absolute_majority_threshold:
+        logging.info("Scenario: Confirm (Absolute majority).")
+        return ScenarioType.CONFIRM
+
+    # Scenario 2: Tiebreaker (50/50 split between exactly two classes)
+    if len(sorted_counts) == 2 and sorted_counts[0] == sorted_counts[1]: # and sorted_counts[0] == total_votes / 2:
+        logging.info("Scenario: Tiebreaker (50/50 split).")
+        return ScenarioType.TIEBREAKER
+
+    # Scenario 3: Investigate (More than 2 classes with significant counts)
+    if len(sorted_counts) >= 3 and sorted_counts[0] >= significant_count_threshold and sorted_counts[1] >= significant_count_threshold:
+        logging.info("Scenario: Investigate (Multiple significant counts).")
+        return ScenarioType.INVESTIGATE
+
+    # Scenario 4: Explore (No clear majority, multiple classes with low counts)
+    if sorted_counts[0] <= significant_count_threshold and len(sorted_counts) >= 3:
+        logging.info("Scenario: Explore (No clear majority).")
+        return ScenarioType.EXPLORE
+
+    logging.info("Scenario: No specific scenario.")
+    return ScenarioType.NO_SPECIFIC_SCENARIO
+
+
+class VoteTally:
+    """
+    Latest vote per user and vote count per label of one SDGLabelDecision.
+
+    Adding a label is O(1), so neither the scenario nor the consensus needs the decision's full
+    user_labels list. Persisted as JSON in SDGLabelDecision.vote_tally.
+    """
+
+    def __init__(self, latest: Optional[Dict[int, Tuple[int, str]]] = None, counts: Optional[Dict[int, int]] = None):
+        self.latest = latest or {}  # user_id -> (voted_label, labeled_at as naive ISO timestamp)
+        self.counts = Counter(counts or {})  # voted_label -> number of users whose latest vote it is
+
+    @classmethod
+    def from_json(cls, value: str) -> "VoteTally":
+        data = json.loads(value)
+        return cls(
+            {int(user_id): (voted_label, labeled_at) for user_id, (voted_label, labeled_at) in data["latest"].items()},
+            {int(voted_label): count for voted_label, count in data["counts"].items()},
+        )
+
+    @classmethod
+    def from_labels(cls, user_labels: List["SDGUserLabel"]) -> "VoteTally":
+        tally = cls()
+        for label in user_labels:
+            tally.add(label.user_id, label.voted_label, label.labeled_at)
+        return tally
+
+    def to_json(self) -> str:
+        return json.dumps({"latest": self.latest, "counts": self.counts})
+
+    @property
+    def total_votes(self) -> int:
+        return len(self.latest)
+
+    def add(self, user_id: int, voted_label: int, labeled_at: datetime) -> None:
+        """
+        Count a vote, replacing the user's previous vote if this one is more recent.
+        """
+        labeled_at = labeled_at.replace(tzinfo=None)
+        previous = self.latest.get(user_id)
+        if previous is not None:
+            if labeled_at <= datetime.fromisoformat(previous[1]):
+                return  # An older (or the same) vote never replaces the latest one
+            self.counts[previous[0]] -= 1
+            if not self.counts[previous[0]]:
+                del self.counts[previous[0]]
+        self.latest[user_id] = (voted_label, labeled_at.isoformat())
+        self.counts[voted_label] += 1
+
+    def scenario(self, votes_needed: int = decision_service_settings.VOTES_NEEDED_FOR_SCENARIO) -> ScenarioType:
+        return classify_vote_scenario(self.counts, self.total_votes, votes_needed)
+
+    def majority_label(self) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: The label voted by more than half of the users, if any.
+        """
+        if not self.counts:
+            return None
+        winning_label, max_votes = self.counts.most_common(1)[0]
+        return winning_label if max_votes > self.total_votes / 2 else None
+
+
 class DecisionService:
     def __init__(self, db: Session):
         self.db = db
@@ -45,59 +152,43 @@ class DecisionService:
         """
         logging.info("Evaluating vote scenario.")
         most_recent_labels = self.get_most_recent_labels_per_user(user_labels)
+        return classify_vote_scenario(Counter(most_recent_labels), len(most_recent_labels), votes_needed)
 
-        if len(most_recent_labels) < votes_needed:
-            logging.info("Not enough votes to trigger a scenario.")
-            return ScenarioType.NOT_ENOUGH_VOTES
-
-        # Count the occurrences of each label
-        vote_counts = Counter(most_recent_labels)
-        sorted_counts = sorted(vote_counts.values(), reverse=True)
-
-        # Total number of votes
-        total_votes = len(most_recent_labels)
-
-        # Thresholds (relative to total_votes) #TODO: de-hardcode
-        absolute_majority_threshold = total_votes * 0.5  # More than 50% for Confirm
-        significant_count_threshold = total_votes * 0.3  # At least 30% for Investigate
-
-        # Scenario 1: Confirm (Absolute majority > 50% for one class)
-        if sorted_counts[0] > absolute_majority_threshold:
-            logging.info("Scenario: Confirm (Absolute majority).")
-            return ScenarioType.CONFIRM
-
-        # Scenario 2: Tiebreaker (50/50 split between exactly two classes)
-        if len(sorted_counts) == 2 and sorted_counts[0] == sorted_counts[1]: # and sorted_counts[0] == total_votes / 2:
-            logging.info("Scenario: Tiebreaker (50/50 split).")
-            return ScenarioType.TIEBREAKER
-
-        # Scenario 3: Investigate (More than 2 classes with significant counts)
-        if len(sorted_counts) >= 3 and sorted_counts[0] >= significant_count_threshold and sorted_counts[1] >= significant_count_threshold:
-            logging.info("Scenario: Investigate (Multiple significant counts).")
-            return ScenarioType.INVESTIGATE
-
-        # Scenario 4: Explore (No clear majority, multiple classes with low counts)
-        if sorted_counts[0] <= significant_count_threshold and len(sorted_counts) >= 3:
-            logging.info("Scenario: Explore (No clear majority).")
-            return ScenarioType.EXPLORE
+    def get_vote_tally(self, decision: SDGLabelDecision) -> VoteTally:
+        """
+        Load the persisted vote tally of a decision, building it once from its labels if it has none yet.
+        """
+        if decision.vote_tally is None:
+            logging.info(f"Building the vote tally of decision {decision.decision_id} from its labels.")
+            tally = VoteTally.from_labels(decision.user_labels)
+            decision.vote_tally = tally.to_json()
+            return tally
+        return VoteTally.from_json(decision.vote_tally)
+
+    def record_vote(self, decision: SDGLabelDecision, user_label: SDGUserLabel) -> VoteTally:
+        """
+        Add a new label of the decision to its vote tally and update its scenario.
+        """
+        tally = self.get_vote_tally(decision)
+        tally.add(user_label.user_id, user_label.voted_label, user_label.labeled_at)
+        decision.vote_tally = tally.to_json()
 
-        logging.info("Scenario: No specific scenario.")
-        return ScenarioType.NO_SPECIFIC_SCENARIO
+        scenario = tally.scenario()
+        logging.info(f"Update scenario in decision based on new user label: Old scenario {decision.scenario_type}; New scenario {scenario}.")
+        decision.scenario_type = scenario
+        return tally
 
-    def calculate_consensus(self, decision: SDGLabelDecision) -> None:
+    def calculate_consensus(self, decision: SDGLabelDecision, tally: Optional[VoteTally] = None) -> None:
         """
-        Calculate consensus for the given decision and update it.
+        Calculate consensus for the given decision and update it (flushed, committed by the caller).
         Only the most recent label per user is counted.
         """
         logging.info("Calculating consensus.")
-        most_recent_labels = self.get_most_recent_labels_per_user(decision.user_labels)
-        total_votes = len(most_recent_labels)
-
-        if total_votes >= decision_service_settings.VOTES_NEEDED_FOR_CONSENSUS:
-            vote_counts = Counter(most_recent_labels)
-            max_votes = max(vote_counts.values())
-            if max_votes > total_votes / 2:  # Clear majority
-                winning_label = vote_counts.most_common(1)[0][0]
+        tally = tally or self.get_vote_tally(decision)
+
+        if tally.total_votes >= decision_service_settings.VOTES_NEEDED_FOR_CONSENSUS:
+            winning_label = tally.majority_label()
+            if winning_label is not None:  # Clear majority
                 logging.info(f"Consensus reached for label {winning_label}.")
                 decision.scenario_type = ScenarioType.DECIDED
                 self.finalize_decision(decision, winning_label)
@@ -108,7 +199,7 @@ class DecisionService:
             logging.info("Not enough votes for consensus. Leaving decision open.")
             decision.decided_label = 0  # Not enough votes for consensus
 
-        self.db.commit()
+        self.db.flush()
 
     def finalize_decision(self, decision: SDGLabelDecision, winning_label: int) -> None:
         """
@@ -118,7 +209,7 @@ class DecisionService:
         decision.decided_label = winning_label
         decision.decided_at = datetime.now(time_zone_settings.ZURICH_TZ)
         decision.decision_type = DecisionType.CONSENSUS_MAJORITY
-        self.db.commit()
+        self.db.flush()
 
         # Ensure label summary is updated after finalizing decision
         self.update_label_summary(decision)
@@ -137,6 +228,7 @@ class DecisionService:
                 detail="SDGLabelSummary not found for the decision.",
             )
 
+        old_values = {i: getattr(label_summary, f"sdg{i}") for i in range(1, 18)}
         if decision.decided_label == 18:  # Null class
             logging.info("Setting all SDGs to -1 (Null class).")
             for i in range(1, 18):
@@ -145,7 +237,12 @@ class DecisionService:
             logging.info(f"Setting SDG {decision.decided_label} to 1.")
             setattr(label_summary, f"sdg{decision.decided_label}", 1)
 
-        self.db.commit()
+        self.db.flush()
+
+        # Keep the per-SDG label totals in step, in the same transaction
+        SDGLabelCountService(self.db).apply_deltas(
+            {i: getattr(label_summary, f"sdg{i}") - old_values[i] for i in range(1, 18)}
+        )
 
     def handle_manual_confirmation(self, decision: SDGLabelDecision, user_id: int, confirmed_label: int) -> None:
         """
@@ -159,8 +256,7 @@ class DecisionService:
                 detail="Manual confirmation is only allowed in the CONFIRM scenario.",
             )
 
-        most_recent_labels = self.get_most_recent_labels_per_user(decision.user_labels)
-        majority_label = self.has_clear_majority(most_recent_labels, len(most_recent_labels))
+        majority_label = self.get_vote_tally(decision).majority_label()
         if majority_label != confirmed_label:
             logging.error("Confirmed label does not match the majority.")
             raise HTTPException(
@@ -169,6 +265,7 @@ class DecisionService:
             )
 
         self.finalize_decision(decision, confirmed_label)
+        self.db.commit()
 
     def has_clear_majority(self, votes: List[int], total_votes: int) -> Optional[int]:
         """
@@ -188,19 +285,35 @@ class DecisionService:
         """
         Find or create an SDGLabelDecision based on the provided data.
         """
+        decision, _ = self.find_or_create_decision_for_update(request)
+        return decision
+
+    def find_or_create_decision_for_update(self, request: UserLabelRequest) -> Tuple[SDGLabelDecision, Optional[SDGPrediction]]:
+        """
+        Find or create the open SDGLabelDecision of a label submission together with the publication's prediction.
+
+        The rows stay locked until the caller commits, so concurrent votes on the same publication are applied one
+        after another. Both the decision_id and the publication_id path lock in the same order, history (with its
+        label summary) before decision, and the locked rows are read with locking reads, never from the snapshot.
+        """
         logging.info("Finding or creating a decision.")
         if request.decision_id:
             logging.info(f"Decision ID provided: {request.decision_id}.")
-            decision = self.db.query(SDGLabelDecision).filter(
-                SDGLabelDecision.decision_id == request.decision_id
-            ).first()
-            if not decision:
+            row = (
+                self.db.query(SDGLabelDecision.history_id, SDGLabelDecision.publication_id)
+                .filter(SDGLabelDecision.decision_id == request.decision_id)
+                .first()
+            )
+            if not row:
                 logging.error(f"Decision with ID {request.decision_id} not found.")
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"SDGLabelDecision with ID {request.decision_id} not found",
                 )
-            return decision
+            if row.history_id:
+                self.lock_history(row.history_id)
+            decision = self.lock_decision(SDGLabelDecision.decision_id == request.decision_id)
+            return decision, self.get_prediction(row.publication_id)
 
         if not request.publication_id:
             logging.error("Neither decision_id nor publication_id provided.")
@@ -209,29 +322,26 @@ class DecisionService:
                 detail="Either publication_id or decision_id must be provided",
             )
 
-        publication = self.db.query(Publication).filter(
-            Publication.publication_id == request.publication_id
-        ).first()
-        if not publication:
+        row = (
+            self.db.query(Publication.publication_id, SDGLabelSummary.history_id)
+            .outerjoin(SDGLabelSummary, SDGLabelSummary.publication_id == Publication.publication_id)
+            .filter(Publication.publication_id == request.publication_id)
+            .first()
+        )
+        if not row:
             logging.error(f"Publication with ID {request.publication_id} not found.")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Publication with ID {request.publication_id} not found",
             )
-
-        sdg_label_summary = self.db.query(SDGLabelSummary).filter(
-            SDGLabelSummary.publication_id == publication.publication_id
-        ).first()
-        if not sdg_label_summary:
+        if not row.history_id:
             logging.error("SDGLabelSummary not found for the given publication.")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="SDGLabelSummary not found for the given publication",
             )
 
-        history = self.db.query(SDGLabelHistory).filter(
-            SDGLabelHistory.history_id == sdg_label_summary.history_id
-        ).first()
+        history = self.lock_history(row.history_id)
         if not history:
             logging.error("SDGLabelHistory not found for the given summary.")
             raise HTTPException(
@@ -239,10 +349,15 @@ class DecisionService:
                 detail="SDGLabelHistory not found for the given summary",
             )
 
-        sdg_prediction = self.db.query(SDGPrediction).filter(
-            SDGPrediction.publication_id == publication.publication_id,
-            SDGPrediction.prediction_model == decision_service_settings.DEFAULT_MODEL
-        ).first()
+        # Under the history lock, so no concurrent vote can create a second open decision
+        unfinished_decision = self.lock_decision(and_(
+            SDGLabelDecision.history_id == history.history_id,
+            SDGLabelDecision.decided_label == 0,
+        ))
+        sdg_prediction = self.get_prediction(request.publication_id)
+        if unfinished_decision:
+            logging.info("Found an unfinished decision.")
+            return unfinished_decision, sdg_prediction
 
         highest_sdg_number = None
         if sdg_prediction:
@@ -250,18 +365,66 @@ class DecisionService:
             logging.info(
                 f"Highest SDG prediction: {highest_sdg_key} ({highest_sdg_number}), Value: {highest_sdg_value}.")
 
-        unfinished_decision = next((d for d in history.decisions if d.decided_label == 0), None)
-        if unfinished_decision:
-            logging.info("Found an unfinished decision.")
-            return unfinished_decision
-
         decision = SDGLabelDecision(
             suggested_label=highest_sdg_number,
             history_id=history.history_id,
+            publication_id=request.publication_id,
             decision_type=request.decision_type,
             decided_at=datetime.now(),
+            vote_tally=VoteTally().to_json(),  # No labels yet
         )
         self.db.add(decision)
         self.db.flush()
         logging.info("Created a new decision.")
+        return decision, sdg_prediction
+
+    def lock_history(self, history_id: int) -> Optional[SDGLabelHistory]:
+        """
+        Lock an SDGLabelHistory together with its SDGLabelSummary (SELECT ... FOR UPDATE), reloading both.
+        """
+        return (
+            self.db.query(SDGLabelHistory)
+            .options(joinedload(SDGLabelHistory.label_summary))
+            .filter(SDGLabelHistory.history_id == history_id)
+            .populate_existing()
+            .with_for_update()
+            .one_or_none()
+        )
+
+    def lock_decision(self, criterion) -> Optional[SDGLabelDecision]:
+        """
+        Lock the first SDGLabelDecision matching `criterion` and reload it and its user labels with locking reads,
+        so the consensus and the coin rewards see every committed vote.
+        """
+        decision = (
+            self.db.query(SDGLabelDecision)
+            .filter(criterion)
+            .order_by(SDGLabelDecision.decision_id)
+            .populate_existing()
+            .with_for_update()
+            .first()
+        )
+        if decision:
+            user_labels = (
+                self.db.query(SDGUserLabel)
+                .join(
+                    sdg_label_decision_user_label_association,
+                    sdg_label_decision_user_label_association.c.user_label_id == SDGUserLabel.label_id,
+                )
+                .filter(sdg_label_decision_user_label_association.c.decision_id == decision.decision_id)
+                .populate_existing()
+                .with_for_update(read=True)
+                .all()
+            )
+            set_committed_value(decision, "user_labels", user_labels)
         return decision
+
+    def get_prediction(self, publication_id: int) -> Optional[SDGPrediction]:
+        return (
+            self.db.query(SDGPrediction)
+            .filter(
+                SDGPrediction.publication_id == publication_id,
+                SDGPrediction.prediction_model == decision_service_settings.DEFAULT_MODEL,
+            )
+            .first()
+        )
@@ -0,0 +1,228 @@
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+from schemas.sdg_explanations import ExplanationSchema
+from settings.settings import ExplanationServiceSettings
+from utils.logger import logger
+
+explanation_service_settings = ExplanationServiceSettings()
+
+# Setup Logging
+logging = logger(explanation_service_settings.EXPLANATION_SERVICE_LOG_NAME)
+
+# ExplanationSchema fields stored in the documents (the others are set from the publication)
+EXPLANATION_FIELDS = [field for field in ExplanationSchema.model_fields if field not in ("mongodb_id", "sql_id", "oai_identifier")]
+# Compact documents (see encode_compact) store the tokens and scores in binary fields instead
+COMPACT_FIELDS = ["format", "n_tokens", "n_outputs", "token_ids", "scores", "scale", "token_major"]
+EXPLANATION_PROJECTION = {"id": 1, **{field: 1 for field in EXPLANATION_FIELDS + COMPACT_FIELDS}}
+
+DUPLICATE_KEY_ERROR = 11000
+COMPACT_FORMAT = 1
+FLOAT16_MAX = 60000.0  # Below the float16 maximum (65504), so rounding never overflows
+
+
+def convert_oid(document: dict) -> dict:
+    """Convert an extended-JSON {"$oid": ...} _id to an ObjectId."""
+    if isinstance(document.get("_id"), dict) and "$oid" in document["_id"]:
+        document["_id"] = ObjectId(document["_id"]["$oid"])
+    return document
+
+
+class TokenVocabulary:
+    """
+    Token strings of a compact explanation collection, stored as {_id: token_id, token} documents in
+    <collection>_vocabulary. Token IDs are assigned in order of first appearance and never change.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+        self.tokens: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._pending: List[dict] = []
+
+    @classmethod
+    def of(cls, collection: Collection) -> "TokenVocabulary":
+        return cls(collection.database[collection.name + explanation_service_settings.VOCABULARY_SUFFIX]).load()
+
+    def load(self) -> "TokenVocabulary":
+        self.tokens = [document["token"] for document in self.collection.find({}, {"token": 1}).sort("_id", ASCENDING)]
+        self.ids = {token: token_id for token_id, token in enumerate(self.tokens)}
+        return self
+
+    def encode(self, tokens: List[str]) -> np.ndarray:
+        """Token IDs of the tokens; new tokens are added and stored by `save`."""
+        token_ids = np.empty(len(tokens), dtype=np.uint32)
+        for position, token in enumerate(tokens):
+            token_id = self.ids.get(token)
+            if token_id is None:
+                token_id = self.ids[token] = len(self.tokens)
+                self.tokens.append(token)
+                self._pending.append({"_id": token_id, "token": token})
+            token_ids[position] = token_id
+        return token_ids
+
+    def save(self) -> int:
+        """Store the new tokens (before the documents that use them). Returns the number stored."""
+        stored = len(self._pending)
+        if self._pending:
+            self.collection.insert_many(self._pending, ordered=False)
+            self._pending = []
+        return stored
+
+    def decode(self, token_ids: np.ndarray) -> List[str]:
+        if len(token_ids) and int(token_ids.max()) >= len(self.tokens):
+            self.load()  # Tokens added by a conversion since the vocabulary was loaded
+        return [self.tokens[token_id] for token_id in token_ids.tolist()]
+
+
+def encode_compact(document: dict, vocabulary: TokenVocabulary) -> dict:
+    """
+    Compact form of an explanation document:
+      token_ids  uint16 (uint32 for vocabularies above 65535 tokens) vocabulary IDs of the input tokens
+      scores     float16 contributions, one contiguous array of n_tokens values per output (SDG), divided by
+                 `scale` if they exceed the float16 range
+      token_major whether token_scores is (tokens x outputs) in the source, as SHAP returns it for text
+    The other fields (id, base_values, xai_method, prediction_model) are kept as they are.
+    """
+    tokens = document.get("input_tokens") or []
+    scores = np.asarray(document.get("token_scores") or [], dtype=np.float64)
+    if scores.ndim != 2:
+        scores = scores.reshape(len(tokens), -1) if len(tokens) else np.zeros((0, 0))
+    token_major = scores.shape[0] == len(tokens)
+    by_output = scores.T if token_major else scores
+    max_abs = float(np.abs(by_output).max()) if by_output.size else 0.0
+    scale = max_abs / FLOAT16_MAX if max_abs > FLOAT16_MAX else 1.0
+
+    token_ids = vocabulary.encode(tokens)
+    id_dtype = np.uint16 if len(vocabulary.tokens) <= np.iinfo(np.uint16).max + 1 else np.uint32
+    return {
+        **{key: value for key, value in document.items() if key not in ("input_tokens", "token_scores")},
+        "format": COMPACT_FORMAT,
+        "n_tokens": len(tokens),
+        "n_outputs": by_output.shape[0],
+        "token_ids": Binary(token_ids.astype(id_dtype).tobytes()),
+        "scores": Binary(np.ascontiguousarray(by_output / scale, dtype="<f2").tobytes()),
+        "scale": scale,
+        "token_major": token_major,
+    }
+
+
+def decode_compact(document: dict, vocabulary: TokenVocabulary) -> dict:
+    """Inverse of encode_compact (scores rounded to float16 precision)."""
+    n_tokens, n_outputs = document["n_tokens"], document["n_outputs"]
+    token_id_bytes = bytes(document["token_ids"])
+    id_dtype = np.uint16 if n_tokens and len(token_id_bytes) == 2 * n_tokens else np.uint32
+    token_ids = np.frombuffer(token_id_bytes, dtype=id_dtype)
+    scores = np.frombuffer(bytes(document["scores"]), dtype="<f2").astype(np.float64).reshape(n_outputs, n_tokens)
+    scores = scores * document.get("scale", 1.0)
+    decoded = {key: value for key, value in document.items() if key not in COMPACT_FIELDS}
+    decoded["input_tokens"] = vocabulary.decode(token_ids)
+    decoded["token_scores"] = (scores.T if document["token_major"] else scores).tolist()
+    return decoded
+
+
+class ExplanationService:
+    """
+    SHAP explanations in MongoDB, one document per publication, keyed by its OAI identifier (`id`).
+
+    Reads are served by the unique `id` index and project only the fields of ExplanationSchema. Documents in
+    the compact format (utils/mongodb/convert_mongodb_explanations.py) are decoded transparently.
+    """
+
+    _vocabularies: Dict[str, TokenVocabulary] = {}  # Per compact collection, shared by all instances
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    @property
+    def vocabulary(self) -> TokenVocabulary:
+        key = self.collection.full_name
+        if key not in self._vocabularies:
+            self._vocabularies[key] = TokenVocabulary.of(self.collection)
+        return self._vocabularies[key]
+
+    def ensure_indexes(self) -> None:
+        """Create the unique `id` index (a no-op if it exists)."""
+        self.collection.create_index([("id", ASCENDING)], unique=True, name="id_unique")
+
+    def to_schema(self, document: dict, publication_id: int) -> ExplanationSchema:
+        if document.get("format") == COMPACT_FORMAT:
+            document = decode_compact(document, self.vocabulary)
+        return ExplanationSchema.model_validate({
+            **{field: document.get(field) for field in EXPLANATION_FIELDS},
+            "mongodb_id": str(document["_id"]),
+            "oai_identifier": document["id"],
+            "sql_id": publication_id,
+        })
+
+    def get(self, oai_identifier: str, publication_id: int) -> Optional[ExplanationSchema]:
+        document = self.collection.find_one({"id": oai_identifier}, EXPLANATION_PROJECTION)
+        return self.to_schema(document, publication_id) if document else None
+
+    def get_many(self, publication_ids: Dict[str, int]) -> List[ExplanationSchema]:
+        """
+        Explanations of many publications with one $in query.
+
+        Args:
+            publication_ids (Dict[str, int]): Publication ID per OAI identifier.
+
+        Returns:
+            List[ExplanationSchema]: The explanations found, in the order of publication_ids.
+        """
+        documents = {
+            document["id"]: document
+            for document in self.collection.find({"id": {"$in": list(publication_ids)}}, EXPLANATION_PROJECTION)
+        }
+        return [
+            self.to_schema(documents[oai_identifier], publication_id)
+            for oai_identifier, publication_id in publication_ids.items() if oai_identifier in documents
+        ]
+
+    def bulk_load(self, documents: Iterable[dict],
+                  batch_size: int = explanation_service_settings.LOAD_BATCH_SIZE) -> dict:
+        """
+        Insert the documents with unordered bulk writes, batch by batch as they are read. Documents whose `id`
+        is already stored are skipped, so an interrupted load can be rerun.
+
+        Returns:
+            dict: Inserted and skipped documents, seconds and documents per second.
+        """
+        self.ensure_indexes()
+        start = time.perf_counter()
+        inserted = skipped = 0
+        batch = []
+
+        def flush():
+            nonlocal inserted, skipped
+            try:
+                inserted += len(self.collection.insert_many(batch, ordered=False).inserted_ids)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                    raise
+                inserted += e.details.get("nInserted", 0)
+                skipped += len(errors)
+            batch.clear()
+
+        for document in documents:
+            batch.append(convert_oid(document))
+            if len(batch) >= batch_size:
+                flush()
+                seconds = time.perf_counter() - start
+                logging.info(f"{inserted} explanations inserted, {skipped} skipped ({inserted / seconds:.0f} docs/s).")
+        if batch:
+            flush()
+
+        seconds = time.perf_counter() - start
+        return {
+            "inserted": inserted,
+            "skipped": skipped,
+            "seconds": round(seconds, 2),
+            "docs_per_second": round(inserted / seconds) if seconds else 0,
+        }
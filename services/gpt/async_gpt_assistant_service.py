@@ -0,0 +1,178 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI
+from pydantic import BaseModel, ValidationError
+
+from settings.settings import GPTAssistantServiceSettings, AsyncGPTAssistantServiceSettings, LLMResponseCacheSettings
+from utils.env_loader import load_env, get_env_variable
+from utils.logger import logger
+from .gpt_assistant_base import DEFAULT_TEMPERATURE, GPTAssistantBase, GPTRequest, parsed_response
+from .llm_response_cache import LLMResponseCache
+
+# Load the API environment variables
+load_env('api.env')
+
+gpt_assistant_service_settings = GPTAssistantServiceSettings()
+async_gpt_assistant_service_settings = AsyncGPTAssistantServiceSettings()
+llm_response_cache_settings = LLMResponseCacheSettings()
+
+# Setup Logging
+logging = logger(async_gpt_assistant_service_settings.ASYNC_GPT_ASSISTANT_SERVICE_LOG_NAME)
+
+
+def is_retryable(e: Exception) -> bool:
+    """Rate limits (429), server errors (5xx), timeouts and connection errors are retried."""
+    if isinstance(e, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(e, APIStatusError) and (e.status_code == 429 or e.status_code >= 500)
+
+
+def backoff_delay(attempt: int, e: Optional[Exception] = None) -> float:
+    """
+    Full-jitter exponential backoff; a Retry-After header of the response takes precedence.
+    """
+    response = getattr(e, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), async_gpt_assistant_service_settings.RETRY_MAX_DELAY_SECONDS)
+        except ValueError:
+            pass
+    cap = min(
+        async_gpt_assistant_service_settings.RETRY_MAX_DELAY_SECONDS,
+        async_gpt_assistant_service_settings.RETRY_BASE_DELAY_SECONDS * 2 ** attempt,
+    )
+    return random.uniform(0, cap)
+
+
+class AsyncGPTAssistantService(GPTAssistantBase):
+    """
+    Non-blocking counterpart of GPTAssistantService for async routes: the same operations (GPTAssistantBase),
+    each returning an awaitable.
+
+    Uses AsyncOpenAI, so waiting for the model never blocks the event loop, and bounds the load on
+    the OpenAI API with a global semaphore plus one semaphore per operation (e.g. summarize_publication).
+    Rate limits and server errors are retried with jittered exponential backoff. Identical requests that
+    are in flight at the same time are coalesced into a single call, and answered requests are served
+    from the LLMResponseCache.
+    """
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None, model: str = gpt_assistant_service_settings.GPT_MODEL,
+                 cache: Optional[LLMResponseCache] = None, use_cache: bool = llm_response_cache_settings.ENABLED,
+                 max_concurrency: int = async_gpt_assistant_service_settings.MAX_CONCURRENCY,
+                 operation_limits: Optional[Dict[str, int]] = None):
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=get_env_variable('OPENAI_API_KEY'),
+                base_url=get_env_variable('OPENAI_BASE_URL'),  # Unset: api.openai.com; set it to target a local fake server
+                max_retries=0,  # Retries are handled here, with backoff shared by the coalesced callers
+            )
+        super().__init__(model, cache, use_cache)
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.operation_limits = {**async_gpt_assistant_service_settings.OPERATION_LIMITS, **(operation_limits or {})}
+
+        # Semaphores and tasks are bound to the event loop they are first used in
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._operation_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+
+    def _semaphore(self, operation: str) -> asyncio.Semaphore:
+        if operation not in self._operation_semaphores:
+            limit = self.operation_limits.get(operation, async_gpt_assistant_service_settings.DEFAULT_OPERATION_LIMIT)
+            self._operation_semaphores[operation] = asyncio.Semaphore(limit)
+        return self._operation_semaphores[operation]
+
+    async def _execute(self, request: GPTRequest):
+        try:
+            return request.result(await self._call_model(request))
+        except Exception as e:
+            if request.fallback is None:
+                raise
+            return request.fallback(e)
+
+    async def _call_model(self, request: GPTRequest):
+        """
+        Answer the request from the cache, join an identical in-flight request, or send it.
+        """
+        key = request.key(self.model)
+        cached = self._cached(request, key)
+        if cached is not None:
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # The call runs as a task of its own, so a cancelled caller (e.g. a closed connection) does not
+            # cancel it for the other callers waiting on the same request
+            task = asyncio.ensure_future(self._send(request, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _send(self, request: GPTRequest, key: str):
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        for attempt in range(async_gpt_assistant_service_settings.MAX_RETRIES + 1):
+            try:
+                async with self._global_semaphore, self._semaphore(request.operation):
+                    start = time.perf_counter()
+                    self.calls += 1
+                    response = await self.client.beta.chat.completions.parse(**request.completion_kwargs(self.model))
+                    latency = time.perf_counter() - start
+                break
+            except ValidationError as e:
+                raise ValueError(f"Invalid response format: {str(e)}")
+            except Exception as e:
+                if not is_retryable(e) or attempt == async_gpt_assistant_service_settings.MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, e)
+                self.retries += 1
+                logging.warning(f"{request.operation} failed ({e.__class__.__name__}), retry {attempt + 1} in {delay:.2f}s.")
+                await asyncio.sleep(delay)  # Outside the semaphores, so waiting does not hold a slot
+
+        parsed = parsed_response(response)
+        self._store(request, key, parsed, latency, response)
+        return parsed
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "in_flight": len(self._in_flight),
+        }
+
+    async def parse(self, operation: str, context: str, prompt_data: Any, response_model: type[BaseModel],
+                    temperature: float = DEFAULT_TEMPERATURE) -> BaseModel:
+        """Structured request with a caller-defined prompt (e.g. dataset generation jobs), under the limits of `operation`."""
+        return await self._execute(GPTRequest(operation, context, prompt_data, response_model, temperature=temperature))
+
+
+_async_gpt_assistant_service: Optional[AsyncGPTAssistantService] = None
+
+
+def get_async_gpt_assistant_service() -> AsyncGPTAssistantService:
+    """
+    Return the shared AsyncGPTAssistantService, so all routes share its limits and in-flight requests.
+    """
+    global _async_gpt_assistant_service
+    if _async_gpt_assistant_service is None:
+        _async_gpt_assistant_service = AsyncGPTAssistantService()
+    return _async_gpt_assistant_service
+
+
+def set_async_gpt_assistant_service(async_gpt_assistant_service: Optional[AsyncGPTAssistantService]) -> None:
+    """
+    Replace the shared AsyncGPTAssistantService (e.g. with one pointing at a fake server in tests).
+    """
+    global _async_gpt_assistant_service
+    _async_gpt_assistant_service = async_gpt_assistant_service
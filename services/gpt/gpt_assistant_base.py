@@ -0,0 +1,213 @@
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from enums import SDGType
+from schemas.gpt_assistant_service import GPTResponseKeywordsSchema, GPTResponseSDGAnalysisSchema, \
+    GPTResponseFactSchema, GPTResponseSummarySchema, GPTResponseCollectiveSummarySchema, GPTResponseSkillsQuerySchema, \
+    GPTResponseAnnotationScoreSchema, GPTResponseCommentSummarySchema, SDGPredictionSchema, \
+    GPTPersonaResponseAnnotationSchema, GPTPersonaResponseCommentSchema
+from .llm_response_cache import LLMResponseCache, get_llm_response_cache, request_key, usage_cost
+from .strategies.fact_generator_strategy import FactStrategy
+from .strategies.keyword_extractor_strategy import ExtractKeywordsStrategy
+from .strategies.persona_comment_generator_strategy import GenerateCommentStrategy, GenerateAnnotationStrategy
+from .strategies.sdg_explainer_strategy import GoalStrategy, TargetStrategy
+from .strategies.summarize_sdg_user_label_comments import SummarizeSDGUserLabelCommentsStrategy
+from .strategies.summarizer_strategy import SummarizeSinglePublicationStrategy, SummarizeMultiplePublicationsStrategy
+from .strategies.user_annotation_evaluator_strategy import AnnotationEvaluatorStrategy
+from .strategies.user_query_generator_strategy import SkillsQueryStrategy, InterestsQueryStrategy, SDGSkillsStrategy, \
+    SDGInterestsStrategy
+
+DEFAULT_TEMPERATURE = 0.7
+CREATIVE_TEMPERATURE = 1.2  # 0.7-1.5 recommended for high creativity
+
+
+def unchanged(response: BaseModel) -> BaseModel:
+    return response
+
+
+@dataclass
+class GPTRequest:
+    """
+    One structured request: the prompt of a strategy, the response model and how the caller's value is taken
+    from the parsed response (`result`) or produced if the call fails (`fallback`, None: the error is raised).
+    """
+    operation: str
+    context: str
+    prompt_data: Any
+    response_model: type[BaseModel]
+    temperature: float = DEFAULT_TEMPERATURE
+    use_cache: bool = True
+    result: Callable[[BaseModel], Any] = unchanged
+    fallback: Optional[Callable[[Exception], Any]] = None
+
+    def key(self, model: str) -> str:
+        return request_key(model, self.temperature, self.context, self.prompt_data, self.response_model)
+
+    def completion_kwargs(self, model: str) -> dict:
+        """Arguments of `client.beta.chat.completions.parse`."""
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": self.context},
+                {"role": "user", "content": json.dumps(self.prompt_data)}
+            ],
+            "temperature": self.temperature,
+            "response_format": self.response_model,
+        }
+
+
+def parsed_response(response: Any) -> Optional[BaseModel]:
+    return response.choices[0].message.parsed
+
+
+class GPTAssistantBase(ABC):
+    """
+    Operations of the GPT assistants, built once as GPTRequests, plus the response cache they share.
+
+    Subclasses only implement the transport in `_execute(request)`: GPTAssistantService returns the value,
+    AsyncGPTAssistantService returns an awaitable of it, so every operation below is awaited on the async service.
+    """
+
+    def __init__(self, model: str, cache: Optional[LLMResponseCache], use_cache: bool):
+        self.model = model
+        self._cache = cache
+        self.use_cache = use_cache
+
+    @property
+    def cache(self) -> LLMResponseCache:
+        if self._cache is None:
+            self._cache = get_llm_response_cache()
+        return self._cache
+
+    def _cached(self, request: GPTRequest, key: str) -> Optional[BaseModel]:
+        """The cached response of the request, if it may be cached and was answered before."""
+        if not (request.use_cache and self.use_cache):
+            return None
+        return self.cache.get(key, request.response_model)
+
+    def _store(self, request: GPTRequest, key: str, parsed: Optional[BaseModel], latency: float, response: Any) -> None:
+        if request.use_cache and self.use_cache and parsed is not None:
+            self.cache.set(key, parsed, latency, usage_cost(getattr(response, "usage", None)))
+
+    @abstractmethod
+    def _execute(self, request: GPTRequest):
+        """Send the request (or answer it from the cache) and return request.result of the response."""
+
+    def extract_keywords(self, title: str, abstract: str) -> List[str]:
+        """Extracts keywords with a context specific to keyword extraction."""
+        strategy = ExtractKeywordsStrategy()
+        return self._execute(GPTRequest("extract_keywords", strategy.context, strategy.generate_prompt(title, abstract),
+                                        GPTResponseKeywordsSchema, result=lambda response: response.keywords))
+
+    def analyze_sdg(self, title: str, abstract: str, goal: Optional[str] = None, target: Optional[str] = None) -> GPTResponseSDGAnalysisSchema:
+        """Analyzes SDG relevance using the provided goal or target."""
+        if target:
+            strategy = TargetStrategy(target)
+        elif goal:
+            strategy = GoalStrategy(goal)
+        else:
+            raise ValueError("Either 'goal' or 'target' must be specified.")
+
+        return self._execute(GPTRequest("analyze_sdg", strategy.context, strategy.generate_prompt(title, abstract),
+                                        GPTResponseSDGAnalysisSchema))
+
+    def create_fact(self, title: str, abstract: str) -> str:
+        """Generates a 'Did-You-Know' fact from the provided data."""
+        strategy = FactStrategy()
+        return self._execute(GPTRequest("create_fact", strategy.context, strategy.generate_prompt(title, abstract),
+                                        GPTResponseFactSchema, result=lambda response: response.fact))
+
+    def summarize_publication(self, title: str, abstract: str) -> str:
+        """Summarizes a publication into a concise summary."""
+        strategy = SummarizeSinglePublicationStrategy()
+        return self._execute(GPTRequest("summarize_publication", strategy.context, strategy.generate_prompt(title, abstract),
+                                        GPTResponseSummarySchema, result=lambda response: response.summary))
+
+    def summarize_publications(self, publications: List[Dict[str, str]]) -> GPTResponseCollectiveSummarySchema:
+        """Summarizes a set of publications into a single summary and extracts keywords."""
+        strategy = SummarizeMultiplePublicationsStrategy()
+        return self._execute(GPTRequest(
+            "summarize_publications", strategy.context, strategy.generate_prompt(publications),
+            GPTResponseCollectiveSummarySchema,
+            fallback=lambda e: GPTResponseCollectiveSummarySchema(summary=f"Error generating summary: {str(e)}", keywords=[]),
+        ))
+
+    def summarize_comments(self, user_labels: List[Dict[str, str]]) -> GPTResponseCommentSummarySchema:
+        """Summarizes a set comments form sdg_user_labels into a single comment."""
+        strategy = SummarizeSDGUserLabelCommentsStrategy()
+        return self._execute(GPTRequest(
+            "summarize_comments", strategy.context, strategy.generate_prompt(user_labels),
+            GPTResponseCommentSummarySchema,
+            fallback=lambda e: GPTResponseCommentSummarySchema(summary=f"Error generating summary: {str(e)}"),
+        ))
+
+    def generate_skills_description(self, skills: str) -> GPTResponseSkillsQuerySchema:
+        """Generates an enriched description for the user's skills."""
+        strategy = SkillsQueryStrategy()
+        return self._execute(GPTRequest("generate_skills_description", strategy.context, strategy.generate_prompt(skills),
+                                        GPTResponseSkillsQuerySchema))
+
+    def generate_interests_description(self, interests: str) -> GPTResponseSkillsQuerySchema:
+        """Generates an enriched description for the user's interests."""
+        strategy = InterestsQueryStrategy()
+        return self._execute(GPTRequest("generate_interests_description", strategy.context, strategy.generate_prompt(interests),
+                                        GPTResponseSkillsQuerySchema))
+
+    def propose_sdg_from_skills(self, skills: str) -> SDGPredictionSchema:
+        """Propose the most suitable SDG based on the user's skills."""
+        strategy = SDGSkillsStrategy()
+        return self._execute(GPTRequest("propose_sdg_from_skills", strategy.context, strategy.generate_prompt(skills),
+                                        SDGPredictionSchema))
+
+    def propose_sdg_from_interests(self, interests: str) -> SDGPredictionSchema:
+        """Propose the most suitable SDG based on the user's interests."""
+        strategy = SDGInterestsStrategy()
+        return self._execute(GPTRequest("propose_sdg_from_interests", strategy.context, strategy.generate_prompt(interests),
+                                        SDGPredictionSchema))
+
+    def evaluate_annotation(self, passage: str, annotation: str, sdg_label: SDGType) -> GPTResponseAnnotationScoreSchema:
+        """Evaluates user annotations based on relevance, depth, correctness, and creativity."""
+        strategy = AnnotationEvaluatorStrategy()
+        return self._execute(GPTRequest("evaluate_annotation", strategy.context,
+                                        strategy.generate_prompt(passage, annotation, sdg_label),
+                                        GPTResponseAnnotationScoreSchema))
+
+    def generate_comment(self, abstract: str, persona: str, interest: str, skill: str,
+                         trust_score: float) -> GPTPersonaResponseCommentSchema:
+        """Generates a comment tailored to the user's persona and expertise level. Not cached, every call should vary."""
+        strategy = GenerateCommentStrategy()
+        return self._execute(GPTRequest("generate_comment", strategy.context,
+                                        strategy.generate_prompt(abstract, persona, interest, skill, trust_score),
+                                        GPTPersonaResponseCommentSchema,
+                                        temperature=CREATIVE_TEMPERATURE, use_cache=False))
+
+    def generate_annotation(
+            self, abstract: str, persona: str, interest: str, skill: str, trust_score: float,
+            user_label_comment: str = None, decision_comment: str = None
+    ) -> GPTPersonaResponseAnnotationSchema:
+        """
+        Generates an annotation based on the structured prompt. Not cached, every call should vary.
+
+        Parameters:
+            abstract (str): The publication abstract.
+            persona (str): The user's persona (Achiever, Explorer, Socializer, Killer).
+            interest (str): The user's interest in the topic.
+            skill (str): The user's skill level or profession.
+            trust_score (float): The user’s expertise score (0-1).
+            user_label_comment (str, optional): The comment from the user label.
+            decision_comment (str, optional): The consensus decision comment.
+
+        Returns:
+            str: A concise and relevant annotation.
+        """
+        strategy = GenerateAnnotationStrategy()
+        prompt_data = strategy.generate_prompt(
+            abstract, persona, interest, skill, trust_score, user_label_comment, decision_comment
+        )
+        return self._execute(GPTRequest("generate_annotation", strategy.context, prompt_data,
+                                        GPTPersonaResponseAnnotationSchema,
+                                        temperature=CREATIVE_TEMPERATURE, use_cache=False))
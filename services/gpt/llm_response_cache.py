@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from settings.settings import LLMResponseCacheSettings
+from utils.env_loader import is_running_in_docker
+from utils.logger import logger
+
+llm_response_cache_settings = LLMResponseCacheSettings()
+
+# Setup Logging
+logging = logger(llm_response_cache_settings.LLM_RESPONSE_CACHE_LOG_NAME)
+
+
+def request_key(model: str, temperature: float, context: str, prompt_data: Any, response_model: type[BaseModel]) -> str:
+    """
+    Content address of an LLM request: SHA-256 over the model, temperature, both messages and the
+    response schema, so a changed prompt or schema never returns a stale answer.
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "context": context,
+            "prompt_data": prompt_data,
+            "response_model": f"{response_model.__module__}.{response_model.__qualname__}",
+            "response_schema": response_model.model_json_schema(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class InMemoryLLMCacheBackend:
+    """
+    In-process backend (tests and runs without a writable cache path).
+    """
+
+    def __init__(self, max_entries: int = llm_response_cache_settings.MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < time.time():
+                return None
+            self._entries[key] = entry  # Re-insert as most recently used
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, value)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteLLMCacheBackend:
+    """
+    Persistent single-host backend: one SQLite file, least recently used entries are evicted
+    once more than max_entries are stored.
+    """
+
+    def __init__(self, path: str, max_entries: int = llm_response_cache_settings.MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_accessed_at ON llm_responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            self._connection.execute("DELETE FROM llm_responses WHERE expires_at < ?", (now,))
+            self._connection.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM llm_responses")
+
+
+class RedisLLMCacheBackend:
+    """
+    Backend shared by all API processes. Entries expire by TTL; a sorted set of access times
+    bounds the number of entries (least recently used are evicted).
+    """
+
+    def __init__(self, client, max_entries: int = llm_response_cache_settings.MAX_ENTRIES):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = llm_response_cache_settings.REDIS_KEY_PREFIX
+        self.index_key = f"{self.prefix}:index"
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(f"{self.prefix}:{key}")
+        if value is not None:
+            self.client.zadd(self.index_key, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.set(f"{self.prefix}:{key}", value, ex=ttl)
+        pipeline.zadd(self.index_key, {key: time.time()})
+        pipeline.execute()
+
+        overflow = self.client.zcard(self.index_key) - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in self.client.zpopmin(self.index_key, overflow)]
+            self.client.delete(*[f"{self.prefix}:{member}" for member in evicted])
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of parsed LLM responses.
+
+    Stores the parsed Pydantic result of a request under its request_key, together with the
+    latency and token usage of the original call, so every hit reports the time and cost it saved.
+    """
+
+    def __init__(self, backend, ttl: int = llm_response_cache_settings.TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.errors = 0
+        self.saved_seconds = 0.0
+        self.saved_cost_usd = 0.0
+        self._lock = Lock()
+
+    @property
+    def backend_name(self) -> str:
+        return type(self.backend).__name__
+
+    def get(self, key: str, response_model: type[BaseModel]) -> Optional[BaseModel]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logging.error(f"LLM cache read failed: {e}")
+            self.errors += 1
+            value = None
+
+        name = response_model.__name__
+        if value is None:
+            with self._lock:
+                self.misses[name] += 1
+            return None
+
+        entry = json.loads(value)
+        with self._lock:
+            self.hits[name] += 1
+            self.saved_seconds += entry["latency"]
+            self.saved_cost_usd += entry["cost_usd"]
+        return response_model.model_validate_json(entry["response"])
+
+    def set(self, key: str, response: BaseModel, latency: float, cost_usd: float) -> None:
+        value = json.dumps({"response": response.model_dump_json(), "latency": latency, "cost_usd": cost_usd})
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logging.error(f"LLM cache write failed: {e}")
+            self.errors += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        total_hits = sum(self.hits.values())
+        total_misses = sum(self.misses.values())
+        requests = total_hits + total_misses
+        return {
+            "backend": self.backend_name,
+            "hits": total_hits,
+            "misses": total_misses,
+            "hit_rate": round(total_hits / requests, 4) if requests else 0.0,
+            "errors": self.errors,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "saved_cost_usd": round(self.saved_cost_usd, 6),
+            "response_models": {
+                name: {"hits": self.hits[name], "misses": self.misses[name]}
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+
+def usage_cost(usage: Any) -> float:
+    """Estimated USD cost of a completion from its token usage (0.0 if the usage is unknown)."""
+    if usage is None:
+        return 0.0
+    return (
+        getattr(usage, "prompt_tokens", 0) * llm_response_cache_settings.INPUT_COST_PER_MILLION_TOKENS
+        + getattr(usage, "completion_tokens", 0) * llm_response_cache_settings.OUTPUT_COST_PER_MILLION_TOKENS
+    ) / 1_000_000
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """
+    Return the shared LLMResponseCache: Redis when reachable, else the SQLite file, else in-process.
+    """
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        backend = None
+        try:
+            from db.redisdb_connector import client as redis_client
+            redis_client.ping()
+            backend = RedisLLMCacheBackend(redis_client)
+        except Exception as e:
+            logging.warning(f"Redis not reachable for the LLM cache: {e}")
+
+        if backend is None:
+            path = llm_response_cache_settings.SQLITE_PATH
+            if is_running_in_docker():
+                path = "/" + path
+            try:
+                backend = SQLiteLLMCacheBackend(path)
+            except Exception as e:
+                logging.warning(f"SQLite LLM cache at {path} unavailable, using in-process cache: {e}")
+                backend = InMemoryLLMCacheBackend()
+
+        _llm_response_cache = LLMResponseCache(backend)
+        logging.info(f"LLMResponseCache initialized with {_llm_response_cache.backend_name}.")
+    return _llm_response_cache
+
+
+def set_llm_response_cache(llm_response_cache: Optional[LLMResponseCache]) -> None:
+    """
+    Replace the shared LLMResponseCache (e.g. with an in-process instance in tests).
+    """
+    global _llm_response_cache
+    _llm_response_cache = llm_response_cache
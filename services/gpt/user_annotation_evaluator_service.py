@@ -5,6 +5,9 @@ os.environ["OPENBLAS_NUM_THREADS"] = "1"
 # https://stackoverflow.com/questions/77137232/identifying-source-of-and-understanding-openblas-and-openmp-warnings
 # warnings.filterwarnings('ignore', category=UserWarning, module='openblas')
 
+from threading import Lock
+from typing import Dict, List, Optional
+
 import torch
 from transformers import AutoTokenizer, AutoModel
 
@@ -13,44 +16,123 @@ from schemas.gpt_assistant_service import GPTResponseAnnotationScoreSchema, Anno
 from settings.sdg_descriptions import sdgs
 from settings.settings import UserAnnotationEvaluatorServiceSettings
 
-# Load Transformer Model
 user_annotation_evaluator_service_settings = UserAnnotationEvaluatorServiceSettings()
-tokenizer = AutoTokenizer.from_pretrained(user_annotation_evaluator_service_settings.BERT_PRETRAINED_MODEL_NAME)
-model = AutoModel.from_pretrained(user_annotation_evaluator_service_settings.BERT_PRETRAINED_MODEL_NAME)
+
+
+class SDGSemanticEncoder:
+    """
+    DistilBERT CLS-token encoder with the SDG description vectors computed once.
+
+    Loading the model and encoding the 17 descriptions is done a single time per process
+    (see get_sdg_semantic_encoder); afterwards scoring an annotation only encodes the annotation.
+    """
+
+    def __init__(self, model_name: str = user_annotation_evaluator_service_settings.BERT_PRETRAINED_MODEL_NAME):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+
+        vectors = self.encode([sdg.sdg_description for sdg in sdgs])
+        self.sdg_vectors: Dict[int, torch.Tensor] = {sdg.index: vector for sdg, vector in zip(sdgs, vectors)}
+        self.description_vectors: Dict[str, torch.Tensor] = {sdg.sdg_description: vector for sdg, vector in zip(sdgs, vectors)}
+
+    def encode(self, texts: List[str], batch_size: int = user_annotation_evaluator_service_settings.BATCH_SIZE) -> torch.Tensor:
+        """
+        Encode texts into their CLS vectors, batch_size texts per forward pass.
+
+        Texts are batched by length so little padding is computed; the result keeps the input order.
+
+        Returns:
+            torch.Tensor: Tensor of shape (len(texts), hidden_size).
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = torch.empty((len(texts), self.model.config.hidden_size))
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                inputs = self.tokenizer(
+                    [texts[i] for i in batch],
+                    return_tensors="pt",
+                    truncation=True,
+                    padding=True,
+                    max_length=user_annotation_evaluator_service_settings.MAX_LENGTH,
+                )
+                vectors[batch] = self.model(**inputs).last_hidden_state[:, 0, :]
+        return vectors
+
+    def sdg_vector(self, sdg_label: SDGType) -> torch.Tensor:
+        # Extract the numeric part of the SDG label (e.g., "sdg1" -> 1)
+        sdg_index = int(sdg_label.value.replace("sdg", ""))
+
+        # TODO: add 0 and 18 class
+        vector = self.sdg_vectors.get(sdg_index)
+        if vector is None:
+            raise ValueError(f"Invalid SDG index: {sdg_label}")
+        return vector
+
+    def description_vector(self, sdg_label_description: str) -> torch.Tensor:
+        vector = self.description_vectors.get(sdg_label_description)
+        return vector if vector is not None else self.encode([sdg_label_description])[0]
+
+    def similarities(self, annotations: List[str], sdg_labels: List[SDGType],
+                     batch_size: int = user_annotation_evaluator_service_settings.BATCH_SIZE) -> List[float]:
+        """
+        Cosine similarity of every annotation with the description of its SDG.
+        """
+        if not annotations:
+            return []
+        sdg_vectors = torch.stack([self.sdg_vector(sdg_label) for sdg_label in sdg_labels])
+        annotation_vectors = self.encode(annotations, batch_size=batch_size)
+        return torch.nn.functional.cosine_similarity(annotation_vectors, sdg_vectors, dim=1).tolist()
+
+
+_sdg_semantic_encoder: Optional[SDGSemanticEncoder] = None
+_sdg_semantic_encoder_lock = Lock()
+
+
+def get_sdg_semantic_encoder() -> SDGSemanticEncoder:
+    """
+    Return the shared encoder, loading the model and the SDG description vectors on first use.
+    """
+    global _sdg_semantic_encoder
+    if _sdg_semantic_encoder is None:
+        with _sdg_semantic_encoder_lock:
+            if _sdg_semantic_encoder is None:
+                _sdg_semantic_encoder = SDGSemanticEncoder()
+    return _sdg_semantic_encoder
+
 
 class UserAnnotationEvaluatorService:
     """Service for evaluating annotations with semantic similarity and combined scoring."""
 
+    def __init__(self, encoder: Optional[SDGSemanticEncoder] = None):
+        self.encoder = encoder or get_sdg_semantic_encoder()
+
     def calculate_semantic_similarity(self, annotation: str, sdg_label_description: str) -> float:
         """Calculates semantic similarity between annotation and SDG description."""
-
-        # Encode annotation and SDG description
-        annotation_embedding = model(**tokenizer(annotation, return_tensors="pt", truncation=True, padding=True))
-        sdg_embedding = model(**tokenizer(sdg_label_description, return_tensors="pt", truncation=True, padding=True))
-
-        # Extract CLS token embeddings and ensure tensors are 1-dimensional
-        annotation_vector = annotation_embedding.last_hidden_state[:, 0, :].squeeze(0)
-        sdg_vector = sdg_embedding.last_hidden_state[:, 0, :].squeeze(0)
+        annotation_vector = self.encoder.encode([annotation])[0]
+        sdg_vector = self.encoder.description_vector(sdg_label_description)
 
         # Compute cosine similarity
         similarity = torch.nn.functional.cosine_similarity(annotation_vector, sdg_vector, dim=0).item()
         return similarity
 
-    def evaluate_annotation(self, passage: str, annotation: str, sdg_label: SDGType, llm_scores: GPTResponseAnnotationScoreSchema) -> AnnotationEvaluationSchema:
-        """Combines LLM and semantic similarity scores."""
+    def calculate_semantic_similarities(self, annotations: List[str], sdg_labels: List[SDGType]) -> List[float]:
+        """
+        Batched semantic similarity of many (annotation, SDG) pairs, e.g. for offline re-scoring.
 
-        # Convert SDGType enum to string (e.g., SDGType.SDG_1 -> "sdg1")
-        sdg_label_str = sdg_label.value
+        Args:
+            annotations (List[str]): The annotations (comments) to score.
+            sdg_labels (List[SDGType]): The SDG of every annotation.
 
-        # Extract the numeric part of the SDG label (e.g., "sdg1" -> 1)
-        sdg_index = int(sdg_label_str.replace("sdg", ""))
+        Returns:
+            List[float]: One similarity per annotation, in input order.
+        """
+        return self.encoder.similarities(annotations, sdg_labels)
 
-        # TODO: add 0 and 18 class
-        sdg_description = next((sdg.sdg_description for sdg in sdgs if sdg.index == sdg_index), None)
-        if not sdg_description:
-            raise ValueError(f"Invalid SDG index: {sdg_label}")
+    def evaluate_annotation(self, passage: str, annotation: str, sdg_label: SDGType, llm_scores: GPTResponseAnnotationScoreSchema) -> AnnotationEvaluationSchema:
+        """Combines LLM and semantic similarity scores."""
 
-        semantic_score = self.calculate_semantic_similarity(annotation, sdg_description)
+        semantic_score = self.encoder.similarities([annotation], [sdg_label])[0]
 
         llm_avg_score = (
             llm_scores.relevance + llm_scores.depth + llm_scores.correctness + llm_scores.creativity
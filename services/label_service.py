@@ -4,18 +4,20 @@ from sqlalchemy.orm import Session, joinedload
 
 from enums import SDGType
 from enums.enums import ScenarioType, LevelType
-from models import SDGUserLabel, sdg_label_decision_user_label_association, SDGPrediction, SDGXPBankHistory, \
-    SDGCoinWalletHistory, SDGCoinWallet, SDGXPBank
+from models import SDGUserLabel, sdg_label_decision_user_label_association, SDGCoinWalletHistory, SDGCoinWallet
 from request_models.sdg_user_label import UserLabelRequest
 from schemas import SDGLabelDistribution, SDGUserLabelStatisticsSchema, SDGUserLabelSchemaFull, UserVotingDetails
+from services.cache_service import get_cache_service
 from services.decision_service import DecisionService
-from services.reward_service import RewardService
-from services.scoring_service import score
-from settings.settings import TimeZoneSettings, LabelServiceSettings
+from services.leaderboard_service import get_leaderboard_service
+from services.reward_evaluation_service import get_reward_evaluation_service
+from services.scoring_service import score_many
+from settings.settings import TimeZoneSettings, LabelServiceSettings, CacheServiceSettings
 from utils.logger import logger
 
 time_zone_settings = TimeZoneSettings()
 label_service_settings = LabelServiceSettings()
+cache_service_settings = CacheServiceSettings()
 
 # Setup Logging
 logging = logger(label_service_settings.LABEL_SERVICE_LOG_NAME)
@@ -31,23 +33,25 @@ class LabelService:
 
     def __init__(self, db: Session):
         self.db = db
-        self.reward_service = RewardService(db)
         logging.info("LabelService initialized.")
 
     def create_or_link_label(self, request: UserLabelRequest) -> SDGUserLabel:
         """
-        Create or link an SDGUserLabel, evaluate rewards, and apply a dynamic scoring function.
+        Create or link an SDGUserLabel, update the decision consensus and award coins on consensus.
+        The XP evaluation of the label is queued and applied asynchronously (see RewardEvaluationService).
 
         Args:
             request (UserLabelRequest): The request containing user label data.
         """
         logging.info("Creating or linking a label.")
         decision_service = DecisionService(self.db)
-        decision = decision_service.find_or_create_decision(request)
+
+        # Locks history, label summary and decision until the commit below, so concurrent votes on it are serialized
+        decision, prediction = decision_service.find_or_create_decision_for_update(request)
 
         new_user_label = SDGUserLabel(
             user_id=request.user_id,
-            publication_id=request.publication_id,
+            publication_id=request.publication_id or decision.publication_id,
             voted_label=request.voted_label,
             abstract_section=request.abstract_section or "",
             comment=request.comment or "",
@@ -55,126 +59,96 @@ class LabelService:
         self.db.add(new_user_label)
         self.db.flush()
         logging.info("Created a new user label.")
-        decision.user_labels.append(new_user_label)
-        old_scenario = decision.scenario_type
+        # Also appends the label to decision.user_labels, which was reloaded under the lock
+        new_user_label.label_decisions.append(decision)
 
         logging.info("Check new scenario and update scenario in decision based on new user label.")
-        scenario = decision_service.evaluate_vote_scenario(decision.user_labels)
-
-        logging.info(f"Update scenario in decision based on new user label: Old scenario {old_scenario}; New scenario {scenario}.")
-        decision.scenario_type = scenario
+        tally = decision_service.record_vote(decision, new_user_label)
 
         logging.info("Check consensus - can we finalize this label?")
-        decision_service.calculate_consensus(decision)
-
-        # Rewards
-        # **Fetch SDG Prediction for the Publication**
-        prediction = (
-            self.db.query(SDGPrediction)
-            .filter(SDGPrediction.publication_id == request.publication_id)
-            .filter(SDGPrediction.prediction_model == "Aurora")
-            .first()
-        )
+        decision_service.calculate_consensus(decision, tally)
 
         if not prediction:
-            logging.warning(f"No SDG prediction found for publication {request.publication_id}. Using default values.")
-        else:
-            # Get probability of the SDG the user voted for
-            voted_sdg_key = f"sdg{request.voted_label}"
-
-        # **Immediate XP Reward Calculation**
-
-        base_xp = prediction.entropy * 10
-        additional_xp = self.reward_service._calculate_xp(new_user_label)
-        total_xp = int(additional_xp + base_xp)
-
-        logging.info(
-            f"User {new_user_label.user_id} gets {total_xp} = {base_xp} (Base) + {additional_xp} (Additional) XP.")
-
-        # **Convert voted_label (int) to SDGType Enum**
-        new_user_sdg_enum_value = SDGType[f"SDG_{new_user_label.voted_label}"]
-
-        # **Fetch the user's XP bank**
-        xp_bank = self.db.query(SDGXPBank).filter(SDGXPBank.user_id == request.user_id).first()
-
-        if not xp_bank:
-            raise ValueError(f"No XP bank found for user {request.user_id}")
-
-        # **Update total XP and specific SDG XP**
-        xp_bank.total_xp += total_xp
+            logging.warning(f"No SDG prediction found for publication {new_user_label.publication_id}. Using default values.")
 
-        # **Determine which SDG field to update**
-        sdg_xp_field = f"sdg{request.voted_label}_xp"
-
-        if hasattr(xp_bank, sdg_xp_field):
-            setattr(xp_bank, sdg_xp_field, getattr(xp_bank, sdg_xp_field) + total_xp)
-        else:
-            raise ValueError(f"Invalid SDG XP field: {sdg_xp_field}")
-
-        # **Log XP Gain in SDGXPBankHistory**
-        xp_history_entry = SDGXPBankHistory(
-            xp_bank_id=request.user_id,
-            sdg=new_user_sdg_enum_value,
-            increment=total_xp,
-            reason=f"Initial XP reward for SDG labeling of the Publication {request.publication_id}",
-            is_shown=False,
-        )
-        self.db.add(xp_history_entry)
-        logging.info(f"Logged XP transaction for user {request.user_id}: {total_xp} XP.")
+        # Coin rewards per user, applied to the leaderboards once committed
+        coin_rewards = {}
 
         # **Final Coin & XP Reward if Consensus is Reached**
         if decision.decided_label:
 
             # **Determine Task Difficulty Based on SDG Probability**
             voted_sdg_key = f"sdg{request.voted_label}"
-            P_max = getattr(prediction, voted_sdg_key, 0.0)  # Probability of the voted SDG
+            P_max = getattr(prediction, voted_sdg_key, 0.0) if prediction else 0.0  # Probability of the voted SDG
             level = LevelType.get_level(P_max)
 
             logging.info(
                 f"Consensus reached! (Level: {level}, ({level.min_prob}) -  ({level.max_prob}), (Prediction: {P_max} for {voted_sdg_key})) to users who voted correctly.")
 
             # **Sort labels by created_at to calculate score incrementally**
-            sorted_labels = sorted(decision.user_labels, key=lambda x: x.labeled_at)
+            sorted_labels = sorted(decision.user_labels, key=lambda x: x.labeled_at.replace(tzinfo=None))
 
-            rewarded_user_ids = []
-
-            # **Award XP & Coins to All Users Who Voted Correctly**
+            # **Award Coins to All Users Who Voted Correctly**
+            user_votes = {}
             for idx, label in enumerate(sorted_labels):
                 if label.voted_label == decision.decided_label:
 
-                    if label.user_id in rewarded_user_ids:
+                    if label.user_id in user_votes:
                         logging.info(f"User {label.user_id} has already received a coin reward. Skipping reward.")
                         continue  # Skip if user has already been rewarded
 
                     # **Calculate score based on the number of votes up to this point**
-                    user_votes = idx + 1  # Incremental votes
-
-                    coin_reward = score(user_votes, P_max)
+                    user_votes[label.user_id] = idx + 1  # Incremental votes
+
+            # **Score all winners at once**
+            coin_rewards = dict(zip(user_votes, score_many(list(user_votes.values()), P_max).tolist()))
+
+            # **Retrieve (locked) or Create the SDGCoinWallets of all winners at once**
+            user_wallets = {
+                wallet.user_id: wallet
+                for wallet in self.db.query(SDGCoinWallet)
+                .filter(SDGCoinWallet.user_id.in_(coin_rewards))
+                .with_for_update()
+            }
+            for user_id, coin_reward in coin_rewards.items():
+                user_wallet = user_wallets.get(user_id)
+                if not user_wallet:
+                    user_wallet = SDGCoinWallet(user_id=user_id, total_coins=0.0)
+                    self.db.add(user_wallet)
+
+                # **Update the total coins**
+                user_wallet.total_coins += coin_reward
+                logging.info(
+                    f"Logged coin transaction for user {user_id}: +{coin_reward} Coins. Updated total: {user_wallet.total_coins}")
+
+            # **Log Coin Rewards in SDGCoinWalletHistory**
+            self.db.add_all([
+                SDGCoinWalletHistory(
+                    wallet_id=user_id,
+                    increment=coin_reward,
+                    reason=f"Final coin reward for SDG {decision.decided_label} after decision consensus Publication {decision.publication_id}",
+                    is_shown=False,
+                )
+                for user_id, coin_reward in coin_rewards.items()
+            ])
 
-                    # **Retrieve or Create SDGCoinWallet**
-                    user_wallet = self.db.query(SDGCoinWallet).filter(SDGCoinWallet.user_id == label.user_id).first()
-                    if not user_wallet:
-                        user_wallet = SDGCoinWallet(user_id=label.user_id, total_coins=0.0)
-                        self.db.add(user_wallet)
-
-                    # **Update the total coins**
-                    user_wallet.total_coins += coin_reward
+        self.db.commit()
+        self.db.refresh(new_user_label)
 
-                    # **Log Coin Reward in SDGCoinWalletHistory**
-                    coin_entry = SDGCoinWalletHistory(
-                        wallet_id=label.user_id,
-                        increment=coin_reward,
-                        reason=f"Final coin reward for SDG {label.voted_label} after decision consensus Publication {decision.publication_id}",
-                        is_shown=False,
-                    )
-                    self.db.add(coin_entry)
-                    logging.info(
-                        f"Logged coin transaction for user {label.user_id}: +{coin_reward} Coins. Updated total: {user_wallet.total_coins}")
+        # **XP Reward**: the comment evaluation (LLM + DistilBERT) runs in the background worker,
+        # which applies the XP increment once it is done
+        get_reward_evaluation_service().enqueue(new_user_label.label_id)
 
-                    rewarded_user_ids.append(label.user_id)
+        # Apply the committed coin increments to the leaderboard
+        leaderboard_service = get_leaderboard_service()
+        for user_id, coin_reward in coin_rewards.items():
+            leaderboard_service.add_coins(user_id, coin_reward)
 
-        self.db.commit()
-        self.db.refresh(new_user_label)
+        # Cached scenario and least-labeled views are derived from decisions and summaries
+        get_cache_service().invalidate_tags([
+            cache_service_settings.SDG_LABEL_DECISIONS_TAG,
+            cache_service_settings.SDG_LABEL_SUMMARIES_TAG,
+        ])
         logging.info("Label creation/linking completed.")
         return new_user_label
 
@@ -0,0 +1,469 @@
+import json
+import os
+import random
+import uuid
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from redis.exceptions import WatchError
+from sqlalchemy.orm import Session
+
+from models import SDGCoinWallet, SDGXPBank
+from settings.settings import LeaderboardServiceSettings, ProjectSettings, SDGSettings
+from utils.logger import logger
+
+leaderboard_service_settings = LeaderboardServiceSettings()
+project_settings = ProjectSettings()
+sdg_settings = SDGSettings()
+
+# Setup Logging
+logging = logger(leaderboard_service_settings.LEADERBOARD_SERVICE_LOG_NAME)
+
+
+class LeaderboardUnavailableError(RuntimeError):
+    """Raised when no shared leaderboard backend is available (Redis down with several API workers)."""
+
+
+def api_worker_count() -> int:
+    try:
+        return max(1, int(os.environ.get(leaderboard_service_settings.WORKERS_ENV_VAR, 1)))
+    except ValueError:
+        return 1
+
+
+def xp_board_name(sdg: Optional[int] = None) -> str:
+    """Name of the total XP leaderboard, or of the XP leaderboard of a single SDG."""
+    return leaderboard_service_settings.XP_TOTAL_BOARD if sdg is None else f"{leaderboard_service_settings.XP_SDG_BOARD_PREFIX}{sdg}"
+
+
+def coins_board_name() -> str:
+    return leaderboard_service_settings.COINS_TOTAL_BOARD
+
+
+def sdg_number(sdg) -> Optional[int]:
+    """Map an SDGType (or its value, e.g. "sdg5") to its goal number; None for values outside 1-17."""
+    value = getattr(sdg, "value", sdg)
+    try:
+        number = int(str(value).lower().removeprefix("sdg"))
+    except ValueError:
+        return None
+    return number if 1 <= number <= sdg_settings.SDGOAL_NUMBER else None
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "size")
+
+    def __init__(self, key: Tuple[float, int]):
+        self.key = key
+        self.priority = random.random()
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.size = 1
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node else 0
+
+
+def _update(node: _Node) -> None:
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+
+def _split(node: Optional[_Node], key: Tuple[float, int]) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into (keys < key, keys >= key)."""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class OrderStatisticTree:
+    """
+    Size-augmented treap ordered by (-score, user_id).
+    Insert, delete, rank and select all run in O(log n) expected time.
+    """
+
+    def __init__(self):
+        self.root: Optional[_Node] = None
+        self.scores: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    def _insert(self, key: Tuple[float, int]) -> None:
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key)), right)
+
+    def _delete(self, key: Tuple[float, int]) -> None:
+        left, right = _split(self.root, key)
+        # Drop the smallest node of the right part, which is the key itself
+        _, right = _split(right, (key[0], key[1] + 1))
+        self.root = _merge(left, right)
+
+    def set(self, user_id: int, score: float) -> None:
+        if user_id in self.scores:
+            self._delete((-self.scores[user_id], user_id))
+        self.scores[user_id] = score
+        self._insert((-score, user_id))
+
+    def increment(self, user_id: int, increment: float) -> float:
+        score = self.scores.get(user_id, 0.0) + increment
+        self.set(user_id, score)
+        return score
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """0-based rank of the user (0 is the highest score)."""
+        if user_id not in self.scores:
+            return None
+        key = (-self.scores[user_id], user_id)
+        node, rank = self.root, 0
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                rank += _size(node.left) + 1
+                node = node.right
+            else:
+                return rank + _size(node.left)
+        return None
+
+    def select(self, index: int) -> Tuple[int, float]:
+        """Return (user_id, score) at the 0-based rank index."""
+        node = self.root
+        while node is not None:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key[1], -node.key[0]
+            else:
+                index -= left_size + 1
+                node = node.right
+        raise IndexError("Leaderboard index out of range")
+
+    def range(self, offset: int, limit: int) -> List[Tuple[int, float]]:
+        end = min(offset + limit, len(self))
+        return [self.select(index) for index in range(offset, end)]
+
+
+class InMemoryLeaderboardBackend:
+    """
+    In-process leaderboards backed by one order-statistic tree per board.
+    """
+
+    def __init__(self):
+        self.boards: Dict[str, OrderStatisticTree] = {}
+        self.built = False
+        self._buffer: Optional[List[Tuple[str, int, float]]] = None
+        self._lock = Lock()
+        self._rebuild_lock = Lock()
+
+    def _board(self, board: str) -> OrderStatisticTree:
+        return self.boards.setdefault(board, OrderStatisticTree())
+
+    def is_built(self) -> bool:
+        return self.built
+
+    def rebuild_lock(self) -> Lock:
+        return self._rebuild_lock
+
+    def start_rebuild(self) -> None:
+        """Buffer the increments from now on, until reset replays them on the rebuilt trees."""
+        with self._lock:
+            self._buffer = []
+
+    def reset(self, scores: Dict[str, Dict[int, float]]) -> None:
+        """Build new trees, then swap them in and replay the increments buffered since start_rebuild."""
+        boards = {}
+        for board, board_scores in scores.items():
+            tree = boards[board] = OrderStatisticTree()
+            for user_id, score in board_scores.items():
+                tree.set(user_id, score)
+        with self._lock:
+            self.boards = boards
+            for board, user_id, increment in self._buffer or []:
+                self._board(board).increment(user_id, increment)
+            self._buffer = None
+            self.built = True
+
+    def increment(self, board: str, user_id: int, increment: float) -> float:
+        with self._lock:
+            if self._buffer is not None:
+                self._buffer.append((board, user_id, increment))
+            return self._board(board).increment(user_id, increment)
+
+    def top(self, board: str, offset: int, limit: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            return self._board(board).range(offset, limit)
+
+    def rank(self, board: str, user_id: int) -> Optional[Tuple[int, float]]:
+        with self._lock:
+            tree = self._board(board)
+            rank = tree.rank(user_id)
+            return None if rank is None else (rank, tree.scores[user_id])
+
+    def size(self, board: str) -> int:
+        with self._lock:
+            return len(self._board(board))
+
+
+class RedisLeaderboardBackend:
+    """
+    Leaderboards backed by Redis sorted sets (ZINCRBY / ZREVRANGE / ZREVRANK are all O(log n)).
+    """
+
+    def __init__(self, client, prefix: str = leaderboard_service_settings.REDIS_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, board: str) -> str:
+        return f"{self.prefix}:{board}"
+
+    def is_built(self) -> bool:
+        return bool(self.client.exists(self._key(leaderboard_service_settings.BUILT_MARKER)))
+
+    def rebuild_lock(self):
+        """Lock held by one rebuild at a time across all API processes."""
+        return self.client.lock(self._key(leaderboard_service_settings.REBUILD_LOCK),
+                                timeout=leaderboard_service_settings.REBUILD_LOCK_TIMEOUT)
+
+    def start_rebuild(self) -> None:
+        """
+        Create the buffer the increments are pushed to (RPUSHX) until reset replays them. It starts with a
+        placeholder, since RPUSHX only pushes to an existing list, and expires with the lock of a failed rebuild.
+        """
+        buffer = self._key(leaderboard_service_settings.REBUILD_BUFFER)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(buffer)
+        pipeline.rpush(buffer, "")
+        pipeline.expire(buffer, leaderboard_service_settings.REBUILD_LOCK_TIMEOUT)
+        pipeline.execute()
+
+    def reset(self, scores: Dict[str, Dict[int, float]]) -> None:
+        """
+        Write the boards into temporary keys, then swap them in with RENAME in one transaction, which also
+        replays the increments buffered since start_rebuild and removes the buffer. The transaction is retried
+        if an increment is buffered while the buffer is read.
+        """
+        suffix = uuid.uuid4().hex
+        pipeline = self.client.pipeline(transaction=False)
+        for board, board_scores in scores.items():
+            if board_scores:
+                pipeline.zadd(f"{self._key(board)}:{suffix}", {str(user_id): score for user_id, score in board_scores.items()})
+        pipeline.execute()
+
+        buffer = self._key(leaderboard_service_settings.REBUILD_BUFFER)
+        while True:
+            with self.client.pipeline(transaction=True) as pipeline:
+                try:
+                    pipeline.watch(buffer)
+                    buffered = [json.loads(entry) for entry in pipeline.lrange(buffer, 1, -1)]
+                    pipeline.multi()
+                    for board, board_scores in scores.items():
+                        if board_scores:
+                            pipeline.rename(f"{self._key(board)}:{suffix}", self._key(board))
+                        else:
+                            pipeline.delete(self._key(board))
+                    for board, user_id, increment in buffered:
+                        pipeline.zincrby(self._key(board), increment, str(user_id))
+                    pipeline.delete(buffer)
+                    pipeline.set(self._key(leaderboard_service_settings.BUILT_MARKER), 1)
+                    pipeline.execute()
+                    return
+                except WatchError:
+                    continue
+
+    def increment(self, board: str, user_id: int, increment: float) -> float:
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.zincrby(self._key(board), increment, str(user_id))
+        # Buffered only while a rebuild runs, i.e. while the buffer exists
+        pipeline.rpushx(self._key(leaderboard_service_settings.REBUILD_BUFFER), json.dumps([board, user_id, increment]))
+        score, _ = pipeline.execute()
+        return float(score)
+
+    def top(self, board: str, offset: int, limit: int) -> List[Tuple[int, float]]:
+        entries = self.client.zrevrange(self._key(board), offset, offset + limit - 1, withscores=True)
+        return [(int(user_id), float(score)) for user_id, score in entries]
+
+    def rank(self, board: str, user_id: int) -> Optional[Tuple[int, float]]:
+        pipeline = self.client.pipeline()
+        pipeline.zrevrank(self._key(board), str(user_id))
+        pipeline.zscore(self._key(board), str(user_id))
+        rank, score = pipeline.execute()
+        return None if rank is None else (int(rank), float(score))
+
+    def size(self, board: str) -> int:
+        return int(self.client.zcard(self._key(board)))
+
+
+class LeaderboardService:
+    """
+    Server-side XP and coin leaderboards (total and per SDG).
+
+    The boards are built once from SDGXPBank/SDGCoinWallet and then kept up to date incrementally
+    by the write paths that change XP or coins, so top-N and "my rank" queries never scan the tables.
+    A rebuild reads the tables in a transaction of its own, started after the backend began buffering the
+    increments; the buffered increments, committed after that snapshot, are replayed on the rebuilt boards.
+    Uses Redis sorted sets when Redis is reachable. The in-process order-statistic tree is per process, so it
+    is only used with a single API worker or in debug mode; otherwise the boards are unavailable until Redis is.
+    """
+
+    def __init__(self, redis_client=None, workers: Optional[int] = None):
+        self.backend = None
+        if redis_client is not None:
+            try:
+                redis_client.ping()
+                self.backend = RedisLeaderboardBackend(redis_client)
+                logging.info("LeaderboardService initialized with Redis backend.")
+                return
+            except Exception as e:
+                logging.warning(f"Redis not reachable: {e}")
+
+        workers = api_worker_count() if workers is None else workers
+        if workers > 1 and not project_settings.DEBUG_MODE:
+            logging.error(f"No Redis for the leaderboards of {workers} API workers: in-process boards would differ "
+                          f"per worker, so the leaderboards are unavailable.")
+            return
+        self.backend = InMemoryLeaderboardBackend()
+        logging.warning("LeaderboardService initialized with the in-process backend (single worker or debug mode only).")
+
+    def _backend(self):
+        if self.backend is None:
+            raise LeaderboardUnavailableError("The leaderboards require Redis when the API runs several workers.")
+        return self.backend
+
+    def rebuild(self, db: Session) -> None:
+        """
+        (Re)build every leaderboard from the XP banks and coin wallets, one rebuild at a time.
+        """
+        with self._backend().rebuild_lock():
+            self._rebuild(db)
+
+    def _rebuild(self, db: Session) -> None:
+        """
+        Start buffering the increments, then read the scores in a new session: the snapshot of the request's
+        session may predate increments that were committed and applied before the buffering started.
+        """
+        self.backend.start_rebuild()
+        with Session(bind=db.get_bind()) as snapshot:
+            scores = self._read_scores(snapshot)
+        self.backend.reset(scores)
+        logging.info(f"Rebuilt leaderboards for {len(scores[xp_board_name()])} XP banks and {len(scores[coins_board_name()])} wallets.")
+
+    @staticmethod
+    def _read_scores(db: Session) -> Dict[str, Dict[int, float]]:
+        scores: Dict[str, Dict[int, float]] = {xp_board_name(): {}, coins_board_name(): {}}
+        for sdg in range(1, sdg_settings.SDGOAL_NUMBER + 1):
+            scores[xp_board_name(sdg)] = {}
+
+        sdg_xp_columns = [getattr(SDGXPBank, f"sdg{i}_xp") for i in range(1, sdg_settings.SDGOAL_NUMBER + 1)]
+        for row in db.query(SDGXPBank.user_id, SDGXPBank.total_xp, *sdg_xp_columns):
+            scores[xp_board_name()][row[0]] = float(row[1])
+            for sdg in range(1, sdg_settings.SDGOAL_NUMBER + 1):
+                scores[xp_board_name(sdg)][row[0]] = float(row[sdg + 1])
+
+        for user_id, total_coins in db.query(SDGCoinWallet.user_id, SDGCoinWallet.total_coins):
+            scores[coins_board_name()][user_id] = float(total_coins)
+        return scores
+
+    def ensure_built(self, db: Session) -> None:
+        backend = self._backend()
+        if not backend.is_built():
+            with backend.rebuild_lock():
+                if not backend.is_built():  # Built by a concurrent request meanwhile
+                    self._rebuild(db)
+
+    def add_xp(self, user_id: int, sdg: Optional[int], increment: float) -> None:
+        """
+        Apply an XP increment to the total board and, if given, to the board of the SDG.
+        """
+        try:
+            if self.backend is None:
+                return
+            # Also before the first build: a rebuild running now replays it, a later one reads it from the banks
+            self.backend.increment(xp_board_name(), user_id, increment)
+            if sdg is not None and 1 <= sdg <= sdg_settings.SDGOAL_NUMBER:
+                self.backend.increment(xp_board_name(sdg), user_id, increment)
+        except Exception as e:
+            # The increment is already committed; a failed board update must not fail the request
+            logging.error(f"Failed to update XP leaderboards for user {user_id}: {e}")
+
+    def add_coins(self, user_id: int, increment: float) -> None:
+        """
+        Apply a coin increment to the coin board.
+        """
+        try:
+            if self.backend is None:
+                return
+            self.backend.increment(coins_board_name(), user_id, increment)
+        except Exception as e:
+            logging.error(f"Failed to update coin leaderboard for user {user_id}: {e}")
+
+    def top(self, db: Session, board: str, offset: int = 0, limit: int = leaderboard_service_settings.DEFAULT_PAGE_SIZE) -> Tuple[int, List[Tuple[int, int, float]]]:
+        """
+        Return (board size, [(rank, user_id, score)]) for one page of the board; ranks are 1-based.
+        """
+        self.ensure_built(db)
+        entries = self.backend.top(board, offset, limit)
+        return self.backend.size(board), [
+            (offset + index + 1, user_id, score) for index, (user_id, score) in enumerate(entries)
+        ]
+
+    def rank(self, db: Session, board: str, user_id: int) -> Optional[Tuple[int, float]]:
+        """
+        Return the 1-based (rank, score) of the user, or None if the user is not on the board.
+        """
+        self.ensure_built(db)
+        result = self.backend.rank(board, user_id)
+        return None if result is None else (result[0] + 1, result[1])
+
+    def size(self, db: Session, board: str) -> int:
+        self.ensure_built(db)
+        return self.backend.size(board)
+
+
+_leaderboard_service: Optional[LeaderboardService] = None
+
+
+def get_leaderboard_service() -> LeaderboardService:
+    """
+    Return the shared LeaderboardService, connecting to Redis on first use.
+    """
+    global _leaderboard_service
+    if _leaderboard_service is None:
+        try:
+            from db.redisdb_connector import client as redis_client
+        except Exception as e:
+            logging.warning(f"Redis connector unavailable: {e}")
+            redis_client = None
+        _leaderboard_service = LeaderboardService(redis_client)
+    return _leaderboard_service
+
+
+def set_leaderboard_service(leaderboard_service: Optional[LeaderboardService]) -> None:
+    """
+    Replace the shared LeaderboardService (e.g. with an in-process instance in tests).
+    """
+    global _leaderboard_service
+    _leaderboard_service = leaderboard_service
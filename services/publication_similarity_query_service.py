@@ -1,26 +1,104 @@
 import time
 from typing import List, Optional, Dict
 
-from qdrant_client.http.models import Filter, FieldCondition, MatchAny
+from qdrant_client.http.models import (
+    Filter, FieldCondition, Fusion, FusionQuery, MatchAny, MatchValue, Prefetch, QueryRequest, Range, ScoredPoint,
+)
 from sentence_transformers import SentenceTransformer
 from sqlalchemy.orm import Session
 
-from models.publications.publication import Publication
+from request_models.publication_similarity_query_service import (
+    PublicationSDGDistributionRequest,
+    PublicationSDGSimilarityRequest,
+    PublicationSimilarityFilters,
+)
 from schemas.services.publication_similarity_query_service import (
     FunctionResponsePublicationSimilaritySchema,
+    PublicationSDGSimilaritySchema,
     PublicationSimilaritySchema,
 )
 from settings.settings import EmbeddingsSettings, QdrantDBSettings
 
+# Payload fields the results are built from
+RESULT_PAYLOAD_FIELDS = [QdrantDBSettings.PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME, "title", "description"]
+
+
+def build_filter(publication_ids: Optional[List[int]] = None,
+                 filters: Optional[PublicationSimilarityFilters] = None,
+                 exclude_publication_ids: Optional[List[int]] = None) -> Optional[Filter]:
+    """
+    Qdrant filter on the indexed payload fields (written by pipeline/zora/loader.py).
+    """
+    conditions, exclusions = [], []
+    if exclude_publication_ids:
+        exclusions.append(FieldCondition(key=QdrantDBSettings.PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME,
+                                         match=MatchAny(any=exclude_publication_ids)))
+    if publication_ids:
+        conditions.append(FieldCondition(key=QdrantDBSettings.PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME,
+                                         match=MatchAny(any=publication_ids)))
+    if filters:
+        if filters.sdg is not None and filters.level is not None:
+            conditions.append(FieldCondition(key="sdg_levels", match=MatchValue(value=f"sdg{filters.sdg}_level{filters.level}")))
+        elif filters.sdg is not None:
+            conditions.append(FieldCondition(key="top_sdg", match=MatchValue(value=filters.sdg)))
+        if filters.year_from is not None or filters.year_to is not None:
+            conditions.append(FieldCondition(key="year", range=Range(gte=filters.year_from, lte=filters.year_to)))
+        if filters.faculty_ids:
+            conditions.append(FieldCondition(key="faculty_id", match=MatchAny(any=filters.faculty_ids)))
+        if filters.collection_ids:
+            conditions.append(FieldCondition(key="collection_id", match=MatchAny(any=filters.collection_ids)))
+    return Filter(must=conditions or None, must_not=exclusions or None) if conditions or exclusions else None
+
+
+def weighted_fusion(results: List[List[ScoredPoint]], weights: List[float], top_k: int) -> List[ScoredPoint]:
+    """
+    Fuse the results of several searches by the weighted sum of their min-max normalized scores (a point missing
+    from a search scores 0 there), so searches on differently scaled vectors (17-d SDG predictions, content
+    embeddings) contribute by their weight only.
+    """
+    fused: Dict[int, float] = {}
+    points: Dict[int, ScoredPoint] = {}
+    for search_results, weight in zip(results, weights):
+        if not search_results:
+            continue
+        scores = [point.score for point in search_results]
+        low, spread = min(scores), max(scores) - min(scores)
+        for point in search_results:
+            normalized = (point.score - low) / spread if spread else 1.0
+            fused[point.id] = fused.get(point.id, 0.0) + weight * normalized
+            points.setdefault(point.id, point)
+    ranking = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [points[point_id].model_copy(update={"score": fused[point_id]}) for point_id in ranking]
+
+
+def to_results(points: List[ScoredPoint]) -> List[dict]:
+    """API results built from the payload of the points, in their order."""
+    return [
+        FunctionResponsePublicationSimilaritySchema(
+            publication_id=point.payload[QdrantDBSettings.PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME],
+            title=point.payload.get("title") or "",
+            abstract=point.payload.get("description") or "",
+            score=point.score,
+        ).model_dump()
+        for point in points
+    ]
+
 
 class PublicationSimilarityQueryService:
     def __init__(self, qdrant_client, db: Session):
         self.qclient = qdrant_client
         self.db = db
-        self.encoder = SentenceTransformer(
-            model_name_or_path=EmbeddingsSettings().ENCODER_MODEL,
-            device=EmbeddingsSettings().ENCODER_DEVICE
-        )
+        self._encoder = None
+
+    @property
+    def encoder(self) -> SentenceTransformer:
+        """Loaded on first use: the SDG-vector searches of a publication do not embed any text."""
+        if self._encoder is None:
+            self._encoder = SentenceTransformer(
+                model_name_or_path=EmbeddingsSettings().ENCODER_MODEL,
+                device=EmbeddingsSettings().ENCODER_DEVICE
+            )
+        return self._encoder
 
     def generate_user_query_vector(self, user_query: str) -> List[float]:
         """Generate embedding for the user query string."""
@@ -30,33 +108,26 @@ class PublicationSimilarityQueryService:
         except Exception as e:
             raise
 
-    def search_publications(self, query_vector: List[float], collection_name: str, top_k: int = 5, publication_ids: Optional[List[int]] = None) -> List[Dict]:
-        """Perform similarity search in Qdrant within a subset of publication IDs."""
+    def search_publications(self, query_vector: List[float], collection_name: str, top_k: int = 5,
+                            publication_ids: Optional[List[int]] = None,
+                            filters: Optional[PublicationSimilarityFilters] = None) -> List[Dict]:
+        """Perform similarity search in Qdrant, filtered on the payload (publication IDs, SDG, year, ...)."""
         try:
-            # Create a filter if publication IDs are provided
-            query_filter = None
-            if publication_ids:
-                query_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="sql_id",
-                            match=MatchAny(any=publication_ids)
-                        )
-                    ]
-                )
-
-            search_results = self.qclient.search(
+            response = self.qclient.query_points(
                 collection_name=collection_name,
-                query_vector=(QdrantDBSettings().PUBLICATIONS_CONTENT_VECTOR_NAME, query_vector),  # Use named vector format
-                query_filter=query_filter,  # Use the filter here
-                limit=top_k
+                query=query_vector,
+                using=QdrantDBSettings().PUBLICATIONS_CONTENT_VECTOR_NAME,  # Named vector
+                query_filter=build_filter(publication_ids, filters),
+                limit=top_k,
+                with_payload=RESULT_PAYLOAD_FIELDS,
             )
-            return search_results
+            return response.points
         except Exception as e:
             raise
 
-    def get_similar_publications(self, user_query: str, top_k: int, publication_ids: Optional[List[int]] = None) -> PublicationSimilaritySchema:
-        """Main method to retrieve similar publications."""
+    def get_similar_publications(self, user_query: str, top_k: int, publication_ids: Optional[List[int]] = None,
+                                 filters: Optional[PublicationSimilarityFilters] = None) -> PublicationSimilaritySchema:
+        """Main method to retrieve similar publications (one Qdrant query, served from the payload)."""
         # Generate the query vector
         start = time.time()
         query_vector = self.generate_user_query_vector(user_query)
@@ -68,39 +139,135 @@ class PublicationSimilarityQueryService:
             query_vector=query_vector,
             collection_name=QdrantDBSettings().PUBLICATIONS_COLLECTION_NAME,
             top_k=top_k,
-            publication_ids=publication_ids
+            publication_ids=publication_ids,
+            filters=filters,
         )
         search_time = time.time() - start
 
-        # Extract publication IDs and similarity scores
-        publication_scores = {result.payload[QdrantDBSettings.PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME]: result.score for result in search_results}
-        publication_ids = list(publication_scores.keys())
+        # Convert to API Response Schema, the results built from the payload (already sorted by score)
+        return PublicationSimilaritySchema(
+            query_building_time=query_building_time,
+            search_time=search_time,
+            user_query=user_query,
+            results=to_results(search_results)
+        )
+
+    def search_sdg_vectors(self, goal_vector: List[float], goal_vector_name: str, top_k: int,
+                           content_vector: Optional[List[float]] = None, content_weight: float = 0.0,
+                           fusion: str = "weighted", query_filter: Optional[Filter] = None) -> List[ScoredPoint]:
+        """
+        ANN search over a goal vector, fused with a content search if content_weight > 0:
+          weighted  both searches in one batch request, scores combined by weighted_fusion
+          rrf       reciprocal rank fusion of both searches by Qdrant, in one query (content_weight only enables it)
+        """
+        collection_name = QdrantDBSettings.PUBLICATIONS_COLLECTION_NAME
+        content_vector_name = QdrantDBSettings.PUBLICATIONS_CONTENT_VECTOR_NAME
+        if content_vector is None or content_weight == 0:
+            return self.qclient.query_points(
+                collection_name=collection_name, query=goal_vector, using=goal_vector_name,
+                query_filter=query_filter, limit=top_k, with_payload=RESULT_PAYLOAD_FIELDS,
+            ).points
 
-        # Fetch publication details from the database
-        publications = (
-            self.db.query(Publication)
-            .filter(Publication.publication_id.in_(publication_ids))
-            .all()
+        candidates = top_k * QdrantDBSettings.FUSION_CANDIDATES_FACTOR
+        if fusion == "rrf":
+            return self.qclient.query_points(
+                collection_name=collection_name,
+                prefetch=[
+                    Prefetch(query=goal_vector, using=goal_vector_name, filter=query_filter, limit=candidates),
+                    Prefetch(query=content_vector, using=content_vector_name, filter=query_filter, limit=candidates),
+                ],
+                query=FusionQuery(fusion=Fusion.RRF),
+                limit=top_k,
+                with_payload=RESULT_PAYLOAD_FIELDS,
+            ).points
+
+        goal_response, content_response = self.qclient.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                QueryRequest(query=goal_vector, using=goal_vector_name, filter=query_filter, limit=candidates,
+                             with_payload=RESULT_PAYLOAD_FIELDS),
+                QueryRequest(query=content_vector, using=content_vector_name, filter=query_filter, limit=candidates,
+                             with_payload=RESULT_PAYLOAD_FIELDS),
+            ],
         )
+        return weighted_fusion([goal_response.points, content_response.points],
+                               [1.0 - content_weight, content_weight], top_k)
 
-        # Build the results using FunctionResponsePublicationSimilaritySchema
-        results = [
-            FunctionResponsePublicationSimilaritySchema(
-                publication_id=pub.publication_id,
-                title=pub.title,
-                abstract=pub.description,
-                score=publication_scores.get(pub.publication_id, 0.0)
-            )
-            for pub in publications
-        ]
+    def get_similar_sdg_profile(self, publication_id: int, top_k: int,
+                                request: PublicationSDGSimilarityRequest) -> Optional[PublicationSDGSimilaritySchema]:
+        """
+        Publications with an SDG profile similar to the one of a publication (its stored goal vector), optionally
+        fused with the similarity of its stored content vector. The publication itself is excluded.
 
-        # Sort results by score in descending order
-        sorted_results = sorted(results, key=lambda x: x.score, reverse=True)
+        Returns:
+            Optional[PublicationSDGSimilaritySchema]: None if the publication has no such goal vector in Qdrant.
+        """
+        goal_vector_name = QdrantDBSettings.PUBLICATIONS_GOAL_VECTOR_NAMES[request.prediction_model]
+        content_vector_name = QdrantDBSettings.PUBLICATIONS_CONTENT_VECTOR_NAME
+        use_content = request.content_weight > 0
 
-        # Convert to API Response Schema
-        return PublicationSimilaritySchema(
+        start = time.time()
+        points, _ = self.qclient.scroll(
+            collection_name=QdrantDBSettings.PUBLICATIONS_COLLECTION_NAME,
+            scroll_filter=build_filter([publication_id]),
+            limit=1,
+            with_payload=False,
+            with_vectors=[goal_vector_name, content_vector_name] if use_content else [goal_vector_name],
+        )
+        vectors = points[0].vector if points else {}
+        if goal_vector_name not in vectors:
+            return None
+        query_building_time = time.time() - start
+
+        start = time.time()
+        search_results = self.search_sdg_vectors(
+            goal_vector=vectors[goal_vector_name],
+            goal_vector_name=goal_vector_name,
+            top_k=top_k,
+            content_vector=vectors.get(content_vector_name),
+            content_weight=request.content_weight,
+            fusion=request.fusion,
+            query_filter=build_filter(request.publication_ids, request.filters,
+                                      [publication_id, *(request.exclude_publication_ids or [])]),
+        )
+        search_time = time.time() - start
+
+        return PublicationSDGSimilaritySchema(
             query_building_time=query_building_time,
             search_time=search_time,
-            user_query=user_query,
-            results=[result.model_dump() for result in sorted_results]
+            prediction_model=request.prediction_model,
+            fusion=request.fusion if use_content else None,
+            results=to_results(search_results),
+        )
+
+    def get_publications_by_sdg_distribution(self, top_k: int,
+                                             request: PublicationSDGDistributionRequest) -> PublicationSDGSimilaritySchema:
+        """
+        Publications whose goal vector best matches an SDG distribution (dot product), optionally fused with the
+        similarity to the user query.
+        """
+        use_content = request.content_weight > 0
+
+        start = time.time()
+        content_vector = self.generate_user_query_vector(request.user_query) if use_content else None
+        query_building_time = time.time() - start
+
+        start = time.time()
+        search_results = self.search_sdg_vectors(
+            goal_vector=request.sdg_distribution,
+            goal_vector_name=QdrantDBSettings.PUBLICATIONS_GOAL_VECTOR_NAMES[request.prediction_model],
+            top_k=top_k,
+            content_vector=content_vector,
+            content_weight=request.content_weight,
+            fusion=request.fusion,
+            query_filter=build_filter(request.publication_ids, request.filters, request.exclude_publication_ids),
+        )
+        search_time = time.time() - start
+
+        return PublicationSDGSimilaritySchema(
+            query_building_time=query_building_time,
+            search_time=search_time,
+            prediction_model=request.prediction_model,
+            fusion=request.fusion if use_content else None,
+            results=to_results(search_results),
         )
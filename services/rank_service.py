@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import false, or_
+from sqlalchemy.orm import Session
+
+from models import SDGRank, SDGXPBank
+from models.users.user import User
+from schemas.sdg_ranks import SDGRankSchemaFull, UsersSDGRankSchemaBase
+from schemas.users.user import UserSchemaFull
+from settings.settings import RankServiceSettings, SDGSettings
+from utils.logger import logger
+
+rank_service_settings = RankServiceSettings()
+sdg_settings = SDGSettings()
+
+# Setup Logging
+logging = logger(rank_service_settings.RANK_SERVICE_LOG_NAME)
+
+SDG_XP_COLUMNS = [getattr(SDGXPBank, f"sdg{i}_xp") for i in range(1, sdg_settings.SDGOAL_NUMBER + 1)]
+
+
+class RankService:
+    """
+    Resolves SDG rank tiers for many users at once.
+
+    The SDGRank threshold table is loaded once into one sorted array per SDG; the tiers of all users
+    are then found with one vectorised searchsorted per SDG over the (users x 17) XP matrix,
+    instead of one query per user and SDG.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.thresholds: Dict[int, np.ndarray] = {}
+        self.ranks: Dict[int, List[SDGRankSchemaFull]] = {}
+        self._load_ranks()
+        logging.info("RankService initialized.")
+
+    def _load_ranks(self) -> None:
+        """
+        Load the SDGRank table into per-SDG sorted threshold arrays and pre-validated rank schemas.
+        """
+        ranks = (
+            self.db.query(SDGRank)
+            .order_by(SDGRank.sdg_goal_id, SDGRank.xp_required, SDGRank.tier)
+            .all()
+        )
+        for sdg_id in range(1, sdg_settings.SDGOAL_NUMBER + 1):
+            sdg_ranks = [rank for rank in ranks if rank.sdg_goal_id == sdg_id]
+            self.thresholds[sdg_id] = np.array([rank.xp_required for rank in sdg_ranks], dtype=np.float64)
+            self.ranks[sdg_id] = [SDGRankSchemaFull.model_validate(rank) for rank in sdg_ranks]
+
+    def resolve_tiers(self, xp_matrix: np.ndarray) -> np.ndarray:
+        """
+        Resolve the rank index for every user and SDG.
+
+        Args:
+            xp_matrix (np.ndarray): XP values of shape (n_users, 17), column i holding SDG i+1.
+
+        Returns:
+            np.ndarray: Indices into self.ranks[sdg] of shape (n_users, 17); -1 where no rank qualifies.
+        """
+        indices = np.full(xp_matrix.shape, -1, dtype=np.int64)
+        for sdg_id, thresholds in self.thresholds.items():
+            if thresholds.size:
+                # Highest threshold <= XP, i.e. the same rank as ORDER BY xp_required DESC LIMIT 1
+                indices[:, sdg_id - 1] = np.searchsorted(thresholds, xp_matrix[:, sdg_id - 1], side="right") - 1
+        return indices
+
+    def qualifies_for_rank(self):
+        """
+        SQL condition for XP banks that reach at least one rank, i.e. the rows resolve_tiers does not map to -1 only.
+        """
+        conditions = [
+            SDG_XP_COLUMNS[sdg_id - 1] >= float(thresholds[0])
+            for sdg_id, thresholds in self.thresholds.items()
+            if thresholds.size
+        ]
+        return or_(*conditions) if conditions else false()
+
+    def load_xp_matrix(self, user_ids: Optional[List[int]] = None, order_by=None, limit: Optional[int] = None,
+                       ranked_only: bool = False):
+        """
+        Load the XP banks as a (user_ids, xp_matrix) pair using a column-only query.
+        With ranked_only, banks without a user or without any qualifying rank are filtered out before the limit.
+        """
+        query = self.db.query(SDGXPBank.user_id, *SDG_XP_COLUMNS)
+        if ranked_only:
+            query = query.join(User, User.user_id == SDGXPBank.user_id).filter(self.qualifies_for_rank())
+        if user_ids is not None:
+            query = query.filter(SDGXPBank.user_id.in_(user_ids))
+        if order_by is not None:
+            query = query.order_by(order_by.desc(), SDGXPBank.user_id)
+        else:
+            query = query.order_by(SDGXPBank.user_id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        rows = query.all()
+        bank_user_ids = [row[0] for row in rows]
+        xp_matrix = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), sdg_settings.SDGOAL_NUMBER)
+        return bank_user_ids, xp_matrix
+
+    def get_user_ranks(self, user_ids: Optional[List[int]] = None, order_by=None, limit: Optional[int] = None) -> List[UsersSDGRankSchemaBase]:
+        """
+        Build the ranks of the given users (all users with an XP bank if None).
+        Users without an XP bank or without any qualifying rank are skipped, in SQL, so they do not count
+        towards the limit.
+        """
+        bank_user_ids, xp_matrix = self.load_xp_matrix(user_ids=user_ids, order_by=order_by, limit=limit,
+                                                       ranked_only=True)
+        if not bank_user_ids:
+            return []
+
+        tiers = self.resolve_tiers(xp_matrix)
+
+        users = self.db.query(User).filter(User.user_id.in_(bank_user_ids)).all()
+        users_by_id = {user.user_id: user for user in users}
+
+        user_ranks = []
+        for row, user_id in enumerate(bank_user_ids):
+            user = users_by_id.get(user_id)
+            if user is None:
+                continue
+
+            ranks = [
+                self.ranks[sdg_id][tiers[row, sdg_id - 1]]
+                for sdg_id in range(1, sdg_settings.SDGOAL_NUMBER + 1)
+                if tiers[row, sdg_id - 1] >= 0
+            ]
+            if ranks:
+                user_ranks.append(UsersSDGRankSchemaBase(
+                    user_id=user_id,
+                    user=UserSchemaFull.model_validate(user),
+                    ranks=ranks,
+                ))
+        return user_ranks
+
+    def get_leaderboard(self, top_k: int, sdg: Optional[int] = None) -> List[UsersSDGRankSchemaBase]:
+        """
+        Return the top-k users by total XP (or by the XP of one SDG) together with their ranks.
+        """
+        order_by = SDGXPBank.total_xp if sdg is None else getattr(SDGXPBank, f"sdg{sdg}_xp")
+        return self.get_user_ranks(order_by=order_by, limit=top_k)
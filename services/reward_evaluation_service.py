@@ -0,0 +1,538 @@
+import heapq
+import json
+import queue
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from enums import SDGType
+from enums.enums import RewardEvaluationStatusType
+from models import SDGPrediction, SDGUserLabel, SDGXPBank, SDGXPBankHistory
+from services.leaderboard_service import get_leaderboard_service
+from services.reward_service import RewardService
+from settings.settings import RewardEvaluationServiceSettings, TimeZoneSettings
+from utils.logger import logger
+
+reward_evaluation_service_settings = RewardEvaluationServiceSettings()
+time_zone_settings = TimeZoneSettings()
+
+# Setup Logging
+logging = logger(reward_evaluation_service_settings.REWARD_EVALUATION_SERVICE_LOG_NAME)
+
+
+class InMemoryRewardQueueBackend:
+    """
+    In-process job queue, retry schedule, dead letters and status store.
+    Used as fallback whenever Redis is not reachable (e.g. local development and tests). Its jobs do not survive a
+    restart; the reconciliation scan of RewardEvaluationService re-enqueues the labels they were for.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[int]" = queue.Queue()
+        self._processing: Set[int] = set()
+        self._delayed: List[Tuple[float, int]] = []  # Heap of (due time, label ID)
+        self._dead: Deque[int] = deque(maxlen=reward_evaluation_service_settings.DEAD_LETTER_MAX_SIZE)
+        self._statuses: Dict[int, dict] = {}
+        self._lock = Lock()
+        self._reconciled_at = 0.0
+
+    def push(self, label_id: int) -> None:
+        self._queue.put(label_id)
+
+    def pop(self, timeout: float) -> Optional[int]:
+        """Next job, moved to the in-flight set until it is acknowledged (timeout 0: do not wait)."""
+        try:
+            label_id = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._processing.add(label_id)
+        return label_id
+
+    def ack(self, label_id: int) -> None:
+        with self._lock:
+            self._processing.discard(label_id)
+
+    def in_flight(self) -> List[int]:
+        with self._lock:
+            return list(self._processing)
+
+    def requeue(self, label_id: int) -> None:
+        self.ack(label_id)
+        self.push(label_id)
+
+    def schedule(self, label_id: int, delay: float) -> None:
+        with self._lock:
+            heapq.heappush(self._delayed, (time.time() + delay, label_id))
+
+    def promote_due(self) -> int:
+        """Move the retries that are due to the queue."""
+        due = []
+        with self._lock:
+            while self._delayed and self._delayed[0][0] <= time.time():
+                due.append(heapq.heappop(self._delayed)[1])
+        for label_id in due:
+            self.push(label_id)
+        return len(due)
+
+    def dead_letter(self, label_id: int) -> None:
+        with self._lock:
+            self._dead.append(label_id)
+
+    def dead_letters(self) -> List[int]:
+        with self._lock:
+            return list(self._dead)
+
+    def claim_reconciliation(self, interval: float) -> bool:
+        with self._lock:
+            if time.time() - self._reconciled_at < interval:
+                return False
+            self._reconciled_at = time.time()
+            return True
+
+    def get_status(self, label_id: int) -> Optional[dict]:
+        with self._lock:
+            status = self._statuses.get(label_id)
+            return dict(status) if status else None
+
+    def set_status(self, label_id: int, status: dict) -> None:
+        with self._lock:
+            self._statuses[label_id] = dict(status)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+
+class RedisRewardQueueBackend:
+    """
+    Redis-backed job queue, shared by all API processes so any of their workers can pick up a job:
+      queue       list of label IDs waiting for a worker
+      processing  list of jobs taken by a worker (LMOVE/BLMOVE), removed by `ack` once the job is finished, so
+                  the jobs of a crashed worker stay visible and are requeued by the reconciliation
+      delayed     sorted set of retries by due time
+      dead        capped list of the jobs that failed MAX_ATTEMPTS times
+      status      one JSON string per label with a TTL
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _key(self, name: str) -> str:
+        return f"{reward_evaluation_service_settings.REDIS_KEY_PREFIX}:{name}"
+
+    def _status_key(self, label_id: int) -> str:
+        return f"{reward_evaluation_service_settings.REDIS_STATUS_KEY_PREFIX}:{label_id}"
+
+    def push(self, label_id: int) -> None:
+        self.client.rpush(reward_evaluation_service_settings.REDIS_QUEUE_KEY, label_id)
+
+    def pop(self, timeout: float) -> Optional[int]:
+        """Next job, moved atomically to the processing list (timeout 0: do not wait)."""
+        source, destination = reward_evaluation_service_settings.REDIS_QUEUE_KEY, self._key("processing")
+        if timeout > 0:
+            item = self.client.blmove(source, destination, timeout, "LEFT", "RIGHT")
+        else:
+            item = self.client.lmove(source, destination, "LEFT", "RIGHT")
+        return int(item) if item is not None else None
+
+    def ack(self, label_id: int) -> None:
+        self.client.lrem(self._key("processing"), 1, label_id)
+
+    def in_flight(self) -> List[int]:
+        return [int(label_id) for label_id in self.client.lrange(self._key("processing"), 0, -1)]
+
+    def requeue(self, label_id: int) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.lrem(self._key("processing"), 1, label_id)
+        pipeline.rpush(reward_evaluation_service_settings.REDIS_QUEUE_KEY, label_id)
+        pipeline.execute()
+
+    def schedule(self, label_id: int, delay: float) -> None:
+        self.client.zadd(self._key("delayed"), {str(label_id): time.time() + delay})
+
+    def promote_due(self) -> int:
+        due = self.client.zrangebyscore(self._key("delayed"), "-inf", time.time(), start=0,
+                                        num=reward_evaluation_service_settings.RECONCILE_BATCH_SIZE)
+        promoted = 0
+        for label_id in due:
+            if self.client.zrem(self._key("delayed"), label_id):  # Only one process promotes each retry
+                self.push(int(label_id))
+                promoted += 1
+        return promoted
+
+    def dead_letter(self, label_id: int) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.lpush(self._key("dead"), label_id)
+        pipeline.ltrim(self._key("dead"), 0, reward_evaluation_service_settings.DEAD_LETTER_MAX_SIZE - 1)
+        pipeline.execute()
+
+    def dead_letters(self) -> List[int]:
+        return [int(label_id) for label_id in self.client.lrange(self._key("dead"), 0, -1)]
+
+    def claim_reconciliation(self, interval: float) -> bool:
+        """Only one API process reconciles per interval."""
+        return bool(self.client.set(self._key("reconciled"), 1, nx=True, ex=max(1, int(interval))))
+
+    def get_status(self, label_id: int) -> Optional[dict]:
+        value = self.client.get(self._status_key(label_id))
+        return json.loads(value) if value else None
+
+    def set_status(self, label_id: int, status: dict) -> None:
+        self.client.set(self._status_key(label_id), json.dumps(status),
+                        ex=reward_evaluation_service_settings.STATUS_TTL_SECONDS)
+
+    def pending(self) -> int:
+        return self.client.llen(reward_evaluation_service_settings.REDIS_QUEUE_KEY)
+
+
+class RewardEvaluationService:
+    """
+    Background XP evaluation for submitted user labels.
+
+    Label submission only commits the label and the consensus state and enqueues the label here.
+    Worker threads then evaluate the comment (LLM + semantic similarity via RewardService), and apply
+    the XP increment to the SDGXPBank, its SDGXPBankHistory and the leaderboards in a short transaction
+    of their own. The job state of every label can be polled via `status`.
+    Uses a Redis list when Redis is reachable and an in-process queue otherwise.
+
+    A job is acknowledged only once it is finished. Failed jobs are retried after an exponential backoff and
+    dead-lettered after MAX_ATTEMPTS. The reward is idempotent (SDGXPBankHistory.label_id), so the periodic
+    `reconcile` can safely re-enqueue stale in-flight jobs and every recent label that never received XP.
+    """
+
+    def __init__(self, redis_client=None, session_factory: Optional[Callable[[], Session]] = None,
+                 worker_count: int = reward_evaluation_service_settings.WORKER_COUNT):
+        self.session_factory = session_factory
+        self.worker_count = worker_count
+        self.fallback = InMemoryRewardQueueBackend()
+        self.backend = self.fallback
+        self._workers: List[Thread] = []
+        self._stop = Event()
+        self._lock = Lock()
+
+        if redis_client is not None:
+            try:
+                redis_client.ping()
+                self.backend = RedisRewardQueueBackend(redis_client)
+                logging.info("RewardEvaluationService initialized with Redis backend.")
+                return
+            except Exception as e:
+                logging.warning(f"Redis not reachable, using in-process reward queue: {e}")
+        logging.info("RewardEvaluationService initialized with in-process backend.")
+
+    @property
+    def backend_name(self) -> str:
+        return "redis" if isinstance(self.backend, RedisRewardQueueBackend) else "memory"
+
+    def _use_fallback(self, e: Exception) -> None:
+        logging.error(f"Redis reward queue error, switching to in-process queue: {e}")
+        self.backend = self.fallback
+        self.start()  # Nobody else drains the in-process queue
+
+    def _set_status(self, label_id: int, status: RewardEvaluationStatusType, attempts: int = 0,
+                    xp: Optional[int] = None, error: Optional[str] = None,
+                    retry_at: Optional[datetime] = None) -> None:
+        value = {
+            "label_id": label_id,
+            "status": status.value,
+            "xp": xp,
+            "attempts": attempts,
+            "error": error,
+            "retry_at": retry_at.isoformat() if retry_at else None,
+            "updated_at": datetime.now(time_zone_settings.ZURICH_TZ).isoformat(),
+        }
+        try:
+            self.backend.set_status(label_id, value)
+        except Exception as e:
+            self._use_fallback(e)
+            self.backend.set_status(label_id, value)
+
+    def enqueue(self, label_id: int, attempts: int = 0) -> None:
+        """
+        Queue the XP evaluation of a committed user label.
+
+        Args:
+            label_id (int): ID of the SDGUserLabel to evaluate.
+            attempts (int): Attempts already made (when a lost job is re-enqueued).
+        """
+        self._set_status(label_id, RewardEvaluationStatusType.QUEUED, attempts=attempts)
+        try:
+            self.backend.push(label_id)
+        except Exception as e:
+            self._use_fallback(e)
+            self.backend.push(label_id)
+
+        if self.backend is self.fallback:
+            self.start()
+        logging.info(f"Queued XP evaluation for label {label_id}.")
+
+    def status(self, label_id: int) -> Optional[dict]:
+        """
+        Returns:
+            Optional[dict]: The job state of the label, or None if no evaluation is known.
+        """
+        try:
+            return self.backend.get_status(label_id)
+        except Exception as e:
+            self._use_fallback(e)
+            return self.backend.get_status(label_id)
+
+    def pending(self) -> int:
+        return self.backend.pending()
+
+    def start(self) -> None:
+        """
+        Start the worker threads (idempotent).
+        """
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            if self._workers:
+                return
+            self._stop.clear()
+            for index in range(self.worker_count):
+                worker = Thread(target=self._run, name=f"reward-evaluation-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        logging.info(f"Started {self.worker_count} reward evaluation workers ({self.backend_name}).")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def drain(self) -> int:
+        """
+        Process queued jobs in the calling thread until the queue is empty (scripts and tests). Retries that
+        are due are processed as well; later ones stay scheduled.
+
+        Returns:
+            int: Number of processed jobs.
+        """
+        processed = 0
+        self.backend.promote_due()
+        while (label_id := self.backend.pop(0)) is not None:
+            self.run_job(label_id)
+            processed += 1
+        return processed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.backend.promote_due()
+                if self.backend.claim_reconciliation(reward_evaluation_service_settings.RECONCILE_INTERVAL_SECONDS):
+                    self.reconcile()
+                label_id = self.backend.pop(reward_evaluation_service_settings.POP_TIMEOUT_SECONDS)
+            except Exception as e:
+                self._use_fallback(e)
+                continue
+            if label_id is not None:
+                self.run_job(label_id)
+
+    def run_job(self, label_id: int) -> None:
+        """
+        Evaluate one label. A failed evaluation is retried after an exponential backoff, up to MAX_ATTEMPTS
+        times, and then marked as failed and dead-lettered. The job is acknowledged once its outcome is stored.
+        """
+        status = self.status(label_id) or {}
+        if status.get("status") == RewardEvaluationStatusType.DONE.value:
+            logging.info(f"XP for label {label_id} was already awarded. Skipping job.")
+            self.backend.ack(label_id)
+            return
+
+        attempts = status.get("attempts", 0) + 1
+        self._set_status(label_id, RewardEvaluationStatusType.RUNNING, attempts=attempts)
+        try:
+            xp = self.evaluate_and_award(label_id)
+        except Exception as e:
+            logging.error(f"XP evaluation for label {label_id} failed (attempt {attempts}): {e}")
+            if attempts < reward_evaluation_service_settings.MAX_ATTEMPTS:
+                delay = min(reward_evaluation_service_settings.RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1),
+                            reward_evaluation_service_settings.RETRY_BACKOFF_MAX_SECONDS)
+                retry_at = datetime.now(time_zone_settings.ZURICH_TZ) + timedelta(seconds=delay)
+                self._set_status(label_id, RewardEvaluationStatusType.QUEUED, attempts=attempts, error=str(e),
+                                 retry_at=retry_at)
+                self.backend.schedule(label_id, delay)
+            else:
+                self._set_status(label_id, RewardEvaluationStatusType.FAILED, attempts=attempts, error=str(e))
+                self.backend.dead_letter(label_id)
+            self.backend.ack(label_id)
+            return
+
+        self._set_status(label_id, RewardEvaluationStatusType.DONE, attempts=attempts, xp=xp)
+        self.backend.ack(label_id)
+
+    def _is_stale(self, status: Optional[dict]) -> bool:
+        """Whether a queued or running job has shown no progress for STALE_JOB_SECONDS (its worker is gone)."""
+        if not status or status.get("status") not in (RewardEvaluationStatusType.QUEUED.value,
+                                                      RewardEvaluationStatusType.RUNNING.value):
+            return False
+        updated_at = datetime.fromisoformat(status["updated_at"])
+        stale_at = updated_at + timedelta(seconds=reward_evaluation_service_settings.STALE_JOB_SECONDS)
+        retry_at = status.get("retry_at")
+        if retry_at:
+            stale_at = max(stale_at, datetime.fromisoformat(retry_at) + timedelta(
+                seconds=reward_evaluation_service_settings.STALE_JOB_SECONDS))
+        return stale_at < datetime.now(time_zone_settings.ZURICH_TZ)
+
+    def reconcile(self) -> int:
+        """
+        Re-enqueue lost work:
+          - in-flight jobs whose worker stopped updating them for STALE_JOB_SECONDS (crash or restart),
+          - labels of the last RECONCILE_WINDOW_SECONDS (older than RECONCILE_MIN_AGE_SECONDS) without an
+            SDGXPBankHistory entry whose job is unknown (lost with the in-process queue) or stale.
+        Dead-lettered (failed) labels are not retried.
+
+        Returns:
+            int: Number of re-enqueued labels.
+        """
+        requeued = 0
+        for label_id in self.backend.in_flight():
+            status = self.status(label_id)
+            if status is None or self._is_stale(status):
+                self._set_status(label_id, RewardEvaluationStatusType.QUEUED, attempts=(status or {}).get("attempts", 0))
+                self.backend.requeue(label_id)
+                requeued += 1
+
+        if self.session_factory is not None:
+            now = datetime.now(time_zone_settings.ZURICH_TZ)
+            db = self.session_factory()
+            try:
+                label_ids = [
+                    label_id for (label_id,) in
+                    db.query(SDGUserLabel.label_id)
+                    .outerjoin(SDGXPBankHistory, SDGXPBankHistory.label_id == SDGUserLabel.label_id)
+                    .filter(SDGXPBankHistory.history_id.is_(None))
+                    .filter(SDGUserLabel.created_at >= now - timedelta(seconds=reward_evaluation_service_settings.RECONCILE_WINDOW_SECONDS))
+                    .filter(SDGUserLabel.created_at < now - timedelta(seconds=reward_evaluation_service_settings.RECONCILE_MIN_AGE_SECONDS))
+                    .order_by(SDGUserLabel.label_id)
+                    .limit(reward_evaluation_service_settings.RECONCILE_BATCH_SIZE)
+                ]
+            finally:
+                db.close()
+
+            for label_id in label_ids:
+                status = self.status(label_id)
+                if status is None or self._is_stale(status):
+                    self.enqueue(label_id, attempts=(status or {}).get("attempts", 0))
+                    requeued += 1
+
+        if requeued:
+            logging.warning(f"Reconciliation re-enqueued {requeued} XP evaluations.")
+        return requeued
+
+    @staticmethod
+    def _awarded_xp(db: Session, label_id: int, lock: bool = False) -> Optional[int]:
+        """XP already awarded for the label, or None. `lock` makes it a locking read of the latest committed rows."""
+        query = db.query(SDGXPBankHistory.increment).filter(SDGXPBankHistory.label_id == label_id)
+        increment = (query.with_for_update() if lock else query).first()
+        return None if increment is None else int(increment[0])
+
+    def evaluate_and_award(self, label_id: int) -> int:
+        """
+        Calculate the XP of a label and apply it to the user's XP bank.
+
+        The slow evaluation runs before the XP bank row is locked, so the write transaction stays short.
+
+        Returns:
+            int: The awarded XP.
+        """
+        db = self.session_factory()
+        try:
+            label = db.query(SDGUserLabel).filter(SDGUserLabel.label_id == label_id).first()
+            if not label:
+                raise ValueError(f"SDGUserLabel with ID {label_id} not found")
+
+            awarded = self._awarded_xp(db, label_id)
+            if awarded is not None:
+                return awarded  # A previous attempt committed the reward (e.g. before its worker crashed)
+
+            prediction = (
+                db.query(SDGPrediction)
+                .filter(SDGPrediction.publication_id == label.publication_id)
+                .filter(SDGPrediction.prediction_model == "Aurora")
+                .first()
+            )
+            if not prediction:
+                logging.warning(f"No SDG prediction found for publication {label.publication_id}. Using no base XP.")
+
+            base_xp = prediction.entropy * 10 if prediction else 0.0
+            additional_xp = RewardService(db)._calculate_xp(label)
+            total_xp = int(additional_xp + base_xp)
+
+            logging.info(f"User {label.user_id} gets {total_xp} = {base_xp} (Base) + {additional_xp} (Additional) XP.")
+
+            xp_bank = (
+                db.query(SDGXPBank)
+                .filter(SDGXPBank.user_id == label.user_id)
+                .with_for_update()
+                .first()
+            )
+            if not xp_bank:
+                raise ValueError(f"No XP bank found for user {label.user_id}")
+
+            # Every reward of the user locks the same XP bank row, so this check cannot race another award
+            awarded = self._awarded_xp(db, label_id, lock=True)
+            if awarded is not None:
+                db.rollback()
+                return awarded
+
+            sdg_xp_field = f"sdg{label.voted_label}_xp"
+            if not hasattr(xp_bank, sdg_xp_field):
+                raise ValueError(f"Invalid SDG XP field: {sdg_xp_field}")
+
+            xp_bank.total_xp += total_xp
+            setattr(xp_bank, sdg_xp_field, getattr(xp_bank, sdg_xp_field) + total_xp)
+
+            db.add(SDGXPBankHistory(
+                xp_bank_id=label.user_id,
+                sdg=SDGType[f"SDG_{label.voted_label}"],
+                increment=total_xp,
+                reason=f"Initial XP reward for SDG labeling of the Publication {label.publication_id}",
+                is_shown=False,
+                label_id=label_id,
+            ))
+            db.commit()
+            logging.info(f"Logged XP transaction for user {label.user_id}: {total_xp} XP.")
+
+            get_leaderboard_service().add_xp(label.user_id, label.voted_label, total_xp)
+            return total_xp
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+_reward_evaluation_service: Optional[RewardEvaluationService] = None
+
+
+def get_reward_evaluation_service() -> RewardEvaluationService:
+    """
+    Return the shared RewardEvaluationService, connecting to Redis and MariaDB on first use.
+    """
+    global _reward_evaluation_service
+    if _reward_evaluation_service is None:
+        try:
+            from db.redisdb_connector import client as redis_client
+        except Exception as e:
+            logging.warning(f"Redis connector unavailable: {e}")
+            redis_client = None
+        from sqlalchemy.orm import sessionmaker
+        from db.mariadb_connector import engine as mariadb_engine
+        _reward_evaluation_service = RewardEvaluationService(
+            redis_client, session_factory=sessionmaker(autocommit=False, autoflush=False, bind=mariadb_engine)
+        )
+    return _reward_evaluation_service
+
+
+def set_reward_evaluation_service(reward_evaluation_service: Optional[RewardEvaluationService]) -> None:
+    """
+    Replace the shared RewardEvaluationService (e.g. with an in-process instance in tests).
+    """
+    global _reward_evaluation_service
+    _reward_evaluation_service = reward_evaluation_service
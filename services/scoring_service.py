@@ -1,4 +1,6 @@
 import hashlib
+from functools import lru_cache
+
 import numpy as np
 
 # Define scoring function parameters
@@ -23,10 +25,18 @@ def deterministic_luck(N: int, P_max: float) -> float:
     Returns:
         float: Luck-based adjustment factor.
     """
+    scaled_value = luck_factor(N, P_max)
+    return int((L_max * np.exp(-((N - N_luck) / sigma) ** 2) * scaled_value) + offset)  # Offset avoids negative values
+
+@lru_cache(maxsize=65536)
+def luck_factor(N: int, P_max: float) -> float:
+    """
+    Hash-based luck factor in [0.9, 1.1] of a (N, P_max) pair. Cached, as the same pairs recur for every
+    rewarded user of a decision.
+    """
     hash_input = f"{N}-{P_max}".encode()
     hash_value = int(hashlib.sha256(hash_input).hexdigest(), 16) % 1000  # Convert hash to int
-    scaled_value = 0.9 + (hash_value / 1000) * 0.2  # Scale to range [0.9, 1.1]
-    return int((L_max * np.exp(-((N - N_luck) / sigma) ** 2) * scaled_value) + offset)  # Offset avoids negative values
+    return 0.9 + (hash_value / 1000) * 0.2  # Scale to range [0.9, 1.1]
 
 def score(N: int, P_max: float) -> int:
     """
@@ -49,3 +59,33 @@ def score(N: int, P_max: float) -> int:
     S_L = deterministic_luck(N, P_max)
 
     return int(max(round(S_B + S_I + U_S + S_L), 0))
+
+
+def score_many(N: np.ndarray, P_max: np.ndarray, *, X: float = X, alpha: float = alpha, beta: float = beta,
+               lambda_: float = lambda_, mu: float = mu, L_max: float = L_max, N_luck: float = N_luck,
+               sigma: float = sigma, offset: float = offset) -> np.ndarray:
+    """
+    Vectorised `score` over arrays of vote counts and confidences (broadcast against each other).
+    With the default parameters the result equals `score` element by element; the keyword arguments
+    allow re-simulating rewards with tuned parameters.
+
+    Args:
+        N (np.ndarray): Numbers of votes cast.
+        P_max (np.ndarray): Maximum probability confidences of the votes.
+
+    Returns:
+        np.ndarray: Computed scores (int).
+    """
+    N, P_max = np.broadcast_arrays(np.asarray(N, dtype=np.int64), np.asarray(P_max, dtype=np.float64))
+
+    S_B = X * (P_max ** alpha) * np.exp(-lambda_ * N)  # Initial confidence, slow decay
+    S_I = X * (1 - np.exp(-mu * N)) * (P_max ** beta)  # Interest-based scoring
+    U_S = ((0.4 * X) - X) * np.exp(-((N - 5) / 1.5) ** 2) + ((1.2 * X) - 0.4 * X) * np.exp(-((N - 10) / 3) ** 2)
+
+    # The hash is per (N, P_max) pair, computed once per distinct pair
+    pairs, inverse = np.unique(np.stack([N.ravel(), P_max.ravel().view(np.int64)]), axis=1, return_inverse=True)
+    factors = np.array([luck_factor(int(n), float(p)) for n, p in zip(pairs[0], pairs[1].view(np.float64))])
+    scaled_value = factors[inverse.ravel()].reshape(N.shape)
+    S_L = np.trunc(L_max * np.exp(-((N - N_luck) / sigma) ** 2) * scaled_value + offset)
+
+    return np.maximum(np.round(S_B + S_I + U_S + S_L), 0).astype(np.int64)
@@ -0,0 +1,113 @@
+from typing import Dict
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import SDGLabelCount, SDGLabelSummary
+from settings.settings import SDGLabelCountServiceSettings, SDGSettings
+from utils.logger import logger
+
+sdg_label_count_service_settings = SDGLabelCountServiceSettings()
+sdg_settings = SDGSettings()
+
+# Setup Logging
+logging = logger(sdg_label_count_service_settings.SDG_LABEL_COUNT_SERVICE_LOG_NAME)
+
+SDGS = range(1, sdg_settings.SDGOAL_NUMBER + 1)
+
+
+class SDGLabelCountService:
+    """
+    Maintained per-SDG label totals (SUM of each SDG column over all SDGLabelSummaries).
+
+    Summary changes apply their deltas in the same transaction, so finding the least labeled SDG reads
+    17 rows instead of aggregating the whole summary table. `reconcile` recomputes the totals and fixes drift
+    (e.g. after bulk loads that bypass the service).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_deltas(self, deltas: Dict[int, int]) -> None:
+        """
+        Add the change of summary values per SDG to the totals (flushed, committed by the caller).
+        Call it after the summary change is flushed: missing counters are rebuilt from the summaries.
+
+        Args:
+            deltas (Dict[int, int]): New minus old summary value, per SDG.
+        """
+        for sdg, delta in deltas.items():
+            if not delta:
+                continue
+            result = self.db.execute(
+                update(SDGLabelCount).where(SDGLabelCount.sdg == sdg).values(total=SDGLabelCount.total + delta)
+            )
+            if result.rowcount == 0:
+                logging.warning(f"No label counter for SDG {sdg}. Rebuilding the counters from the summaries.")
+                self.reconcile()
+                return
+
+    def totals(self) -> Dict[int, int]:
+        """
+        Returns:
+            Dict[int, int]: Label total per SDG.
+        """
+        totals = dict(self.db.execute(select(SDGLabelCount.sdg, SDGLabelCount.total)).all())
+        if len(totals) < len(SDGS):
+            logging.warning("Label counters are incomplete. Rebuilding them from the summaries.")
+            totals = self._rebuild_totals()
+        return totals
+
+    def _rebuild_totals(self) -> Dict[int, int]:
+        """
+        Reconcile the counters in a session of their own, so reading the totals never commits (or rolls back)
+        the work of the caller's session.
+
+        Returns:
+            Dict[int, int]: Label total per SDG.
+        """
+        with Session(bind=self.db.get_bind()) as session:
+            try:
+                SDGLabelCountService(session).reconcile()
+                session.commit()
+            except IntegrityError:
+                # A concurrent request created the missing counters first
+                session.rollback()
+            return dict(session.execute(select(SDGLabelCount.sdg, SDGLabelCount.total)).all())
+
+    def least_labeled_sdg(self) -> int:
+        """
+        Returns:
+            int: The SDG with the lowest label total (the lowest SDG number on ties).
+        """
+        totals = self.totals()
+        return min(SDGS, key=lambda sdg: totals[sdg])
+
+    def reconcile(self) -> Dict[int, int]:
+        """
+        Recompute the totals from the summaries and store them (flushed, committed by the caller).
+
+        The counters are locked before the summaries are aggregated, so a concurrent summary change either is
+        part of the aggregate or applies its delta after the reconciliation commits.
+
+        Returns:
+            Dict[int, int]: Drift (actual minus stored total) per SDG, only for SDGs that had drifted.
+        """
+        stored = dict(self.db.execute(
+            select(SDGLabelCount.sdg, SDGLabelCount.total).order_by(SDGLabelCount.sdg).with_for_update()
+        ).all())
+        sums = self.db.execute(
+            select(*[func.coalesce(func.sum(getattr(SDGLabelSummary, f"sdg{sdg}")), 0) for sdg in SDGS])
+        ).one()
+        actual = {sdg: int(total) for sdg, total in zip(SDGS, sums)}
+
+        drift = {sdg: actual[sdg] - stored.get(sdg, 0) for sdg in SDGS
+                 if sdg not in stored or actual[sdg] != stored[sdg]}
+        for sdg in drift:
+            self.db.merge(SDGLabelCount(sdg=sdg, total=actual[sdg]))
+        self.db.flush()
+
+        if drift:
+            logging.info(f"Reconciled SDG label counters, drift per SDG: {drift}.")
+        return drift
@@ -1,5 +1,5 @@
 import os
-from typing import ClassVar, List, Tuple
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
 
 import pytz
 from pydantic_settings import BaseSettings
@@ -52,6 +52,19 @@ class QdrantDBSettings(BaseSettings):
     PUBLICATIONS_COLLECTION_NAME: ClassVar[str] = "publications-mt" #TODO: remove duplicate and leave here; do NOT remove here
     PUBLICATIONS_CONTENT_VECTOR_NAME: ClassVar[str] = "content"
     PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME: ClassVar[str] = "sql_id"
+    # Filterable payload fields of the publications collection and their index types (pipeline/zora/loader.py)
+    PUBLICATIONS_PAYLOAD_INDEXES: ClassVar[Dict[str, str]] = {
+        "sql_id": "integer",
+        "year": "integer",
+        "faculty_id": "integer",
+        "collection_id": "integer",
+        "top_sdg": "integer",
+        "sdg_levels": "keyword",  # e.g. "sdg3_level1": the SDG 3 prediction is in ReducerSettings.FILTER_RANGES[0]
+    }
+    PAYLOAD_UPDATE_BATCH_SIZE: ClassVar[int] = 1000  # Points per set-payload request of the backfill
+    # SDG prediction vectors per prediction model (17-d, dot product)
+    PUBLICATIONS_GOAL_VECTOR_NAMES: ClassVar[Dict[str, str]] = {"aurora": "goal_aurora", "dvdblk": "goal_dvdblk"}
+    FUSION_CANDIDATES_FACTOR: ClassVar[int] = 4  # Candidates per search of a fused query: factor * top_k
 
 class CouchDBSettings(BaseSettings):
     COUCHDB_LOG_NAME: ClassVar[str] = "db_couchdb.log"
@@ -162,6 +175,51 @@ class ReducerSettings(BaseSettings):
     ]  # SDG filter ranges
 
     MAP_PARTITION_SIZE: ClassVar[int] = 9
+    MAP_PARTITION_ROWS: ClassVar[int] = 13000  # Publications per level of the SDG 0 map (117k / 9)
+
+    # Map-building job (utils/mariadb/build_umap_maps.py)
+    UMAP_RANDOM_STATE: ClassVar[int] = 31011997
+    UMAP_WORK_DIR: ClassVar[str] = os.path.join("data", "umap")
+    UMAP_WORKERS: ClassVar[int] = 4
+    QDRANT_RETRIEVE_BATCH_SIZE: ClassVar[int] = 1000
+    UMAP_REFIT_QUEUE: ClassVar[str] = "refit_queue.json"  # Cells flagged for a full refit, in the work directory
+
+    # Incremental placement (utils/mariadb/place_new_publications.py)
+    PLACEMENT_BATCH_SIZE: ClassVar[int] = 2000  # Embeddings per UMAP.transform call
+    DRIFT_SAMPLE_SIZE: ClassVar[int] = 500
+    DRIFT_MIN_SAMPLE: ClassVar[int] = 50  # Fewer placed publications are too few to measure the drift
+    DRIFT_NEIGHBOURS: ClassVar[int] = 15
+    MAX_PRESERVATION_DROP: ClassVar[float] = 0.1  # Neighbour preservation of placed vs. fitted publications
+    MAX_PLACED_FRACTION: ClassVar[float] = 0.2  # Placed publications relative to the publications the model was fitted on
+
+class TopicModelSettings(BaseSettings):
+    WORK_DIR: ClassVar[str] = os.path.join("data", "topic_model")
+    SCROLL_PAGE_SIZE: ClassVar[int] = 1000  # Points per Qdrant scroll request
+    QUERY_CHUNK_SIZE: ClassVar[int] = 1000  # Publication IDs per IN (...) clause
+    EMBEDDING_MODEL: ClassVar[str] = "all-MiniLM-L6-v2"
+    RANDOM_STATE: ClassVar[int] = 31011997
+
+    # Batch fit
+    UMAP_PARAMS: ClassVar[Dict[str, Any]] = {"n_neighbors": 15, "n_components": 2, "min_dist": 0.0, "metric": "cosine"}
+    HDBSCAN_PARAMS: ClassVar[Dict[str, Any]] = {"min_cluster_size": 15, "metric": "euclidean", "prediction_data": True}
+    VECTORIZER_PARAMS: ClassVar[Dict[str, Any]] = {"stop_words": "english", "ngram_range": (1, 3), "min_df": 10, "max_features": 10_000}
+    CTFIDF_PARAMS: ClassVar[Dict[str, Any]] = {"bm25_weighting": True, "reduce_frequent_words": True}
+    NR_TOPICS: ClassVar[Optional[int]] = None  # e.g. 21: 20 topics + outliers
+
+    # Online fit (--partial)
+    PARTIAL_CHUNK_SIZE: ClassVar[int] = 5000  # Documents per partial_fit call
+    PARTIAL_N_COMPONENTS: ClassVar[int] = 5
+    PARTIAL_N_CLUSTERS: ClassVar[int] = 50
+    ONLINE_VECTORIZER_DECAY: ClassVar[float] = 0.01
+
+    # Representation models
+    MMR_DIVERSITY: ClassVar[float] = 0.5
+    TEXT_GENERATION_MODEL: ClassVar[str] = "google/flan-t5-base"
+    ZERO_SHOT_MODEL: ClassVar[str] = "facebook/bart-large-mnli"
+    SEED_WORDS_PER_SDG: ClassVar[int] = 3
+
+    # Collection assignments (utils/mariadb/write_collection_assignments.py)
+    ASSIGNMENT_BATCH_SIZE: ClassVar[int] = 1000  # Publications per UPDATE ... CASE statement
 
 class PrefectSettings(BaseSettings):
     PREFECT_LOG_NAME: ClassVar[str] = "prefect.log"
@@ -183,9 +241,66 @@ class GPTAssistantServiceSettings(BaseSettings):
     # smaller model (cheapest as of 06.2024) to keep the cost down: "gpt-3.5-turbo-0125"
     GPT_TEMPERATURE: ClassVar[float] = 0.2
 
+class AsyncGPTAssistantServiceSettings(BaseSettings):
+    ASYNC_GPT_ASSISTANT_SERVICE_LOG_NAME: ClassVar[str] = "service_async_gpt_assistant.log"
+    MAX_CONCURRENCY: ClassVar[int] = 16  # Requests to OpenAI in flight per process
+    DEFAULT_OPERATION_LIMIT: ClassVar[int] = 8
+    # Concurrency per operation (the GPT-backed routes), below MAX_CONCURRENCY for the expensive ones
+    OPERATION_LIMITS: ClassVar[Dict[str, int]] = {
+        "summarize_publication": 4,
+        "summarize_publications": 2,
+        "summarize_comments": 2,
+        "create_fact": 4,
+        "evaluate_annotation": 8,
+    }
+    MAX_RETRIES: ClassVar[int] = 4
+    RETRY_BASE_DELAY_SECONDS: ClassVar[float] = 0.5
+    RETRY_MAX_DELAY_SECONDS: ClassVar[float] = 20.0
+
+class LLMResponseCacheSettings(BaseSettings):
+    LLM_RESPONSE_CACHE_LOG_NAME: ClassVar[str] = "service_llm_response_cache.log"
+    ENABLED: ClassVar[bool] = True
+    TTL_SECONDS: ClassVar[int] = 30 * 24 * 60 * 60  # Keep responses for 30 days
+    MAX_ENTRIES: ClassVar[int] = 100000
+    SQLITE_PATH: ClassVar[str] = "cache/llm_response_cache.sqlite3"  # Used when Redis is not reachable
+    REDIS_KEY_PREFIX: ClassVar[str] = "llm"
+    # USD per 1M tokens of GPT_MODEL, used to report the saved cost
+    INPUT_COST_PER_MILLION_TOKENS: ClassVar[float] = 2.50
+    OUTPUT_COST_PER_MILLION_TOKENS: ClassVar[float] = 10.00
+
+class PublicationContentPrecomputeSettings(BaseSettings):
+    WORK_DIR: ClassVar[str] = "batch/publication_content"  # Batch input files and job state
+    BATCH_ENDPOINT: ClassVar[str] = "/v1/chat/completions"
+    COMPLETION_WINDOW: ClassVar[str] = "24h"
+    MAX_REQUESTS_PER_BATCH: ClassVar[int] = 10000  # OpenAI allows up to 50000 per batch file
+    POLL_INTERVAL_SECONDS: ClassVar[int] = 60
+    QUERY_CHUNK_SIZE: ClassVar[int] = 1000
+    TASKS: ClassVar[List[str]] = ["summary", "fact", "keywords", "goal"]
+
+class ConfidenceScoreDatasetSettings(BaseSettings):
+    CONFIDENCE_SCORE_LOG_NAME: ClassVar[str] = "confidence_score_chatGPT_dataset_generator.log"
+    GPT_MODEL: ClassVar[str] = "gpt-4o-mini-2024-07-18"
+    TEMPERATURE: ClassVar[float] = 1.0  # The API default the dataset was first generated with
+    PREDICTION_MODEL: ClassVar[str] = "Aurora"
+    FILTER_RANGES: ClassVar[List[Tuple[float, float]]] = [(1.0, 0.99)]  # (upper, lower] prediction ranges per SDG
+    SAMPLES_PER_RANGE: ClassVar[int] = 1  # Top candidates per SDG and range
+    CHECKPOINT_PATH: ClassVar[str] = "data/dataset/confidence_scores.jsonl"  # One JSON result per line
+    OUTPUT_PATH: ClassVar[str] = "chatgpt_sdg_classification_results.csv"
+    WORKERS: ClassVar[int] = 8  # Candidates in progress at the same time
+    REQUESTS_PER_MINUTE: ClassVar[int] = 500
+
 class UserAnnotationEvaluatorServiceSettings(BaseSettings):
     GPT_MODEL: ClassVar[str] = "gpt-4o-2024-08-06"
     BERT_PRETRAINED_MODEL_NAME: ClassVar[str] = "distilbert-base-uncased"
+    BATCH_SIZE: ClassVar[int] = 64  # Texts per forward pass
+    MAX_LENGTH: ClassVar[int] = 512  # DistilBERT input limit
+
+class ANNIndexSettings(BaseSettings):
+    ANN_INDEX_LOG_NAME: ClassVar[str] = "service_ann_index.log"
+    INDEX_DIR: ClassVar[str] = os.path.join("data", "ann_index")
+    DEFAULT_METRIC: ClassVar[str] = "euclidean"
+    RANDOM_STATE: ClassVar[int] = 31011997
+    N_JOBS: ClassVar[int] = -1
 
 class DecisionServiceSettings(BaseSettings):
     DECISION_SERVICE_LOG_NAME: ClassVar[str] = "service_decision.log"
@@ -193,12 +308,87 @@ class DecisionServiceSettings(BaseSettings):
     VOTES_NEEDED_FOR_SCENARIO: ClassVar[int] = 10 # 10
     VOTES_NEEDED_FOR_CONSENSUS: ClassVar[int] = 11 # 15
 
+class DecisionProvisioningServiceSettings(BaseSettings):
+    DECISION_PROVISIONING_SERVICE_LOG_NAME: ClassVar[str] = "service_decision_provisioning.log"
+    DEFAULT_MODEL: ClassVar[str] = MariaDBSettings().DEFAULT_PREDICTION_MODEL
+    CHUNK_SIZE: ClassVar[int] = 1000  # Publication IDs per IN (...) clause
+
+class SDGLabelCountServiceSettings(BaseSettings):
+    SDG_LABEL_COUNT_SERVICE_LOG_NAME: ClassVar[str] = "service_sdg_label_count.log"
+
 class LabelServiceSettings(BaseSettings):
     LABEL_SERVICE_LOG_NAME: ClassVar[str] = "service_label.log"
 
 class RewardServiceSettings(BaseSettings):
     REWARD_SERVICE_LOG_NAME: ClassVar[str] = "service_reward.log"
 
+class RewardEvaluationServiceSettings(BaseSettings):
+    REWARD_EVALUATION_SERVICE_LOG_NAME: ClassVar[str] = "service_reward_evaluation.log"
+    REDIS_KEY_PREFIX: ClassVar[str] = "reward_evaluation"
+    REDIS_QUEUE_KEY: ClassVar[str] = "reward_evaluation:queue"
+    REDIS_STATUS_KEY_PREFIX: ClassVar[str] = "reward_evaluation:status"
+    STATUS_TTL_SECONDS: ClassVar[int] = 7 * 24 * 60 * 60  # Keep finished job states for a week
+    WORKER_COUNT: ClassVar[int] = 2
+    MAX_ATTEMPTS: ClassVar[int] = 3
+    POP_TIMEOUT_SECONDS: ClassVar[int] = 1
+    RETRY_BACKOFF_SECONDS: ClassVar[int] = 10  # Doubled per attempt
+    RETRY_BACKOFF_MAX_SECONDS: ClassVar[int] = 5 * 60
+    DEAD_LETTER_MAX_SIZE: ClassVar[int] = 1000
+    STALE_JOB_SECONDS: ClassVar[int] = 15 * 60  # Queued/running jobs without a status update for longer are requeued
+    RECONCILE_INTERVAL_SECONDS: ClassVar[int] = 5 * 60
+    RECONCILE_MIN_AGE_SECONDS: ClassVar[int] = 10 * 60  # Labels younger than this are left to their queued job
+    RECONCILE_WINDOW_SECONDS: ClassVar[int] = 7 * 24 * 60 * 60  # Labels older than this are never rewarded late
+    RECONCILE_BATCH_SIZE: ClassVar[int] = 500
+
+class RankServiceSettings(BaseSettings):
+    RANK_SERVICE_LOG_NAME: ClassVar[str] = "service_rank.log"
+    DEFAULT_LEADERBOARD_SIZE: ClassVar[int] = 100
+
+class LeaderboardServiceSettings(BaseSettings):
+    LEADERBOARD_SERVICE_LOG_NAME: ClassVar[str] = "service_leaderboard.log"
+    REDIS_KEY_PREFIX: ClassVar[str] = "leaderboard"
+    BUILT_MARKER: ClassVar[str] = "built"
+    XP_TOTAL_BOARD: ClassVar[str] = "xp:total"
+    XP_SDG_BOARD_PREFIX: ClassVar[str] = "xp:sdg"
+    COINS_TOTAL_BOARD: ClassVar[str] = "coins:total"
+    DEFAULT_PAGE_SIZE: ClassVar[int] = 50
+    MAX_PAGE_SIZE: ClassVar[int] = 500
+    REBUILD_LOCK: ClassVar[str] = "rebuild:lock"
+    REBUILD_LOCK_TIMEOUT: ClassVar[int] = 300  # Seconds
+    REBUILD_BUFFER: ClassVar[str] = "rebuild:buffer"  # Increments applied while a rebuild runs
+    WORKERS_ENV_VAR: ClassVar[str] = "WEB_CONCURRENCY"  # API worker processes (read by uvicorn and gunicorn)
+
+class CacheServiceSettings(BaseSettings):
+    CACHE_SERVICE_LOG_NAME: ClassVar[str] = "service_cache.log"
+    CACHE_KEY_PREFIX: ClassVar[str] = "cache"
+    CACHE_TAG_PREFIX: ClassVar[str] = "cache:tag"
+    LRU_MAX_ENTRIES: ClassVar[int] = 512  # In-process fallback when Redis is absent
+    DEFAULT_TTL: ClassVar[int] = 60  # Seconds
+    REDIS_REPROBE_INTERVAL: ClassVar[int] = 30  # Seconds between Redis probes while on the fallback
+
+    # Per-route TTLs (seconds)
+    SDGS_TTL: ClassVar[int] = 24 * 60 * 60  # Static reference data
+    RANKS_TTL: ClassVar[int] = 24 * 60 * 60  # Only changed by the rank loader
+    COLLECTIONS_TTL: ClassVar[int] = 60 * 60
+    DIMENSIONALITY_REDUCTIONS_TTL: ClassVar[int] = 60 * 60
+    MAX_ENTROPY_TTL: ClassVar[int] = 10 * 60
+    LEAST_LABELED_TTL: ClassVar[int] = 60
+    SCENARIOS_TTL: ClassVar[int] = 60
+
+    # Invalidation tags
+    SDGS_TAG: ClassVar[str] = "sdgs"
+    RANKS_TAG: ClassVar[str] = "ranks"
+    COLLECTIONS_TAG: ClassVar[str] = "collections"
+    DIMENSIONALITY_REDUCTIONS_TAG: ClassVar[str] = "dimensionality-reductions"
+    SDG_PREDICTIONS_TAG: ClassVar[str] = "sdg-predictions"
+    SDG_LABEL_DECISIONS_TAG: ClassVar[str] = "sdg-label-decisions"
+    SDG_LABEL_SUMMARIES_TAG: ClassVar[str] = "sdg-label-summaries"
+
+class BulkSerializationSettings(BaseSettings):
+    IN_CHUNK_SIZE: ClassVar[int] = 1000  # Parent keys per child SELECT ... IN
+    STREAM_BATCH_SIZE: ClassVar[int] = 1000  # Root rows per NDJSON batch
+    NDJSON_MEDIA_TYPE: ClassVar[str] = "application/x-ndjson"
+
 ### Router Settings
 
 class FastAPISettings(BaseSettings):
@@ -245,6 +435,13 @@ class CoinWalletsRouterSettings(BaseSettings):
 
 class ExplanationsRouterSettings(BaseSettings):
     EXPLANATIONS_ROUTER_LOG_NAME: ClassVar[str] = "api_explanations.log"
+    MAX_BATCH_SIZE: ClassVar[int] = 200  # Publications per batch request
+
+class ExplanationServiceSettings(BaseSettings):
+    EXPLANATION_SERVICE_LOG_NAME: ClassVar[str] = "service_explanation.log"
+    LOAD_BATCH_SIZE: ClassVar[int] = 1000  # Documents per unordered bulk insert
+    COMPACT_COLLECTION_NAME: ClassVar[str] = "explanations_compact"  # Target of convert_mongodb_explanations.py
+    VOCABULARY_SUFFIX: ClassVar[str] = "_vocabulary"  # Token vocabulary collection of a compact collection
 
 class SDGSLabelSummariesRouterSettings(BaseSettings):
     SDGLABELSUMMARIES_ROUTER_LOG_NAME: ClassVar[str] = "api_sdg_label_summaries.log"
@@ -269,6 +466,9 @@ class VotesSettings(BaseSettings):
 class SDGRanksSettings(BaseSettings):
     SDGRANKS_ROUTER_LOG_NAME: ClassVar[str] = "api_sdg_ranks.log"
 
+class LeaderboardsRouterSettings(BaseSettings):
+    LEADERBOARDS_ROUTER_LOG_NAME: ClassVar[str] = "api_leaderboards.log"
+
 
 class FixturesSettings(BaseSettings):
     FIXTURES_LOG_NAME: ClassVar[str] = "fixtures.log"
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from openai import AsyncOpenAI
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models import Publication, Summary
+from models.base import Base
+from services.gpt.async_gpt_assistant_service import AsyncGPTAssistantService
+from settings.settings import AsyncGPTAssistantServiceSettings
+from utils.dataset.generate_confidence_score import serve_fake_endpoint
+
+SUMMARY = "A short summary."
+
+
+class FakeEndpoint:
+    """Counts the chat completion requests; the first `drop` of them fail with a dropped connection."""
+
+    def __init__(self, drop: int = 0, delay: float = 0.2):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.drop = drop
+        self.delay = delay
+
+    def __call__(self, body: dict) -> str:
+        with self.lock:
+            self.requests += 1
+            dropped = self.requests <= self.drop
+        if dropped:
+            raise ConnectionResetError("dropped")
+        threading.Event().wait(self.delay)  # Keeps the request in flight while the other callers arrive
+        return json.dumps({"summary": SUMMARY})
+
+
+@pytest.fixture
+def endpoint():
+    return FakeEndpoint()
+
+
+@pytest.fixture
+def assistant(endpoint, monkeypatch):
+    monkeypatch.setattr(AsyncGPTAssistantServiceSettings, "RETRY_BASE_DELAY_SECONDS", 0.01)
+    server, base_url = serve_fake_endpoint(endpoint)
+    yield AsyncGPTAssistantService(client=AsyncOpenAI(api_key="test", base_url=base_url, max_retries=0),
+                                   use_cache=False)
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_identical_requests_are_coalesced(assistant, endpoint):
+    async def summarize_all():
+        return await asyncio.gather(*(assistant.summarize_publication("Title", "Abstract") for _ in range(20)))
+
+    assert asyncio.run(summarize_all()) == [SUMMARY] * 20
+    assert endpoint.requests == 1
+    assert assistant.stats() == {"calls": 1, "coalesced": 19, "retries": 0, "in_flight": 0}
+
+
+def test_dropped_connection_is_retried(assistant, endpoint):
+    endpoint.drop = 2
+
+    assert asyncio.run(assistant.summarize_publication("Title", "Abstract")) == SUMMARY
+    assert endpoint.requests == 3
+    assert assistant.retries == 2
+
+
+@pytest.fixture
+def snapshot_engine(tmp_path):
+    """
+    SQLite in WAL mode with explicit transactions, so a transaction reads from the snapshot of its first query,
+    as under MariaDB's REPEATABLE READ.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def enable_wal(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_concurrent_summary_requests_store_one_row(snapshot_engine, assistant, endpoint, monkeypatch):
+    publications_gpt = pytest.importorskip("api.app.routes.publications_gpt")
+    monkeypatch.setattr(publications_gpt, "verify_token", lambda token, db: None)
+    monkeypatch.setattr(publications_gpt, "assistant", assistant)
+
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=snapshot_engine)
+    with session_factory() as session:
+        publication = Publication(oai_identifier="oai:1", oai_identifier_num=1, title="Title", description="Abstract")
+        session.add(publication)
+        session.commit()
+        publication_id = publication.publication_id
+
+    async def request_all():
+        sessions = [session_factory() for _ in range(5)]
+        try:
+            return await asyncio.gather(*(
+                publications_gpt.create_or_get_publication_summary(publication_id, db=session, token="token")
+                for session in sessions
+            ))
+        finally:
+            for session in sessions:
+                session.close()
+
+    responses = asyncio.run(request_all())
+
+    assert [response.summary for response in responses] == [SUMMARY] * 5
+    assert endpoint.requests == 1
+    with session_factory() as session:
+        assert session.query(Summary).filter_by(publication_id=publication_id).count() == 1
@@ -0,0 +1,89 @@
+import pytest
+from redis.exceptions import ConnectionError
+
+from services import cache_service
+from services.cache_service import CacheService, LRUCacheBackend
+from settings.settings import CacheServiceSettings
+
+
+class Clock:
+    """Stands in for the time module of the cache service."""
+
+    def __init__(self):
+        self.now = 1_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FlakyRedis:
+    """Redis client that fails every command while it is down."""
+
+    def __init__(self, client):
+        self.client = client
+        self.down = False
+
+    def __getattr__(self, name):
+        if self.down:
+            raise ConnectionError("Redis is down")
+        return getattr(self.client, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_service, "time", clock)
+    return clock
+
+
+def test_lru_tags_forget_evicted_expired_and_replaced_entries(clock):
+    backend = LRUCacheBackend(max_entries=2)
+    backend.set("first", b"a", ttl=10, tags=["old"])
+    backend.set("second", b"b", ttl=100, tags=["old"])
+    backend.set("third", b"c", ttl=100, tags=["new"])  # Evicts "first"
+    assert backend._tags == {"old": {"second"}, "new": {"third"}}
+
+    backend.set("second", b"b", ttl=100, tags=["new"])
+    assert backend._tags == {"new": {"second", "third"}}
+
+    clock.now += 50
+    backend.set("fourth", b"d", ttl=10, tags=["short"])  # Evicts "third"
+    assert backend._tags == {"new": {"second"}, "short": {"fourth"}}
+    clock.now += 20
+    assert backend.get("fourth") is None
+    assert backend.invalidate_tag("new") == 1
+    assert (backend._entries, backend._tags, backend._key_tags) == ({}, {}, {})
+
+
+def test_redis_is_probed_again_after_a_failure(clock, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(CacheServiceSettings, "REDIS_REPROBE_INTERVAL", 30)
+    client = FlakyRedis(fakeredis.FakeRedis())
+    service = CacheService(client)
+    service.set("cache:stale", b"stale", ttl=100, tags=["collections"])
+
+    client.down = True
+    assert service.get("cache:stale") is None
+    assert service.backend_name == "lru"
+    service.invalidate_tags(["collections"])  # Missed by Redis
+
+    client.down = False
+    clock.now += 10
+    assert service.get("cache:stale") is None
+    assert service.backend_name == "lru"
+
+    clock.now += 30
+    service.set("cache:fresh", b"fresh", ttl=100)
+    assert service.backend_name == "redis"
+    assert client.get("cache:stale") is None
+    assert service.get("cache:fresh") == b"fresh"
+    assert service.errors == 1
+
+
+def test_unreachable_redis_keeps_the_fallback(clock):
+    client = FlakyRedis(None)
+    client.down = True
+    service = CacheService(client)
+    clock.now += CacheServiceSettings.REDIS_REPROBE_INTERVAL
+    service.set("cache:key", b"value")
+    assert (service.backend_name, service.get("cache:key")) == ("lru", b"value")
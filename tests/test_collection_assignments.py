@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+from sqlalchemy import insert, select
+
+from models.collection import Collection
+from models.publications.publication import Publication
+from services.cache_service import CacheService, set_cache_service
+from settings.settings import CacheServiceSettings
+from utils.mariadb.write_collection_assignments import METHODS, write_assignments
+
+PUBLICATIONS = 50
+TOPICS = 4
+
+
+def assignments(shift: int = 0) -> pd.DataFrame:
+    ids = list(range(1, PUBLICATIONS + 1))
+    return pd.DataFrame({
+        "id": ids,
+        "topic": [(publication_id + shift) % TOPICS for publication_id in ids],
+        "keywords": [[f"word{(publication_id + shift) % TOPICS}"] for publication_id in ids],
+    })
+
+
+@pytest.fixture
+def publications(db):
+    db.execute(insert(Publication), [
+        {"publication_id": publication_id, "oai_identifier": f"oai:{publication_id}",
+         "oai_identifier_num": publication_id, "title": f"Publication {publication_id}"}
+        for publication_id in range(1, PUBLICATIONS + 1)
+    ])
+    db.commit()
+
+
+def assigned_topics(db) -> dict:
+    return dict(db.execute(
+        select(Publication.publication_id, Collection.topic_id)
+        .join(Collection, Collection.collection_id == Publication.collection_id)
+    ).all())
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_write_assignments(db, publications, method):
+    result = write_assignments(db, assignments(), method=method, batch_size=8)
+    assert (result["collections"], result["changed"]) == (TOPICS, PUBLICATIONS)
+    assert assigned_topics(db) == dict(zip(assignments()["id"], assignments()["topic"]))
+
+    # Unchanged assignments update nothing; moved ones update the moved publications only
+    assert write_assignments(db, assignments(), method=method, batch_size=8)["changed"] == 0
+    result = write_assignments(db, assignments(shift=1), method=method, batch_size=8)
+    assert result["changed"] == PUBLICATIONS
+    assert assigned_topics(db) == dict(zip(assignments(shift=1)["id"], assignments(shift=1)["topic"]))
+    assert db.query(Collection).count() == TOPICS
+
+
+def test_write_assignments_invalidates_the_cached_responses(db, publications):
+    cache_service = CacheService()
+    set_cache_service(cache_service)
+    try:
+        cache_service.set("cache:collections", b"[]", tags=[CacheServiceSettings.COLLECTIONS_TAG])
+        cache_service.set("cache:publications", b"[]", tags=[CacheServiceSettings.DIMENSIONALITY_REDUCTIONS_TAG])
+        write_assignments(db, assignments())
+        assert cache_service.get("cache:collections") is None
+        assert cache_service.get("cache:publications") is None
+    finally:
+        set_cache_service(None)
@@ -0,0 +1,89 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from services.explanation_service import ExplanationService, TokenVocabulary, encode_compact  # noqa: E402
+
+OID = "65f0c0ffee0000000000000{}"
+
+
+def explanation(index: int) -> dict:
+    """An explanation document as exported (extended-JSON _id), with a field the reads must not fetch."""
+    return {
+        "_id": {"$oid": OID.format(index)},
+        "id": f"oai:{index}",
+        "input_tokens": ["climate", "action", str(index)],
+        "token_scores": [[0.5, -0.25], [0.125, 0.0], [float(index), 1.0]],
+        "base_values": [0.1, 0.2],
+        "xai_method": "shap",
+        "prediction_model": "Aurora",
+        "raw_shap_values": list(range(1000)),
+    }
+
+
+@pytest.fixture
+def collection():
+    ExplanationService._vocabularies.clear()
+    yield mongomock.MongoClient().db.explanations
+    ExplanationService._vocabularies.clear()
+
+
+@pytest.fixture
+def fetched(collection, monkeypatch):
+    """Documents returned by the collection's queries (mongomock's find_one also goes through find)."""
+    fetched = []
+    find = collection.find
+
+    def recording_find(*args, **kwargs):
+        documents = list(find(*args, **kwargs))
+        fetched.extend(documents)
+        return iter(documents)
+
+    monkeypatch.setattr(collection, "find", recording_find)
+    return fetched
+
+
+def test_bulk_load_creates_unique_index_and_skips_stored_documents(collection):
+    service = ExplanationService(collection)
+
+    assert service.bulk_load((explanation(index) for index in range(5)), batch_size=2)["inserted"] == 5
+    index = collection.index_information()["id_unique"]
+    assert index["key"] == [("id", 1)]
+    assert index["unique"]
+
+    # A rerun of an interrupted load skips what is stored and inserts the rest
+    stats = service.bulk_load((explanation(index) for index in range(7)), batch_size=3)
+    assert (stats["inserted"], stats["skipped"]) == (2, 5)
+    assert collection.count_documents({}) == 7
+
+
+def test_reads_round_trip_with_projection(collection, fetched):
+    service = ExplanationService(collection)
+    service.bulk_load(explanation(index) for index in range(3))
+
+    single = service.get("oai:1", publication_id=11)
+    source = explanation(1)
+    assert single.mongodb_id == OID.format(1)
+    assert (single.oai_identifier, single.sql_id) == ("oai:1", 11)
+    assert single.input_tokens == source["input_tokens"]
+    assert single.token_scores == source["token_scores"]
+    assert (single.base_values, single.xai_method, single.prediction_model) == (
+        source["base_values"], source["xai_method"], source["prediction_model"])
+    assert service.get("oai:missing", publication_id=1) is None
+
+    many = service.get_many({"oai:2": 12, "oai:missing": 99, "oai:0": 10})
+    assert [(item.oai_identifier, item.sql_id) for item in many] == [("oai:2", 12), ("oai:0", 10)]
+
+    assert len(fetched) == 3
+    assert all("raw_shap_values" not in document for document in fetched)
+
+
+def test_compact_documents_are_decoded_on_read(collection):
+    vocabulary = TokenVocabulary.of(collection)
+    documents = [encode_compact(explanation(index), vocabulary) for index in range(2)]
+    vocabulary.save()
+    ExplanationService(collection).bulk_load(documents)
+
+    decoded = ExplanationService(collection).get("oai:1", publication_id=1)
+    assert decoded.input_tokens == explanation(1)["input_tokens"]
+    assert decoded.token_scores == explanation(1)["token_scores"]  # Exact in float16
@@ -0,0 +1,150 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models import Publication, SDGCoinWallet, SDGCoinWalletHistory, SDGLabelDecision, SDGLabelHistory, \
+    SDGLabelSummary, SDGPrediction, User
+from models.base import Base
+from request_models.sdg_user_label import UserLabelRequest
+from settings.settings import DecisionServiceSettings
+
+label_service = pytest.importorskip("services.label_service")
+from services.decision_service import VoteTally  # noqa: E402
+
+decision_service_settings = DecisionServiceSettings()
+
+VOTERS = decision_service_settings.VOTES_NEEDED_FOR_CONSENSUS
+VOTED_LABEL = 3
+
+
+@pytest.fixture
+def locking_engine(tmp_path):
+    """
+    TEST_DATABASE_URL (e.g. a MariaDB test database) exercises the row locks themselves. Without it, a SQLite
+    file stands in, where every transaction starts with BEGIN IMMEDIATE, since SQLite ignores FOR UPDATE.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if url:
+        engine = create_engine(url)
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}",
+                               connect_args={"check_same_thread": False, "timeout": 30})
+
+        @event.listens_for(engine, "connect")
+        def disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+class Recorder:
+    """Stands in for the reward queue, leaderboard and cache, which need Redis."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enqueued = []
+        self.coins = {}
+
+    def enqueue(self, label_id: int, attempts: int = 0) -> None:
+        with self.lock:
+            self.enqueued.append(label_id)
+
+    def add_coins(self, user_id: int, increment: float) -> None:
+        with self.lock:
+            self.coins[user_id] = self.coins.get(user_id, 0.0) + increment
+
+    def invalidate_tags(self, tags) -> int:
+        return 0
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(label_service, "get_reward_evaluation_service", lambda: recorder)
+    monkeypatch.setattr(label_service, "get_leaderboard_service", lambda: recorder)
+    monkeypatch.setattr(label_service, "get_cache_service", lambda: recorder)
+    return recorder
+
+
+@pytest.fixture
+def seeded(locking_engine):
+    """A publication with summary, history and prediction, but no decision yet, and its voters."""
+    session = sessionmaker(bind=locking_engine)()
+    publication = Publication(oai_identifier="oai:1", oai_identifier_num=1, title="Title")
+    users = [User(email=f"voter{index}@example.org") for index in range(VOTERS)]
+    for user in users:
+        user.hashed_password = "x"
+    session.add_all([publication, *users])
+    session.flush()
+    history = SDGLabelHistory(active=True)
+    session.add(history)
+    session.flush()
+    session.add_all([
+        SDGLabelSummary(publication_id=publication.publication_id, history_id=history.history_id),
+        SDGPrediction(publication_id=publication.publication_id, prediction_model=decision_service_settings.DEFAULT_MODEL,
+                      **{f"sdg{VOTED_LABEL}": 0.9}),
+    ])
+    session.commit()
+    seeded = publication.publication_id, history.history_id, [user.user_id for user in users]
+    session.close()
+    return seeded
+
+
+def submit(session_factory, request: UserLabelRequest, barrier: threading.Barrier = None) -> int:
+    session = session_factory()
+    try:
+        if barrier:
+            barrier.wait()
+        return label_service.LabelService(session).create_or_link_label(request).label_id
+    finally:
+        session.close()
+
+
+def test_concurrent_labels_share_one_decision_and_reward_each_voter_once(locking_engine, seeded, recorder):
+    publication_id, history_id, user_ids = seeded
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=locking_engine)
+
+    # The first vote creates the open decision; the others arrive at once, through both lookup paths
+    submit(session_factory, UserLabelRequest(user_id=user_ids[0], voted_label=VOTED_LABEL, publication_id=publication_id))
+    session = session_factory()
+    decision_id = session.query(SDGLabelDecision.decision_id).filter_by(history_id=history_id).scalar()
+    session.close()
+
+    others = user_ids[1:]
+    barrier = threading.Barrier(len(others))
+    requests = [
+        UserLabelRequest(user_id=user_id, voted_label=VOTED_LABEL,
+                         **({"decision_id": decision_id} if index % 2 else {"publication_id": publication_id}))
+        for index, user_id in enumerate(others)
+    ]
+    with ThreadPoolExecutor(max_workers=len(others)) as executor:
+        label_ids = list(executor.map(lambda request: submit(session_factory, request, barrier), requests))
+
+    session = session_factory()
+    decisions = session.query(SDGLabelDecision).filter_by(history_id=history_id).all()
+    assert len(decisions) == 1
+    decision = decisions[0]
+    assert decision.decided_label == VOTED_LABEL
+    assert len(decision.user_labels) == VOTERS
+    assert VoteTally.from_json(decision.vote_tally).total_votes == VOTERS
+    assert getattr(decision.history.label_summary, f"sdg{VOTED_LABEL}") == 1
+
+    # Consensus is reached exactly once, by the last vote, and every voter is rewarded once
+    assert session.query(SDGCoinWalletHistory).count() == VOTERS
+    wallets = session.query(SDGCoinWallet).all()
+    assert sorted(wallet.user_id for wallet in wallets) == sorted(user_ids)
+    assert all(wallet.total_coins > 0 for wallet in wallets)
+    assert recorder.coins == {wallet.user_id: pytest.approx(wallet.total_coins) for wallet in wallets}
+    assert len(recorder.enqueued) == VOTERS and set(label_ids) <= set(recorder.enqueued)
+    session.close()
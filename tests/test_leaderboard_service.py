@@ -0,0 +1,56 @@
+import pytest
+
+from models import SDGCoinWallet, User
+from services.leaderboard_service import LeaderboardService, coins_board_name
+
+COINS = {1: 10.0, 2: 20.0}
+
+
+@pytest.fixture(params=["memory", "redis"])
+def service(request):
+    if request.param == "memory":
+        return LeaderboardService(workers=1)
+    fakeredis = pytest.importorskip("fakeredis")
+    return LeaderboardService(redis_client=fakeredis.FakeRedis())
+
+
+@pytest.fixture
+def wallets(db):
+    for user_id, coins in COINS.items():
+        user = User(email=f"user{user_id}@example.org")
+        user.user_id, user.hashed_password = user_id, "x"
+        db.add_all([user, SDGCoinWallet(user_id=user_id, total_coins=coins)])
+    db.commit()
+
+
+def add_coins(session_factory, service: LeaderboardService, user_id: int, increment: float) -> None:
+    """A coin route: commit the increment, then apply it to the board."""
+    with session_factory() as session:
+        session.query(SDGCoinWallet).filter_by(user_id=user_id).one().total_coins += increment
+        session.commit()
+    service.add_coins(user_id, increment)
+
+
+def test_increments_before_the_first_build_are_counted_once(db, session_factory, wallets, service):
+    add_coins(session_factory, service, 1, 15.0)
+
+    assert service.top(db, coins_board_name()) == (2, [(1, 1, 25.0), (2, 2, 20.0)])
+
+
+def test_increments_committed_during_a_rebuild_are_kept(db, session_factory, wallets, service, monkeypatch):
+    service.ensure_built(db)
+    read_scores = service._read_scores
+
+    def read_then_increment(snapshot):
+        scores = read_scores(snapshot)
+        add_coins(session_factory, service, 1, 15.0)  # After the snapshot, before the swap
+        return scores
+
+    monkeypatch.setattr(service, "_read_scores", read_then_increment)
+    service.rebuild(db)
+    assert service.rank(db, coins_board_name(), 1) == (1, 25.0)
+
+    # The next rebuild reads it from the wallet instead
+    monkeypatch.setattr(service, "_read_scores", read_scores)
+    service.rebuild(db)
+    assert service.top(db, coins_board_name()) == (2, [(1, 1, 25.0), (2, 2, 20.0)])
@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from schemas.gpt_assistant_service import GPTResponseSummarySchema
+from services.gpt import llm_response_cache
+from services.gpt.async_gpt_assistant_service import AsyncGPTAssistantService
+from services.gpt.llm_response_cache import InMemoryLLMCacheBackend, LLMResponseCache, SQLiteLLMCacheBackend, \
+    request_key
+from settings.settings import LLMResponseCacheSettings
+
+LATENCY = 0.01
+USAGE = SimpleNamespace(prompt_tokens=1000, completion_tokens=500)
+COST = (1000 * LLMResponseCacheSettings.INPUT_COST_PER_MILLION_TOKENS
+        + 500 * LLMResponseCacheSettings.OUTPUT_COST_PER_MILLION_TOKENS) / 1_000_000
+
+
+class Clock:
+    """Stands in for the time module of the cache, so expiry and access order do not depend on the wall clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        self.now += 0.001  # Distinct access times
+        return self.now
+
+
+class FakeClient:
+    """Async OpenAI client stand-in counting the completions it was asked for."""
+
+    def __init__(self):
+        self.calls = 0
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=self))
+
+    async def parse(self, model, messages, temperature, response_format):
+        self.calls += 1
+        await asyncio.sleep(LATENCY)
+        parsed = response_format(**{name: f"{name} {self.calls}" for name in response_format.model_fields})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(parsed=parsed))], usage=USAGE)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_response_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make_backend(max_entries: int = 100):
+        if request.param == "memory":
+            return InMemoryLLMCacheBackend(max_entries=max_entries)
+        return SQLiteLLMCacheBackend(str(tmp_path / "cache" / "llm.sqlite3"), max_entries=max_entries)
+    return make_backend
+
+
+def test_entries_expire_after_their_ttl(make_backend, clock):
+    backend = make_backend()
+    backend.set("short", "a", ttl=10)
+    backend.set("long", "b", ttl=100)
+    assert backend.get("short") == "a"
+
+    clock.now += 50
+    assert backend.get("short") is None
+    assert backend.get("long") == "b"
+
+
+def test_least_recently_used_entries_are_evicted(make_backend, clock):
+    backend = make_backend(max_entries=2)
+    backend.set("first", "a", ttl=100)
+    backend.set("second", "b", ttl=100)
+    assert backend.get("first") == "a"  # Now more recently used than "second"
+
+    backend.set("third", "c", ttl=100)
+    assert backend.get("second") is None
+    assert (backend.get("first"), backend.get("third")) == ("a", "c")
+
+
+def test_sqlite_entries_persist_across_instances(tmp_path, clock):
+    path = str(tmp_path / "llm.sqlite3")
+    SQLiteLLMCacheBackend(path).set("key", "value", ttl=100)
+    assert SQLiteLLMCacheBackend(path).get("key") == "value"
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.fixture
+def cache(make_backend):
+    return LLMResponseCache(make_backend(), ttl=100)
+
+
+def test_identical_requests_are_answered_from_the_cache(client, cache):
+    assistant = AsyncGPTAssistantService(client=client, cache=cache, use_cache=True)
+
+    async def summarize(title: str) -> str:
+        return await assistant.summarize_publication(title=title, abstract="Abstract")
+
+    first = asyncio.run(summarize("Title"))
+    assert asyncio.run(summarize("Title")) == first
+    assert asyncio.run(summarize("Other title")) != first
+    assert client.calls == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 0.3333)
+    assert stats["response_models"] == {"GPTResponseSummarySchema": {"hits": 1, "misses": 2}}
+    assert stats["saved_cost_usd"] == pytest.approx(COST)
+    assert stats["saved_seconds"] >= LATENCY
+
+
+def test_uncached_operations_and_services_bypass_the_cache(client, cache):
+    assistant = AsyncGPTAssistantService(client=client, cache=cache, use_cache=True)
+    comment = lambda: assistant.generate_comment("Abstract", "Explorer", "Water", "Engineer", 0.5)
+    asyncio.run(comment())
+    asyncio.run(comment())
+
+    uncached = AsyncGPTAssistantService(client=client, cache=cache, use_cache=False)
+    asyncio.run(uncached.summarize_publication(title="Title", abstract="Abstract"))
+    asyncio.run(uncached.summarize_publication(title="Title", abstract="Abstract"))
+
+    assert client.calls == 4
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 0)
+
+
+def test_request_key_covers_prompt_model_and_schema():
+    key = request_key("model", 0.7, "context", {"title": "Title"}, GPTResponseSummarySchema)
+    assert key == request_key("model", 0.7, "context", {"title": "Title"}, GPTResponseSummarySchema)
+    assert key != request_key("other-model", 0.7, "context", {"title": "Title"}, GPTResponseSummarySchema)
+    assert key != request_key("model", 1.2, "context", {"title": "Title"}, GPTResponseSummarySchema)
+    assert key != request_key("model", 0.7, "context", {"title": "Other"}, GPTResponseSummarySchema)
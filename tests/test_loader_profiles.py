@@ -0,0 +1,188 @@
+import asyncio
+import inspect
+import json
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from api.app.loader_profiles import (
+    ANNOTATION,
+    PUBLICATION_BASE,
+    PUBLICATION_FULL,
+    SDG_LABEL_DECISION,
+    SDG_LABEL_DECISION_EXTENDED,
+    SDG_USER_LABEL,
+    count_queries,
+)
+from enums.enums import DecisionType, ScenarioType
+from models import (
+    Annotation, Author, Faculty, Publication, SDGLabelDecision, SDGLabelHistory, SDGLabelSummary, SDGPrediction,
+    SDGUserLabel, User, Vote,
+)
+from request_models.publication import PublicationIdsRequest
+from schemas import (
+    AnnotationSchemaFull, PublicationSchemaBase, PublicationSchemaFull, SDGLabelDecisionSchemaExtended,
+    SDGLabelDecisionSchemaFull, SDGUserLabelSchemaFull,
+)
+from services.cache_service import CacheService, set_cache_service
+
+PUBLICATIONS = 12
+
+
+def add_labelled_publication(db, user, index: int, faculty_id=None, suggested_label: int = 3,
+                             voted_labels=(3, 4, 5), scenario_type=ScenarioType.NOT_ENOUGH_VOTES) -> Publication:
+    """A publication with authors and a prediction, and a decision with labels, annotations and votes."""
+    publication = Publication(oai_identifier=f"oai:{index}", oai_identifier_num=index, title=f"Title {index}",
+                              faculty_id=faculty_id)
+    publication.authors = [Author(name=f"Doe{index}, John"), Author(name=f"Roe{index}, Jane")]
+    db.add(publication)
+    db.flush()
+    db.add(SDGPrediction(publication_id=publication.publication_id, prediction_model="Aurora",
+                         **{f"sdg{suggested_label}": 0.9}))
+
+    history = SDGLabelHistory(active=True)
+    db.add(history)
+    db.flush()
+    db.add(SDGLabelSummary(publication_id=publication.publication_id, history_id=history.history_id))
+    decision = SDGLabelDecision(history_id=history.history_id, publication_id=publication.publication_id,
+                                suggested_label=suggested_label, decided_label=0,
+                                decision_type=DecisionType.CONSENSUS_MAJORITY, scenario_type=scenario_type)
+    db.add(decision)
+    db.flush()
+    db.add(Annotation(user_id=user.user_id, decision_id=decision.decision_id, labeler_score=1.0, comment="c"))
+
+    for voted_label in voted_labels:
+        label = SDGUserLabel(user_id=user.user_id, publication_id=publication.publication_id,
+                             voted_label=voted_label, abstract_section="", comment="")
+        db.add(label)
+        db.flush()
+        decision.user_labels.append(label)
+        db.add(Vote(user_id=user.user_id, sdg_user_label_id=label.label_id, score=1.0))
+        annotation = Annotation(user_id=user.user_id, sdg_user_label_id=label.label_id, labeler_score=1.0, comment="c")
+        db.add(annotation)
+        db.flush()
+        db.add(Vote(user_id=user.user_id, annotation_id=annotation.annotation_id, score=2.0))
+    return publication
+
+
+@pytest.fixture
+def seeded_db(db):
+    """Publications with authors, predictions and a decision with labels, annotations and votes each."""
+    user = User(email="labeler@example.org")
+    user.hashed_password = "x"
+    faculty = Faculty(faculty_setSpec="faculty", faculty_name="Faculty")
+    db.add_all([user, faculty])
+    db.flush()
+
+    for index in range(PUBLICATIONS):
+        add_labelled_publication(db, user, index, faculty_id=faculty.faculty_id)
+    db.commit()
+    return db
+
+
+PROFILES = [
+    ("publication_base", Publication, PUBLICATION_BASE, PublicationSchemaBase),
+    ("publication_full", Publication, PUBLICATION_FULL, PublicationSchemaFull),
+    ("annotation", Annotation, ANNOTATION, AnnotationSchemaFull),
+    ("sdg_label_decision", SDGLabelDecision, SDG_LABEL_DECISION, SDGLabelDecisionSchemaFull),
+    ("sdg_label_decision_extended", SDGLabelDecision, SDG_LABEL_DECISION_EXTENDED, SDGLabelDecisionSchemaExtended),
+    ("sdg_user_label", SDGUserLabel, SDG_USER_LABEL, SDGUserLabelSchemaFull),
+]
+
+
+def serialize_queries(db, engine, model, profile, schema, limit: int) -> int:
+    """Number of queries to load `limit` rows with the profile and serialize them with the response schema."""
+    db.expunge_all()
+    adapter = TypeAdapter(List[schema])
+    with count_queries(engine) as queries:
+        rows = db.query(model).options(*profile).limit(limit).all()
+        assert len(adapter.validate_python(rows, from_attributes=True)) == limit
+    return len(queries)
+
+
+@pytest.mark.parametrize("name, model, profile, schema", PROFILES, ids=[profile[0] for profile in PROFILES])
+def test_query_count_is_independent_of_result_size(seeded_db, engine, name, model, profile, schema):
+    few = serialize_queries(seeded_db, engine, model, profile, schema, limit=2)
+    many = serialize_queries(seeded_db, engine, model, profile, schema, limit=PUBLICATIONS)
+    assert few == many, f"{name}: {few} queries for 2 rows, {many} for {PUBLICATIONS}"
+
+
+def test_lazy_loading_grows_with_result_size(seeded_db, engine):
+    """Guards the test itself: without a profile the same serialization costs queries per row."""
+    few = serialize_queries(seeded_db, engine, Publication, (), PublicationSchemaBase, limit=2)
+    many = serialize_queries(seeded_db, engine, Publication, (), PublicationSchemaBase, limit=PUBLICATIONS)
+    assert many > few
+
+
+@pytest.fixture
+def route_db(seeded_db):
+    """The seeded publications plus one labelled by another user, whose decision has a scenario of its own."""
+    db = seeded_db
+    labeler = db.query(User).one()
+    user = User(email="single@example.org")
+    user.hashed_password = "x"
+    db.add(user)
+    db.flush()
+    add_labelled_publication(db, user, PUBLICATIONS, suggested_label=5, voted_labels=(5,),
+                             scenario_type=ScenarioType.CONFIRM)
+    db.commit()
+
+    publication_ids = [row[0] for row in db.query(Publication.publication_id).order_by(Publication.publication_id)]
+    return SimpleNamespace(db=db, labeler_id=labeler.user_id, user_id=user.user_id,
+                           publication_ids=publication_ids[:PUBLICATIONS])
+
+
+# (route module, route, arguments selecting one row, arguments selecting PUBLICATIONS rows)
+ROUTES = [
+    ("publications", "get_publications_by_ids",
+     lambda seeded: {"request": PublicationIdsRequest(publication_ids=seeded.publication_ids[:1])},
+     lambda seeded: {"request": PublicationIdsRequest(publication_ids=seeded.publication_ids)}),
+    ("publications", "get_top_k_entropy_publications",
+     lambda seeded: {"top_k": 1}, lambda seeded: {"top_k": PUBLICATIONS}),
+    ("publications", "get_publications_by_scenario",
+     lambda seeded: {"scenario_type": ScenarioType.NOT_ENOUGH_VOTES, "top_k": 1},
+     lambda seeded: {"scenario_type": ScenarioType.NOT_ENOUGH_VOTES, "top_k": PUBLICATIONS}),
+    ("publications", "get_user_labeled_publications",
+     lambda seeded: {"user_id": seeded.user_id}, lambda seeded: {"user_id": seeded.labeler_id}),
+    ("sdg_label_decisions", "get_sdg_label_decisions_by_scenario",
+     lambda seeded: {"scenario": ScenarioType.CONFIRM}, lambda seeded: {"scenario": ScenarioType.NOT_ENOUGH_VOTES}),
+    ("sdg_label_decisions", "get_user_interacted_sdg_label_decisions",
+     lambda seeded: {"user_id": seeded.user_id}, lambda seeded: {"user_id": seeded.labeler_id}),
+    ("sdg_user_labels", "get_user_interacted_sdg_label_decisions",
+     lambda seeded: {"user_id": seeded.user_id}, lambda seeded: {"user_id": seeded.labeler_id}),
+]
+
+
+@pytest.fixture
+def cache_service():
+    """A fresh in-process cache for the cached routes (every call here is a miss)."""
+    set_cache_service(CacheService())
+    yield
+    set_cache_service(None)
+
+
+def route_queries(route, db, engine, arguments: dict) -> tuple:
+    """Number of queries of one route call, including the serialization of its response, and its row count."""
+    db.expunge_all()
+    with count_queries(engine) as queries:
+        result = route(**arguments, db=db, token="token")
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        rows = json.loads(result.body) if isinstance(result, Response) else result
+    return len(queries), len(rows)
+
+
+@pytest.mark.parametrize("module, name, one, many", ROUTES, ids=[f"{route[0]}.{route[1]}" for route in ROUTES])
+def test_route_query_count_is_independent_of_result_size(route_db, engine, cache_service, monkeypatch,
+                                                         module, name, one, many):
+    routes = pytest.importorskip(f"api.app.routes.{module}")
+    monkeypatch.setattr(routes, "verify_token", lambda token, db: None)
+    route = getattr(routes, name)
+
+    few, few_rows = route_queries(route, route_db.db, engine, one(route_db))
+    more, more_rows = route_queries(route, route_db.db, engine, many(route_db))
+    assert few_rows == 1 and more_rows >= PUBLICATIONS
+    assert few == more, f"{module}.{name}: {few} queries for 1 row, {more} for {more_rows}"
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from models import Fact, Publication, PublicationKeywords, PublicationSDGAnalysis, Summary
+from utils.dataset.precompute_publication_content import ContentTask, LocalFileBatchClient, \
+    PublicationContentPrecompute, content_tasks
+
+GOALS = [3, 13]
+
+
+@pytest.fixture
+def publication_ids(db):
+    """Two publications to precompute (the first with a stored summary) and one without content."""
+    publications = [
+        Publication(oai_identifier="oai:1", oai_identifier_num=1, title="Clean water", description="Abstract"),
+        Publication(oai_identifier="oai:2", oai_identifier_num=2, title="Climate action", description=None),
+        Publication(oai_identifier="oai:3", oai_identifier_num=3, title=None, description=None),
+    ]
+    db.add_all(publications)
+    db.flush()
+    db.add(Summary(publication_id=publications[0].publication_id, content="Stored summary"))
+    db.commit()
+    return [publication.publication_id for publication in publications]
+
+
+def precompute(session_factory, tmp_path) -> PublicationContentPrecompute:
+    return PublicationContentPrecompute(
+        session_factory, LocalFileBatchClient(str(tmp_path / "fake")),
+        content_tasks(["summary", "fact", "keywords", "goal"], GOALS),
+        work_dir=str(tmp_path / "work"), max_requests_per_batch=4,
+    )
+
+
+def test_precompute_stores_every_missing_result_and_resumes(session_factory, db, tmp_path, publication_ids):
+    first, second, empty = publication_ids
+
+    # The first run submits 9 requests (2 publications x 5 tasks, minus the stored summary) in batches of 4
+    job = precompute(session_factory, tmp_path)
+    job.run(submit=True)
+    assert [batch["requests"] for batch in job.state["batches"]] == [4, 4, 1]
+    assert job.submit() == 0  # Pending requests are not submitted again
+
+    # A restarted job picks up the submitted batches from its work directory and applies them
+    job = precompute(session_factory, tmp_path)
+    job.run(submit=True)
+    assert not job.pending_batches()
+    assert len(job.state["batches"]) == 3
+
+    assert db.query(Summary.publication_id, Summary.content).order_by(Summary.publication_id).all() == [
+        (first, "Stored summary"), (second, "Fake summary")]
+    assert sorted(publication_id for (publication_id,) in db.query(Fact.publication_id)) == [first, second]
+    keywords = db.query(PublicationKeywords).filter_by(publication_id=second).one()
+    assert keywords.keywords == ["fake keywords"]
+    assert sorted(db.query(PublicationSDGAnalysis.publication_id, PublicationSDGAnalysis.sdg)) == [
+        (first, 3), (first, 13), (second, 3), (second, 13)]
+    assert db.query(Summary).filter_by(publication_id=empty).count() == 0
+
+    # Nothing is left to request
+    assert precompute(session_factory, tmp_path).submit() == 0
+
+
+def test_results_stored_by_a_route_in_the_meantime_are_kept(session_factory, db, tmp_path, publication_ids,
+                                                            monkeypatch):
+    first, second, _ = publication_ids
+    job = precompute(session_factory, tmp_path)
+    job.submit(publication_ids=[second])
+
+    # A route stores the fact after the job checked for it, so the bulk insert fails the unique constraint
+    stored_publication_ids = ContentTask.stored_publication_ids
+    checked = []
+
+    def store_after_check(task, session, ids):
+        stored = stored_publication_ids(task, session, ids)
+        if task.name == "fact" and not checked:
+            checked.append(ids)
+            with session_factory() as route_session:
+                route_session.add(Fact(publication_id=second, content="Route fact"))
+                route_session.commit()
+        return stored
+
+    monkeypatch.setattr(ContentTask, "stored_publication_ids", store_after_check)
+    job.poll()
+
+    assert checked == [[second]]
+    assert db.query(Fact.content).filter_by(publication_id=second).scalar() == "Route fact"
+    assert db.query(Summary.content).filter_by(publication_id=second).scalar() == "Fake summary"
+    assert json.loads(db.query(PublicationKeywords.content).filter_by(publication_id=second).scalar()) == [
+        "fake keywords"]
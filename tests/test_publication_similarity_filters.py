@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.http.models import Distance, PointStruct, VectorParams  # noqa: E402
+
+from request_models.publication_similarity_query_service import PublicationSimilarityFilters  # noqa: E402
+from services.publication_similarity_query_service import PublicationSimilarityQueryService  # noqa: E402
+from settings.settings import QdrantDBSettings  # noqa: E402
+
+COLLECTION = "publications-test"
+CONTENT = QdrantDBSettings.PUBLICATIONS_CONTENT_VECTOR_NAME
+SQL_ID = QdrantDBSettings.PUBLICATIONS_SQL_ID_PAYLOAD_FIELD_NAME
+DIMENSION = 8
+POINTS = 200
+
+
+def payload(rng: random.Random, sql_id: int) -> dict:
+    top_sdg = rng.randint(1, 17)
+    return {
+        SQL_ID: sql_id,
+        "title": f"Title {sql_id}",
+        "description": f"Abstract {sql_id}",
+        "year": rng.randint(2000, 2024),
+        "faculty_id": rng.randint(1, 5),
+        "collection_id": rng.randint(1, 10),
+        "top_sdg": top_sdg,
+        "sdg_levels": [f"sdg{top_sdg}_level{rng.randint(1, 3)}", f"sdg{rng.randint(1, 17)}_level1"],
+    }
+
+
+def matches(point_payload: dict, publication_ids, filters: PublicationSimilarityFilters) -> bool:
+    """The filter as the search applied it before: in Python, on the results of an unfiltered search."""
+    if publication_ids and point_payload[SQL_ID] not in publication_ids:
+        return False
+    if filters.sdg is not None and filters.level is not None:
+        if f"sdg{filters.sdg}_level{filters.level}" not in point_payload["sdg_levels"]:
+            return False
+    elif filters.sdg is not None and point_payload["top_sdg"] != filters.sdg:
+        return False
+    if filters.year_from is not None and point_payload["year"] < filters.year_from:
+        return False
+    if filters.year_to is not None and point_payload["year"] > filters.year_to:
+        return False
+    if filters.faculty_ids and point_payload["faculty_id"] not in filters.faculty_ids:
+        return False
+    return not filters.collection_ids or point_payload["collection_id"] in filters.collection_ids
+
+
+@pytest.fixture(scope="module")
+def qdrant():
+    rng = random.Random(7)
+    client = QdrantClient(":memory:")
+    client.create_collection(COLLECTION, vectors_config={CONTENT: VectorParams(size=DIMENSION, distance=Distance.COSINE)})
+    client.upsert(COLLECTION, points=[
+        PointStruct(id=sql_id, vector={CONTENT: [rng.gauss(0, 1) for _ in range(DIMENSION)]}, payload=payload(rng, sql_id))
+        for sql_id in range(1, POINTS + 1)
+    ])
+    yield client
+    client.close()
+
+
+@pytest.mark.parametrize("publication_ids, filters", [
+    (None, PublicationSimilarityFilters(sdg=3)),
+    (None, PublicationSimilarityFilters(sdg=5, level=1)),
+    (None, PublicationSimilarityFilters(year_from=2010, year_to=2015, faculty_ids=[1, 2])),
+    (None, PublicationSimilarityFilters(year_to=2005)),
+    (list(range(1, POINTS, 3)), PublicationSimilarityFilters(collection_ids=[2, 4, 6])),
+    (list(range(50, 120)), PublicationSimilarityFilters()),
+])
+def test_filtered_search_matches_post_filtered_search(qdrant, publication_ids, filters):
+    service = PublicationSimilarityQueryService(qdrant, db=None)
+    query_vector = [random.Random(11).gauss(0, 1) for _ in range(DIMENSION)]
+    top_k = 10
+
+    filtered = service.search_publications(query_vector, COLLECTION, top_k=top_k, publication_ids=publication_ids,
+                                           filters=filters)
+
+    unfiltered = qdrant.query_points(COLLECTION, query=query_vector, using=CONTENT, limit=POINTS, with_payload=True).points
+    expected = [point for point in unfiltered if matches(point.payload, publication_ids, filters)][:top_k]
+
+    assert expected, "the case should select some publications"
+    assert [point.payload[SQL_ID] for point in filtered] == [point.payload[SQL_ID] for point in expected]
+    assert [point.score for point in filtered] == pytest.approx([point.score for point in expected])
+    assert set(filtered[0].payload) == {SQL_ID, "title", "description"}  # Only the fields the results are built from
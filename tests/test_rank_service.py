@@ -0,0 +1,20 @@
+from models import SDGRank, SDGXPBank, User
+from services.rank_service import RankService
+
+# user_id: (total_xp, sdg1_xp); user 4 has no user row
+BANKS = {1: (100.0, 5.0), 2: (90.0, 50.0), 3: (80.0, 10.0), 4: (95.0, 60.0), 5: (70.0, 20.0)}
+
+
+def test_leaderboard_skips_unranked_users_before_the_limit(db):
+    db.add(SDGRank(sdg_goal_id=1, tier=0, name="Novice", xp_required=10.0))
+    for user_id, (total_xp, sdg1_xp) in BANKS.items():
+        if user_id != 4:
+            user = User(email=f"user{user_id}@example.org")
+            user.user_id, user.hashed_password = user_id, "x"
+            db.add(user)
+        db.add(SDGXPBank(user_id=user_id, total_xp=total_xp, sdg1_xp=sdg1_xp))
+    db.commit()
+
+    leaderboard = RankService(db).get_leaderboard(top_k=2)
+    assert [entry.user_id for entry in leaderboard] == [2, 3]
+    assert [entry.user_id for entry in RankService(db).get_leaderboard(top_k=2, sdg=1)] == [2, 5]
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import select
+
+from models import Publication, SDGLabelCount, SDGLabelHistory, SDGLabelSummary
+from services.sdg_label_count_service import SDGS, SDGLabelCountService
+
+LABELS = [{"sdg3": 1, "sdg5": -1}, {"sdg3": 1, "sdg5": 1, "sdg7": -1}]
+
+
+@pytest.fixture
+def summaries(db):
+    for index, labels in enumerate(LABELS):
+        publication = Publication(oai_identifier=f"oai:{index}", oai_identifier_num=index, title=f"Publication {index}")
+        history = SDGLabelHistory(active=True)
+        db.add_all([publication, history])
+        db.flush()
+        db.add(SDGLabelSummary(publication_id=publication.publication_id, history_id=history.history_id, **labels))
+    db.commit()
+
+
+def test_missing_counters_are_rebuilt_without_committing_the_callers_session(db, session_factory, summaries,
+                                                                            monkeypatch):
+    monkeypatch.setattr(db, "commit", lambda: pytest.fail("Reading the totals committed the caller's session"))
+
+    assert SDGLabelCountService(db).least_labeled_sdg() == 7
+    expected = {sdg: 0 for sdg in SDGS} | {3: 2, 7: -1}
+    with session_factory() as session:
+        assert dict(session.execute(select(SDGLabelCount.sdg, SDGLabelCount.total)).all()) == expected
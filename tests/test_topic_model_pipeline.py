@@ -0,0 +1,81 @@
+import importlib
+import json
+import sys
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Imported at the top of the pipeline; stubbed where not installed, the stage under test only uses the topic model
+OPTIONAL_MODULES = [
+    "joblib", "pynndescent", "bertopic", "bertopic.cluster", "bertopic.dimensionality", "bertopic.representation",
+    "bertopic.vectorizers", "hdbscan", "sklearn", "sklearn.cluster", "sklearn.decomposition",
+    "sklearn.feature_extraction", "sklearn.feature_extraction.text", "umap",
+]
+PIPELINE_MODULES = ["services.ann_index_service", "utils.mariadb.topic_model_pipeline"]
+
+
+class StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        stub = type(name, (), {})
+        setattr(self, name, stub)
+        return stub
+
+
+@pytest.fixture
+def pipeline_module():
+    saved = {name: sys.modules.get(name) for name in OPTIONAL_MODULES + PIPELINE_MODULES}
+    for name in PIPELINE_MODULES:
+        sys.modules.pop(name, None)
+    for name in OPTIONAL_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            sys.modules[name] = StubModule(name)
+    try:
+        yield importlib.import_module("utils.mariadb.topic_model_pipeline")
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+class RowLabel:
+    """Representation model labelling each topic with the c-TF-IDF row it was given for it."""
+
+    def extract_topics(self, topic_model, documents, c_tf_idf, topics):
+        return {topic: [(f"row{int(c_tf_idf[index, 0])}", 1.0)] for index, topic in enumerate(topics)}
+
+
+def topic_model(words: dict, offset: int) -> SimpleNamespace:
+    """Topics -1 (outliers) to 2; row i of the c-TF-IDF matrix is topic i - 1 and holds offset + i."""
+    return SimpleNamespace(get_topics=lambda: words, _outliers=1,
+                           c_tf_idf_=np.arange(offset, offset + len(words)).reshape(-1, 1))
+
+
+def test_missing_topics_are_represented_from_their_own_rows(pipeline_module, tmp_path, monkeypatch):
+    pipeline = pipeline_module.TopicModelPipeline(str(tmp_path), aspects=["Main"])
+    pipeline.state["embeddings"] = {"rows": 4}
+    np.save(tmp_path / "ids.npy", np.arange(4))
+    np.save(tmp_path / "topics.npy", np.array([-1, 0, 1, 2]))
+    (tmp_path / "documents.jsonl").write_text("".join(json.dumps({"document": f"Document {index}"}) + "\n"
+                                                       for index in range(4)))
+    monkeypatch.setattr(pipeline_module, "representation_factories", lambda seed_words: {"Main": RowLabel})
+
+    words = {topic: [(f"word{topic}", 0.5)] for topic in [-1, 0, 1, 2]}
+    monkeypatch.setattr(pipeline, "load_topic_model", lambda: topic_model(words, 0))
+    pipeline.stage_representations()
+
+    # Only the topics whose words changed are represented again, from a refitted matrix
+    changed = {**words, -1: [("changed-1", 0.5)], 1: [("changed1", 0.5)]}
+    monkeypatch.setattr(pipeline, "load_topic_model", lambda: topic_model(changed, 10))
+    pipeline.stage_representations()
+
+    representations = json.loads((tmp_path / "representations.json").read_text())
+    assert {topic: aspects["Main"][0][0] for topic, aspects in representations.items()} == {
+        "-1": "row10", "0": "row1", "1": "row12", "2": "row3"}
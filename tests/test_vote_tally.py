@@ -0,0 +1,41 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+decision_service = pytest.importorskip("services.decision_service")
+DecisionService, VoteTally = decision_service.DecisionService, decision_service.VoteTally
+
+SEQUENCES_PER_SEED = 20
+
+
+def scan(service, user_labels) -> tuple:
+    """Latest votes, scenario and majority as DecisionService computes them from all labels so far."""
+    most_recent_labels = service.get_most_recent_labels_per_user(user_labels)
+    majority = service.has_clear_majority(most_recent_labels, len(most_recent_labels)) if most_recent_labels else None
+    return Counter(most_recent_labels), service.evaluate_vote_scenario(user_labels), majority
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_tally_matches_the_scan_after_every_vote(seed):
+    rng = random.Random(seed)
+    service = DecisionService(db=None)
+    for sequence in range(SEQUENCES_PER_SEED):
+        users = rng.randint(1, 25)
+        labels = rng.sample(range(1, 19), rng.randint(1, 5))
+        start = datetime(2025, 1, 1)
+        tally = VoteTally()
+        user_labels = []
+        for vote in range(rng.randint(1, 60)):
+            # Out-of-order and equal timestamps are included on purpose
+            label = SimpleNamespace(user_id=rng.randint(1, users), voted_label=rng.choice(labels),
+                                    labeled_at=start + timedelta(seconds=rng.randint(0, 30)))
+            user_labels.append(label)
+            tally.add(label.user_id, label.voted_label, label.labeled_at)
+            if rng.random() < 0.2:
+                tally = VoteTally.from_json(tally.to_json())  # Round trip as when persisted
+
+            assert (tally.counts, tally.scenario(), tally.majority_label()) == scan(service, user_labels), (
+                f"seed {seed}, sequence {sequence}, vote {vote}")
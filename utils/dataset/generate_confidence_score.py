@@ -1,50 +1,48 @@
+"""
+Generate the ChatGPT SDG confidence-score dataset.
+
+For every SDG and prediction range (FILTER_RANGES) the top SAMPLES_PER_RANGE publications by model prediction
+are selected with one limited query each. Every candidate gets two structured LLM answers:
+  Q1  an initial classification of the abstract (information density, SDG guess, reasoning, confidence),
+  Q2  an assessment of the model prediction for the SDG (reasoning, confidence).
+Both requests of a candidate are sent concurrently through AsyncGPTAssistantService (concurrency limits and
+retries with backoff), by a pool of --workers candidates at a time and at most --requests-per-minute requests.
+
+Every finished candidate is appended to a JSONL checkpoint; on restart the (publication, sdg) pairs found there
+are skipped, so an interrupted or partly failed run is completed by running it again. Finally the checkpoint is
+exported to --output (CSV).
+
+Usage:
+    python -m utils.dataset.generate_confidence_score --samples 5 --workers 16
+    python -m utils.dataset.generate_confidence_score --sdgs 7 13 --ranges 1.0 0.99 0.99 0.95
+    python -m utils.dataset.generate_confidence_score --fake-endpoint     # local fake LLM endpoint
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
 import time
-from typing import Literal
-import pandas as pd
-from sqlalchemy.orm import sessionmaker, relationship, joinedload
-from db.mariadb_connector import engine as mariadb_engine
-
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Literal, Optional, Set, Tuple
 from zoneinfo import ZoneInfo
 
-from models.sdg_prediction import SDGPrediction
-from models.publications.publication import Publication
-from utils.logger import logger
-logging = logger("confidence_score_chatGPT_dataset_generator.log")
-
-
-
-from enum import Enum
-import json
-
-import requests
-from openai import OpenAI
+import pandas as pd
 from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
 
-from settings.settings import ExplainerSettings
-from utils.env_loader import load_env, get_env_variable
-import instructor
-
-# Apply the patch to the OpenAI client
-# enables response_model keyword
-
-
-# Load the API environment variables
-load_env('api.env')
-
-explainer_settings = ExplainerSettings()
-client = OpenAI(api_key=get_env_variable('OPENAI_API_KEY'))
+from models.publications.publication import Publication
+from models.sdg_prediction import SDGPrediction
+from settings.settings import ConfidenceScoreDatasetSettings, SDGSettings
+from utils.logger import logger
 
-MODEL = "gpt-4o-2024-08-06"
-MODEL = "gpt-4o-mini-2024-07-18"
-print(client)
-logging.info(f"Initialized ChatGPT with model... ")
+confidence_score_settings = ConfidenceScoreDatasetSettings()
+sdg_settings = SDGSettings()
 
-# Apply the patch to the OpenAI client
-# enables response_model keyword
-client = instructor.from_openai(OpenAI())
-print(client)
-logging.info(f"Patched ChatGPT with model... ")
+# Setup Logging
+logging = logger(confidence_score_settings.CONFIDENCE_SCORE_LOG_NAME)
 
 
 # Define the initial classification prompt
@@ -71,33 +69,18 @@ Given the publication's title, abstract, the current SDG goal being evaluated, a
 """
 
 
-# Example queries
-initial_query = """
-Title: "Advancing Renewable Energy in Sub-Saharan Africa"
-Abstract: "This study explores renewable energy adoption in Sub-Saharan Africa, focusing on wind and solar energy's potential to reduce carbon emissions and improve energy access in rural areas."
-"""
-
-refinement_query = """
-Title: "Advancing Renewable Energy in Sub-Saharan Africa"
-Abstract: "This study explores renewable energy adoption in Sub-Saharan Africa, focusing on wind and solar energy's potential to reduce carbon emissions and improve energy access in rural areas."
-Current SDG Goal: 7
-Model Prediction Score: 0.92
-"""
-
-
 def generate_initial_query(title, abstract):
-    return f"""
-    Title: {title}
-    Abstract: {abstract}
-    """
+    return {"title": title, "abstract": abstract}
+
 
 def generate_refinement_query(title, abstract, current_sdg_goal, model_prediction_score):
-    return f"""
-    Title: {title}
-    Abstract: {abstract}
-    Current SDG Goal: {current_sdg_goal}
-    Model Prediction Score: {model_prediction_score}
-    """
+    return {
+        "title": title,
+        "abstract": abstract,
+        "current_sdg_goal": current_sdg_goal,
+        "model_prediction_score": model_prediction_score,
+    }
+
 
 # Define the structured output for initial classification
 class InitialClassificationResponse(BaseModel):
@@ -131,190 +114,259 @@ class RefinementResponse(BaseModel):
     )
 
 
-def get_initial_classification_response(query: str):
-    # Simulate interaction with the model
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": initial_classification_prompt},
-            {"role": "user", "content": query},
-        ],
-        response_format=InitialClassificationResponse,
-    )
-    return completion.choices[0].message.parsed
-
-
-def get_refinement_response(query: str):
-    # Simulate interaction with the model
-    completion = client.beta.chat.completions.parse(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": refinement_prompt},
-            {"role": "user", "content": query},
-        ],
-        response_format=RefinementResponse,
-    )
-    return completion.choices[0].message.parsed
-
-
-# Initialize session
-Session = sessionmaker(bind=mariadb_engine)
-
-
-sdg_columns = [f"sdg{i}" for i in range(1, 18)]  # SDG1 to SDG17
-print(sdg_columns)
-filter_ranges = [[1.0, 0.99]]
-
-no_samples = 1
+class Candidate(BaseModel):
+    publication_id: int
+    title: Optional[str]
+    abstract: Optional[str]
+    oai_identifier: str
+    prediction: float
+    sdg: int
 
-results = []
-
-load = True
-if load:
-    with (Session() as session):
-
-
-        for sdg_index, sdg_column in enumerate(sdg_columns, start=1):
-            print(f"Processing SDG{sdg_index}...")
-
-            level = 1  # Start level numbering at 1 for each SDG
-
-            for range_index, (upper, lower) in enumerate(filter_ranges, start=1):
-                print(f"  Applying filter range {upper} - {lower}... - Level {level}")
-
-                start = time.time()
-                # Query publications based on SDG filter
-                publications = (
-                    session.query(Publication)
-                    .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
-                    .options(joinedload(Publication.sdg_predictions))
-                    .filter(
-                        SDGPrediction.prediction_model == "Aurora",
-                        getattr(SDGPrediction, sdg_column) <= upper,
-                        getattr(SDGPrediction, sdg_column) > lower,
-                    )
-                    .order_by(getattr(SDGPrediction, sdg_column).desc())
-                    .all()
 
+def select_candidates(db: Session, sdgs: List[int], filter_ranges: List[Tuple[float, float]], samples: int,
+                      done: Set[Tuple[int, int]]) -> List[Candidate]:
+    """
+    Top `samples` publications per SDG and (upper, lower] prediction range, without the pairs already done.
+    """
+    candidates = []
+    for sdg in sdgs:
+        column = getattr(SDGPrediction, f"sdg{sdg}")
+        for upper, lower in filter_ranges:
+            start = time.time()
+            rows = db.execute(
+                select(Publication.publication_id, Publication.title, Publication.description,
+                       Publication.oai_identifier, column)
+                .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
+                .where(
+                    SDGPrediction.prediction_model == confidence_score_settings.PREDICTION_MODEL,
+                    column <= upper,
+                    column > lower,
                 )
-                end = time.time()
+                .order_by(column.desc())
+                .limit(samples)
+            ).all()
+            selected = [
+                Candidate(publication_id=publication_id, title=title, abstract=abstract,
+                          oai_identifier=oai_identifier, prediction=prediction, sdg=sdg)
+                for publication_id, title, abstract, oai_identifier, prediction in rows
+                if (publication_id, sdg) not in done
+            ]
+            logging.info(f"SDG{sdg} range {upper} - {lower}: {len(rows)} candidates, {len(selected)} to do "
+                         f"({time.time() - start:.2f} seconds).")
+            candidates.extend(selected)
+    return candidates
+
+
+def load_checkpoint(path: str) -> List[dict]:
+    """
+    Results in the checkpoint; a line cut off by an interrupted write is ignored (its pair is redone).
+    """
+    results = []
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                try:
+                    results.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping an incomplete checkpoint line: {line[:80]!r}")
+    return results
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly at `requests_per_minute` across all workers of an event loop.
+    """
 
-                logging.info(
-                    f"  Found {len(publications)} publications for SDG{sdg_index} in range {upper} - {lower}. Took {end - start} seconds."
-                )
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
 
-                if publications:
-                    # Always log and print details of the first candidate
-                    first_candidate = publications[0]  # Access the first publication
-                    model_prediction = getattr(first_candidate.sdg_predictions[0], sdg_column)  # Dynamic SDG value
-                    logging.info(
-                        f"  First Example for SDG{sdg_index}: Title: '{first_candidate.title}', Model Prediction Score: {model_prediction}"
-                    )
-                    print(
-                        f"SDG{sdg_index}: Title: '{first_candidate.title}', Model Prediction Score: {model_prediction}"
-                    )
-
-                if not publications:
-                    continue  # Skip if no publications for this SDG and range
-
-                # Select top candidates and log their model values
-                candidates = publications[:no_samples]
-                logging.info(
-                    f" Selected Top {no_samples}: {[candidate.publication_id for candidate in candidates]}"
-                )
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
 
-                logging.info(
-                    f"  Selected Top {len(candidates)} for SDG{sdg_index}: "
-                    f"{', '.join([f'({candidate.publication_id}, {candidate.title.split()[0]} ... {candidate.title.split()[-1]}, {getattr(candidate.sdg_predictions[0], sdg_column):.4f})' for candidate in candidates])}"
-                )
 
-                for publication in candidates:
-                    publication_id = publication.publication_id
-                    title = publication.title
-                    abstract = publication.description
-                    oai_identifier = publication.oai_identifier
-                    model_prediction = getattr(publication.sdg_predictions[0], sdg_column)
-
-                    # Get initial classification response
-                    initial_query = generate_initial_query(title, abstract)
-                    logging.info(f"Initial Query: {initial_query}")
-                    initial_response = get_initial_classification_response(initial_query)
-                    # print(initial_response.model_dump())
-
-                    # Extract initial classification data
-                    abstract_information_density = initial_response.abstract_information_density
-                    initial_sdg_guess = initial_response.initial_sdg_guess
-                    initial_reasoning_for = initial_response.initial_reasoning_for
-                    initial_reasoning_against = initial_response.initial_reasoning_against
-                    initial_sdg_guess_confidence_score = initial_response.initial_sdg_guess_confidence_score
-
-                    # Get refinement response
-                    refinement_query = generate_refinement_query(title, abstract, sdg_index, model_prediction)
-                    logging.info(f"Refinement Query: {refinement_query}")
-                    refinement_response = get_refinement_response(refinement_query)
-                    # print(refinement_response.model_dump())
-
-                    # Extract refinement response data
-                    model_prediction_assessment_reasoning_for = refinement_response.reasoning_for
-                    model_prediction_assessment_reasoning_against = refinement_response.reasoning_against
-                    model_prediction_confidence_score = refinement_response.model_prediction_confidence_score
-
-                    timestamp = datetime.now(ZoneInfo("Europe/Zurich"))
-
-
-                    # Append the extracted data to the results list
-                    results.append({
-                        "publication_id": publication_id,
-                        "title": title,
-                        "abstract": abstract,
-                        "oai_identifier": oai_identifier,
-                        "prediction": model_prediction,
-                        "sdg": sdg_index,
-                        "OUT_Q1_abstract_information_density": abstract_information_density,
-                        "OUT_Q1_initial_sdg_guess": initial_sdg_guess,
-                        "OUT_Q1_initial_reasoning_for": initial_reasoning_for,
-                        "OUT_Q1_initial_reasoning_against": initial_reasoning_against,
-                        "OUT_Q1_initial_sdg_guess_confidence_score": initial_sdg_guess_confidence_score,
-                        #"initial_query": initial_query,
-                        # Store query parameters instead of full query
-                        #"initial_query_params": {
-                            #"title": title,
-                            #"abstract": abstract,
-                        #},
-                        "OUT_Q2_refinement_reasoning_for": model_prediction_assessment_reasoning_for,
-                        "OUT_Q2_refinement_reasoning_against": model_prediction_assessment_reasoning_against,
-                        "OUT_Q2_model_prediction_confidence_score": model_prediction_confidence_score,
-                        #"refinement_query": refinement_query,
-                        #"refinement_query_params": {
-                            #"title": title,
-                            #"abstract": abstract,
-                            #"current_sdg_goal": sdg_index,
-                            #"model_prediction_score": model_prediction,
-                        #},
-                        "created_at": timestamp,
-                    })
-
-# abstract information densitiy: High Average Low
-# initial SDG guess: 0 - 17
-# initial SDG guess reasoning: Text
-# initial SDG guess confidence score: 0-1
-# model prediction assessment resoning: Text
-# model prediction confidence score: 0-1
-
-
-
-# Create a DataFrame from the results
-df = pd.DataFrame(results)
-
-# Save the DataFrame to a CSV file
-df.to_csv("chatgpt_sdg_classification_results.csv", index=False)
-print(df.head())
-
-# Example usage
-# Get initial classification response
-# initial_response = get_initial_classification_response(initial_query)
-# print(initial_response.model_dump())
-
-# Get refinement response
-# refinement_response = get_refinement_response(refinement_query)
-# print(refinement_response.model_dump())
+class ConfidenceScoreGenerator:
+    """
+    Async worker pool over the candidates, appending every finished candidate to the checkpoint.
+    """
+
+    def __init__(self, gpt_service, checkpoint_path: str = confidence_score_settings.CHECKPOINT_PATH,
+                 workers: int = confidence_score_settings.WORKERS,
+                 requests_per_minute: int = confidence_score_settings.REQUESTS_PER_MINUTE,
+                 temperature: float = confidence_score_settings.TEMPERATURE):
+        self.gpt_service = gpt_service
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.temperature = temperature
+        self.completed = 0
+        self.failed = 0
+
+    async def _request(self, operation: str, context: str, prompt_data: dict, response_model: type[BaseModel]):
+        await self.rate_limiter.acquire()
+        return await self.gpt_service.parse(operation, context, prompt_data, response_model, self.temperature)
+
+    async def classify(self, candidate: Candidate) -> dict:
+        initial_response, refinement_response = await asyncio.gather(
+            self._request("confidence_initial_classification", initial_classification_prompt,
+                          generate_initial_query(candidate.title, candidate.abstract), InitialClassificationResponse),
+            self._request("confidence_refinement", refinement_prompt,
+                          generate_refinement_query(candidate.title, candidate.abstract, candidate.sdg,
+                                                    candidate.prediction), RefinementResponse),
+        )
+        return {
+            "publication_id": candidate.publication_id,
+            "title": candidate.title,
+            "abstract": candidate.abstract,
+            "oai_identifier": candidate.oai_identifier,
+            "prediction": candidate.prediction,
+            "sdg": candidate.sdg,
+            "OUT_Q1_abstract_information_density": initial_response.abstract_information_density,
+            "OUT_Q1_initial_sdg_guess": initial_response.initial_sdg_guess,
+            "OUT_Q1_initial_reasoning_for": initial_response.initial_reasoning_for,
+            "OUT_Q1_initial_reasoning_against": initial_response.initial_reasoning_against,
+            "OUT_Q1_initial_sdg_guess_confidence_score": initial_response.initial_sdg_guess_confidence_score,
+            "OUT_Q2_refinement_reasoning_for": refinement_response.reasoning_for,
+            "OUT_Q2_refinement_reasoning_against": refinement_response.reasoning_against,
+            "OUT_Q2_model_prediction_confidence_score": refinement_response.model_prediction_confidence_score,
+            "created_at": datetime.now(ZoneInfo("Europe/Zurich")).isoformat(),
+        }
+
+    async def _worker(self, queue: asyncio.Queue, checkpoint) -> None:
+        while True:
+            candidate = await queue.get()
+            try:
+                result = await self.classify(candidate)
+                checkpoint.write(json.dumps(result) + "\n")  # No await in between: lines never interleave
+                checkpoint.flush()
+                self.completed += 1
+            except Exception as e:
+                # Not checkpointed, so the next run retries it
+                self.failed += 1
+                logging.error(f"Publication {candidate.publication_id} (SDG{candidate.sdg}) failed: {e}")
+            finally:
+                queue.task_done()
+
+    async def run(self, candidates: List[Candidate]) -> dict:
+        start = time.perf_counter()
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for candidate in candidates:
+            queue.put_nowait(candidate)
+        with open(self.checkpoint_path, "a") as checkpoint:
+            workers = [asyncio.create_task(self._worker(queue, checkpoint)) for _ in range(self.workers)]
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return {
+            "candidates": len(candidates),
+            "completed": self.completed,
+            "failed": self.failed,
+            "seconds": round(time.perf_counter() - start, 2),
+            **self.gpt_service.stats(),
+        }
+
+
+def export(checkpoint_path: str, output_path: str) -> pd.DataFrame:
+    """Write the checkpoint (last result per pair) as the dataset CSV."""
+    df = pd.DataFrame(load_checkpoint(checkpoint_path))
+    if not df.empty:
+        df = df.drop_duplicates(["publication_id", "sdg"], keep="last").sort_values(["sdg", "prediction"],
+                                                                                    ascending=[True, False])
+    df.to_csv(output_path, index=False)
+    return df
+
+
+def serve_fake_endpoint(responder: Callable[[dict], str]) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Local fake of the chat completions endpoint, answering every request with responder(body) as the message
+    content. Returns the server (shut it down when done) and its base URL.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            data = json.dumps({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": responder(body)}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+
+def generate(session_factory: Callable[[], Session], gpt_service, sdgs: List[int],
+             filter_ranges: List[Tuple[float, float]], samples: int, checkpoint_path: str, output_path: str,
+             workers: int, requests_per_minute: int) -> dict:
+    done = {(result["publication_id"], result["sdg"]) for result in load_checkpoint(checkpoint_path)}
+    with session_factory() as db:
+        candidates = select_candidates(db, sdgs, filter_ranges, samples, done)
+    logging.info(f"{len(done)} pairs in the checkpoint, {len(candidates)} candidates to classify.")
+
+    generator = ConfidenceScoreGenerator(gpt_service, checkpoint_path, workers, requests_per_minute)
+    stats = asyncio.run(generator.run(candidates))
+    stats["exported"] = len(export(checkpoint_path, output_path))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the ChatGPT SDG confidence-score dataset")
+    parser.add_argument("--sdgs", nargs="+", type=int, default=list(range(1, sdg_settings.SDGOAL_NUMBER + 1)))
+    parser.add_argument("--ranges", nargs="+", type=float,
+                        help="Prediction ranges as upper/lower pairs, e.g. 1.0 0.99 0.99 0.95 (default: FILTER_RANGES)")
+    parser.add_argument("--samples", type=int, default=confidence_score_settings.SAMPLES_PER_RANGE,
+                        help="Top candidates per SDG and range")
+    parser.add_argument("--checkpoint", default=confidence_score_settings.CHECKPOINT_PATH)
+    parser.add_argument("--output", default=confidence_score_settings.OUTPUT_PATH)
+    parser.add_argument("--workers", type=int, default=confidence_score_settings.WORKERS)
+    parser.add_argument("--requests-per-minute", type=int, default=confidence_score_settings.REQUESTS_PER_MINUTE)
+    parser.add_argument("--fake-endpoint", action="store_true", help="Answer the requests with a local fake endpoint")
+    args = parser.parse_args()
+
+    if args.ranges and len(args.ranges) % 2:
+        parser.error("--ranges takes upper/lower pairs")
+    ranges = list(zip(args.ranges[::2], args.ranges[1::2])) if args.ranges else confidence_score_settings.FILTER_RANGES
+
+    from openai import AsyncOpenAI
+    from db.mariadb_connector import engine as mariadb_engine
+    from services.gpt.async_gpt_assistant_service import AsyncGPTAssistantService
+
+    fake_server, client = None, None
+    if args.fake_endpoint:
+        from utils.dataset.precompute_publication_content import fake_completion
+        fake_server, base_url = serve_fake_endpoint(fake_completion)
+        client = AsyncOpenAI(api_key="fake", base_url=base_url, max_retries=0)
+
+    # Every result is new data, so the shared LLM response cache is not used
+    service = AsyncGPTAssistantService(
+        client=client, model=confidence_score_settings.GPT_MODEL, use_cache=False,
+        operation_limits={"confidence_initial_classification": args.workers, "confidence_refinement": args.workers},
+    )
+    try:
+        result = generate(sessionmaker(bind=mariadb_engine), service, args.sdgs, ranges, args.samples,
+                          args.checkpoint, args.output, args.workers, args.requests_per_minute)
+    finally:
+        if fake_server:
+            fake_server.shutdown()
+    print(f"{result['completed']} of {result['candidates']} candidates classified ({result['failed']} failed) in "
+          f"{result['seconds']} seconds; {result['exported']} rows in {args.output}. LLM: calls {result['calls']}, "
+          f"retries {result['retries']}.")
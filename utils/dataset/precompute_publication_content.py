@@ -0,0 +1,421 @@
+"""
+Precompute publication summaries, facts, keywords and per-goal SDG explanations with the OpenAI Batch API.
+
+The job is resumable: the database is the source of truth for finished work and the work directory
+records the submitted batches. Every run
+  1. polls the submitted batches and bulk-writes the results of completed ones,
+  2. builds requests for every (publication, task) that has no stored result and is not pending,
+  3. submits them as JSONL batch files (unless --no-submit).
+Failed or expired requests are simply requested again by the next run.
+
+The prompts are the ones GPTAssistantService uses, so the stored content matches what the routes
+would generate on demand; the routes then only read the database.
+
+Usage:
+  python -m utils.dataset.precompute_publication_content --tasks summary fact keywords goal --limit 1000
+  python -m utils.dataset.precompute_publication_content --wait                    # poll until all are applied
+  python -m utils.dataset.precompute_publication_content --fake-batch-dir /tmp/fake  # local fake endpoint
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from models import Fact, Publication, PublicationKeywords, PublicationSDGAnalysis, SDGLabelSummary, Summary
+from schemas.gpt_assistant_service import GPTResponseFactSchema, GPTResponseKeywordsSchema, \
+    GPTResponseSDGAnalysisSchema, GPTResponseSummarySchema
+from services.gpt.strategies.fact_generator_strategy import FactStrategy
+from services.gpt.strategies.keyword_extractor_strategy import ExtractKeywordsStrategy
+from services.gpt.strategies.sdg_explainer_strategy import GoalStrategy
+from services.gpt.strategies.summarizer_strategy import SummarizeSinglePublicationStrategy
+from settings.settings import GPTAssistantServiceSettings, PublicationContentPrecomputeSettings, SDGSettings
+from utils.env_loader import load_env
+
+gpt_assistant_service_settings = GPTAssistantServiceSettings()
+precompute_settings = PublicationContentPrecomputeSettings()
+sdg_settings = SDGSettings()
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class ContentTask:
+    """
+    One kind of precomputed content: its prompt, response schema and storage.
+    """
+
+    def __init__(self, name: str, strategy_factory: Callable, response_model: type[BaseModel], model,
+                 to_row: Callable[[int, BaseModel], dict], sdg: Optional[int] = None):
+        self.name = name
+        self.strategy_factory = strategy_factory
+        self.response_model = response_model
+        self.model = model
+        self.to_row = to_row
+        self.sdg = sdg
+
+    def stored_publication_ids(self, db: Session, publication_ids: List[int]) -> set:
+        stmt = select(self.model.publication_id).where(self.model.publication_id.in_(publication_ids))
+        if self.sdg is not None:
+            stmt = stmt.where(self.model.sdg == self.sdg)
+        return set(db.scalars(stmt))
+
+
+def content_tasks(names: List[str], goals: List[int]) -> Dict[str, ContentTask]:
+    tasks = {}
+    if "summary" in names:
+        tasks["summary"] = ContentTask(
+            "summary", SummarizeSinglePublicationStrategy, GPTResponseSummarySchema, Summary,
+            lambda publication_id, response: {"publication_id": publication_id, "content": response.summary},
+        )
+    if "fact" in names:
+        tasks["fact"] = ContentTask(
+            "fact", FactStrategy, GPTResponseFactSchema, Fact,
+            lambda publication_id, response: {"publication_id": publication_id, "content": response.fact},
+        )
+    if "keywords" in names:
+        tasks["keywords"] = ContentTask(
+            "keywords", ExtractKeywordsStrategy, GPTResponseKeywordsSchema, PublicationKeywords,
+            lambda publication_id, response: {"publication_id": publication_id, "content": json.dumps(response.keywords)},
+        )
+    if "goal" in names:
+        for goal in goals:
+            tasks[f"goal{goal}"] = ContentTask(
+                f"goal{goal}", lambda goal=goal: GoalStrategy(str(goal)), GPTResponseSDGAnalysisSchema,
+                PublicationSDGAnalysis,
+                lambda publication_id, response, goal=goal: {
+                    "publication_id": publication_id, "sdg": goal,
+                    "relevance": response.relevance, "reasoning": response.reasoning,
+                },
+                sdg=goal,
+            )
+    return tasks
+
+
+def response_format(response_model: type[BaseModel]) -> dict:
+    """Strict JSON schema response format of a flat response schema (as used by structured outputs)."""
+    schema = response_model.model_json_schema()
+    schema["additionalProperties"] = False
+    schema["required"] = list(schema["properties"])
+    return {"type": "json_schema", "json_schema": {"name": response_model.__name__, "schema": schema, "strict": True}}
+
+
+def build_request(task: ContentTask, publication: Tuple[int, str, str]) -> dict:
+    publication_id, title, abstract = publication
+    strategy = task.strategy_factory()
+    return {
+        "custom_id": f"{task.name}:{publication_id}",
+        "method": "POST",
+        "url": precompute_settings.BATCH_ENDPOINT,
+        "body": {
+            "model": gpt_assistant_service_settings.GPT_MODEL,
+            "temperature": 0.7,
+            "messages": [
+                {"role": "system", "content": strategy.context},
+                {"role": "user", "content": json.dumps(strategy.generate_prompt(title, abstract))},
+            ],
+            "response_format": response_format(task.response_model),
+        },
+    }
+
+
+class OpenAIBatchClient:
+    """Submits JSONL files to the OpenAI Batch API."""
+
+    def __init__(self, client=None):
+        if client is None:
+            from openai import OpenAI
+            load_env('api.env')
+            client = OpenAI()
+        self.client = client
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as file:
+            input_file = self.client.files.create(file=file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=precompute_settings.BATCH_ENDPOINT,
+            completion_window=precompute_settings.COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def retrieve(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        batch = self.client.batches.retrieve(batch_id)
+        return batch.status, batch.output_file_id
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+def fake_completion(body: dict) -> str:
+    """Placeholder content that satisfies the requested response schema."""
+    schema = body["response_format"]["json_schema"]["schema"]
+    content = {}
+    for name, field in schema["properties"].items():
+        if "enum" in field:
+            content[name] = field["enum"][0]
+        elif field.get("type") == "array":
+            content[name] = [f"fake {name}"]
+        elif field.get("type") in ("integer", "number"):
+            content[name] = 0.5 if field["type"] == "number" else 1
+        else:
+            content[name] = f"Fake {name}"
+    return json.dumps(content)
+
+
+class LocalFileBatchClient:
+    """
+    File-based fake of the Batch API for local runs and tests: batches are stored in a directory and
+    complete on their first retrieve, answered by `responder` (request body -> message content).
+    """
+
+    def __init__(self, directory: str, responder: Callable[[dict], str] = fake_completion):
+        self.directory = directory
+        self.responder = responder
+        os.makedirs(directory, exist_ok=True)
+
+    def submit(self, input_path: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        with open(input_path) as source, open(os.path.join(self.directory, f"{batch_id}.input.jsonl"), "w") as target:
+            target.write(source.read())
+        return batch_id
+
+    def retrieve(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        output_path = os.path.join(self.directory, f"{batch_id}.output.jsonl")
+        if not os.path.exists(output_path):
+            with open(os.path.join(self.directory, f"{batch_id}.input.jsonl")) as source, open(output_path, "w") as target:
+                for line in source:
+                    request = json.loads(line)
+                    target.write(json.dumps({
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": {
+                            "model": request["body"]["model"],
+                            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.responder(request["body"])}}],
+                        }},
+                        "error": None,
+                    }) + "\n")
+        return "completed", output_path
+
+    def download(self, file_id: str) -> str:
+        with open(file_id) as file:
+            return file.read()
+
+
+class PublicationContentPrecompute:
+    """
+    Resumable batch precomputation of publication content.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], batch_client, tasks: Dict[str, ContentTask],
+                 work_dir: str = precompute_settings.WORK_DIR,
+                 max_requests_per_batch: int = precompute_settings.MAX_REQUESTS_PER_BATCH):
+        self.session_factory = session_factory
+        self.batch_client = batch_client
+        self.tasks = tasks
+        self.work_dir = work_dir
+        self.max_requests_per_batch = max_requests_per_batch
+        self.state_path = os.path.join(work_dir, "state.json")
+        os.makedirs(work_dir, exist_ok=True)
+        self.state = self._load_state()
+
+    def _load_state(self) -> dict:
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as file:
+                return json.load(file)
+        return {"batches": []}
+
+    def _save_state(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(tmp_path, self.state_path)  # Atomic, so an interrupted run never leaves a broken state
+
+    def pending_batches(self) -> List[dict]:
+        return [batch for batch in self.state["batches"] if not batch["applied"]]
+
+    def pending_custom_ids(self) -> set:
+        custom_ids = set()
+        for batch in self.pending_batches():
+            with open(batch["input_file"]) as file:
+                custom_ids.update(json.loads(line)["custom_id"] for line in file)
+        return custom_ids
+
+    def poll(self) -> int:
+        """
+        Apply every batch that reached a terminal status. Returns the number of stored results.
+        """
+        stored = 0
+        for batch in self.pending_batches():
+            status, output_file_id = self.batch_client.retrieve(batch["batch_id"])
+            batch["status"] = status
+            if status not in TERMINAL_STATUSES:
+                continue
+            if output_file_id:
+                stored += self.apply_results(self.batch_client.download(output_file_id))
+            batch["applied"] = True  # Requests without a result are rebuilt by the next run
+            self._save_state()
+            print(f"Batch {batch['batch_id']} {status}.")
+        return stored
+
+    def apply_results(self, output: str) -> int:
+        """
+        Parse a batch output file and bulk-insert the results that are not stored yet.
+        """
+        rows: Dict[str, Dict[int, dict]] = {name: {} for name in self.tasks}
+        failed = 0
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            task_name, publication_id = result["custom_id"].rsplit(":", 1)
+            task = self.tasks.get(task_name)
+            response = result.get("response") or {}
+            if task is None or result.get("error") or response.get("status_code") != 200:
+                failed += 1
+                continue
+            try:
+                content = response["body"]["choices"][0]["message"]["content"]
+                parsed = task.response_model.model_validate_json(content)
+            except (KeyError, IndexError, TypeError, ValidationError):
+                failed += 1
+                continue
+            rows[task_name][int(publication_id)] = task.to_row(int(publication_id), parsed)
+
+        stored = 0
+        with self.session_factory() as db:
+            for task_name, task_rows in rows.items():
+                if not task_rows:
+                    continue
+                task = self.tasks[task_name]
+                ids = list(task_rows)
+                for start in range(0, len(ids), precompute_settings.QUERY_CHUNK_SIZE):
+                    chunk = ids[start:start + precompute_settings.QUERY_CHUNK_SIZE]
+                    stored += self._insert_missing(db, task, [task_rows[publication_id] for publication_id in chunk])
+        print(f"Stored {stored} results ({failed} failed requests will be retried).")
+        return stored
+
+    @staticmethod
+    def _insert_missing(db: Session, task: ContentTask, task_rows: List[dict]) -> int:
+        """
+        Insert the rows whose publication has no stored result. A route storing one between the check and
+        the insert fails the unique constraint; the chunk is then checked again in a new transaction.
+        """
+        while True:
+            existing = task.stored_publication_ids(db, [row["publication_id"] for row in task_rows])
+            new_rows = [row for row in task_rows if row["publication_id"] not in existing]
+            if not new_rows:
+                db.rollback()
+                return 0
+            try:
+                db.execute(insert(task.model), new_rows)
+                db.commit()
+                return len(new_rows)
+            except IntegrityError:
+                db.rollback()
+
+    def candidate_publications(self, db: Session, publication_ids: Optional[List[int]] = None,
+                               sdg: Optional[int] = None, limit: Optional[int] = None) -> Iterator[List[Tuple[int, str, str]]]:
+        """
+        Yield (publication_id, title, description) chunks of the publications to precompute, in id order.
+        """
+        stmt = select(Publication.publication_id, Publication.title, Publication.description).order_by(Publication.publication_id)
+        if publication_ids:
+            stmt = stmt.where(Publication.publication_id.in_(publication_ids))
+        if sdg is not None:
+            stmt = stmt.join(SDGLabelSummary, SDGLabelSummary.publication_id == Publication.publication_id) \
+                .where(getattr(SDGLabelSummary, f"sdg{sdg}") == 1)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        chunk = []
+        for row in db.execute(stmt):
+            if not row.title and not row.description:
+                continue  # Nothing to generate from
+            chunk.append((row.publication_id, row.title or "", row.description or ""))
+            if len(chunk) == precompute_settings.QUERY_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def build_requests(self, **candidates) -> Iterator[dict]:
+        pending = self.pending_custom_ids()
+        with self.session_factory() as db:
+            for chunk in self.candidate_publications(db, **candidates):
+                ids = [publication[0] for publication in chunk]
+                for task in self.tasks.values():
+                    stored = task.stored_publication_ids(db, ids)
+                    for publication in chunk:
+                        if publication[0] in stored or f"{task.name}:{publication[0]}" in pending:
+                            continue
+                        yield build_request(task, publication)
+
+    def submit(self, **candidates) -> int:
+        """
+        Write the missing requests to JSONL files of at most max_requests_per_batch lines and submit them.
+        """
+        submitted = 0
+        requests = []
+
+        def flush():
+            nonlocal submitted
+            input_file = os.path.join(self.work_dir, f"requests_{int(time.time())}_{uuid.uuid4().hex[:8]}.jsonl")
+            with open(input_file, "w") as file:
+                file.writelines(json.dumps(request) + "\n" for request in requests)
+            batch_id = self.batch_client.submit(input_file)
+            self.state["batches"].append({
+                "batch_id": batch_id, "input_file": input_file, "requests": len(requests),
+                "status": "submitted", "applied": False,
+            })
+            self._save_state()
+            submitted += len(requests)
+            print(f"Submitted batch {batch_id} with {len(requests)} requests.")
+            requests.clear()
+
+        for request in self.build_requests(**candidates):
+            requests.append(request)
+            if len(requests) == self.max_requests_per_batch:
+                flush()
+        if requests:
+            flush()
+        return submitted
+
+    def run(self, submit: bool = True, wait: bool = False,
+            poll_interval: int = precompute_settings.POLL_INTERVAL_SECONDS, **candidates) -> None:
+        self.poll()
+        if submit:
+            self.submit(**candidates)
+        while wait and self.pending_batches():
+            time.sleep(poll_interval)
+            self.poll()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute publication content with the OpenAI Batch API")
+    parser.add_argument("--tasks", nargs="+", default=precompute_settings.TASKS, choices=precompute_settings.TASKS)
+    parser.add_argument("--goals", nargs="+", type=int, default=list(range(1, sdg_settings.SDGOAL_NUMBER + 1)),
+                        help="SDG goals to explain (task 'goal')")
+    parser.add_argument("--publication-ids", nargs="+", type=int, help="Only these publications")
+    parser.add_argument("--sdg", type=int, help="Only publications labelled with this SDG (priority subset)")
+    parser.add_argument("--limit", type=int, help="At most this many publications")
+    parser.add_argument("--work-dir", default=precompute_settings.WORK_DIR)
+    parser.add_argument("--no-submit", action="store_true", help="Only poll and apply submitted batches")
+    parser.add_argument("--wait", action="store_true", help="Poll until every submitted batch is applied")
+    parser.add_argument("--fake-batch-dir", help="Use the local file-based fake batch endpoint in this directory")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    batch_client = LocalFileBatchClient(args.fake_batch_dir) if args.fake_batch_dir else OpenAIBatchClient()
+    PublicationContentPrecompute(
+        sessionmaker(bind=mariadb_engine), batch_client, content_tasks(args.tasks, args.goals), work_dir=args.work_dir,
+    ).run(
+        submit=not args.no_submit, wait=args.wait,
+        publication_ids=args.publication_ids, sdg=args.sdg, limit=args.limit,
+    )
@@ -0,0 +1,119 @@
+"""
+Benchmark the collection assignment writers on a scratch SQLite database.
+
+`--publications` publications are assigned to `--topics` topics and written with
+  - per_row:    the path of load_mariadb_collections.py / load_mariadb_clusters_publications.py (a collection
+                lookup and an ORM update per publication, commits every 100 rows), on the first `--per-row-limit`
+                publications (it scales linearly; the rate is reported per publication),
+  - case:       write_collection_assignments with batched UPDATE ... CASE,
+  - temp_table: write_collection_assignments with a temporary table and one UPDATE ... JOIN,
+and a rerun of `case` with unchanged assignments (nothing to update). Every run starts from unassigned publications
+and its result is checked against the assignments.
+
+Usage: python -m utils.mariadb.benchmark_collection_assignments --publications 100000 --topics 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.collection import Collection
+from models.publications.publication import Publication
+from utils.mariadb.write_collection_assignments import upsert_collections, write_assignments
+
+
+def scratch_database(path: str, publications: int) -> sessionmaker:
+    engine = create_engine(f"sqlite:///{path}")
+    Collection.__table__.create(engine)
+    Publication.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        db.execute(insert(Publication), [
+            {"publication_id": publication_id, "oai_identifier": f"oai:benchmark:{publication_id}",
+             "oai_identifier_num": publication_id, "title": f"Publication {publication_id}"}
+            for publication_id in range(1, publications + 1)
+        ])
+        db.commit()
+    return session_factory
+
+
+def reset(db: Session) -> None:
+    db.execute(update(Publication).values(collection_id=None))
+    db.commit()
+
+
+def write_per_row(db: Session, assignments: pd.DataFrame) -> None:
+    for idx, (publication_id, topic) in enumerate(zip(assignments["id"].tolist(), assignments["topic"].tolist())):
+        collection = db.query(Collection).filter_by(topic_id=topic).first()
+        publication = db.query(Publication).filter_by(publication_id=publication_id).first()
+        if collection and publication:
+            publication.collection_id = collection.collection_id
+        if (idx + 1) % 100 == 0:
+            db.commit()
+    db.commit()
+
+
+def check(db: Session, assignments: pd.DataFrame) -> bool:
+    collection_of = dict(db.execute(select(Collection.topic_id, Collection.collection_id)).all())
+    stored = dict(db.execute(
+        select(Publication.publication_id, Publication.collection_id).where(Publication.collection_id.is_not(None))
+    ).all())
+    expected = dict(zip(assignments["id"].tolist(), assignments["topic"].map(collection_of).tolist()))
+    return stored == expected
+
+
+def benchmark(publications: int, topics: int, per_row_limit: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    assignments = pd.DataFrame({
+        "id": np.arange(1, publications + 1),
+        "topic": rng.integers(-1, topics - 1, size=publications),
+    })
+    assignments["keywords"] = [[f"word{topic}", f"term{topic}"] for topic in assignments["topic"].tolist()]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        session_factory = scratch_database(os.path.join(directory, "benchmark.db"), publications)
+        with session_factory() as db:
+            upsert_collections(db, assignments)  # The per-row path expects existing collections
+            db.commit()
+
+            subset = assignments.head(per_row_limit)
+            start = time.perf_counter()
+            write_per_row(db, subset)
+            seconds = time.perf_counter() - start
+            results["per_row"] = {"rows": len(subset), "seconds": round(seconds, 3),
+                                  "per_second": round(len(subset) / seconds), "correct": check(db, subset)}
+
+            for method in ["case", "temp_table"]:
+                reset(db)
+                start = time.perf_counter()
+                result = write_assignments(db, assignments, method=method)
+                seconds = time.perf_counter() - start
+                results[method] = {"rows": result["changed"], "seconds": round(seconds, 3),
+                                   "per_second": round(len(assignments) / seconds), "steps": result["seconds"],
+                                   "correct": check(db, assignments)}
+
+            start = time.perf_counter()
+            result = write_assignments(db, assignments, method="case")
+            seconds = time.perf_counter() - start
+            results["case_unchanged"] = {"rows": result["changed"], "seconds": round(seconds, 3),
+                                         "per_second": round(len(assignments) / seconds), "steps": result["seconds"],
+                                         "correct": check(db, assignments)}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the collection assignment writers on SQLite")
+    parser.add_argument("--publications", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--per-row-limit", type=int, default=5000, help="Publications written with the per-row path")
+    args = parser.parse_args()
+
+    for path, measured in benchmark(args.publications, args.topics, args.per_row_limit).items():
+        print(f"{path:<15} {measured['rows']:>8} rows  {measured['seconds']:>8} s  {measured['per_second']:>9} rows/s  "
+              f"correct={measured['correct']}  {measured.get('steps', '')}")
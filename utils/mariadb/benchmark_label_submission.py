@@ -0,0 +1,122 @@
+"""
+Concurrency benchmark of the label submission path (LabelService.create_or_link_label).
+
+`--voters` users vote on the same publication simultaneously, each from its own thread and session.
+Afterwards the totals are checked:
+  - every submission created exactly one label linked to a decision,
+  - the vote tally of every touched decision equals the scan over its labels,
+  - every coin wallet total equals the sum of its SDGCoinWalletHistory increments.
+Reports the latency percentiles and the throughput. Writes real labels: run it against a development database.
+The XP evaluation is not part of the benchmark (its jobs are queued but not processed).
+
+Usage: python -m utils.mariadb.benchmark_label_submission --publication-id 42 --voters 50 --threads 16
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+
+from models import SDGCoinWallet, SDGCoinWalletHistory, SDGUserLabel, User
+from request_models.sdg_user_label import UserLabelRequest
+from services.decision_service import VoteTally
+from services.label_service import LabelService
+from services.reward_evaluation_service import RewardEvaluationService, set_reward_evaluation_service
+
+
+def submit(session_factory: Callable[[], Session], request: UserLabelRequest) -> float:
+    start = time.perf_counter()
+    with session_factory() as db:
+        LabelService(db).create_or_link_label(request)
+    return time.perf_counter() - start
+
+
+def check_totals(db: Session, label_ids: List[int], user_ids: List[int]) -> List[str]:
+    """
+    Returns:
+        List[str]: Descriptions of every inconsistency found (empty if the totals are correct).
+    """
+    errors = []
+    labels = db.query(SDGUserLabel).filter(SDGUserLabel.label_id.in_(label_ids)).all()
+    unlinked = [label.label_id for label in labels if len(label.label_decisions) != 1]
+    if len(labels) != len(label_ids) or unlinked:
+        errors.append(f"{len(labels)} of {len(label_ids)} labels stored, not linked to exactly one decision: {unlinked}")
+
+    decisions = {decision for label in labels for decision in label.label_decisions}
+    for decision in decisions:
+        expected = VoteTally.from_labels(decision.user_labels)
+        stored = VoteTally.from_json(decision.vote_tally)
+        if stored.counts != expected.counts:
+            errors.append(f"Vote tally of decision {decision.decision_id} is {dict(stored.counts)}, "
+                          f"its labels give {dict(expected.counts)}")
+
+    history_totals = dict(
+        db.query(SDGCoinWalletHistory.wallet_id, func.sum(SDGCoinWalletHistory.increment))
+        .filter(SDGCoinWalletHistory.wallet_id.in_(user_ids))
+        .group_by(SDGCoinWalletHistory.wallet_id)
+    )
+    for wallet in db.query(SDGCoinWallet).filter(SDGCoinWallet.user_id.in_(user_ids)):
+        if abs(wallet.total_coins - (history_totals.get(wallet.user_id) or 0.0)) > 1e-6:
+            errors.append(f"Wallet of user {wallet.user_id} holds {wallet.total_coins} coins, "
+                          f"its history sums to {history_totals.get(wallet.user_id)}")
+    return errors
+
+
+def benchmark(session_factory: Callable[[], Session], publication_id: int, voters: int, threads: int,
+              labels: List[int], seed: int = 0) -> dict:
+    with session_factory() as db:
+        user_ids = [user_id for (user_id,) in db.query(User.user_id).order_by(User.user_id).limit(voters)]
+        before = {label_id for (label_id,) in db.query(SDGUserLabel.label_id).filter(SDGUserLabel.user_id.in_(user_ids))}
+
+    rng = random.Random(seed)
+    requests = [
+        UserLabelRequest(user_id=user_id, publication_id=publication_id, voted_label=rng.choice(labels),
+                         comment="benchmark", abstract_section="")
+        for user_id in user_ids
+    ]
+
+    # Keep the XP evaluation out of the measurement
+    set_reward_evaluation_service(RewardEvaluationService(session_factory=session_factory, worker_count=0))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(lambda request: submit(session_factory, request), requests))
+    elapsed = time.perf_counter() - start
+
+    with session_factory() as db:
+        label_ids = [label_id for (label_id,) in db.query(SDGUserLabel.label_id).filter(SDGUserLabel.user_id.in_(user_ids))
+                     if label_id not in before]
+        errors = check_totals(db, label_ids, user_ids)
+
+    latencies.sort()
+    return {
+        "submissions": len(requests),
+        "threads": threads,
+        "seconds": round(elapsed, 3),
+        "per_second": round(len(requests) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "votes": dict(Counter(request.voted_label for request in requests)),
+        "errors": errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent label submissions on one publication")
+    parser.add_argument("--publication-id", type=int, required=True)
+    parser.add_argument("--voters", type=int, default=50, help="Number of users voting (the first N users)")
+    parser.add_argument("--threads", type=int, default=16, help="Simultaneous submissions")
+    parser.add_argument("--labels", type=int, nargs="+", default=[3, 3, 3, 5], help="Labels to vote (drawn at random)")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    result = benchmark(sessionmaker(bind=mariadb_engine), args.publication_id, args.voters, args.threads, args.labels)
+    for key, value in result.items():
+        print(f"{key:<12} {value}")
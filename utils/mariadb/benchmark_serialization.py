@@ -0,0 +1,108 @@
+"""
+Benchmark the bulk serialization path against the per-row model_validate path.
+
+For each large list endpoint this loads up to `--rows` root rows and measures:
+  - orm:    ORM query + pydantic validation of the response model + jsonable_encoder + json.dumps
+            (what FastAPI does for a route returning ORM objects / schemas)
+  - bulk:   column-only BulkSpec.load + orjson.dumps (ORJSONResponse)
+  - ndjson: BulkSpec.iter_batches + orjson.dumps per line (streamed response)
+
+Usage: python -m utils.mariadb.benchmark_serialization --rows 10000
+"""
+import argparse
+import json
+import time
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.app import serialization
+from models import Annotation, Publication, SDGUserLabel, SDGXPBank, Vote
+from schemas import (AnnotationSchemaFull, PublicationSchemaBase, SDGUserLabelSchemaFull, SDGXPBankSchemaFull,
+                     VoteSchemaFull)
+
+BENCHMARKS = [
+    ("votes", Vote, VoteSchemaFull, serialization.VOTE),
+    ("annotations", Annotation, AnnotationSchemaFull, serialization.ANNOTATION),
+    ("sdg_user_labels", SDGUserLabel, SDGUserLabelSchemaFull, serialization.SDG_USER_LABEL),
+    ("xp_banks", SDGXPBank, SDGXPBankSchemaFull, serialization.SDG_XP_BANK),
+    ("publications", Publication, PublicationSchemaBase, serialization.PUBLICATION_BASE),
+]
+
+
+def _orm_path(db: Session, model, schema, spec, rows: int) -> bytes:
+    adapter = TypeAdapter(List[schema])
+    objects = db.query(model).order_by(spec.pk).limit(rows).all()
+    return json.dumps(jsonable_encoder(adapter.validate_python(objects, from_attributes=True))).encode()
+
+
+def _bulk_path(db: Session, spec, rows: int) -> bytes:
+    return orjson.dumps(spec.load(db, limit=rows))
+
+
+def _ndjson_path(db: Session, spec, rows: int) -> bytes:
+    chunks, count = [], 0
+    for items in spec.iter_batches(db):
+        items = items[:rows - count]
+        chunks.append(b"".join(orjson.dumps(item) + b"\n" for item in items))
+        count += len(items)
+        if count >= rows:
+            break
+    return b"".join(chunks)
+
+
+def _timed(db: Session, path) -> tuple[float, bytes]:
+    db.expunge_all()  # Start every run with an empty identity map
+    start = time.perf_counter()
+    body = path()
+    return time.perf_counter() - start, body
+
+
+def benchmark(db: Session, rows: int, repeat: int = 3) -> List[dict]:
+    """
+    Run every benchmark `repeat` times and report the best time per path.
+    """
+    results = []
+    for name, model, schema, spec in BENCHMARKS:
+        paths = {
+            "orm": lambda: _orm_path(db, model, schema, spec, rows),
+            "bulk": lambda: _bulk_path(db, spec, rows),
+            "ndjson": lambda: _ndjson_path(db, spec, rows),
+        }
+        row_count = len(spec.load(db, limit=rows))
+        for path_name, path in paths.items():
+            best, body = min((_timed(db, path) for _ in range(repeat)), key=lambda timing: timing[0])
+            results.append({
+                "endpoint": name,
+                "path": path_name,
+                "rows": row_count,
+                "ms": round(best * 1000, 1),
+                "rows_per_s": round(row_count / best) if best else None,
+                "bytes": len(body),
+            })
+    return results
+
+
+def print_results(results: List[dict]) -> None:
+    print(f"{'endpoint':<16} {'path':<7} {'rows':>7} {'ms':>9} {'rows/s':>10} {'bytes':>11}")
+    for result in results:
+        print(f"{result['endpoint']:<16} {result['path']:<7} {result['rows']:>7} {result['ms']:>9} "
+              f"{result['rows_per_s']:>10} {result['bytes']:>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk vs per-row response serialization")
+    parser.add_argument("--rows", type=int, default=10000, help="Root rows per endpoint")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path (best is reported)")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    session = sessionmaker(bind=mariadb_engine)()
+    try:
+        print_results(benchmark(session, args.rows, args.repeat))
+    finally:
+        session.close()
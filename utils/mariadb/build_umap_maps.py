@@ -0,0 +1,407 @@
+"""
+Parallel map-building job: UMAP coordinates (DimensionalityReduction rows) of the SDG maps.
+
+A map cell is an (SDG, level) pair:
+  - SDG 0, level L: the L-th partition of MAP_PARTITION_ROWS publications (in publication ID order),
+  - SDG 1-17, level L: the publications whose prediction of the SDG lies in FILTER_RANGES[L - 1].
+
+The embeddings of all publications are retrieved from Qdrant once into a float32 matrix on disk
+(<work dir>/embeddings.npy), which the worker processes memory-map. Every cell is fitted in its own process:
+the k-NN graph is computed once for the largest n_neighbors and reused (sliced) for every configuration
+(n_neighbors, min_dist, n_components) of the cell. The graph is kept in the ANN index cache
+(services/ann_index_service.py), so rebuilding a cell with new parameters skips the neighbour search.
+The coordinates replace the cell's rows of the same configuration with bulk INSERTs, and a runtime report
+per fit is written to the work directory.
+
+Usage:
+    python -m utils.mariadb.build_umap_maps --sdgs 0 --levels 1 2 --n-neighbors 15 30 --min-dist 0.0 0.1
+    python -m utils.mariadb.build_umap_maps --sdgs 3 5 --workers 8 --refresh-embeddings
+    python -m utils.mariadb.build_umap_maps --dry-run
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from itertools import product
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import umap
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.publications.dimensionality_reduction import DimensionalityReduction
+from models.publications.publication import Publication
+from models.sdg_prediction import SDGPrediction
+from services.ann_index_service import ANNIndex
+from services.cache_service import get_cache_service
+from settings.settings import CacheServiceSettings, LoaderSettings, ReducerSettings
+
+reducer_settings = ReducerSettings()
+loader_settings = LoaderSettings()
+cache_service_settings = CacheServiceSettings()
+
+SDG_COLUMNS = [getattr(SDGPrediction, f"sdg{i}") for i in range(1, 18)]
+
+
+class MapCell(NamedTuple):
+    sdg: int
+    level: int
+    rows: np.ndarray  # Rows of the embedding matrix, in fit order
+    description: str  # Appended to reduction_details, e.g. "level=3" or "filter_range=0.98-0.9"
+
+
+class UMAPConfig(NamedTuple):
+    n_neighbors: int
+    min_dist: float
+    n_components: int
+
+    @property
+    def shorthand(self) -> str:
+        return f"UMAP-{self.n_neighbors}-{self.min_dist}-{self.n_components}"
+
+    @property
+    def model_dir(self) -> str:
+        return os.path.join(reducer_settings.UMAP_MODEL_PATH, f"config_{self.n_neighbors}_{self.min_dist}_{self.n_components}")
+
+    def model_path(self, sdg: int, level: int) -> str:
+        return os.path.join(self.model_dir, f"SDG{sdg}-level{level}.joblib")
+
+    @property
+    def details(self) -> str:
+        return f"UMAP with n_neighbors={self.n_neighbors}, min_dist={self.min_dist}, n_components={self.n_components}"
+
+
+def load_publications(session: Session) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Publication IDs, Qdrant point IDs (oai_identifier_num) and
+        the (n, 17) prediction matrix of all publications with a default-model prediction, by publication ID.
+    """
+    rows = session.execute(
+        select(Publication.publication_id, Publication.oai_identifier_num, *SDG_COLUMNS)
+        .join(SDGPrediction, Publication.publication_id == SDGPrediction.publication_id)
+        .where(SDGPrediction.prediction_model == "Aurora")
+        .order_by(Publication.publication_id)
+    ).all()
+    publication_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    point_ids = np.array([int(row[1]) for row in rows], dtype=np.int64)
+    predictions = np.array([row[2:] for row in rows], dtype=np.float32).reshape(len(rows), 17)
+    return publication_ids, point_ids, np.nan_to_num(predictions)
+
+
+def retrieve_embeddings(publication_ids: np.ndarray, point_ids: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Retrieve the embeddings of the publications from Qdrant in batches.
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: Positions (in publication_ids) and float32 vectors of a batch.
+    """
+    from db.qdrantdb_connector import client as qclient
+
+    row_of = {publication_id: row for row, publication_id in enumerate(publication_ids.tolist())}
+    batch_size = reducer_settings.QDRANT_RETRIEVE_BATCH_SIZE
+    start = time.time()
+    for offset in range(0, len(point_ids), batch_size):
+        results = qclient.retrieve(
+            collection_name=loader_settings.PUBLICATIONS_COLLECTION_NAME,
+            ids=point_ids[offset:offset + batch_size].tolist(),
+            with_vectors=["content"],
+            with_payload=["sql_id"],
+        )
+        rows, vectors = [], []
+        for result in results:
+            row = row_of.get(result.payload.get("sql_id"))
+            if row is not None:
+                rows.append(row)
+                vectors.append(result.vector["content"])
+        print(f"Retrieved {min(offset + batch_size, len(point_ids))}/{len(point_ids)} embeddings "
+              f"({time.time() - start:.1f} seconds).")
+        if rows:
+            yield np.array(rows, dtype=np.int64), np.asarray(vectors, dtype=np.float32)
+
+
+def fetch_embeddings(publication_ids: np.ndarray, point_ids: np.ndarray, work_dir: str) -> Tuple[str, np.ndarray]:
+    """
+    Retrieve the embeddings of the publications into a float32 .npy matrix (row i belongs to publication_ids[i]).
+
+    Returns:
+        Tuple[str, np.ndarray]: Path of the matrix and the mask of the rows with an embedding.
+    """
+    matrix_path = os.path.join(work_dir, "embeddings.npy")
+    present = np.zeros(len(publication_ids), dtype=bool)
+    matrix = None
+    for rows, vectors in retrieve_embeddings(publication_ids, point_ids):
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32,
+                                               shape=(len(publication_ids), vectors.shape[1]))
+        matrix[rows] = vectors
+        present[rows] = True
+
+    if matrix is None:
+        raise ValueError("No embeddings found in Qdrant.")
+    matrix.flush()
+    np.savez(os.path.join(work_dir, "embeddings_index.npz"), publication_ids=publication_ids, present=present)
+    return matrix_path, present
+
+
+def load_or_fetch_embeddings(publication_ids: np.ndarray, point_ids: np.ndarray, work_dir: str,
+                             refresh: bool = False) -> Tuple[str, np.ndarray]:
+    """
+    Reuse the embedding matrix of an earlier run if it covers exactly the same publications.
+    """
+    matrix_path = os.path.join(work_dir, "embeddings.npy")
+    index_path = os.path.join(work_dir, "embeddings_index.npz")
+    if not refresh and os.path.exists(matrix_path) and os.path.exists(index_path):
+        index = np.load(index_path)
+        if np.array_equal(index["publication_ids"], publication_ids):
+            print(f"Reusing the embedding matrix {matrix_path}.")
+            return matrix_path, index["present"]
+        print("The publications changed since the embedding matrix was built, fetching it again.")
+    return fetch_embeddings(publication_ids, point_ids, work_dir)
+
+
+def map_cells(predictions: np.ndarray, present: np.ndarray, sdgs: List[int],
+              levels: Optional[List[int]] = None) -> List[MapCell]:
+    """
+    Rows of every requested (SDG, level) cell, restricted to the publications with an embedding.
+    """
+    cells = []
+    for sdg in sdgs:
+        if sdg == 0:
+            level_count = reducer_settings.MAP_PARTITION_SIZE
+        else:
+            level_count = len(reducer_settings.FILTER_RANGES)
+
+        for level in range(1, level_count + 1):
+            if levels and level not in levels:
+                continue
+            if sdg == 0:
+                partition_rows = reducer_settings.MAP_PARTITION_ROWS
+                rows = np.arange((level - 1) * partition_rows, min(level * partition_rows, len(predictions)))
+                description = f"level={level}"
+            else:
+                upper, lower = reducer_settings.FILTER_RANGES[level - 1]
+                prediction = predictions[:, sdg - 1]
+                rows = np.flatnonzero((prediction <= upper) & (prediction > lower))
+                rows = rows[np.argsort(-prediction[rows], kind="stable")]  # Highest prediction first
+                description = f"filter_range={upper}-{lower}"
+
+            rows = rows[present[rows]]
+            if len(rows):
+                cells.append(MapCell(sdg=sdg, level=level, rows=rows, description=description))
+    return cells
+
+
+def fit_cell(matrix_path: str, publication_ids: np.ndarray, cell: MapCell, configs: List[UMAPConfig],
+             save_models: bool, last_level: bool) -> List[dict]:
+    """
+    Fit every configuration of a map cell (runs in a worker process).
+
+    Returns:
+        List[dict]: Coordinates and timings per configuration.
+    """
+    embeddings = np.load(matrix_path, mmap_mode="r")
+    X = np.ascontiguousarray(embeddings[cell.rows])
+
+    # One k-NN graph for the largest n_neighbors, stored with the cell's embedding set: smaller n_neighbors use
+    # its first columns, and later runs (e.g. with other min_dist values) load it instead of searching again
+    start = time.perf_counter()
+    max_neighbors = min(max(config.n_neighbors for config in configs), len(X) - 1)
+    ann_index = ANNIndex.load_or_build(publication_ids[cell.rows], X, n_neighbors=max_neighbors, metric="euclidean")
+    knn_seconds = time.perf_counter() - start
+
+    results = []
+    for config in configs:
+        n_neighbors = min(config.n_neighbors, max_neighbors)
+        reducer = umap.UMAP(
+            n_neighbors=n_neighbors,
+            min_dist=config.min_dist,
+            n_components=config.n_components,
+            random_state=reducer_settings.UMAP_RANDOM_STATE,
+            n_jobs=1,  # The parallelism is across cells
+            precomputed_knn=ann_index.precomputed_knn(n_neighbors),
+        )
+        start = time.perf_counter()
+        coordinates = reducer.fit_transform(X).astype(np.float32)
+        fit_seconds = time.perf_counter() - start
+
+        if save_models:
+            os.makedirs(config.model_dir, exist_ok=True)
+            joblib.dump(reducer, config.model_path(cell.sdg, cell.level))
+            if cell.sdg and last_level:
+                # Model of the SDG loaded by UMAPCoordinateService
+                joblib.dump(reducer, os.path.join(config.model_dir, f"SDG{cell.sdg}.joblib"))
+
+        results.append({
+            "config": config,
+            "coordinates": coordinates,
+            "knn_seconds": knn_seconds,
+            "fit_seconds": fit_seconds,
+        })
+    return results
+
+
+def reduction_rows(publication_ids: Sequence[int], sdg: int, level: int, config: UMAPConfig, details: str,
+                   coordinates: np.ndarray) -> List[dict]:
+    """
+    DimensionalityReduction rows (for a bulk INSERT) of coordinates on the map of a cell and configuration.
+    """
+    now = datetime.now()
+    z_coords = coordinates[:, 2] if config.n_components > 2 else np.zeros(len(coordinates), dtype=np.float32)
+    return [
+        {
+            "publication_id": publication_id,
+            "reduction_technique": "UMAP",
+            "reduction_details": details,
+            "reduction_shorthand": config.shorthand,
+            "x_coord": x_coord,
+            "y_coord": y_coord,
+            "z_coord": z_coord,
+            "sdg": sdg,
+            "level": level,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for publication_id, x_coord, y_coord, z_coord in zip(
+            list(publication_ids), coordinates[:, 0].tolist(), coordinates[:, 1].tolist(), z_coords.tolist()
+        )
+    ]
+
+
+def insert_reductions(session: Session, rows: List[dict]) -> None:
+    batch_size = reducer_settings.DEFAULT_MARIADB_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        session.execute(insert(DimensionalityReduction), rows[start:start + batch_size])
+
+
+def store_coordinates(session: Session, publication_ids: np.ndarray, cell: MapCell, config: UMAPConfig,
+                      coordinates: np.ndarray) -> None:
+    """
+    Replace the DimensionalityReductions of a cell and configuration with bulk INSERTs.
+    """
+    session.execute(
+        delete(DimensionalityReduction)
+        .where(DimensionalityReduction.sdg == cell.sdg, DimensionalityReduction.level == cell.level,
+               DimensionalityReduction.reduction_shorthand == config.shorthand)
+    )
+    insert_reductions(session, reduction_rows(publication_ids[cell.rows].tolist(), cell.sdg, cell.level, config,
+                                              f"{config.details}, {cell.description}", coordinates))
+    session.commit()
+    get_cache_service().invalidate_tags([cache_service_settings.DIMENSIONALITY_REDUCTIONS_TAG])
+
+
+def load_refit_queue(work_dir: str) -> List[dict]:
+    """
+    Returns:
+        List[dict]: Cells flagged for a full refit ({"sdg", "level", "config": [n_neighbors, min_dist, n_components],
+        "reason"}), see utils/mariadb/place_new_publications.py.
+    """
+    path = os.path.join(work_dir, reducer_settings.UMAP_REFIT_QUEUE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)
+
+
+def build_maps(session_factory, cells: List[MapCell], configs: List[UMAPConfig], publication_ids: np.ndarray,
+               matrix_path: str, workers: int, save_models: bool = True) -> List[dict]:
+    """
+    Fit the cells in a process pool and store each cell's coordinates as soon as it is done.
+
+    Returns:
+        List[dict]: Runtime report, one entry per fit.
+    """
+    report = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fit_cell, matrix_path, publication_ids, cell, configs, save_models,
+                            cell.level == len(reducer_settings.FILTER_RANGES)): cell
+            for cell in cells
+        }
+        for future in as_completed(futures):
+            cell = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Fitting SDG{cell.sdg} level {cell.level} failed: {e}")
+                report.append({"sdg": cell.sdg, "level": cell.level, "rows": len(cell.rows), "error": str(e)})
+                continue
+
+            for result in results:
+                start = time.perf_counter()
+                with session_factory() as session:
+                    store_coordinates(session, publication_ids, cell, result["config"], result["coordinates"])
+                entry = {
+                    "sdg": cell.sdg,
+                    "level": cell.level,
+                    "config": result["config"].shorthand,
+                    "rows": len(cell.rows),
+                    "knn_seconds": round(result["knn_seconds"], 2),
+                    "fit_seconds": round(result["fit_seconds"], 2),
+                    "insert_seconds": round(time.perf_counter() - start, 2),
+                }
+                report.append(entry)
+                print(f"SDG{entry['sdg']:<3} level {entry['level']:<2} {entry['config']:<18} rows {entry['rows']:<7} "
+                      f"knn {entry['knn_seconds']:>7}s  fit {entry['fit_seconds']:>7}s  insert {entry['insert_seconds']:>6}s")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the UMAP maps of the selected SDG/level/configuration cells")
+    parser.add_argument("--sdgs", type=int, nargs="+", default=list(range(0, 18)), help="0 is the map of all publications")
+    parser.add_argument("--levels", type=int, nargs="+", help="Default: all levels")
+    parser.add_argument("--n-neighbors", type=int, nargs="+", default=reducer_settings.UMAP_N_NEIGHBORS_ARRAY)
+    parser.add_argument("--min-dist", type=float, nargs="+", default=reducer_settings.UMAP_MIN_DIST_ARRAY)
+    parser.add_argument("--n-components", type=int, nargs="+", default=reducer_settings.UMAP_N_COMPONENTS_ARRAY)
+    parser.add_argument("--workers", type=int, default=reducer_settings.UMAP_WORKERS)
+    parser.add_argument("--work-dir", type=str, default=reducer_settings.UMAP_WORK_DIR)
+    parser.add_argument("--refresh-embeddings", action="store_true", help="Fetch the embeddings from Qdrant again")
+    parser.add_argument("--no-models", action="store_true", help="Do not save the fitted UMAP models")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the cells that would be rebuilt")
+    parser.add_argument("--refit-queue", action="store_true",
+                        help="Rebuild the cells flagged by utils/mariadb/place_new_publications.py instead of the selection")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    Session = sessionmaker(bind=mariadb_engine)
+    umap_configs = [UMAPConfig(*combination) for combination in product(args.n_neighbors, args.min_dist, args.n_components)]
+    selected_cells = None
+
+    refit_queue_path = os.path.join(args.work_dir, reducer_settings.UMAP_REFIT_QUEUE)
+    if args.refit_queue:
+        queued = load_refit_queue(args.work_dir)
+        if not queued:
+            raise SystemExit("The refit queue is empty.")
+        selected_cells = {(entry["sdg"], entry["level"]) for entry in queued}
+        umap_configs = sorted({UMAPConfig(*entry["config"]) for entry in queued})
+        args.sdgs = sorted({sdg for sdg, _ in selected_cells})
+
+    with Session() as db:
+        all_publication_ids, all_point_ids, prediction_matrix = load_publications(db)
+    print(f"{len(all_publication_ids)} publications with predictions.")
+
+    if args.dry_run:
+        for map_cell in map_cells(prediction_matrix, np.ones(len(all_publication_ids), dtype=bool), args.sdgs, args.levels):
+            print(f"SDG{map_cell.sdg:<3} level {map_cell.level:<2} {map_cell.description:<24} rows {len(map_cell.rows)}")
+        print(f"Configurations: {[config.shorthand for config in umap_configs]}")
+    else:
+        embeddings_path, has_embedding = load_or_fetch_embeddings(all_publication_ids, all_point_ids, args.work_dir,
+                                                                  args.refresh_embeddings)
+        cells_to_build = map_cells(prediction_matrix, has_embedding, args.sdgs, args.levels)
+        if selected_cells is not None:
+            cells_to_build = [cell for cell in cells_to_build if (cell.sdg, cell.level) in selected_cells]
+        runtime_report = build_maps(Session, cells_to_build, umap_configs, all_publication_ids, embeddings_path,
+                                    args.workers, not args.no_models)
+        if args.refit_queue and not any("error" in entry for entry in runtime_report):
+            os.remove(refit_queue_path)
+
+        report_path = os.path.join(args.work_dir, f"report-{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(report_path, "w") as file:
+            json.dump(runtime_report, file, indent=2)
+        print(f"Runtime report written to {report_path}")
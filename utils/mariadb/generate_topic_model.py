@@ -18,6 +18,7 @@ from db.mariadb_connector import engine as mariadb_engine
 from qdrant_client.http.models import Filter, MatchAny, FieldCondition
 from models.publications.publication import Publication
 from models.publications.dimensionality_reduction import DimensionalityReduction
+from services.ann_index_service import ANNIndex
 from settings.sdg_descriptions import sdgs
 from settings.settings import EmbeddingsSettings
 
@@ -298,8 +299,12 @@ N = 3  # Set the limit for seed words per SDG
 seed_words = [word for sdg in sdgs for word in sdg.seed_words[:N]]
 print(seed_words)
 
+# Neighbour graph of the embeddings, shared with other runs over the same embedding set
+ann_index = ANNIndex.load_or_build(ids, embeddings, n_neighbors=15, metric="cosine")
+
 topic_model = tm_pipeline.create_topic_model(
-    dim_reduction_params={"n_neighbors": 15 , "n_components": 2, "min_dist": 0.0, "metric": "cosine"},
+    dim_reduction_params={"n_neighbors": 15 , "n_components": 2, "min_dist": 0.0, "metric": "cosine",
+                          "precomputed_knn": ann_index.precomputed_knn(15)},
     # reduced_dimensions=dimreds,
     cluster_method_params={"min_cluster_size": 15, "metric": "euclidean", "prediction_data": True},
     vectorizer_params={"stop_words": "english", "ngram_range": (1, 3), "min_df": 10, "max_features": 10_000},
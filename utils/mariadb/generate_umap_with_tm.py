@@ -20,6 +20,7 @@ from db.qdrantdb_connector import client as qdrantdb_client
 from db.mariadb_connector import engine as mariadb_engine
 from qdrant_client.http.models import Filter, MatchAny, FieldCondition
 from models.publications.publication import Publication
+from services.ann_index_service import ANNIndex
 from settings.sdg_descriptions import sdgs
 from settings.settings import EmbeddingsSettings
 
@@ -321,12 +322,16 @@ print(seed_words)
 
 from settings.settings import ReducerSettings
 
+# Neighbour graph of the embeddings, shared with other runs over the same embedding set
+ann_index = ANNIndex.load_or_build(ids, embeddings, n_neighbors=ReducerSettings.UMAP_N_NEIGHBORS, metric="cosine")
+
 dim_reduction_params = {
     "n_neighbors": ReducerSettings.UMAP_N_NEIGHBORS,
     "n_components": ReducerSettings.UMAP_N_COMPONENTS,
     "min_dist": ReducerSettings.UMAP_MIN_DIST,
     "metric": "cosine",
     "random_state": 31011997,
+    "precomputed_knn": ann_index.precomputed_knn(ReducerSettings.UMAP_N_NEIGHBORS),
 }
 
 topic_model = tm_pipeline.create_topic_model(
@@ -21,6 +21,7 @@ from models import (
 from db.mariadb_connector import engine as mariadb_engine
 from models.base import Base
 from enums.enums import SDGType, DecisionType, VoteType, ScenarioType
+from services.decision_service import VoteTally
 from services.gpt.gpt_assistant_service import GPTAssistantService
 from services.gpt.strategies.persona_comment_generator_strategy import GenerateCommentStrategy, GenerateAnnotationStrategy
 from utils.logger import logger
@@ -218,6 +219,7 @@ def create_sdg_label_decisions(
         num_labels = randint(1, 3)
         unique_labels = faker.random_elements(user_labels, length=num_labels, unique=True)
         decision.user_labels.extend(unique_labels)
+        decision.vote_tally = VoteTally.from_labels(decision.user_labels).to_json()
 
         session.add(decision)
         logging.info(f"Created {decision}.")
@@ -246,6 +248,7 @@ def create_sdg_label_decisions(
         num_labels = randint(1, 3)
         unique_labels = faker.random_elements(user_labels, length=num_labels, unique=True)
         decision.user_labels.extend(unique_labels)
+        decision.vote_tally = VoteTally.from_labels(decision.user_labels).to_json()
 
         session.add(decision)
         logging.info(f"Created {decision}.")
@@ -613,6 +616,9 @@ def create_sdg_label_decisions_for_scenarios(
             session.add(user_label)
             user_labels.append(user_label)
 
+        # The labels are attached directly, not through DecisionService.record_vote, so the tally is built from them
+        # here; the scenario stays the one the labels were generated for
+        decision.vote_tally = VoteTally.from_labels(decision.user_labels).to_json()
         session.commit()
         logging.info(f"Created {len(user_labels)} SDGUserLabels for decision {decision.decision_id}.")
 
@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker
 from db.mariadb_connector import engine as mariadb_engine
 from models.sdg_label_summary import SDGLabelSummary
 from models.sdg_label_history import SDGLabelHistory
+from utils.mariadb.reconcile_sdg_label_counts import reconcile_sdg_label_counts
 
 # Initialize session
 Session = sessionmaker(bind=mariadb_engine)
@@ -96,3 +97,6 @@ def load_sdg_label_data(file_path, batch_size=100):
 # Call the loader with the file path
 file_path = "./data/db/sdg_label_summary.txt"
 load_sdg_label_data(file_path, batch_size=500)
+
+# The summaries were written directly, bring the per-SDG label totals in step
+reconcile_sdg_label_counts()
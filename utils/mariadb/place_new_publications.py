@@ -0,0 +1,280 @@
+"""
+Incremental map placement: project publications without map coordinates (e.g. after a harvest) into the saved
+UMAP models instead of refitting the maps.
+
+For every configuration and SDG map, the publications with a prediction but without a DimensionalityReduction
+row are assigned to their cell (as in utils/mariadb/build_umap_maps.py), their embeddings are retrieved from
+Qdrant once, and they are transformed with the cell's model (<UMAP_MODEL_PATH>/config_*/SDG<sdg>-level<level>.joblib)
+in batches. The coordinates are written with bulk INSERTs (reduction_details end with ", placed").
+
+Drift check per cell: neighbour preservation (share of a publication's k nearest fitted publications in
+embedding space that are also among its k nearest on the map) of a sample of placed publications, against
+the same measure for a sample of the fitted ones. A cell is added to the refit queue, which
+`build_umap_maps --refit-queue` rebuilds, if its preservation drops by more than MAX_PRESERVATION_DROP
+(checked from DRIFT_MIN_SAMPLE placed publications on), if its placed publications exceed MAX_PLACED_FRACTION
+of the fitted ones, or if it has no model.
+
+Usage:
+    python -m utils.mariadb.place_new_publications
+    python -m utils.mariadb.place_new_publications --sdgs 0 3 --n-neighbors 15 --min-dist 0.0 --dry-run
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.publications.dimensionality_reduction import DimensionalityReduction
+from services.cache_service import get_cache_service
+from settings.settings import CacheServiceSettings, ReducerSettings
+from utils.mariadb.build_umap_maps import (
+    UMAPConfig,
+    insert_reductions,
+    load_publications,
+    load_refit_queue,
+    reduction_rows,
+    retrieve_embeddings,
+)
+
+reducer_settings = ReducerSettings()
+cache_service_settings = CacheServiceSettings()
+
+PLACED_SUFFIX = ", placed"
+
+
+def cell_levels(predictions: np.ndarray, sdg: int, rows: np.ndarray) -> np.ndarray:
+    """
+    Level of the map cell of every row (0 if the row belongs to no cell of the SDG).
+    SDG 0: the partition of the row (rows past the last partition belong to the last one).
+    SDG 1-17: the filter range containing the SDG prediction.
+    """
+    if sdg == 0:
+        return np.minimum(rows // reducer_settings.MAP_PARTITION_ROWS + 1, reducer_settings.MAP_PARTITION_SIZE)
+    prediction = predictions[rows, sdg - 1]
+    levels = np.zeros(len(rows), dtype=np.int64)
+    for level, (upper, lower) in enumerate(reducer_settings.FILTER_RANGES, start=1):
+        levels[(prediction <= upper) & (prediction > lower)] = level
+    return levels
+
+
+def k_nearest(reference: np.ndarray, queries: np.ndarray, k: int, exclude: Optional[np.ndarray] = None,
+              metric: str = "euclidean") -> np.ndarray:
+    """
+    Exact k nearest rows of the reference matrix for every query (brute force, in chunks).
+    `exclude` holds a reference row per query to leave out (the query itself).
+    """
+    reference = np.asarray(reference, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    if metric == "cosine":
+        reference = reference / np.maximum(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    reference_norms = (reference ** 2).sum(axis=1)
+
+    neighbours = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), 256):
+        chunk = queries[start:start + 256]
+        distances = reference_norms[None, :] - 2 * chunk @ reference.T
+        if exclude is not None:
+            distances[np.arange(len(chunk)), exclude[start:start + 256]] = np.inf
+        neighbours[start:start + len(chunk)] = np.argpartition(distances, k, axis=1)[:, :k]
+    return neighbours
+
+
+def neighbour_preservation(high_neighbours: np.ndarray, low_neighbours: np.ndarray) -> float:
+    """
+    Mean share of the neighbours in embedding space that are also neighbours on the map.
+    """
+    k = high_neighbours.shape[1]
+    shared = [len(np.intersect1d(high, low, assume_unique=True)) for high, low in zip(high_neighbours, low_neighbours)]
+    return float(np.mean(shared)) / k if shared else 1.0
+
+
+def drift(model, embeddings: np.ndarray, coordinates: np.ndarray, rng: np.random.Generator) -> Tuple[float, float]:
+    """
+    Returns:
+        Tuple[float, float]: Neighbour preservation of a sample of the placed publications and of a sample of the
+        publications the model was fitted on.
+    """
+    fitted_embeddings, fitted_coordinates = np.asarray(model._raw_data), np.asarray(model.embedding_)
+    metric = "cosine" if model.metric == "cosine" else "euclidean"
+    k = min(reducer_settings.DRIFT_NEIGHBOURS, len(fitted_embeddings) - 2)
+    sample_size = reducer_settings.DRIFT_SAMPLE_SIZE
+
+    placed = rng.choice(len(embeddings), size=min(sample_size, len(embeddings)), replace=False)
+    placed_preservation = neighbour_preservation(
+        k_nearest(fitted_embeddings, embeddings[placed], k, metric=metric),
+        k_nearest(fitted_coordinates, coordinates[placed], k),
+    )
+
+    fitted = rng.choice(len(fitted_embeddings), size=min(sample_size, len(fitted_embeddings)), replace=False)
+    fitted_preservation = neighbour_preservation(
+        k_nearest(fitted_embeddings, fitted_embeddings[fitted], k, exclude=fitted, metric=metric),
+        k_nearest(fitted_coordinates, fitted_coordinates[fitted], k, exclude=fitted),
+    )
+    return placed_preservation, fitted_preservation
+
+
+def unplaced_rows(session: Session, publication_ids: np.ndarray, config: UMAPConfig, sdg: int) -> np.ndarray:
+    """
+    Rows (in publication_ids) of the publications without coordinates on the SDG map of a configuration.
+    """
+    placed = set(session.scalars(
+        select(DimensionalityReduction.publication_id)
+        .where(DimensionalityReduction.sdg == sdg, DimensionalityReduction.reduction_shorthand == config.shorthand)
+    ))
+    return np.flatnonzero([publication_id not in placed for publication_id in publication_ids.tolist()])
+
+
+def placed_count(session: Session, config: UMAPConfig, sdg: int, level: int) -> int:
+    """
+    Number of publications placed on a map cell since it was fitted.
+    """
+    return session.scalar(
+        select(func.count())
+        .select_from(DimensionalityReduction)
+        .where(DimensionalityReduction.sdg == sdg, DimensionalityReduction.level == level,
+               DimensionalityReduction.reduction_shorthand == config.shorthand,
+               DimensionalityReduction.reduction_details.like(f"%{PLACED_SUFFIX}"))
+    )
+
+
+def place_publications(session_factory, configs: List[UMAPConfig], sdgs: List[int], dry_run: bool = False,
+                       seed: int = 0) -> Tuple[List[dict], List[dict]]:
+    """
+    Place the publications without coordinates on every selected map.
+
+    Returns:
+        Tuple[List[dict], List[dict]]: Report per map cell and the cells flagged for a full refit.
+    """
+    rng = np.random.default_rng(seed)
+    with session_factory() as session:
+        publication_ids, point_ids, predictions = load_publications(session)
+
+        # Cell of every publication to place, per configuration and SDG
+        targets: Dict[Tuple[UMAPConfig, int, int], np.ndarray] = {}
+        for config, sdg in product(configs, sdgs):
+            rows = unplaced_rows(session, publication_ids, config, sdg)
+            levels = cell_levels(predictions, sdg, rows)
+            for level in np.unique(levels[levels > 0]).tolist():
+                targets[(config, sdg, level)] = rows[levels == level]
+
+    report, refits = [], []
+    if not targets:
+        print("All publications are placed.")
+        return report, refits
+    for (config, sdg, level), rows in sorted(targets.items(), key=lambda item: item[0]):
+        print(f"SDG{sdg:<3} level {level:<2} {config.shorthand:<18} {len(rows)} publications to place")
+    if dry_run:
+        return report, refits
+
+    # Embeddings of every publication to place, retrieved once
+    needed = np.unique(np.concatenate(list(targets.values())))
+    embedding_of: Dict[int, np.ndarray] = {}
+    for positions, vectors in retrieve_embeddings(publication_ids[needed], point_ids[needed]):
+        embedding_of.update(zip(needed[positions].tolist(), vectors))
+
+    for (config, sdg, level), rows in sorted(targets.items(), key=lambda item: item[0]):
+        entry = {"sdg": sdg, "level": level, "config": config.shorthand, "to_place": len(rows)}
+        rows = np.array([row for row in rows.tolist() if row in embedding_of], dtype=np.int64)
+        entry["without_embedding"] = entry["to_place"] - len(rows)
+
+        model_path = config.model_path(sdg, level)
+        if not os.path.exists(model_path):
+            refits.append({"sdg": sdg, "level": level, "config": list(config), "reason": "no model"})
+            entry["error"] = f"No model at {model_path}"
+            report.append(entry)
+            print(f"SDG{sdg:<3} level {level:<2} {config.shorthand:<18} no model, flagged for a refit")
+            continue
+        if not len(rows):
+            report.append(entry)
+            continue
+
+        start = time.perf_counter()
+        model = joblib.load(model_path)
+        embeddings = np.stack([embedding_of[row] for row in rows.tolist()])
+        batch_size = reducer_settings.PLACEMENT_BATCH_SIZE
+        coordinates = np.concatenate([
+            model.transform(embeddings[offset:offset + batch_size]) for offset in range(0, len(embeddings), batch_size)
+        ]).astype(np.float32)
+        entry["transform_seconds"] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        with session_factory() as session:
+            insert_reductions(session, reduction_rows(
+                publication_ids[rows].tolist(), sdg, level, config,
+                f"{config.details}, level={level}{PLACED_SUFFIX}", coordinates,
+            ))
+            session.commit()
+            placed = placed_count(session, config, sdg, level)
+        get_cache_service().invalidate_tags([cache_service_settings.DIMENSIONALITY_REDUCTIONS_TAG])
+        entry["insert_seconds"] = round(time.perf_counter() - start, 2)
+
+        placed_preservation, fitted_preservation = drift(model, embeddings, coordinates, rng)
+        entry.update({
+            "placed": len(rows),
+            "placed_total": placed,
+            "fitted": len(model.embedding_),
+            "placed_preservation": round(placed_preservation, 3),
+            "fitted_preservation": round(fitted_preservation, 3),
+        })
+
+        reasons = []
+        if (len(rows) >= reducer_settings.DRIFT_MIN_SAMPLE
+                and fitted_preservation - placed_preservation > reducer_settings.MAX_PRESERVATION_DROP):
+            reasons.append(f"neighbour preservation {placed_preservation:.2f} vs. {fitted_preservation:.2f}")
+        if placed / entry["fitted"] > reducer_settings.MAX_PLACED_FRACTION:
+            reasons.append(f"{placed} placed on a map of {entry['fitted']}")
+        if reasons:
+            refits.append({"sdg": sdg, "level": level, "config": list(config), "reason": "; ".join(reasons)})
+        entry["refit"] = bool(reasons)
+        report.append(entry)
+
+        print(f"SDG{sdg:<3} level {level:<2} {config.shorthand:<18} placed {len(rows):<6} "
+              f"transform {entry['transform_seconds']:>6}s  insert {entry['insert_seconds']:>6}s  "
+              f"preservation {placed_preservation:.2f} (fitted {fitted_preservation:.2f})"
+              f"{'  -> refit' if reasons else ''}")
+    return report, refits
+
+
+def queue_refits(work_dir: str, refits: List[dict]) -> None:
+    """
+    Add flagged cells to the refit queue (one entry per cell and configuration).
+    """
+    queued = {(entry["sdg"], entry["level"], tuple(entry["config"])): entry for entry in load_refit_queue(work_dir)}
+    for entry in refits:
+        queued[(entry["sdg"], entry["level"], tuple(entry["config"]))] = entry
+    with open(os.path.join(work_dir, reducer_settings.UMAP_REFIT_QUEUE), "w") as file:
+        json.dump(list(queued.values()), file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Place publications without map coordinates into the saved UMAP models")
+    parser.add_argument("--sdgs", type=int, nargs="+", default=list(range(0, 18)), help="0 is the map of all publications")
+    parser.add_argument("--n-neighbors", type=int, nargs="+", default=reducer_settings.UMAP_N_NEIGHBORS_ARRAY)
+    parser.add_argument("--min-dist", type=float, nargs="+", default=reducer_settings.UMAP_MIN_DIST_ARRAY)
+    parser.add_argument("--n-components", type=int, nargs="+", default=reducer_settings.UMAP_N_COMPONENTS_ARRAY)
+    parser.add_argument("--work-dir", type=str, default=reducer_settings.UMAP_WORK_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="Only list the publications to place per cell")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    umap_configs = [UMAPConfig(*combination) for combination in product(args.n_neighbors, args.min_dist, args.n_components)]
+    placement_report, flagged = place_publications(sessionmaker(bind=mariadb_engine), umap_configs, args.sdgs, args.dry_run)
+
+    if not args.dry_run:
+        report_path = os.path.join(args.work_dir, f"placement-{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(report_path, "w") as file:
+            json.dump(placement_report, file, indent=2)
+        print(f"Placement report written to {report_path}")
+    if flagged and not args.dry_run:
+        queue_refits(args.work_dir, flagged)
+        print(f"{len(flagged)} cells flagged for a full refit: python -m utils.mariadb.build_umap_maps --refit-queue")
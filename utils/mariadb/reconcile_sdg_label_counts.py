@@ -0,0 +1,27 @@
+"""
+Reconcile the maintained per-SDG label totals (sdg_label_counts) with the SDGLabelSummaries.
+
+Run it after bulk loads that write summaries directly (e.g. load_mariadb_sdg_label_summaries) and
+periodically to fix drift. Prints the corrected drift per SDG.
+
+Usage: python -m utils.mariadb.reconcile_sdg_label_counts
+"""
+from sqlalchemy.orm import sessionmaker
+
+from db.mariadb_connector import engine as mariadb_engine
+from services.sdg_label_count_service import SDGLabelCountService
+
+# Initialize session
+Session = sessionmaker(bind=mariadb_engine)
+
+
+def reconcile_sdg_label_counts() -> dict:
+    with Session() as session:
+        drift = SDGLabelCountService(session).reconcile()
+        session.commit()
+    print(f"Reconciled SDG label counters, drift per SDG: {drift or 'none'}.")
+    return drift
+
+
+if __name__ == "__main__":
+    reconcile_sdg_label_counts()
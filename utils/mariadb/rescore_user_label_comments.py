@@ -0,0 +1,66 @@
+"""
+Re-score the comments of all SDGUserLabels against the description of their voted SDG.
+
+Uses the batched semantic similarity of UserAnnotationEvaluatorService (one forward pass per batch,
+SDG description vectors computed once) and writes label_id, user_id, voted_label and semantic_score to a CSV.
+
+Usage: python -m utils.mariadb.rescore_user_label_comments --output semantic_scores.csv
+"""
+import argparse
+import csv
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from db.mariadb_connector import engine as mariadb_engine
+from enums import SDGType
+from models import SDGUserLabel
+from services.gpt.user_annotation_evaluator_service import UserAnnotationEvaluatorService
+
+# Initialize session
+Session = sessionmaker(bind=mariadb_engine)
+
+
+def rescore_comments(output: str, batch_size: int = 256) -> None:
+    evaluator_service = UserAnnotationEvaluatorService()
+
+    with Session() as session, open(output, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["label_id", "user_id", "voted_label", "semantic_score"])
+
+        query = (
+            session.query(SDGUserLabel.label_id, SDGUserLabel.user_id, SDGUserLabel.voted_label, SDGUserLabel.comment)
+            .filter(SDGUserLabel.comment != "")
+            .filter(SDGUserLabel.voted_label.between(1, 17))  # Only SDGs with a description
+            .order_by(SDGUserLabel.label_id)
+        )
+
+        start = time.perf_counter()
+        scored = 0
+        last_label_id = 0
+        while True:
+            rows = query.filter(SDGUserLabel.label_id > last_label_id).limit(batch_size).all()
+            if not rows:
+                break
+
+            scores = evaluator_service.calculate_semantic_similarities(
+                [row.comment for row in rows],
+                [SDGType[f"SDG_{row.voted_label}"] for row in rows],
+            )
+            writer.writerows(
+                [row.label_id, row.user_id, row.voted_label, round(semantic_score, 4)]
+                for row, semantic_score in zip(rows, scores)
+            )
+
+            scored += len(rows)
+            last_label_id = rows[-1].label_id
+            print(f"Scored {scored} comments ({scored / (time.perf_counter() - start):.0f}/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score SDGUserLabel comments with the semantic evaluator")
+    parser.add_argument("--output", default="semantic_scores.csv", help="CSV file to write")
+    parser.add_argument("--batch-size", type=int, default=256, help="Comments per batch")
+    args = parser.parse_args()
+
+    rescore_comments(args.output, batch_size=args.batch_size)
@@ -0,0 +1,143 @@
+"""
+Replay every decided SDGLabelDecision through the coin reward rules of LabelService, optionally with tuned
+scoring parameters, and compare the simulated coins with the ones actually paid out.
+
+The rules replayed are those of LabelService.create_or_link_label on consensus: the labels of a decision are
+sorted by labeled_at, the first label of every user voting the decided label earns score(idx + 1, P_max), and
+P_max is the prediction of the SDG voted by the label that triggered the consensus (the decision's latest label).
+
+The data is read with three queries (decisions, labels, predictions) and all rewards are scored with one
+call to scoring_service.score_many, so a full replay takes seconds.
+
+Usage: python -m utils.mariadb.simulate_rewards --X 25 --mu 0.3 --output rewards.csv
+"""
+import argparse
+import csv
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from enums.enums import ScenarioType
+from models import SDGCoinWalletHistory, SDGLabelDecision, SDGPrediction, SDGUserLabel
+from models.associations import sdg_label_decision_user_label_association as decision_labels
+from services import scoring_service
+from settings.settings import DecisionServiceSettings
+
+decision_service_settings = DecisionServiceSettings()
+
+PARAMETERS = ["X", "alpha", "beta", "lambda_", "mu", "L_max", "N_luck", "sigma", "offset"]
+
+
+def load_rewarded_votes(db: Session):
+    """
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Decision ID, user ID, N and P_max of every
+        rewarded vote.
+    """
+    decided, publication_of = {}, {}
+    for decision_id, decided_label, publication_id in db.execute(
+        select(SDGLabelDecision.decision_id, SDGLabelDecision.decided_label, SDGLabelDecision.publication_id)
+        .where(SDGLabelDecision.scenario_type == ScenarioType.DECIDED, SDGLabelDecision.decided_label != 0)
+    ):
+        decided[decision_id] = decided_label
+        publication_of[decision_id] = publication_id
+
+    labels = defaultdict(list)
+    rows = db.execute(
+        select(decision_labels.c.decision_id, SDGUserLabel.user_id, SDGUserLabel.voted_label, SDGUserLabel.labeled_at)
+        .join(SDGUserLabel, SDGUserLabel.label_id == decision_labels.c.user_label_id)
+        .join(SDGLabelDecision, SDGLabelDecision.decision_id == decision_labels.c.decision_id)
+        .where(SDGLabelDecision.scenario_type == ScenarioType.DECIDED, SDGLabelDecision.decided_label != 0)
+    )
+    for decision_id, user_id, voted_label, labeled_at in rows:
+        labels[decision_id].append((labeled_at.replace(tzinfo=None), user_id, voted_label))
+
+    predictions = {
+        row[0]: row[1:]
+        for row in db.execute(
+            select(SDGPrediction.publication_id, *[getattr(SDGPrediction, f"sdg{i}") for i in range(1, 18)])
+            .where(SDGPrediction.prediction_model == decision_service_settings.DEFAULT_MODEL)
+            .where(SDGPrediction.publication_id.in_(set(publication_of.values())))
+        )
+    } if publication_of else {}
+
+    decision_ids, user_ids, votes, confidences = [], [], [], []
+    for decision_id, decision_votes in labels.items():
+        decision_votes.sort(key=lambda label: label[0])  # Stable, as the sort of LabelService
+        prediction = predictions.get(publication_of[decision_id])
+        trigger_label = decision_votes[-1][2]
+        P_max = (prediction[trigger_label - 1] or 0.0) if prediction and 1 <= trigger_label <= 17 else 0.0
+
+        rewarded = set()
+        for idx, (_, user_id, voted_label) in enumerate(decision_votes):
+            if voted_label == decided[decision_id] and user_id not in rewarded:
+                rewarded.add(user_id)
+                decision_ids.append(decision_id)
+                user_ids.append(user_id)
+                votes.append(idx + 1)
+                confidences.append(P_max)
+
+    return np.array(decision_ids, dtype=np.int64), np.array(user_ids, dtype=np.int64), \
+        np.array(votes, dtype=np.int64), np.array(confidences, dtype=np.float64)
+
+
+def paid_coins(db: Session) -> dict:
+    """
+    Returns:
+        dict: Coins paid out per user on decision consensus (SDGCoinWalletHistory).
+    """
+    return dict(db.execute(
+        select(SDGCoinWalletHistory.wallet_id, func.sum(SDGCoinWalletHistory.increment))
+        .where(SDGCoinWalletHistory.reason.like("Final coin reward%"))
+        .group_by(SDGCoinWalletHistory.wallet_id)
+    ).all())
+
+
+def simulate(db: Session, **parameters) -> dict:
+    decision_ids, user_ids, votes, confidences = load_rewarded_votes(db)
+    rewards = scoring_service.score_many(votes, confidences, **parameters)
+    per_user = defaultdict(int)
+    for user_id, reward in zip(user_ids.tolist(), rewards.tolist()):
+        per_user[user_id] += reward
+    return {
+        "decisions": len(np.unique(decision_ids)),
+        "rewards": rewards,
+        "votes": votes,
+        "per_user": dict(per_user),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the decided SDG label decisions through the coin reward rules")
+    for name in PARAMETERS:
+        parser.add_argument(f"--{name}", type=float, default=getattr(scoring_service, name),
+                            help=f"Scoring parameter (default {getattr(scoring_service, name)})")
+    parser.add_argument("--output", type=str, help="CSV file of simulated and paid coins per user")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    with sessionmaker(bind=mariadb_engine)() as session:
+        result = simulate(session, **{name: getattr(args, name) for name in PARAMETERS})
+        paid = paid_coins(session)
+
+    rewards = result["rewards"]
+    print(f"Decisions replayed: {result['decisions']}, rewarded votes: {len(rewards)}, users: {len(result['per_user'])}")
+    if len(rewards):
+        print(f"Coins simulated: {int(rewards.sum())}, paid: {sum(paid.values()):.0f}")
+        print(f"Reward per vote: mean {rewards.mean():.1f}, p50 {np.percentile(rewards, 50):.0f}, "
+              f"p95 {np.percentile(rewards, 95):.0f}, max {rewards.max()}")
+        for N in range(1, min(int(result["votes"].max()), 20) + 1):
+            at_N = rewards[result["votes"] == N]
+            if len(at_N):
+                print(f"  N={N:<3} votes {len(at_N):<7} mean reward {at_N.mean():.1f}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["user_id", "simulated_coins", "paid_coins"])
+            for user_id in sorted(set(result["per_user"]) | set(paid)):
+                writer.writerow([user_id, result["per_user"].get(user_id, 0), paid.get(user_id) or 0.0])
+        print(f"Per-user coins written to {args.output}")
@@ -0,0 +1,453 @@
+"""
+Topic-model pipeline (BERTopic) over the publication embeddings, as a resumable CLI.
+
+Stages, each timed and stored in the work directory; a finished stage is skipped when the pipeline is rerun,
+unless it or an earlier stage is listed in --force (every stage after a forced one is rerun on its output):
+  embeddings       Page through the Qdrant collection into a float32 memmap (resumes at the last stored page)
+  documents        Titles and abstracts of the embedded publications (ENCODER_CONTENT_PATTERN)
+  reduce           UMAP over the embeddings, on the cached neighbour graph (services/ann_index_service.py)
+  cluster          HDBSCAN over the reduced embeddings
+  topics           c-TF-IDF topic words: BERTopic on the precomputed reduction and clusters
+  representations  KeyBERT, MMR, text-generation and zero-shot representations, cached per topic: a topic
+                   whose c-TF-IDF words did not change is not represented again
+  export           topic_data.json/.csv and topic_info.csv
+
+With --partial, an online model (IncrementalPCA, MiniBatchKMeans, OnlineCountVectorizer) is fitted with
+BERTopic.partial_fit in chunks instead of the reduce/cluster/topics stages. Rerunning it after a new embeddings
+stage (--force embeddings documents) only feeds the documents the model has not seen yet.
+
+Usage:
+    python -m utils.mariadb.topic_model_pipeline
+    python -m utils.mariadb.topic_model_pipeline --stages embeddings documents reduce --force reduce
+    python -m utils.mariadb.topic_model_pipeline --partial --force embeddings documents
+    python -m utils.mariadb.topic_model_pipeline --aspects Main Aspect1 --nr-topics 21
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from bertopic import BERTopic
+from bertopic.cluster import BaseCluster
+from bertopic.dimensionality import BaseDimensionalityReduction
+from bertopic.representation import KeyBERTInspired, MaximalMarginalRelevance, TextGeneration, ZeroShotClassification
+from bertopic.vectorizers import ClassTfidfTransformer, OnlineCountVectorizer
+from hdbscan import HDBSCAN
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+from sklearn.feature_extraction.text import CountVectorizer
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from umap import UMAP
+
+from models.publications.publication import Publication
+from services.ann_index_service import ANNIndex
+from settings.sdg_descriptions import sdgs
+from settings.settings import EmbeddingsSettings, LoaderSettings, TopicModelSettings
+
+topic_model_settings = TopicModelSettings()
+embeddings_settings = EmbeddingsSettings()
+loader_settings = LoaderSettings()
+
+STAGES = ["embeddings", "documents", "reduce", "cluster", "topics", "representations", "export"]
+PARTIAL_STAGES = ["embeddings", "documents", "partial", "representations", "export"]
+
+
+class PublicationContent:
+    """
+    Title and abstract in the shape ENCODER_CONTENT_PATTERN expects.
+    """
+    def __init__(self, title: Optional[str], description: Optional[str]):
+        self.title = title
+        self.description = description
+
+
+def representation_factories(seed_words: List[str]) -> Dict[str, Callable]:
+    """
+    Representation models per aspect, created only when a topic actually needs them.
+    """
+    def text_generation():
+        from transformers import pipeline
+        return TextGeneration(pipeline("text2text-generation", model=topic_model_settings.TEXT_GENERATION_MODEL))
+
+    return {
+        "Main": KeyBERTInspired,
+        "Aspect1": lambda: MaximalMarginalRelevance(diversity=topic_model_settings.MMR_DIVERSITY),
+        "Aspect2": text_generation,
+        "Aspect3": lambda: ZeroShotClassification(seed_words, model=topic_model_settings.ZERO_SHOT_MODEL),
+    }
+
+
+class TopicModelPipeline:
+    """
+    Resumable topic-model stages over one work directory (see the module docstring).
+    """
+
+    def __init__(self, work_dir: str, session_factory=None, partial: bool = False, nr_topics: Optional[int] = None,
+                 aspects: Optional[List[str]] = None):
+        self.work_dir = work_dir
+        self.session_factory = session_factory
+        self.partial = partial
+        self.nr_topics = nr_topics if nr_topics is not None else topic_model_settings.NR_TOPICS
+        self.aspects = aspects
+        os.makedirs(work_dir, exist_ok=True)
+        self.state_path = self._path("state.json")
+        self.state = self._load_state()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    def _load_state(self) -> dict:
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as file:
+                return json.load(file)
+        return {"stages": {}}
+
+    def _save_state(self) -> None:
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temporary_path, self.state_path)
+
+    def stages(self) -> List[str]:
+        return PARTIAL_STAGES if self.partial else STAGES
+
+    def run(self, stages: Optional[List[str]] = None, force: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Run the stages in order, skipping the finished ones that are not forced or after a forced one.
+
+        Returns:
+            Dict[str, float]: Seconds per stage run.
+        """
+        order = self.stages()
+        forced = [order.index(stage) for stage in force or [] if stage in order and (not stages or stage in stages)]
+        if forced:
+            # The stages after the earliest forced one are built on its output, so they are invalid as well,
+            # also those not selected now: they run again the next time they are selected
+            for stage in order[min(forced):]:
+                self.state["stages"].pop(stage, None)
+                self.state.pop(stage, None)  # Progress of an interrupted run
+            self._save_state()
+
+        timings = {}
+        for stage in order:
+            if stages and stage not in stages:
+                continue
+            finished = self.state["stages"].get(stage, {}).get("finished_at")
+            if finished:
+                print(f"[{stage}] finished at {finished}, skipped.")
+                continue
+            print(f"[{stage}] running...")
+            start = time.perf_counter()
+            getattr(self, f"stage_{stage}")()
+            timings[stage] = round(time.perf_counter() - start, 2)
+            self.state["stages"][stage] = {"seconds": timings[stage], "finished_at": datetime.now().isoformat()}
+            self._save_state()
+            print(f"[{stage}] done in {timings[stage]} seconds.")
+        return timings
+
+    # Stored data
+
+    def embeddings(self) -> np.ndarray:
+        rows = self.state["embeddings"]["rows"]
+        return np.load(self._path("embeddings.npy"), mmap_mode="r")[:rows]
+
+    def ids(self) -> np.ndarray:
+        rows = self.state["embeddings"]["rows"]
+        return np.load(self._path("ids.npy"), mmap_mode="r")[:rows]
+
+    def documents(self) -> List[dict]:
+        with open(self._path("documents.jsonl")) as file:
+            return [json.loads(line) for line in file]
+
+    def topic_model_path(self) -> str:
+        return self._path("online_topic_model" if self.partial else "topic_model")
+
+    def load_topic_model(self) -> BERTopic:
+        return BERTopic.load(self.topic_model_path(), embedding_model=topic_model_settings.EMBEDDING_MODEL)
+
+    # Stages
+
+    def stage_embeddings(self) -> None:
+        """
+        Scroll through the collection page by page into embeddings.npy / ids.npy; the progress (rows written and
+        the next page offset) is saved after every page, so an interrupted run continues where it stopped.
+        """
+        from db.qdrantdb_connector import client as qclient
+
+        collection_name = loader_settings.PUBLICATIONS_COLLECTION_NAME
+        page_size = topic_model_settings.SCROLL_PAGE_SIZE
+        progress = self.state.get("embeddings")
+        if not progress:
+            total = qclient.count(collection_name=collection_name, exact=True).count
+            capacity = total + max(page_size, total // 100)  # Room for points added during the scroll
+            np.lib.format.open_memmap(self._path("embeddings.npy"), mode="w+", dtype=np.float32,
+                                      shape=(capacity, embeddings_settings.VECTOR_SIZE))
+            np.lib.format.open_memmap(self._path("ids.npy"), mode="w+", dtype=np.int64, shape=(capacity,))
+            progress = self.state["embeddings"] = {"rows": 0, "next_offset": None, "capacity": capacity}
+            self._save_state()
+        elif progress["next_offset"] is None and progress["rows"]:
+            return  # Already complete
+
+        matrix = np.load(self._path("embeddings.npy"), mmap_mode="r+")
+        ids = np.load(self._path("ids.npy"), mmap_mode="r+")
+        start = time.time()
+        while True:
+            points, next_offset = qclient.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=progress["next_offset"],
+                with_payload=["sql_id"],
+                with_vectors=[embeddings_settings.VECTOR_CONTENT_NAME],
+            )
+            rows = progress["rows"]
+            if rows + len(points) > progress["capacity"]:
+                raise RuntimeError("The collection grew during the scroll. Rerun with --force embeddings.")
+            for row, point in enumerate(points, start=rows):
+                matrix[row] = point.vector[embeddings_settings.VECTOR_CONTENT_NAME]
+                ids[row] = point.payload["sql_id"]
+            matrix.flush()
+            ids.flush()
+
+            progress["rows"] = rows + len(points)
+            progress["next_offset"] = next_offset
+            self._save_state()
+            print(f"  {progress['rows']} embeddings ({time.time() - start:.1f} seconds).")
+            if next_offset is None:
+                break
+
+    def stage_documents(self) -> None:
+        ids = self.ids().tolist()
+        chunk_size = topic_model_settings.QUERY_CHUNK_SIZE
+        content: Dict[int, tuple] = {}
+        with self.session_factory() as session:
+            for start in range(0, len(ids), chunk_size):
+                content.update(
+                    (publication_id, (title, description))
+                    for publication_id, title, description in session.execute(
+                        select(Publication.publication_id, Publication.title, Publication.description)
+                        .where(Publication.publication_id.in_(ids[start:start + chunk_size]))
+                    )
+                )
+
+        with open(self._path("documents.jsonl"), "w") as file:
+            for publication_id in ids:
+                title, description = content.get(publication_id, (None, None))
+                publication = PublicationContent(title, description)
+                document = "\n".join(pattern.format(pub=publication) for pattern in embeddings_settings.ENCODER_CONTENT_PATTERN)
+                file.write(json.dumps({"id": publication_id, "title": title, "description": description,
+                                       "document": document}) + "\n")
+
+    def stage_reduce(self) -> None:
+        embeddings = np.ascontiguousarray(self.embeddings())
+        params = dict(topic_model_settings.UMAP_PARAMS)
+        ann_index = ANNIndex.load_or_build(self.ids(), embeddings, n_neighbors=params["n_neighbors"], metric=params["metric"])
+        reducer = UMAP(**params, random_state=topic_model_settings.RANDOM_STATE,
+                       precomputed_knn=ann_index.precomputed_knn(params["n_neighbors"]))
+        np.save(self._path("reduced.npy"), reducer.fit_transform(embeddings).astype(np.float32))
+        joblib.dump(reducer, self._path("umap_model.joblib"))
+
+    def stage_cluster(self) -> None:
+        clusterer = HDBSCAN(**topic_model_settings.HDBSCAN_PARAMS)
+        np.save(self._path("labels.npy"), clusterer.fit_predict(np.load(self._path("reduced.npy"))))
+        joblib.dump(clusterer, self._path("cluster_model.joblib"))
+
+    def stage_topics(self) -> None:
+        """
+        c-TF-IDF over the stored clusters: BERTopic with pass-through reduction and clustering.
+        """
+        topic_model = BERTopic(
+            embedding_model=topic_model_settings.EMBEDDING_MODEL,
+            umap_model=BaseDimensionalityReduction(),
+            hdbscan_model=BaseCluster(),
+            vectorizer_model=CountVectorizer(**topic_model_settings.VECTORIZER_PARAMS),
+            ctfidf_model=ClassTfidfTransformer(**topic_model_settings.CTFIDF_PARAMS),
+            nr_topics=self.nr_topics,
+            verbose=True,
+        )
+        documents = [document["document"] for document in self.documents()]
+        topic_model.fit(documents, embeddings=np.asarray(self.embeddings()), y=np.load(self._path("labels.npy")))
+        np.save(self._path("topics.npy"), np.asarray(topic_model.topics_))
+        topic_model.save(self.topic_model_path(), serialization="pickle", save_embedding_model=False)
+        self._save_topic_words(topic_model)
+
+    def stage_partial(self) -> None:
+        """
+        Online fit in chunks of unseen documents. The model and the seen rows are saved after every chunk.
+        """
+        ids = self.ids()
+        rows_seen_path = self._path("online_rows_seen.npy")
+        if os.path.exists(self.topic_model_path()):
+            topic_model = self.load_topic_model()
+            seen_ids = np.load(rows_seen_path)
+        else:
+            topic_model = BERTopic(
+                embedding_model=topic_model_settings.EMBEDDING_MODEL,
+                umap_model=IncrementalPCA(n_components=topic_model_settings.PARTIAL_N_COMPONENTS),
+                hdbscan_model=MiniBatchKMeans(n_clusters=topic_model_settings.PARTIAL_N_CLUSTERS,
+                                              random_state=topic_model_settings.RANDOM_STATE),
+                vectorizer_model=OnlineCountVectorizer(stop_words="english",
+                                                       decay=topic_model_settings.ONLINE_VECTORIZER_DECAY),
+                ctfidf_model=ClassTfidfTransformer(**topic_model_settings.CTFIDF_PARAMS),
+                verbose=True,
+            )
+            seen_ids = np.zeros(0, dtype=np.int64)
+
+        # Per-row topics and 2D coordinates of everything fitted so far
+        topics = np.full(len(ids), -1, dtype=np.int64)
+        reduced = np.zeros((len(ids), 2), dtype=np.float32)
+        if os.path.exists(self._path("online_topics.npz")):
+            stored = np.load(self._path("online_topics.npz"))
+            position = {id_: row for row, id_ in enumerate(ids.tolist())}
+            for id_, topic, coordinates in zip(stored["ids"].tolist(), stored["topics"], stored["reduced"]):
+                if id_ in position:
+                    topics[position[id_]] = topic
+                    reduced[position[id_]] = coordinates
+
+        unseen = np.flatnonzero(~np.isin(ids, seen_ids))
+        documents = self.documents()
+        embeddings = self.embeddings()
+        chunk_size = topic_model_settings.PARTIAL_CHUNK_SIZE
+        for start in range(0, len(unseen), chunk_size):
+            chunk = unseen[start:start + chunk_size]
+            if len(chunk) < topic_model_settings.PARTIAL_N_CLUSTERS:
+                print(f"  {len(chunk)} documents are too few for a partial fit, left for the next run.")
+                break
+            chunk_embeddings = np.asarray(embeddings[chunk])
+            topic_model.partial_fit([documents[row]["document"] for row in chunk], chunk_embeddings)
+            topics[chunk] = topic_model.topics_[-len(chunk):]
+            reduced[chunk] = topic_model.umap_model.transform(chunk_embeddings)[:, :2]
+
+            seen_ids = np.concatenate([seen_ids, ids[chunk]])
+            fitted = np.isin(ids, seen_ids)
+            topic_model.save(self.topic_model_path(), serialization="pickle", save_embedding_model=False)
+            np.savez(self._path("online_topics.npz"), ids=ids[fitted], topics=topics[fitted], reduced=reduced[fitted])
+            np.save(rows_seen_path, seen_ids)
+            print(f"  Partially fitted {len(seen_ids)}/{len(ids)} documents.")
+
+        np.save(self._path("topics.npy"), topics)
+        np.save(self._path("reduced.npy"), reduced)
+        self._save_topic_words(topic_model)
+
+    def _save_topic_words(self, topic_model: BERTopic) -> None:
+        topic_words = {str(topic): words for topic, words in topic_model.get_topics().items()}
+        with open(self._path("topic_words.json"), "w") as file:
+            json.dump(topic_words, file, indent=2)
+
+    def stage_representations(self) -> None:
+        """
+        Representations per aspect and topic, keyed by the topic's c-TF-IDF words: cached topics are not
+        represented again, and a representation model is only loaded if a topic is missing.
+        """
+        topic_model = self.load_topic_model()
+        documents = pd.DataFrame({
+            "Document": [document["document"] for document in self.documents()],
+            "ID": range(len(self.ids())),
+            "Topic": np.load(self._path("topics.npy")),
+            "Image": None,
+        })
+        topic_words = {topic: words for topic, words in topic_model.get_topics().items()}
+        seed_words = [word for sdg in sdgs for word in sdg.seed_words[:topic_model_settings.SEED_WORDS_PER_SDG]]
+        factories = representation_factories(seed_words)
+
+        cache_dir = self._path("representations")
+        os.makedirs(cache_dir, exist_ok=True)
+        representations: Dict[str, Dict[str, list]] = {str(topic): {} for topic in topic_words}
+        for aspect, factory in factories.items():
+            if self.aspects and aspect not in self.aspects:
+                continue
+            cache_path = os.path.join(cache_dir, f"{aspect}.json")
+            cache = {}
+            if os.path.exists(cache_path):
+                with open(cache_path) as file:
+                    cache = json.load(file)
+
+            keys = {
+                topic: hashlib.sha1(json.dumps([aspect, words], default=str).encode()).hexdigest()
+                for topic, words in topic_words.items()
+            }
+            missing = {topic: topic_words[topic] for topic, key in keys.items() if key not in cache}
+            print(f"  {aspect}: {len(topic_words) - len(missing)} topics cached, {len(missing)} to represent.")
+            if missing:
+                start = time.perf_counter()
+                # The representation models read row i of the c-TF-IDF matrix for the i-th of the given topics;
+                # the model's matrix has a row per topic, after the outlier row
+                rows = [topic + topic_model._outliers for topic in missing]
+                represented = factory().extract_topics(topic_model, documents, topic_model.c_tf_idf_[rows], missing)
+                for topic, representation in represented.items():
+                    cache[keys[topic]] = [[str(label), float(score)] for label, score in representation]
+                with open(cache_path, "w") as file:
+                    json.dump(cache, file)
+                print(f"  {aspect}: represented {len(missing)} topics in {time.perf_counter() - start:.1f} seconds.")
+
+            for topic, key in keys.items():
+                representations[str(topic)][aspect] = cache.get(key, [])
+
+        with open(self._path("representations.json"), "w") as file:
+            json.dump(representations, file, indent=2)
+
+    def stage_export(self) -> None:
+        documents = self.documents()
+        topics = np.load(self._path("topics.npy"))
+        reduced = np.load(self._path("reduced.npy"))
+        with open(self._path("topic_words.json")) as file:
+            topic_words = json.load(file)
+        representations = {}
+        if os.path.exists(self._path("representations.json")):
+            with open(self._path("representations.json")) as file:
+                representations = json.load(file)
+
+        def keywords(topic: int) -> List[str]:
+            main = representations.get(str(topic), {}).get("Main")
+            return [word for word, _ in (main or topic_words.get(str(topic), []))]
+
+        data = pd.DataFrame({
+            "x": reduced[:, 0],
+            "y": reduced[:, 1],
+            "id": [document["id"] for document in documents],
+            "title": [document["title"] for document in documents],
+            "topic": topics,
+            "document": [document["document"] for document in documents],
+        })
+        data["keywords"] = [keywords(topic) for topic in topics.tolist()]
+        with open(self._path("topic_data.json"), "w") as file:
+            json.dump(data.to_dict(orient="records"), file, indent=2, default=str)
+        data.to_csv(self._path("topic_data.csv"), index=False)
+
+        counts = data["topic"].value_counts()
+        topic_info = pd.DataFrame([
+            {"Topic": int(topic), "Count": int(counts.get(int(topic), 0)), "Representation": keywords(int(topic)),
+             **{aspect: [label for label, _ in values] for aspect, values in representations.get(topic, {}).items()}}
+            for topic in sorted(topic_words, key=int)
+        ])
+        topic_info.to_csv(self._path("topic_info.csv"), index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable BERTopic pipeline over the publication embeddings")
+    parser.add_argument("--work-dir", type=str, default=topic_model_settings.WORK_DIR)
+    parser.add_argument("--stages", nargs="+", choices=sorted(set(STAGES + PARTIAL_STAGES)), help="Default: all")
+    parser.add_argument("--force", nargs="+", default=[], help="Stages to rerun even if finished, with every stage after them")
+    parser.add_argument("--partial", action="store_true", help="Online fit with partial_fit instead of a batch fit")
+    parser.add_argument("--nr-topics", type=int, help="Reduce the batch model to this many topics")
+    parser.add_argument("--aspects", nargs="+", help="Representation aspects to compute (default: all)")
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    work_dir = os.path.join(args.work_dir, "partial") if args.partial else args.work_dir
+    pipeline = TopicModelPipeline(work_dir, sessionmaker(bind=mariadb_engine), partial=args.partial,
+                                  nr_topics=args.nr_topics, aspects=args.aspects)
+    stage_timings = pipeline.run(args.stages, args.force)
+
+    print("Stage timings (seconds):")
+    for stage_name in pipeline.stages():
+        recorded = pipeline.state["stages"].get(stage_name, {})
+        status = "ran" if stage_name in stage_timings else "skipped"
+        print(f"  {stage_name:<16} {recorded.get('seconds', '-'):>10}  {status}")
@@ -0,0 +1,50 @@
+"""
+Backfill the persisted vote tallies of existing decisions: build the missing tallies of all decisions from their
+labels and verify (and rebuild) the stored ones. The incremental VoteTally itself is checked against the scan-based
+consensus of DecisionService by tests/test_vote_tally.py.
+
+Usage: python -m utils.mariadb.verify_decision_tallies --backfill
+"""
+import argparse
+
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from services.decision_service import VoteTally
+from settings.settings import DecisionServiceSettings
+
+decision_service_settings = DecisionServiceSettings()
+
+
+def backfill_tallies() -> int:
+    """
+    Returns:
+        int: Number of stored tallies that did not match the decision's labels (and were rebuilt).
+    """
+    from db.mariadb_connector import engine as mariadb_engine
+    from models import SDGLabelDecision
+
+    Session = sessionmaker(bind=mariadb_engine)
+    built, rebuilt = 0, 0
+    with Session() as session:
+        decisions = session.query(SDGLabelDecision).options(selectinload(SDGLabelDecision.user_labels)).all()
+        for decision in decisions:
+            tally = VoteTally.from_labels(decision.user_labels)
+            if decision.vote_tally is None:
+                built += 1
+            elif VoteTally.from_json(decision.vote_tally).counts == tally.counts:
+                continue
+            else:
+                rebuilt += 1
+            decision.vote_tally = tally.to_json()
+        session.commit()
+    print(f"Built {built} missing tallies, rebuilt {rebuilt} mismatching tallies of {len(decisions)} decisions.")
+    return rebuilt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and backfill the vote tallies of SDG label decisions")
+    parser.add_argument("--backfill", action="store_true")
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill_tallies()
@@ -0,0 +1,257 @@
+"""
+Write the topic assignments of the topic-model pipeline (utils/mariadb/topic_model_pipeline.py) to the
+Collection table and Publication.collection_id.
+
+Columnar replacement of load_mariadb_collections.py: the topic_data export (id, topic, keywords) is read into a
+DataFrame, the collections are created or updated in bulk, the topic -> collection_id mapping is read once, and
+only the publications whose collection changes are updated, either
+  - case:       UPDATE publications SET collection_id = CASE publication_id WHEN ... END, ASSIGNMENT_BATCH_SIZE
+                publications per statement, or
+  - temp_table: the assignments are bulk-inserted into a temporary table and applied with one UPDATE ... JOIN.
+
+Usage:
+    python -m utils.mariadb.write_collection_assignments
+    python -m utils.mariadb.write_collection_assignments --topic-data data/topic_model/topic_data.json \
+        --topic-info data/topic_model/topic_info.csv --method temp_table
+"""
+import argparse
+import ast
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+from sqlalchemy import Column, Integer, MetaData, Table, case, insert, select, text, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.collection import Collection
+from models.publications.publication import Publication
+from services.cache_service import get_cache_service
+from settings.settings import CacheServiceSettings, TimeZoneSettings, TopicModelSettings
+
+topic_model_settings = TopicModelSettings()
+cache_service_settings = CacheServiceSettings()
+
+METHODS = ["case", "temp_table"]
+
+
+def load_assignments(path: str) -> pd.DataFrame:
+    """
+    Read a topic_data export (.json or .csv).
+
+    Returns:
+        pd.DataFrame: Columns id, topic and keywords (list of words) of every assigned publication.
+    """
+    if path.endswith(".json"):
+        with open(path) as file:
+            data = pd.DataFrame(json.load(file))
+    else:
+        data = pd.read_csv(path)
+        data.columns = data.columns.str.strip()
+    if "keywords" not in data:
+        data["keywords"] = [[] for _ in range(len(data))]
+    data["keywords"] = [ast.literal_eval(words) if isinstance(words, str) else list(words) for words in data["keywords"]]
+    return data[["id", "topic", "keywords"]].astype({"id": "int64", "topic": "int64"})
+
+
+def load_topic_info(path: str) -> Dict[int, dict]:
+    """
+    Returns:
+        Dict[int, dict]: Representation and aspects (lists of words) per topic of a topic_info export.
+    """
+    topic_info = pd.read_csv(path)
+    topic_info.columns = topic_info.columns.str.strip()
+    info = {}
+    for row in topic_info.to_dict(orient="records"):
+        info[int(row["Topic"])] = {
+            column: ast.literal_eval(row[column]) if isinstance(row.get(column), str) else []
+            for column in ["Representation", "Aspect1", "Aspect2", "Aspect3"]
+        }
+    return info
+
+
+def upsert_collections(session: Session, assignments: pd.DataFrame, topic_info: Optional[Dict[int, dict]] = None,
+                       topic_id_offset: int = 0) -> Dict[int, int]:
+    """
+    Create the collections of new topics and update count and representation of the existing ones.
+
+    Args:
+        session (Session): Database session (not committed).
+        assignments (pd.DataFrame): id, topic and keywords per publication (see load_assignments).
+        topic_info (Optional[Dict[int, dict]]): Representation and aspects per topic (see load_topic_info).
+        topic_id_offset (int): Added to the topic of the model to get Collection.topic_id.
+
+    Returns:
+        Dict[int, int]: collection_id per topic of the model.
+    """
+    topic_info = topic_info or {}
+    counts = assignments["topic"].value_counts().to_dict()
+    keywords = {int(topic): words for topic, words in zip(assignments["topic"], assignments["keywords"])}
+
+    values = {}
+    for topic, count in counts.items():
+        topic = int(topic)
+        info = topic_info.get(topic, {})
+        representation = info.get("Representation") or keywords.get(topic) or []
+        name = "_".join([str(topic)] + [str(word) for word in representation[:4]])
+        values[topic + topic_id_offset] = {
+            "count": int(count),
+            "name": name[:255],
+            "representation": json.dumps(representation),
+            "aspect1": json.dumps(info.get("Aspect1", [])),
+            "aspect2": json.dumps(info.get("Aspect2", [])),
+            "aspect3": json.dumps(info.get("Aspect3", [])),
+        }
+
+    existing = dict(session.execute(
+        select(Collection.topic_id, Collection.collection_id).where(Collection.topic_id.in_(list(values)))
+    ).all())
+    now = datetime.now(TimeZoneSettings.ZURICH_TZ)
+    new_rows = [
+        {"topic_id": topic_id, "short_name": row["name"], "created_at": now, "updated_at": now, **row}
+        for topic_id, row in values.items() if topic_id not in existing
+    ]
+    if new_rows:
+        session.execute(insert(Collection), new_rows)
+    if existing:
+        # Short names are curated (GPT_Name in load_mariadb_collections.py) and kept
+        session.execute(update(Collection), [
+            {"collection_id": collection_id, "updated_at": now, **values[topic_id]}
+            for topic_id, collection_id in existing.items()
+        ])
+    print(f"Collections: {len(new_rows)} created, {len(existing)} updated.")
+
+    collection_ids = dict(session.execute(
+        select(Collection.topic_id, Collection.collection_id).where(Collection.topic_id.in_(list(values)))
+    ).all())
+    return {topic_id - topic_id_offset: collection_id for topic_id, collection_id in collection_ids.items()}
+
+
+def changed_assignments(session: Session, assignments: pd.DataFrame, collection_of: Dict[int, int],
+                        batch_size: int = None) -> Dict[int, int]:
+    """
+    Returns:
+        Dict[int, int]: New collection_id per existing publication whose collection changes.
+    """
+    batch_size = batch_size or topic_model_settings.ASSIGNMENT_BATCH_SIZE
+    target = dict(zip(assignments["id"].tolist(), assignments["topic"].map(collection_of).tolist()))
+    ids = list(target)
+    changed, found = {}, 0
+    for start in range(0, len(ids), batch_size):
+        for publication_id, collection_id in session.execute(
+            select(Publication.publication_id, Publication.collection_id)
+            .where(Publication.publication_id.in_(ids[start:start + batch_size]))
+        ):
+            found += 1
+            if collection_id != target[publication_id]:
+                changed[publication_id] = target[publication_id]
+    if found < len(ids):
+        print(f"{len(ids) - found} assigned publications do not exist, skipped.")
+    return changed
+
+
+def update_with_case(session: Session, changed: Dict[int, int], batch_size: int = None) -> None:
+    batch_size = batch_size or topic_model_settings.ASSIGNMENT_BATCH_SIZE
+    items = list(changed.items())
+    now = datetime.now(TimeZoneSettings.ZURICH_TZ)
+    for start in range(0, len(items), batch_size):
+        batch = dict(items[start:start + batch_size])
+        session.execute(
+            update(Publication)
+            .where(Publication.publication_id.in_(list(batch)))
+            .values(collection_id=case(batch, value=Publication.publication_id), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def update_with_temp_table(session: Session, changed: Dict[int, int]) -> None:
+    assignments = Table(
+        "tmp_collection_assignments",
+        MetaData(),
+        Column("publication_id", Integer, primary_key=True, autoincrement=False),
+        Column("collection_id", Integer, nullable=False),
+        prefixes=["TEMPORARY"],
+    )
+    connection = session.connection()  # Temporary tables live on one connection
+    assignments.create(connection)
+    try:
+        connection.execute(insert(assignments), [
+            {"publication_id": publication_id, "collection_id": collection_id}
+            for publication_id, collection_id in changed.items()
+        ])
+        session.execute(
+            update(Publication)
+            .where(Publication.publication_id == assignments.c.publication_id)
+            .values(collection_id=assignments.c.collection_id, updated_at=datetime.now(TimeZoneSettings.ZURICH_TZ))
+            .execution_options(synchronize_session=False)
+        )
+    finally:
+        if connection.dialect.name in ("mysql", "mariadb"):
+            # Not assignments.drop: a plain DROP TABLE commits the transaction implicitly on MariaDB
+            connection.execute(text("DROP TEMPORARY TABLE IF EXISTS tmp_collection_assignments"))
+        else:
+            assignments.drop(connection)
+
+
+def write_assignments(session: Session, assignments: pd.DataFrame, topic_info: Optional[Dict[int, dict]] = None,
+                      method: str = "case", topic_id_offset: int = 0, batch_size: int = None) -> dict:
+    """
+    Create/update the collections and set Publication.collection_id of every assigned publication, in one
+    transaction.
+
+    Returns:
+        dict: Number of collections and changed publications, and the seconds per step.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method}, expected one of {METHODS}.")
+    timings = {}
+    start = time.perf_counter()
+    collection_of = upsert_collections(session, assignments, topic_info, topic_id_offset)
+    timings["collections"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    changed = changed_assignments(session, assignments, collection_of, batch_size)
+    timings["diff"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if changed:
+        if method == "case":
+            update_with_case(session, changed, batch_size)
+        else:
+            update_with_temp_table(session, changed)
+    session.commit()
+    timings["update"] = time.perf_counter() - start
+
+    # Cached collections and the publications on the maps carry the collection ids
+    get_cache_service().invalidate_tags([
+        cache_service_settings.COLLECTIONS_TAG,
+        cache_service_settings.DIMENSIONALITY_REDUCTIONS_TAG,
+    ])
+
+    return {
+        "collections": len(collection_of),
+        "assignments": len(assignments),
+        "changed": len(changed),
+        "seconds": {step: round(seconds, 3) for step, seconds in timings.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write topic-model assignments to collections and publications")
+    parser.add_argument("--topic-data", type=str, default=os.path.join(topic_model_settings.WORK_DIR, "topic_data.json"))
+    parser.add_argument("--topic-info", type=str, help="topic_info.csv with the representation and aspects per topic")
+    parser.add_argument("--method", choices=METHODS, default="case")
+    parser.add_argument("--topic-id-offset", type=int, default=0, help="Added to the topics to get Collection.topic_id")
+    parser.add_argument("--batch-size", type=int, default=topic_model_settings.ASSIGNMENT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from db.mariadb_connector import engine as mariadb_engine
+
+    topic_data = load_assignments(args.topic_data)
+    info_per_topic = load_topic_info(args.topic_info) if args.topic_info else None
+    with sessionmaker(bind=mariadb_engine)() as db:
+        result = write_assignments(db, topic_data, info_per_topic, args.method, args.topic_id_offset, args.batch_size)
+    print(f"{result['changed']} of {result['assignments']} publications assigned to new collections "
+          f"({result['collections']} collections): {result['seconds']}")
@@ -0,0 +1,141 @@
+"""
+Convert the SHAP explanations to the compact format (services/explanation_service.py, encode_compact) and compare
+storage size and read latency of both collections.
+
+The compact documents keep the vocabulary IDs of the input tokens (uint16) and one float16 contribution array per
+SDG as BinData, instead of the token strings and nested JSON float lists. ExplanationService decodes them into the
+same ExplanationSchema, so the explanation routes switch to the compact store by pointing
+MongoDBSDGSettings.DB_COLLECTION_NAME at the target collection.
+
+The conversion is resumable: explanations already in the target are skipped.
+
+Usage:
+    python -m utils.mongodb.convert_mongodb_explanations
+    python -m utils.mongodb.convert_mongodb_explanations --source explanations_scaled_new --no-convert --compare 500
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Iterator, List
+
+import numpy as np
+from bson import BSON
+from pymongo.collection import Collection
+
+from services.explanation_service import ExplanationService, TokenVocabulary, encode_compact
+from settings.settings import ExplanationServiceSettings, MongoDBSDGSettings
+
+explanation_service_settings = ExplanationServiceSettings()
+mongodb_settings = MongoDBSDGSettings()
+
+
+def compact_documents(source: Collection, target: Collection, vocabulary: TokenVocabulary,
+                      batch_size: int) -> Iterator[dict]:
+    """
+    Encoded source documents missing in the target. New tokens of a batch are stored before its documents.
+    """
+    converted = set(target.distinct("id"))
+    batch = []
+    for document in source.find({}, batch_size=batch_size):
+        if document["id"] in converted:
+            continue
+        batch.append(encode_compact(document, vocabulary))
+        if len(batch) >= batch_size:
+            vocabulary.save()
+            yield from batch
+            batch = []
+    vocabulary.save()
+    yield from batch
+
+
+def convert(source: Collection, target: Collection,
+            batch_size: int = explanation_service_settings.LOAD_BATCH_SIZE) -> dict:
+    vocabulary = TokenVocabulary.of(target)
+    vocabulary.collection.create_index("token", unique=True)
+    result = ExplanationService(target).bulk_load(compact_documents(source, target, vocabulary, batch_size), batch_size)
+    result["vocabulary"] = len(vocabulary.tokens)
+    return result
+
+
+def storage_size(collection: Collection) -> dict:
+    """Data and index bytes (collStats; summed BSON sizes where collStats is not available)."""
+    try:
+        stats = collection.database.command("collStats", collection.name)
+        return {"documents": stats["count"], "data_bytes": stats["size"], "storage_bytes": stats["storageSize"],
+                "index_bytes": stats["totalIndexSize"]}
+    except Exception:
+        sizes = [len(BSON.encode(document)) for document in collection.find()]
+        return {"documents": len(sizes), "data_bytes": sum(sizes), "storage_bytes": None, "index_bytes": None}
+
+
+def read_latency(collection: Collection, oai_identifiers: List[str]) -> dict:
+    service = ExplanationService(collection)
+    service.get(oai_identifiers[0], 0)  # Warm up (connection, vocabulary)
+    latencies = []
+    for oai_identifier in oai_identifiers:
+        start = time.perf_counter()
+        service.get(oai_identifier, 0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+    }
+
+
+def compare(source: Collection, target: Collection, sample_size: int, seed: int = 0) -> dict:
+    """
+    Storage of both collections, read latency of ExplanationService.get (including the decoding) on a sample,
+    and the float16 rounding error of the decoded scores.
+    """
+    oai_identifiers = target.distinct("id")
+    sample = random.Random(seed).sample(oai_identifiers, min(sample_size, len(oai_identifiers)))
+    if not sample:
+        raise ValueError("The target collection is empty.")
+
+    errors, tokens_equal = [], True
+    source_service, target_service = ExplanationService(source), ExplanationService(target)
+    for oai_identifier in sample:
+        original, decoded = source_service.get(oai_identifier, 0), target_service.get(oai_identifier, 0)
+        tokens_equal &= original.input_tokens == decoded.input_tokens
+        expected, actual = np.asarray(original.token_scores), np.asarray(decoded.token_scores)
+        if expected.size:
+            errors.append(float(np.abs(expected - actual).max() / max(np.abs(expected).max(), 1e-12)))
+
+    return {
+        "source": {**storage_size(source), **read_latency(source, sample)},
+        "target": {**storage_size(target), **read_latency(target, sample)},
+        "sample": len(sample),
+        "tokens_equal": tokens_equal,
+        "max_relative_error": max(errors) if errors else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the SHAP explanations to the compact format and compare")
+    parser.add_argument("--database", default="sdg_explanations")
+    parser.add_argument("--source", default=mongodb_settings.DB_COLLECTION_NAME)
+    parser.add_argument("--target", default=explanation_service_settings.COMPACT_COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=explanation_service_settings.LOAD_BATCH_SIZE)
+    parser.add_argument("--no-convert", action="store_true", help="Only compare the collections")
+    parser.add_argument("--compare", type=int, default=200, help="Explanations read for the comparison (0: none)")
+    args = parser.parse_args()
+
+    from db.mongodb_connector import client
+
+    database = client[args.database]
+    source_collection, target_collection = database[args.source], database[args.target]
+    if not args.no_convert:
+        result = convert(source_collection, target_collection, args.batch_size)
+        print(f"{result['inserted']} explanations converted ({result['skipped']} already converted) in "
+              f"{result['seconds']} seconds; vocabulary of {result['vocabulary']} tokens.")
+
+    if args.compare:
+        comparison = compare(source_collection, target_collection, args.compare)
+        for name in ("source", "target"):
+            print(f"{name:<7} {comparison[name]}")
+        source_bytes, target_bytes = comparison["source"]["data_bytes"], comparison["target"]["data_bytes"]
+        print(f"Data size ratio: {source_bytes / max(target_bytes, 1):.1f}x; tokens equal: {comparison['tokens_equal']}; "
+              f"max relative score error: {comparison['max_relative_error']:.2e} (sample of {comparison['sample']})")
@@ -1,54 +1,66 @@
+"""
+Load the SHAP explanations (JSON lines, split into split_part_*.json files) into MongoDB.
+
+The files are streamed line by line and inserted with unordered bulk writes; the unique `id` index is created
+before the load, so reads by OAI identifier never scan the collection. Explanations already stored are
+skipped, so an interrupted load can simply be rerun.
+
+Shell command to split the export:
+    awk '{
+      if (NR % 10000 == 1) {
+        file = sprintf("split_part_%03d.json", int(NR/10000))
+      }
+      print $0 >> file
+    }' sdg_explanations.json
+
+Usage:
+    python -m utils.mongodb.load_mongodb_explanations
+    python -m utils.mongodb.load_mongodb_explanations --directory ./data/db/explanations/ --drop
+"""
+import argparse
 import json
 import os
+from typing import Iterator, List
+
 from tqdm import tqdm
-from bson import ObjectId  # to handle $oid
-from db.mongodb_connector import client
 
-# Define the database and collection names
-db_name = 'sdg_explanations'
-collection_name = 'explanations'
+from services.explanation_service import ExplanationService
+from settings.settings import ExplanationServiceSettings
 
-# Check if the database exists and drop it if it does
-if db_name in client.list_database_names():
-    client.drop_database(db_name)
-    print(f"Database '{db_name}' has been deleted.")
+explanation_service_settings = ExplanationServiceSettings()
 
-# Create a new connection to the database
-db = client[db_name]
-collection = db[collection_name]
 
-# Shell command:
-"""
-awk '{
-  if (NR % 10000 == 1) {
-    file = sprintf("split_part_%03d.json", int(NR/10000))
-  }
-  print $0 >> file
-}' sdg_explanations.json
-"""
+def split_files(directory: str, prefix: str) -> List[str]:
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory)) if filename.startswith(prefix)]
 
-# Function to convert $oid to ObjectId
-def convert_oid(doc):
-    if '_id' in doc and '$oid' in doc['_id']:
-        doc['_id'] = ObjectId(doc['_id']['$oid'])
-    return doc
 
+def read_documents(paths: List[str]) -> Iterator[dict]:
+    for path in tqdm(paths, desc="Loading files"):
+        with open(path, "r") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
 
-# Directory containing the split files
-split_files_directory = './data/db/explanations/'
-split_files_prefix = 'split_part_'  # Prefix of the split files
 
-# Iterate through each split file
-for filename in tqdm(sorted(os.listdir(split_files_directory)), desc="Loading files"):
-    if filename.startswith(split_files_prefix):
-        file_path = os.path.join(split_files_directory, filename)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the SHAP explanations into MongoDB")
+    parser.add_argument("--directory", default="./data/db/explanations/", help="Directory of the split files")
+    parser.add_argument("--prefix", default="split_part_", help="Prefix of the split files")
+    parser.add_argument("--database", default="sdg_explanations")
+    parser.add_argument("--collection", default="explanations")
+    parser.add_argument("--batch-size", type=int, default=explanation_service_settings.LOAD_BATCH_SIZE)
+    parser.add_argument("--drop", action="store_true", help="Drop the collection before loading")
+    args = parser.parse_args()
 
-        # Load the JSON objects from the file
-        with open(file_path, 'r') as f:
-            data = [json.loads(line) for line in f]
+    from db.mongodb_connector import client
 
-        # Convert _id fields and insert documents
-        data = [convert_oid(doc) for doc in data]
-        collection.insert_many(data)
+    collection = client[args.database][args.collection]
+    if args.drop:
+        collection.drop()
+        print(f"Collection '{args.database}.{args.collection}' has been dropped.")
 
-print(f"All data has been successfully loaded into the '{collection_name}' collection.")
+    result = ExplanationService(collection).bulk_load(
+        read_documents(split_files(args.directory, args.prefix)), batch_size=args.batch_size,
+    )
+    print(f"{result['inserted']} explanations loaded into '{args.collection}' ({result['skipped']} already stored) "
+          f"in {result['seconds']} seconds: {result['docs_per_second']} docs/s.")
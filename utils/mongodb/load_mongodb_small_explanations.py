@@ -5,6 +5,7 @@ import numpy as np
 from tqdm import tqdm
 from bson import ObjectId, BSON  # to handle $oid and BSON size calculation
 from db.mongodb_connector import client
+from services.explanation_service import ExplanationService
 
 # Define the database and collection names
 db_name = 'sdg_explanations'
@@ -15,6 +16,7 @@ target_collection_name = 'explanations_scaled'
 db = client[db_name]
 source_collection = db[source_collection_name]
 target_collection = db[target_collection_name]
+ExplanationService(target_collection).ensure_indexes()  # Unique "id" index of the explanation reads
 
 # Iterate through documents in the source collection
 for document in tqdm(source_collection.find()):